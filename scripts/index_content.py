@@ -13,6 +13,13 @@ Example:
     python scripts/index_content.py
     python scripts/index_content.py --index-name my-custom-index --batch-size 50
     python scripts/index_content.py --force  # Recreate index if exists
+    python scripts/index_content.py --skip-safety  # Index without safety screening
+
+Every document is safety-screened before upload (in parallel) and its severities are
+stored in the index, so ContentRetriever can filter unsafe sources server-side. Documents
+whose screening fails are marked as failed and are not retrieved until re-indexed.
+Documents indexed with --skip-safety are only retrieved by
+ContentRetriever(include_unscreened=True).
 """
 
 import os
@@ -28,12 +35,15 @@ from tqdm import tqdm
 # Add project root to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.integrations.azure_content_safety import get_safety_client
 from src.integrations.azure_search import (
+    add_safety_fields,
     create_index,
     index_documents,
     index_exists,
     delete_index,
     get_index_statistics,
+    prescreen_documents,
 )
 
 # Configure logging
@@ -181,6 +191,8 @@ def index_content_pipeline(
     index_name: str = None,
     batch_size: int = 100,
     force_recreate: bool = False,
+    safety_screening: bool = True,
+    safety_workers: int = 8,
 ) -> Dict[str, Any]:
     """
     Execute the complete content indexing pipeline.
@@ -190,6 +202,8 @@ def index_content_pipeline(
         index_name: Name of the search index (uses default if None)
         batch_size: Number of documents to process per batch
         force_recreate: Whether to recreate the index if it exists
+        safety_screening: Whether to safety-screen documents and store severities
+        safety_workers: Documents screened concurrently
 
     Returns:
         Dictionary with indexing results and statistics
@@ -219,6 +233,8 @@ def index_content_pipeline(
                 raise Exception(f"Failed to create index '{index_name}'")
         else:
             logger.info(f"ℹ️ Using existing index '{index_name}'")
+            if safety_screening and not add_safety_fields(index_name):
+                raise Exception(f"Failed to add safety fields to index '{index_name}'")
 
         # Step 3: Load content documents
         logger.info("📖 Loading content documents...")
@@ -231,14 +247,29 @@ def index_content_pipeline(
         if not valid_documents:
             raise ValueError("No valid documents to index")
 
-        # Step 5: Index documents in batches
+        # Step 5: Safety-screen documents so retrieval can filter unsafe sources
+        safety_stats = None
+        if safety_screening:
+            logger.info(f"🛡️ Safety-screening {len(valid_documents)} documents...")
+            safety_stats = prescreen_documents(
+                valid_documents, get_safety_client(), max_workers=safety_workers
+            )
+            for severity, count in sorted(safety_stats["severity_counts"].items()):
+                logger.info(f"   • Max severity {severity}: {count} documents")
+            if safety_stats["failed"]:
+                logger.warning(
+                    f"⚠️ {safety_stats['failed']} documents failed screening; they are indexed "
+                    "as failed and excluded from retrieval until re-indexed"
+                )
+
+        # Step 6: Index documents in batches
         logger.info(f"📤 Indexing {len(valid_documents)} documents in batches of {batch_size}...")
 
         indexing_result = index_documents(
             documents=valid_documents, index_name=index_name, batch_size=batch_size
         )
 
-        # Step 6: Get final statistics
+        # Step 7: Get final statistics
         final_stats = get_index_statistics(index_name)
 
         # Calculate execution time
@@ -253,6 +284,7 @@ def index_content_pipeline(
             "documents_validated": len(valid_documents),
             "documents_indexed": indexing_result["indexed"],
             "documents_failed": indexing_result["failed"],
+            "safety_screening": safety_stats,
             "final_index_count": final_stats.get("document_count", 0) if final_stats else 0,
             "execution_time_seconds": round(execution_time, 2),
             "batch_size": batch_size,
@@ -323,6 +355,19 @@ Examples:
         "--force", action="store_true", help="Recreate the index if it already exists"
     )
 
+    parser.add_argument(
+        "--skip-safety",
+        action="store_true",
+        help="Index without safety screening (documents are only retrieved with include_unscreened)",
+    )
+
+    parser.add_argument(
+        "--safety-workers",
+        type=int,
+        default=8,
+        help="Documents safety-screened concurrently (default: 8)",
+    )
+
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
 
     args = parser.parse_args()
@@ -339,6 +384,8 @@ Examples:
             index_name=args.index_name,
             batch_size=args.batch_size,
             force_recreate=args.force,
+            safety_screening=not args.skip_safety,
+            safety_workers=args.safety_workers,
         )
 
         # Print final status
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Generation Load Test Script
+
+This script load-tests the generation path (prompt building, completion, parsing,
+citation extraction and validation) against a local mock LLM so concurrency can be
+tuned offline without calling Azure OpenAI.
+
+Usage:
+    python scripts/load_test_generation.py [--variants N] [--concurrency N] [--mode MODE]
+
+Example:
+    python scripts/load_test_generation.py --variants 10000 --concurrency 64
+    python scripts/load_test_generation.py --mode http --latency-ms 800 \\
+        --distribution lognormal --rate-limit 0.02
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.generation_agent import MessageGenerator, VARIANT_TONES
+from src.integrations.azure_openai import AzureOpenAIClient
+from src.integrations.mock_llm import MockLLMConfig, MockLLMServer, MockResponsesClient
+from src.integrations.request_hedging import RequestHedger
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SAMPLE_SEGMENT = {
+    "name": "High-Value Recent",
+    "features": {"avg_order_value": 275.0, "avg_purchase_frequency": 14.5},
+}
+SAMPLE_CONTENT = [
+    {
+        "document_id": "DOC001",
+        "title": "Premium Widget Features",
+        "snippet": "Our Premium Widget includes advanced features for our most valued customers.",
+    },
+    {
+        "document_id": "DOC002",
+        "title": "Customer Success Stories",
+        "snippet": "High-value customers have seen remarkable results with our premium offerings.",
+    },
+]
+
+
+def run_load_test(
+    variants: int,
+    concurrency: int,
+    config: MockLLMConfig,
+    mode: str,
+    hedge_budget: float = 0.0,
+) -> dict:
+    """
+    Generate variants concurrently against the mock LLM and collect statistics.
+
+    Args:
+        variants: Number of variants to generate
+        concurrency: Number of worker threads (in-flight requests are further
+            capped by the client's adaptive concurrency limiter)
+        config: Mock LLM behaviour
+        mode: "inprocess" or "http"
+        hedge_budget: Fraction of requests that may be hedged (0 disables hedging)
+
+    Returns:
+        Dictionary with throughput, latency and validation statistics
+    """
+    server = None
+    client = None
+    env = {"AZURE_OPENAI_DEPLOYMENT_NAME": "mock-gpt-4o-mini", "AZURE_OPENAI_API_KEY": "mock"}
+
+    if mode == "http":
+        server = MockLLMServer(config).start()
+        env["AZURE_OPENAI_ENDPOINT"] = server.endpoint
+    else:
+        env["AZURE_OPENAI_MOCK_LLM"] = "inprocess"
+        env["AZURE_OPENAI_ENDPOINT"] = "mock://in-process"
+
+    # Restored in the finally block so callers keep their own settings
+    previous_env = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+
+    try:
+        hedger = RequestHedger(budget_fraction=hedge_budget) if hedge_budget > 0 else None
+        client = AzureOpenAIClient(timeout=30.0, hedger=hedger)
+        if mode == "inprocess":
+            # Apply the command-line mock configuration rather than the env defaults
+            client.client = MockResponsesClient(config)
+        generator = MessageGenerator(client)
+
+        latencies_ms = []
+        valid = 0
+        failed = 0
+
+        def generate_one(i: int):
+            tone = VARIANT_TONES[i % len(VARIANT_TONES)]
+            segment = {**SAMPLE_SEGMENT, "features": {**SAMPLE_SEGMENT["features"], "id": i}}
+            started = time.perf_counter()
+            variant = generator.generate_variant(segment, SAMPLE_CONTENT, tone)
+            return variant, (time.perf_counter() - started) * 1000
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(generate_one, i) for i in range(variants)]
+            for future in as_completed(futures):
+                try:
+                    variant, latency_ms = future.result()
+                    latencies_ms.append(latency_ms)
+                    valid += int(variant["validation"]["valid"])
+                except Exception as e:
+                    logger.debug(f"Variant generation failed: {e}")
+                    failed += 1
+        elapsed = time.perf_counter() - start_time
+
+        latencies = np.array(latencies_ms) if latencies_ms else np.zeros(1)
+        return {
+            "mode": mode,
+            "variants_requested": variants,
+            "variants_generated": len(latencies_ms),
+            "variants_failed": failed,
+            "validation_pass_rate": valid / max(1, len(latencies_ms)),
+            "elapsed_seconds": round(elapsed, 2),
+            "variants_per_minute": round(len(latencies_ms) / max(elapsed, 1e-9) * 60, 1),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)), 1),
+            "usage": client.get_usage_summary(),
+            "concurrency": client.concurrency_limiter.get_stats(),
+            "hedging": hedger.get_stats() if hedger else None,
+        }
+    finally:
+        if client is not None:
+            client.close()
+        if server is not None:
+            server.stop()
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(
+        description="Load-test the generation path against a local mock LLM",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--variants", type=int, default=1000, help="Variants to generate")
+    parser.add_argument("--concurrency", type=int, default=32, help="Worker threads")
+    parser.add_argument(
+        "--mode",
+        choices=["inprocess", "http"],
+        default="inprocess",
+        help="In-process fake or localhost HTTP server (default: inprocess)",
+    )
+    parser.add_argument(
+        "--distribution", choices=["fixed", "uniform", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed/median latency")
+    parser.add_argument("--latency-min-ms", type=float, default=0.0)
+    parser.add_argument("--latency-max-ms", type=float, default=0.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal shape")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 probability")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--hedge-budget", type=float, default=0.0, help="Hedged request fraction (0 = off)"
+    )
+
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        latency_distribution=args.distribution,
+        latency_ms=args.latency_ms,
+        latency_min_ms=args.latency_min_ms,
+        latency_max_ms=args.latency_max_ms,
+        latency_sigma=args.latency_sigma,
+        rate_limit_probability=args.rate_limit,
+        seed=args.seed,
+    )
+
+    results = run_load_test(
+        args.variants, args.concurrency, config, args.mode, hedge_budget=args.hedge_budget
+    )
+
+    print("\n📊 Generation load test results")
+    for key, value in results.items():
+        print(f"   • {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
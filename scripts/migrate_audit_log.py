@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Audit Log Migration Script
+
+This script imports the CSV safety audit log (and its rotated files) into the indexed
+SQLite audit store. Each file resumes from where the previous run stopped (files are
+tracked by inode and header fingerprint, so rotated logs are recognised), so it is safe
+to re-run.
+Afterwards set safety_policy.audit_logging.format to "sqlite" in
+config/safety_thresholds.yaml to write new decisions to the store.
+
+Usage:
+    python scripts/migrate_audit_log.py [--audit-log PATH] [--store PATH] [--chunk-rows N]
+
+Example:
+    python scripts/migrate_audit_log.py
+    python scripts/migrate_audit_log.py --audit-log logs/safety_audit.log --store logs/audit.db
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.audit_report import AuditReportIndex
+from src.agents.audit_store import migrate_csv
+from src.agents.safety_agent import AUDIT_HEADERS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(
+        description="Migrate the CSV safety audit log into the SQLite audit store"
+    )
+    parser.add_argument(
+        "--audit-log",
+        default="logs/safety_audit.log",
+        help="CSV audit log; rotated files next to it are included (default: logs/safety_audit.log)",
+    )
+    parser.add_argument(
+        "--store",
+        help="SQLite audit store path (default: audit log path with a .db extension)",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=50000,
+        help="Rows inserted per transaction (default: 50000)",
+    )
+    args = parser.parse_args()
+
+    store_path = args.store or f"{os.path.splitext(args.audit_log)[0]}.db"
+    csv_paths = AuditReportIndex(args.audit_log).audit_files()
+    if not csv_paths:
+        print(f"❌ No audit log found at {args.audit_log}")
+        sys.exit(1)
+
+    try:
+        imported = migrate_csv(csv_paths, store_path, AUDIT_HEADERS, args.chunk_rows)
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        logger.exception("Unexpected error in main")
+        sys.exit(1)
+
+    for path, rows in imported.items():
+        print(f"  {path}: {rows} rows" if rows else f"  {path}: no new rows")
+    print(f"\n✅ SUCCESS: Imported {sum(imported.values())} audit rows into {store_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,8 @@ Customer Personalization Orchestrator
 This script orchestrates the complete personalization experiment pipeline:
 1. Load and segment customers
 2. Retrieve relevant content for each segment
-3. Generate personalized message variants
+3. Generate personalized message variants (once per bucket of customers with the
+   same segment and quantized features, fanned out to every customer in it)
 4. Screen variants for safety compliance
 5. Design and execute A/B/n experiment
 6. Calculate metrics and generate results
@@ -41,8 +42,9 @@ sys.path.insert(0, str(project_root))
 # Import all agents
 from src.agents.segmentation_agent import segment_customers, load_customer_data
 from src.agents.retrieval_agent import retrieve_content
-from src.agents.generation_agent import generate_variants
-from src.agents.safety_agent import check_safety
+from src.agents.generation_agent import MessageGenerator
+from src.agents.personalization_planner import PersonalizationPlanner
+from src.agents.safety_agent import SafetyAgent
 from src.agents.experimentation_agent import ExperimentationAgent
 
 # Configure logging
@@ -72,6 +74,8 @@ class ExperimentPipeline:
         self.config_path = config_path
         self.config = self._load_config()
         self.results = {}
+        # Generated variant ID per customer and tone, from the personalization planner
+        self.customer_variants = {}
         self.start_time = None
         self.end_time = None
 
@@ -132,7 +136,7 @@ class ExperimentPipeline:
 
             # Step 3: Generate message variants
             logger.info("✍️ Step 3: Message Generation")
-            variants = self._run_message_generation(segments_df, retrieved_content)
+            variants = self._run_message_generation(customers_df, segments_df, retrieved_content)
 
             # Step 4: Safety screening
             logger.info("🛡️ Step 4: Safety Screening")
@@ -232,60 +236,52 @@ class ExperimentPipeline:
             raise
 
     def _run_message_generation(
-        self, segments_df: pd.DataFrame, retrieved_content: Dict[str, List[Dict]]
+        self,
+        customers_df: pd.DataFrame,
+        segments_df: pd.DataFrame,
+        retrieved_content: Dict[str, List[Dict]],
     ) -> List[Dict]:
-        """Generate message variants for each segment."""
+        """Generate personalized variants once per customer bucket."""
         try:
-            all_variants = []
-            unique_segments = segments_df["segment"].unique()
-
-            with tqdm(unique_segments, desc="Generating variants") as pbar:
-                for segment_name in pbar:
-                    pbar.set_description(f"Generating variants for {segment_name}")
-
-                    # Get content for this segment
-                    content = retrieved_content.get(segment_name, [])
-                    if not content:
-                        logger.warning(
-                            f"No content available for {segment_name}, skipping generation"
-                        )
-                        continue
-
-                    # Create segment dict for generation
-                    segment_info = {"name": segment_name, "features": {}}
-
-                    try:
-                        # Generate variants for this segment
-                        variants = generate_variants(segment_info, content)
+            customers_with_segments = customers_df.merge(
+                segments_df[["customer_id", "segment"]], on="customer_id", how="left"
+            )
 
-                        # Add segment info to each variant
-                        for variant in variants:
-                            variant["segment"] = segment_name
-                            variant["variant_id"] = (
-                                f"VAR_{segment_name}_{variant.get('tone', 'unknown')}_{len(all_variants)}"
-                            )
+            # Bucket customers by segment and quantized features, generate once per bucket
+            planner = PersonalizationPlanner()
+            plan = planner.plan(customers_with_segments.to_dict(orient="records"))
+            logger.info(
+                f"Personalization plan: {plan['unique_buckets']} buckets for "
+                f"{plan['total_customers']} customers (dedup ratio {plan['dedup_ratio']}x)"
+            )
 
-                        all_variants.extend(variants)
-                        logger.debug(f"Generated {len(variants)} variants for {segment_name}")
+            generation = planner.execute(plan, MessageGenerator(), retrieved_content)
+            all_variants = generation["variants"]
+            self.customer_variants = generation["customer_variants"]
 
-                    except Exception as e:
-                        logger.warning(f"Variant generation failed for {segment_name}: {e}")
-                        continue
+            # Add segment info to each variant
+            segment_by_bucket = {
+                bucket["bucket_id"]: bucket["segment"]["name"] for bucket in plan["buckets"]
+            }
+            for variant in all_variants:
+                variant["segment"] = segment_by_bucket[variant["bucket_id"]]
 
             # Save intermediate results
             with open("data/processed/variants.json", "w") as f:
                 json.dump(all_variants, f, indent=2, default=self._json_serializer)
+            with open("data/processed/customer_variants.json", "w") as f:
+                json.dump(self.customer_variants, f, indent=2, default=self._json_serializer)
 
+            statistics = generation["statistics"]
             logger.info(
-                f"Generated {len(all_variants)} total variants across {len(unique_segments)} segments"
+                f"Generated {len(all_variants)} total variants from "
+                f"{statistics['buckets_generated']} buckets"
             )
 
             self.results["message_generation"] = {
-                "segments_processed": len(unique_segments),
+                "segments_processed": segments_df["segment"].nunique(),
                 "total_variants_generated": len(all_variants),
-                "avg_variants_per_segment": (
-                    len(all_variants) / len(unique_segments) if unique_segments.size > 0 else 0
-                ),
+                **statistics,
             }
 
             return all_variants
@@ -294,42 +290,55 @@ class ExperimentPipeline:
             logger.error(f"Message generation failed: {e}")
             raise
 
+    def _personalize_assignments(
+        self, assignments: List[Dict], experiment_design: Dict, safe_variants: List[Dict]
+    ) -> int:
+        """
+        Point treatment assignments at the customer's own bucket variant.
+
+        Assignments keep the segment-level variant chosen by the experiment design
+        when the customer's bucket variant for the arm's tone did not pass safety.
+
+        Returns:
+            Number of assignments personalized
+        """
+        safe_ids = {variant["variant_id"] for variant in safe_variants}
+        arm_tones = {
+            name: arm.get("tone") for name, arm in experiment_design.get("arms", {}).items()
+        }
+
+        personalized = 0
+        for assignment in assignments:
+            tone = arm_tones.get(assignment["experiment_arm"])
+            variant_id = self.customer_variants.get(assignment["customer_id"], {}).get(tone)
+            if variant_id in safe_ids:
+                assignment["variant_id"] = variant_id
+                personalized += 1
+        return personalized
+
     def _run_safety_screening(self, variants: List[Dict]) -> List[Dict]:
         """Screen all variants for safety compliance."""
         try:
             safe_variants = []
             blocked_variants = []
 
-            with tqdm(variants, desc="Safety screening") as pbar:
-                for variant in pbar:
-                    pbar.set_description(
-                        f"Screening variant {variant.get('variant_id', 'unknown')}"
+            # One agent and client for the whole run; calls are screened concurrently
+            agent = SafetyAgent()
+            try:
+                with tqdm(total=len(variants), desc="Safety screening") as pbar:
+                    results = agent.check_safety_batch(
+                        variants, progress_callback=lambda result: pbar.update(1)
                     )
+            finally:
+                # Flush buffered audit rows before results are reported
+                agent.close()
 
-                    try:
-                        safety_result = check_safety(variant)
-
-                        if safety_result["status"] == "pass":
-                            safe_variants.append(variant)
-                        else:
-                            blocked_variants.append(
-                                {"variant": variant, "safety_result": safety_result}
-                            )
-
-                    except Exception as e:
-                        logger.warning(
-                            f"Safety check failed for variant {variant.get('variant_id')}: {e}"
-                        )
-                        # Fail closed - treat as blocked
-                        blocked_variants.append(
-                            {
-                                "variant": variant,
-                                "safety_result": {
-                                    "status": "block",
-                                    "block_reason": f"Safety check error: {e}",
-                                },
-                            }
-                        )
+            # check_safety_batch fails closed: errors come back as blocked results
+            for variant, safety_result in zip(variants, results):
+                if safety_result["status"] == "pass":
+                    safe_variants.append(variant)
+                else:
+                    blocked_variants.append({"variant": variant, "safety_result": safety_result})
 
             # Save safety results
             safety_summary = {
@@ -384,6 +393,10 @@ class ExperimentPipeline:
             assignments = exp_agent.assign_customers_to_arms(
                 customers_with_segments.to_dict(orient="records"), experiment_design
             )
+            personalized = self._personalize_assignments(
+                assignments, experiment_design, safe_variants
+            )
+            logger.info(f"Personalized {personalized}/{len(assignments)} assignments")
 
             # Save assignments
             with open("data/processed/assignments.json", "w") as f:
@@ -418,6 +431,7 @@ class ExperimentPipeline:
 
             self.results["experiment"] = {
                 "total_customers_assigned": len(assignments),
+                "personalized_assignments": personalized,
                 "experiment_arms": len(experiment_design.get("arms", [])),
                 "engagement_events": len(engagement_data),
                 "primary_metric": metrics.get("primary_metric"),
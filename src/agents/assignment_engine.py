@@ -0,0 +1,471 @@
+"""
+Vectorized stratified assignment for the Experimentation Agent.
+
+Customers are assigned per segment with columnar NumPy operations instead of
+per-customer Python objects:
+
+- Customers are grouped with a stable sort on factorized segment codes, then each
+  segment's rows are permuted with a seeded np.random.Generator
+- Arm boundaries are computed arithmetically from each customer's rank within its
+  segment, using the same allocation sizes as the original list-based assignment
+- Output is a DataFrame with categorical columns and one timestamp per batch
+
+The same seed, customers and design always give the same assignment.
+
+HashAssigner is the stateless alternative (assignment method "deterministic_hash"):
+each customer's arm is a pure function of (experiment_id, customer_id), so single
+records, streams and shards of a batch job are assigned identically on any machine
+without holding the customer list or coordinating.
+"""
+
+import hashlib
+import logging
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Experiment arms in allocation order (control block first, then treatments)
+ARMS = ["control", "treatment_1", "treatment_2", "treatment_3"]
+TREATMENT_ARMS = ARMS[1:]
+
+ASSIGNMENT_METHOD = "stratified_random"
+HASH_ASSIGNMENT_METHOD = "deterministic_hash"
+ASSIGNMENT_COLUMNS = [
+    "customer_id",
+    "segment",
+    "experiment_arm",
+    "variant_id",
+    "assigned_at",
+    "assignment_method",
+]
+
+
+def allocation_sizes(n_customers: int, sample_allocation: Dict[str, float]) -> Tuple[int, int]:
+    """
+    Compute control and per-treatment-arm sizes for one segment.
+
+    Customers beyond control + 3 treatment blocks (rounding remainder) are not
+    enrolled. Segments too small for the allocation get one control customer and
+    an even split of the rest.
+
+    Args:
+        n_customers: Customers in the segment
+        sample_allocation: Dict with control_percent and treatment_percent
+
+    Returns:
+        Tuple of (control size, size of each treatment arm)
+    """
+    control_size = max(1, int(n_customers * sample_allocation["control_percent"] / 100))
+    treatment_size = max(
+        1, int(n_customers * sample_allocation["treatment_percent"] / 100 / len(TREATMENT_ARMS))
+    )
+
+    if control_size + treatment_size * len(TREATMENT_ARMS) > n_customers:
+        control_size = 1 if n_customers >= 1 else 0
+        treatment_size = (
+            max(1, (n_customers - control_size) // len(TREATMENT_ARMS)) if n_customers > 1 else 0
+        )
+    return control_size, treatment_size
+
+
+def customer_frame(customers: Any) -> pd.DataFrame:
+    """
+    Get customer_id and segment columns from customers.
+
+    Args:
+        customers: DataFrame, pyarrow Table or list of customer dicts
+
+    Returns:
+        DataFrame with customer_id and segment columns
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    if pa is not None and isinstance(customers, pa.Table):
+        missing = {"customer_id", "segment"} - set(customers.column_names)
+        if missing:
+            raise ValueError(f"Customers missing required columns: {sorted(missing)}")
+        return customers.select(["customer_id", "segment"]).to_pandas()
+    if not isinstance(customers, pd.DataFrame):
+        records = list(customers)
+        if not records:
+            return pd.DataFrame(columns=["customer_id", "segment"])
+        customers = pd.DataFrame.from_records(records)
+
+    missing = {"customer_id", "segment"} - set(customers.columns)
+    if missing:
+        raise ValueError(f"Customers missing required columns: {sorted(missing)}")
+    return customers
+
+
+def variant_id_table(experiment_design: Dict, segments: List[Any]) -> List[List[str]]:
+    """
+    Look up the variant sent by each arm in each segment.
+
+    Args:
+        experiment_design: Experiment design from design_experiment()
+        segments: Segment names
+
+    Returns:
+        Table indexed [segment][arm] in ARMS order
+    """
+    table = []
+    for segment in segments:
+        row = ["control"]
+        for arm_name in TREATMENT_ARMS:
+            arm_config = experiment_design["arms"].get(arm_name, {})
+            variant = (arm_config.get("variants_by_segment") or {}).get(segment)
+            row.append(variant["variant_id"] if variant else f"{arm_name}_{segment}_fallback")
+        table.append(row)
+    return table
+
+
+def _assignment_frame(
+    customer_ids: np.ndarray,
+    segment_codes: np.ndarray,
+    segments: Any,
+    arm_codes: np.ndarray,
+    experiment_design: Dict,
+    assigned_at: str,
+    method: str,
+) -> pd.DataFrame:
+    """Build the columnar assignment output from segment and arm codes."""
+    # Variant ids as a categorical over the (segment, arm) lookup table
+    table = variant_id_table(experiment_design, list(segments))
+    variant_names, variant_codes = np.unique(np.array(table, dtype=object), return_inverse=True)
+    variant_codes = variant_codes.reshape(len(segments), len(ARMS))
+
+    assignments = pd.DataFrame(
+        {
+            "customer_id": customer_ids,
+            "segment": pd.Categorical.from_codes(segment_codes, categories=segments),
+            "experiment_arm": pd.Categorical.from_codes(arm_codes, categories=ARMS),
+            "variant_id": pd.Categorical.from_codes(
+                variant_codes[segment_codes, arm_codes], categories=variant_names
+            ),
+        }
+    )
+    # Per-batch constants stored once as single-category columns
+    constant = np.zeros(len(assignments), dtype=np.int8)
+    assignments["assigned_at"] = pd.Categorical.from_codes(constant, categories=[assigned_at])
+    assignments["assignment_method"] = pd.Categorical.from_codes(constant, categories=[method])
+    return assignments
+
+
+def assign_stratified(
+    customers: Union[pd.DataFrame, List[Dict], Any],
+    experiment_design: Dict,
+    seed: int = 42,
+    assigned_at: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Assign customers to arms with a seeded permutation within each segment.
+
+    Args:
+        customers: DataFrame, pyarrow Table or list of dicts with customer_id and segment
+        experiment_design: Experiment design with arms and sample_allocation
+        seed: Seed for the np.random.Generator permuting each segment
+        assigned_at: Timestamp for the batch (default: now, UTC)
+
+    Returns:
+        DataFrame with ASSIGNMENT_COLUMNS, grouped by segment (in order of first
+        appearance) with each segment's control block first
+    """
+    frame = customer_frame(customers)
+    assigned_at = assigned_at or datetime.utcnow().isoformat()
+    if frame.empty:
+        return pd.DataFrame(columns=ASSIGNMENT_COLUMNS)
+
+    # Group rows by segment: stable sort on segment codes keeps input order per segment
+    # (16-bit codes let NumPy radix-sort in linear time)
+    segment_codes, segments = pd.factorize(frame["segment"], sort=False, use_na_sentinel=False)
+    if len(segments) <= np.iinfo(np.int16).max:
+        segment_codes = segment_codes.astype(np.int16)
+    order = np.argsort(segment_codes, kind="stable")
+    counts = np.bincount(segment_codes, minlength=len(segments))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    # Shuffle each segment's rows in place with one seeded generator
+    rng = np.random.default_rng(seed)
+    for start, count in zip(starts, counts):
+        rng.shuffle(order[start : start + count])
+
+    # Arm boundaries from each customer's rank within its segment
+    sorted_codes = np.repeat(np.arange(len(segments)), counts)
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+    sizes = np.array(
+        [allocation_sizes(int(count), experiment_design["sample_allocation"]) for count in counts]
+    )
+    control_size = np.repeat(sizes[:, 0], counts)
+    treatment_size = np.repeat(sizes[:, 1], counts)
+    arm_codes = np.where(
+        rank < control_size, 0, 1 + (rank - control_size) // np.maximum(treatment_size, 1)
+    )
+    enrolled = (rank < control_size) | ((treatment_size > 0) & (arm_codes <= len(TREATMENT_ARMS)))
+
+    order, sorted_codes, arm_codes = order[enrolled], sorted_codes[enrolled], arm_codes[enrolled]
+
+    assignments = _assignment_frame(
+        frame["customer_id"].to_numpy()[order],
+        sorted_codes,
+        segments,
+        arm_codes,
+        experiment_design,
+        assigned_at,
+        ASSIGNMENT_METHOD,
+    )
+
+    logger.info(
+        f"Assigned {len(assignments)} of {len(frame)} customers across {len(segments)} segments"
+    )
+    return assignments
+
+
+def arm_shares(sample_allocation: Dict[str, float]) -> Dict[str, float]:
+    """
+    Fraction of all customers each arm receives under a sample allocation.
+
+    Control gets control_percent and the treatment arms split treatment_percent
+    evenly; any remainder below 100% is not enrolled.
+
+    Args:
+        sample_allocation: Dict with control_percent and treatment_percent
+
+    Returns:
+        Dict mapping arm name to its share of customers, in ARMS order
+
+    Raises:
+        ValueError: If a percentage is negative or they sum to more than 100
+    """
+    control = sample_allocation["control_percent"] / 100
+    treatment = sample_allocation["treatment_percent"] / 100
+    if control < 0 or treatment < 0 or control + treatment > 1 + 1e-9:
+        raise ValueError(f"Invalid sample allocation: {sample_allocation}")
+
+    shares = {"control": control}
+    shares.update({arm: treatment / len(TREATMENT_ARMS) for arm in TREATMENT_ARMS})
+    return shares
+
+
+def _hash_digest(prefix: bytes, customer_id: Any) -> bytes:
+    """8-byte BLAKE2b digest of an experiment prefix and a customer id."""
+    return hashlib.blake2b(prefix + str(customer_id).encode("utf-8"), digest_size=8).digest()
+
+
+def hash_buckets(experiment_id: str, customer_ids: Iterable[Any]) -> np.ndarray:
+    """
+    Map customers to uniform buckets in [0, 1) for one experiment.
+
+    Uses BLAKE2b rather than hash(), which is salted per process, so every
+    process and machine computes the same bucket. The top 53 bits of each
+    digest give an exactly representable float below 1.
+
+    Args:
+        experiment_id: Experiment identifier (salts buckets per experiment)
+        customer_ids: Customer identifiers
+
+    Returns:
+        Array of buckets, in input order
+    """
+    prefix = f"{experiment_id}:".encode("utf-8")
+    digests = b"".join(_hash_digest(prefix, customer_id) for customer_id in customer_ids)
+    return (np.frombuffer(digests, dtype=">u8") >> np.uint64(11)) * 2.0**-53
+
+
+def hash_bucket(experiment_id: str, customer_id: Any) -> float:
+    """
+    Map (experiment_id, customer_id) to a uniform bucket in [0, 1).
+
+    Args:
+        experiment_id: Experiment identifier (salts buckets per experiment)
+        customer_id: Customer identifier
+
+    Returns:
+        Bucket in [0, 1), equal to hash_buckets() for the same customer
+    """
+    digest = _hash_digest(f"{experiment_id}:".encode("utf-8"), customer_id)
+    return (int.from_bytes(digest, "big") >> 11) * 2.0**-53
+
+
+def check_balance(
+    arm_counts: Dict[str, int], sample_allocation: Dict[str, float], tolerance: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Compare observed arm counts with the shares expected from the allocation.
+
+    Args:
+        arm_counts: Assigned customers per arm
+        sample_allocation: Dict with control_percent and treatment_percent
+        tolerance: Allowed absolute deviation of each arm's share of enrolled
+            customers (0.05 = 5 percentage points)
+
+    Returns:
+        Dict with per-arm expected/actual percentages and deviations, and
+        "balanced" (True when every arm is within tolerance)
+    """
+    shares = arm_shares(sample_allocation)
+    enrolled_share = sum(shares.values()) or 1.0
+    total = sum(arm_counts.values())
+
+    arms = {}
+    for arm, share in shares.items():
+        expected_pct = share / enrolled_share * 100
+        actual_pct = arm_counts.get(arm, 0) / total * 100 if total else 0.0
+        deviation = abs(actual_pct - expected_pct)
+        arms[arm] = {
+            "count": arm_counts.get(arm, 0),
+            "expected_percent": round(expected_pct, 2),
+            "actual_percent": round(actual_pct, 2),
+            "deviation_percent": round(deviation, 2),
+            "within_tolerance": deviation <= tolerance * 100,
+        }
+
+    return {
+        "total": total,
+        "tolerance": tolerance,
+        "balanced": total > 0 and all(arm["within_tolerance"] for arm in arms.values()),
+        "arms": arms,
+    }
+
+
+class HashAssigner:
+    """
+    Stateless arm assignment from a hash of (experiment_id, customer_id).
+
+    Each customer's bucket in [0, 1) is mapped to an arm through cumulative
+    sample_allocation shares, so assignment needs no customer list, shared RNG
+    or coordination: a real-time send path, a stream consumer and every shard of
+    a batch job all agree. Buckets past the enrolled share are not enrolled.
+    """
+
+    def __init__(self, experiment_design: Dict):
+        """
+        Initialize the assigner.
+
+        Args:
+            experiment_design: Experiment design with experiment_id, arms and
+                sample_allocation
+
+        Raises:
+            ValueError: If the design has no experiment_id or an invalid allocation
+        """
+        if not experiment_design.get("experiment_id"):
+            raise ValueError("Hash assignment requires an experiment_id")
+
+        self.experiment_design = experiment_design
+        self.experiment_id = str(experiment_design["experiment_id"])
+        self.sample_allocation = experiment_design["sample_allocation"]
+        self.boundaries = np.cumsum(list(arm_shares(self.sample_allocation).values()))
+        self._variants: Dict[Any, List[str]] = {}
+
+    def arm_for_bucket(self, bucket: float) -> Optional[str]:
+        """Arm owning a bucket, or None if the bucket is not enrolled."""
+        index = bisect_right(self.boundaries, bucket)
+        return ARMS[index] if index < len(ARMS) else None
+
+    def assign(
+        self, customer: Dict[str, Any], assigned_at: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Assign one customer.
+
+        Args:
+            customer: Dict with customer_id and segment
+            assigned_at: Timestamp (default: now, UTC)
+
+        Returns:
+            Assignment record, or None if the customer is not enrolled
+        """
+        arm = self.arm_for_bucket(hash_bucket(self.experiment_id, customer["customer_id"]))
+        if arm is None:
+            return None
+
+        segment = customer["segment"]
+        if segment not in self._variants:
+            self._variants[segment] = variant_id_table(self.experiment_design, [segment])[0]
+        return {
+            "customer_id": customer["customer_id"],
+            "segment": segment,
+            "experiment_arm": arm,
+            "variant_id": self._variants[segment][ARMS.index(arm)],
+            "assigned_at": assigned_at or datetime.utcnow().isoformat(),
+            "assignment_method": HASH_ASSIGNMENT_METHOD,
+        }
+
+    def assign_stream(self, customers: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily assign a stream of customers, skipping those not enrolled.
+
+        Args:
+            customers: Iterable of dicts with customer_id and segment
+
+        Yields:
+            Assignment records, in input order
+        """
+        for customer in customers:
+            assignment = self.assign(customer)
+            if assignment is not None:
+                yield assignment
+
+    def assign_frame(self, customers: Any, assigned_at: Optional[str] = None) -> pd.DataFrame:
+        """
+        Assign a batch (or one shard of it), returning columnar output.
+
+        Args:
+            customers: DataFrame, pyarrow Table or list of dicts with customer_id and segment
+            assigned_at: Timestamp for the batch (default: now, UTC)
+
+        Returns:
+            DataFrame with ASSIGNMENT_COLUMNS for enrolled customers, in input order
+        """
+        frame = customer_frame(customers)
+        assigned_at = assigned_at or datetime.utcnow().isoformat()
+        if frame.empty:
+            return pd.DataFrame(columns=ASSIGNMENT_COLUMNS)
+
+        customer_ids = frame["customer_id"].to_numpy()
+        buckets = hash_buckets(self.experiment_id, customer_ids.tolist())
+        arm_codes = np.searchsorted(self.boundaries, buckets, side="right")
+        enrolled = arm_codes < len(ARMS)
+
+        segment_codes, segments = pd.factorize(frame["segment"], sort=False, use_na_sentinel=False)
+        return _assignment_frame(
+            customer_ids[enrolled],
+            segment_codes[enrolled],
+            segments,
+            arm_codes[enrolled],
+            self.experiment_design,
+            assigned_at,
+            HASH_ASSIGNMENT_METHOD,
+        )
+
+    def check_balance(self, assignments: Any, tolerance: float = 0.05) -> Dict[str, Any]:
+        """
+        Verify assignments against the allocation within a tolerance.
+
+        Args:
+            assignments: Assignment DataFrame or iterable of assignment records
+            tolerance: Allowed absolute deviation per arm (0.05 = 5 percentage points)
+
+        Returns:
+            Balance report from check_balance()
+        """
+        if isinstance(assignments, pd.DataFrame):
+            arm_counts = assignments["experiment_arm"].value_counts().to_dict()
+        else:
+            arm_counts = {}
+            for assignment in assignments:
+                arm = assignment["experiment_arm"]
+                arm_counts[arm] = arm_counts.get(arm, 0) + 1
+        return check_balance(arm_counts, self.sample_allocation, tolerance)
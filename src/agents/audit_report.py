@@ -0,0 +1,372 @@
+"""
+Audit Report Module
+
+This module builds safety audit reports from the CSV audit log without loading it into
+memory. New rows are streamed in chunks with pandas and aggregated into hourly partitions
+stored in a sidecar index next to the log (<audit log>.index.json). Each refresh only
+reads rows appended since the previous one, so totals, per-category counts and recent
+activity are answered from the index instead of rescanning history.
+
+- Rotated logs (<audit log>.<timestamp>) are included and indexed once; a file moved by
+  rotation keeps its index entry
+- Files that were rewritten or truncated are re-indexed from the start
+- Recent activity is counted at hour granularity (the hour containing the cutoff is
+  included)
+"""
+
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+# Bytes after the header hashed to recognise a file across refreshes
+FINGERPRINT_BYTES = 1024
+HOUR_PATTERN = r"^\d{4}-\d{2}-\d{2}T\d{2}$"
+UNKNOWN_HOUR = "unknown"
+# Harm categories plus the block categories the safety agent records for errors
+REPORT_CATEGORIES = ["hate", "violence", "self_harm", "sexual", "api_error", "invalid_input"]
+SEVERITY_BUCKETS = {"0": "safe_0", "2": "low_2", "4": "medium_4", "6": "high_6"}
+# Columns needed for the report; other audit columns are never parsed
+REPORT_COLUMNS = ["timestamp", "status", "blocked_categories", "max_severity", "cache_hit"]
+_ROTATED_SUFFIX = re.compile(r"^\.\d{8}(T\d{6})?(\.\d+)?$")
+
+
+def _empty_partition() -> Dict[str, Any]:
+    """Counters for one hourly partition."""
+    return {"total": 0, "pass": 0, "block": 0, "cache_hits": 0, "categories": {}, "severity": {}}
+
+
+def file_fingerprint(path: str, length: int) -> str:
+    """
+    Hash the first bytes of a file.
+
+    Detects files that were rewritten and inodes reused by new files.
+
+    Args:
+        path: File path
+        length: Number of leading bytes hashed
+
+    Returns:
+        SHA-1 hex digest
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def complete_rows_end(f, start: int, size: int) -> int:
+    """
+    Find the end of the last complete row in a file being appended to.
+
+    Args:
+        f: File opened in binary mode
+        start: Offset to search from
+        size: File size
+
+    Returns:
+        Offset just past the last newline at or after start (start if there is none)
+    """
+    tail_start = max(start, size - 65536)
+    f.seek(tail_start)
+    tail = f.read(size - tail_start)
+    last_newline = tail.rfind(b"\n")
+    if last_newline < 0:
+        return start
+    return tail_start + last_newline + 1
+
+
+class BoundedReader:
+    """File wrapper that stops reading at a byte limit (the last complete row)."""
+
+    def __init__(self, f, limit: int):
+        self._f = f
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        line = self._f.readline(min(size, self._remaining) if size >= 0 else self._remaining)
+        self._remaining -= len(line)
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+class AuditReportIndex:
+    """
+    Incrementally maintained hourly summary of a safety audit log.
+    """
+
+    def __init__(
+        self,
+        audit_log_path: str,
+        index_path: Optional[str] = None,
+        chunk_rows: int = 200000,
+    ):
+        """
+        Initialize the report index.
+
+        Args:
+            audit_log_path: Path to the CSV audit log
+            index_path: Sidecar index path (default: <audit_log_path>.index.json)
+            chunk_rows: Rows parsed per chunk while streaming the log
+        """
+        self.audit_log_path = audit_log_path
+        self.index_path = index_path or f"{audit_log_path}.index.json"
+        self.chunk_rows = chunk_rows
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Load the sidecar index, starting fresh if it is missing or incompatible."""
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+            logger.info(f"Rebuilding audit index {self.index_path} (version changed)")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding unreadable audit index {self.index_path}: {e}")
+        return {"version": INDEX_VERSION, "files": {}}
+
+    def _save_index(self) -> None:
+        """Atomically write the sidecar index."""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def audit_files(self) -> List[str]:
+        """
+        List the audit log and its rotated files.
+
+        Returns:
+            Paths of existing audit files, oldest rotation first
+        """
+        rotated = [
+            path
+            for path in glob.glob(f"{glob.escape(self.audit_log_path)}.*")
+            if _ROTATED_SUFFIX.match(path[len(self.audit_log_path) :])
+        ]
+        files = sorted(rotated)
+        if os.path.exists(self.audit_log_path):
+            files.append(self.audit_log_path)
+        return files
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Index rows appended since the last refresh.
+
+        Returns:
+            Dictionary with files scanned and rows indexed by this refresh
+        """
+        previous = self._index["files"]
+        # Entries are matched by inode so a file renamed by rotation keeps its entry
+        by_inode = {entry["inode"]: entry for entry in previous.values()}
+
+        entries = {}
+        stats = {"files_scanned": 0, "rows_indexed": 0}
+        for path in self.audit_files():
+            stat = os.stat(path)
+            entry = by_inode.get(stat.st_ino)
+            if entry is None or stat.st_size < entry["offset"] or not self._same_file(path, entry):
+                entry = self._new_entry(path, stat.st_ino)
+                if entry is None:
+                    continue
+
+            if stat.st_size > entry["offset"]:
+                stats["files_scanned"] += 1
+                stats["rows_indexed"] += self._scan(path, entry, stat.st_size)
+            entries[os.path.basename(path)] = entry
+
+        self._index["files"] = entries
+        if stats["rows_indexed"] or entries.keys() != previous.keys():
+            self._save_index()
+        return stats
+
+    @staticmethod
+    def _same_file(path: str, entry: Dict[str, Any]) -> bool:
+        """Whether an index entry still describes the file at path."""
+        return file_fingerprint(path, entry["fingerprint_bytes"]) == entry["fingerprint"]
+
+    def _new_entry(self, path: str, inode: int) -> Optional[Dict[str, Any]]:
+        """Start indexing a file after its header row."""
+        with open(path, "rb") as f:
+            header_line = f.readline()
+            start = f.read(FINGERPRINT_BYTES)
+        if not header_line.endswith(b"\n"):
+            return None
+
+        header = next(csv.reader([header_line.decode("utf-8")]))
+        fingerprint_bytes = len(header_line) + len(start)
+        return {
+            "inode": inode,
+            "offset": len(header_line),
+            "header": header,
+            "fingerprint_bytes": fingerprint_bytes,
+            "fingerprint": file_fingerprint(path, fingerprint_bytes),
+            "partitions": {},
+        }
+
+    def _scan(self, path: str, entry: Dict[str, Any], size: int) -> int:
+        """Stream rows from the entry's offset to the last complete row into partitions."""
+        with open(path, "rb") as f:
+            # Only read up to the last newline; a row still being written waits for next time
+            end = complete_rows_end(f, entry["offset"], size)
+            if end == entry["offset"]:
+                return 0
+
+            f.seek(entry["offset"])
+            header = entry["header"]
+            usecols = [column for column in REPORT_COLUMNS if column in header]
+            reader = pd.read_csv(
+                BoundedReader(f, end - entry["offset"]),
+                names=header,
+                usecols=usecols,
+                header=None,
+                dtype=str,
+                keep_default_na=False,
+                chunksize=self.chunk_rows,
+            )
+
+            rows = 0
+            for chunk in reader:
+                rows += len(chunk)
+                self._aggregate(chunk, entry["partitions"])
+
+        entry["offset"] = end
+        return rows
+
+    @staticmethod
+    def _aggregate(chunk: pd.DataFrame, partitions: Dict[str, Dict[str, Any]]) -> None:
+        """Add one chunk's counts to the hourly partitions."""
+        hour = chunk["timestamp"].str.slice(0, 13)
+        hour = hour.where(hour.str.match(HOUR_PATTERN), UNKNOWN_HOUR)
+        blocked = chunk["status"] == "block"
+        frame = pd.DataFrame(
+            {
+                "hour": hour,
+                "pass": chunk["status"] == "pass",
+                "block": blocked,
+                "cache_hit": (
+                    chunk["cache_hit"] == "True"
+                    if "cache_hit" in chunk
+                    else pd.Series(False, index=chunk.index)
+                ),
+                "severity": pd.to_numeric(chunk["max_severity"], errors="coerce")
+                .fillna(0)
+                .astype(int)
+                .astype(str),
+            }
+        )
+
+        grouped = frame.groupby("hour")[["pass", "block", "cache_hit"]].sum()
+        grouped["total"] = frame.groupby("hour").size()
+        severity = frame.groupby(["hour", "severity"]).size()
+
+        categories = (
+            pd.DataFrame({"hour": hour[blocked], "category": chunk["blocked_categories"][blocked]})
+            .assign(category=lambda df: df["category"].str.split(","))
+            .explode("category")
+        )
+        categories["category"] = categories["category"].str.strip()
+        categories = categories[categories["category"].fillna("") != ""]
+        category_counts = categories.groupby(["hour", "category"]).size()
+
+        for key, row in grouped.iterrows():
+            partition = partitions.setdefault(key, _empty_partition())
+            partition["total"] += int(row["total"])
+            partition["pass"] += int(row["pass"])
+            partition["block"] += int(row["block"])
+            partition["cache_hits"] += int(row["cache_hit"])
+        for (key, value), count in severity.items():
+            counts = partitions[key]["severity"]
+            counts[value] = counts.get(value, 0) + int(count)
+        for (key, category), count in category_counts.items():
+            counts = partitions[key]["categories"]
+            counts[category] = counts.get(category, 0) + int(count)
+
+    def summarize(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Refresh the index and summarize the whole audit history.
+
+        Args:
+            now: Current UTC time for recent activity (default: utcnow)
+
+        Returns:
+            Dict with totals, pass/block rates, category blocks, severity
+            distribution, cache hits and recent (24h) activity
+        """
+        self.refresh()
+        now = now or datetime.utcnow()
+        cutoff = (now - timedelta(hours=24)).strftime("%Y-%m-%dT%H")
+
+        totals = _empty_partition()
+        recent = 0
+        for entry in self._index["files"].values():
+            for hour, partition in entry["partitions"].items():
+                for key in ["total", "pass", "block", "cache_hits"]:
+                    totals[key] += partition[key]
+                for key in ["categories", "severity"]:
+                    for name, count in partition[key].items():
+                        totals[key][name] = totals[key].get(name, 0) + count
+                if hour != UNKNOWN_HOUR and hour >= cutoff:
+                    recent += partition["total"]
+
+        total = totals["total"]
+        return {
+            "total_checks": total,
+            "passed_checks": totals["pass"],
+            "blocked_checks": totals["block"],
+            "pass_rate_percent": round(totals["pass"] / max(1, total) * 100, 2),
+            "block_rate_percent": round(totals["block"] / max(1, total) * 100, 2),
+            "category_blocks": {
+                category: totals["categories"].get(category, 0) for category in REPORT_CATEGORIES
+            },
+            "severity_distribution": {
+                bucket: totals["severity"].get(value, 0)
+                for value, bucket in SEVERITY_BUCKETS.items()
+            },
+            "recent_activity_24h": recent,
+            "cache_hits": totals["cache_hits"],
+            "audit_files": len(self._index["files"]),
+        }
+
+
+def generate_report(audit_log_path: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Summarize an audit log using its sidecar index (convenience function).
+
+    Args:
+        audit_log_path: Path to the CSV audit log
+        now: Current UTC time for recent activity (default: utcnow)
+
+    Returns:
+        Audit summary (see AuditReportIndex.summarize)
+    """
+    return AuditReportIndex(audit_log_path).summarize(now)
@@ -0,0 +1,535 @@
+"""
+Audit Store Module
+
+This module provides an indexed SQLite store for the safety audit trail, as an
+alternative to the CSV audit log. Compliance questions such as "all blocks for
+customer X last quarter" are answered with index lookups instead of full scans.
+
+- Typed columns (integer severities, boolean cache_hit) in an `audit_log` table
+- Indexes on timestamp, variant_id, customer_id and status
+- Same write()/flush()/close()/get_stats() interface as AuditLogWriter, so SafetyAgent
+  can use either backend (safety_policy.audit_logging.format: csv | sqlite)
+- query_audit(filters, time_range) API and report summaries computed in SQL
+- migrate_csv() to import existing CSV audit logs (including rotated files); like
+  AuditReportIndex, sources are tracked by inode, header fingerprint and byte offset,
+  so re-runs import only appended rows and a file moved by rotation is not re-imported
+"""
+
+import atexit
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from src.agents.audit_report import (
+    FINGERPRINT_BYTES,
+    REPORT_CATEGORIES,
+    SEVERITY_BUCKETS,
+    BoundedReader,
+    complete_rows_end,
+    file_fingerprint,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Column types for known audit columns; anything else is stored as TEXT
+COLUMN_TYPES = {
+    "hate_severity": "INTEGER",
+    "violence_severity": "INTEGER",
+    "self_harm_severity": "INTEGER",
+    "sexual_severity": "INTEGER",
+    "max_severity": "INTEGER",
+    "threshold_used": "INTEGER",
+    "cache_hit": "BOOLEAN",
+}
+# Filters accepted by query_audit(); blocked_category matches one entry of blocked_categories
+QUERY_FILTERS = ["variant_id", "customer_id", "segment", "status", "cache_hit", "blocked_category"]
+
+TimeBound = Optional[Union[datetime, str]]
+
+
+def _to_sql_value(value: Any, column_type: str) -> Any:
+    """Convert a CSV or Python value to its stored representation."""
+    if value is None or value == "":
+        return None
+    if column_type == "BOOLEAN":
+        if isinstance(value, str):
+            return int(value.strip().lower() in ("true", "1"))
+        return int(bool(value))
+    if column_type == "INTEGER":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def _convert_column(values: pd.Series, column_type: str) -> List[Any]:
+    """Vectorized _to_sql_value() for one column of CSV strings."""
+    missing = values == ""
+    if column_type == "BOOLEAN":
+        converted = values.str.strip().str.lower().isin(["true", "1"]).astype(int)
+    elif column_type == "INTEGER":
+        converted = pd.to_numeric(values, errors="coerce").astype("Int64")
+        missing = missing | converted.isna()
+    else:
+        converted = values
+    return converted.astype(object).where(~missing, None).tolist()
+
+
+def _time_bound(value: TimeBound) -> Optional[str]:
+    """Format a time range bound like the audit timestamps (ISO 8601)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class AuditStore:
+    """
+    Thread-safe SQLite audit store with buffered inserts.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        headers: List[str],
+        flush_rows: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        """
+        Open (or create) the audit store.
+
+        Args:
+            db_path: SQLite database path
+            headers: Audit columns, in the order rows are passed to write()
+            flush_rows: Buffered rows that trigger an insert
+            flush_interval: Maximum seconds a buffered row waits before insertion
+                (checked on the next write)
+
+        Raises:
+            ValueError: If flush_rows is not positive
+        """
+        if flush_rows < 1:
+            raise ValueError("flush_rows must be at least 1")
+
+        self.db_path = db_path
+        self.headers = list(headers)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._types = [COLUMN_TYPES.get(column, "TEXT") for column in self.headers]
+        self._pending: List[Tuple[Any, ...]] = []
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {"rows_written": 0, "batches_written": 0, "write_errors": 0}
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        atexit.register(self.close)
+
+    def _create_schema(self) -> None:
+        """Create the audit table, its indexes and the migration ledger."""
+        columns = ", ".join(
+            f"{column} {column_type}" for column, column_type in zip(self.headers, self._types)
+        )
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS audit_log ({columns})")
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(audit_log)")}
+        for column, column_type in zip(self.headers, self._types):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE audit_log ADD COLUMN {column} {column_type}")
+
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log (timestamp)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_variant ON audit_log (variant_id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_customer ON audit_log (customer_id, timestamp)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_status ON audit_log (status, timestamp)"
+        )
+        # Migration ledger: one row per imported CSV file, keyed by inode so rotation
+        # (a rename) keeps the entry; offset is the end of the last imported row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_sources ("
+            "inode INTEGER PRIMARY KEY, source TEXT NOT NULL, header TEXT NOT NULL, "
+            "fingerprint_bytes INTEGER NOT NULL, fingerprint TEXT NOT NULL, "
+            "offset INTEGER NOT NULL, rows INTEGER NOT NULL, migrated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def write(self, row: List[Any]) -> None:
+        """
+        Buffer one audit row.
+
+        Args:
+            row: Values in header order
+
+        Raises:
+            ValueError: If the store is closed
+        """
+        values = tuple(
+            _to_sql_value(value, column_type) for value, column_type in zip(row, self._types)
+        )
+        with self._lock:
+            if self._closed:
+                raise ValueError("Audit store is closed")
+            self._pending.append(values)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if (
+                len(self._pending) >= self.flush_rows
+                or time.monotonic() - self._oldest_pending >= self.flush_interval
+            ):
+                self._insert_pending()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Insert all buffered rows.
+
+        Args:
+            timeout: Unused; accepted for compatibility with AuditLogWriter.flush()
+
+        Returns:
+            True if no buffered rows remain
+        """
+        with self._lock:
+            if self._closed:
+                return True
+            self._insert_pending()
+            return not self._pending
+
+    def close(self) -> None:
+        """Insert remaining rows and close the database."""
+        with self._lock:
+            if self._closed:
+                return
+            self._insert_pending()
+            if self._pending:
+                logger.error(f"Dropping {len(self._pending)} unwritten audit rows on close")
+            self._closed = True
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with rows/batches written, write errors and buffered rows
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queued_rows"] = len(self._pending)
+        return stats
+
+    def _insert_pending(self) -> None:
+        """Insert buffered rows in one transaction (lock held); kept for retry on failure."""
+        if not self._pending:
+            return
+        try:
+            with self._conn:
+                self._insert(self._pending)
+        except sqlite3.Error as e:
+            self.stats["write_errors"] += 1
+            logger.error(
+                f"Failed to insert {len(self._pending)} audit rows into {self.db_path}: {e}"
+            )
+            return
+        self.stats["rows_written"] += len(self._pending)
+        self.stats["batches_written"] += 1
+        self._pending = []
+        self._oldest_pending = None
+
+    def _insert(self, rows: Sequence[Tuple[Any, ...]], columns: Optional[List[str]] = None) -> None:
+        """Insert converted rows (the caller commits)."""
+        columns = columns or self.headers
+        placeholders = ", ".join("?" for _ in columns)
+        self._conn.executemany(
+            f"INSERT INTO audit_log ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+
+    def query_audit(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        time_range: Optional[Tuple[TimeBound, TimeBound]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query audit records.
+
+        Args:
+            filters: Column filters; each value is a single value or a list of
+                accepted values. Supported keys: QUERY_FILTERS
+            time_range: (start, end) datetimes or ISO strings; start is inclusive,
+                end exclusive, and either may be None
+            limit: Maximum records returned (None = all)
+
+        Returns:
+            Audit records (dicts keyed by column) ordered by timestamp
+
+        Raises:
+            ValueError: If a filter key is not supported
+        """
+        clauses = []
+        params: List[Any] = []
+
+        for key, value in (filters or {}).items():
+            if key not in QUERY_FILTERS:
+                raise ValueError(f"Unsupported audit filter: {key}. Must be one of {QUERY_FILTERS}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if key == "blocked_category":
+                clauses.append(
+                    "("
+                    + " OR ".join("instr(',' || blocked_categories || ',', ?) > 0" for _ in values)
+                    + ")"
+                )
+                params.extend(f",{category}," for category in values)
+            else:
+                column_type = COLUMN_TYPES.get(key, "TEXT")
+                clauses.append(f"{key} IN ({', '.join('?' for _ in values)})")
+                params.extend(_to_sql_value(v, column_type) for v in values)
+
+        start, end = time_range or (None, None)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_time_bound(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_time_bound(end))
+
+        sql = f"SELECT {', '.join(self.headers)} FROM audit_log"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(zip(self.headers, row))
+            if "cache_hit" in record and record["cache_hit"] is not None:
+                record["cache_hit"] = bool(record["cache_hit"])
+            records.append(record)
+        return records
+
+    def summarize(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Summarize the whole audit history.
+
+        Args:
+            now: Current UTC time for recent activity (default: utcnow)
+
+        Returns:
+            Dict with the same statistics as AuditReportIndex.summarize()
+        """
+        now = now or datetime.utcnow()
+        cutoff = (now - timedelta(hours=24)).isoformat()
+
+        self.flush()
+        with self._lock:
+            total, passed, blocked, cache_hits, recent = self._conn.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(status = 'pass'), 0), "
+                "COALESCE(SUM(status = 'block'), 0), "
+                "COALESCE(SUM(cache_hit = 1), 0), "
+                "COALESCE(SUM(timestamp >= ?), 0) "
+                "FROM audit_log",
+                (cutoff,),
+            ).fetchone()
+            category_rows = self._conn.execute(
+                "SELECT blocked_categories, COUNT(*) FROM audit_log "
+                "WHERE status = 'block' GROUP BY blocked_categories"
+            ).fetchall()
+            severity_rows = self._conn.execute(
+                "SELECT COALESCE(max_severity, 0), COUNT(*) FROM audit_log GROUP BY 1"
+            ).fetchall()
+
+        category_blocks = {category: 0 for category in REPORT_CATEGORIES}
+        for categories, count in category_rows:
+            for category in (categories or "").split(","):
+                category = category.strip()
+                if category in category_blocks:
+                    category_blocks[category] += count
+        severity = {str(value): count for value, count in severity_rows}
+
+        return {
+            "total_checks": total,
+            "passed_checks": passed,
+            "blocked_checks": blocked,
+            "pass_rate_percent": round(passed / max(1, total) * 100, 2),
+            "block_rate_percent": round(blocked / max(1, total) * 100, 2),
+            "category_blocks": category_blocks,
+            "severity_distribution": {
+                bucket: severity.get(value, 0) for value, bucket in SEVERITY_BUCKETS.items()
+            },
+            "recent_activity_24h": recent,
+            "cache_hits": cache_hits,
+        }
+
+    def import_csv(self, csv_path: str, chunk_rows: int = 50000) -> int:
+        """
+        Import rows of a CSV audit log not imported before.
+
+        The file is matched to the migration ledger by inode and a fingerprint of its
+        header and first rows, and reading resumes at the recorded offset: rows appended
+        since the last run are imported, and a log renamed by rotation is recognised
+        instead of being imported again. A partially written last row waits for the next
+        run. Files that were rewritten or truncated are imported from the start. Columns
+        missing from older logs (e.g. cache_hit) are stored as NULL.
+
+        Args:
+            csv_path: CSV audit log path
+            chunk_rows: Rows parsed and inserted per transaction
+
+        Returns:
+            Number of rows imported
+
+        Raises:
+            ValueError: If the CSV has no columns in common with the store
+        """
+        stat = os.stat(csv_path)
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT header, fingerprint_bytes, fingerprint, offset, rows "
+                "FROM audit_sources WHERE inode = ?",
+                (stat.st_ino,),
+            ).fetchone()
+
+        source = None
+        if row is not None:
+            header, fingerprint_bytes, fingerprint, offset, total = row
+            if (
+                stat.st_size >= offset
+                and file_fingerprint(csv_path, fingerprint_bytes) == fingerprint
+            ):
+                source = {
+                    "header": json.loads(header),
+                    "fingerprint_bytes": fingerprint_bytes,
+                    "fingerprint": fingerprint,
+                    "offset": offset,
+                    "rows": total,
+                }
+        if source is None:
+            source = self._new_source(csv_path)
+            if source is None:
+                return 0
+
+        rows = 0
+        with open(csv_path, "rb") as f:
+            end = complete_rows_end(f, source["offset"], stat.st_size)
+            if end == source["offset"]:
+                logger.info(f"Skipping {csv_path}: no new rows ({source['rows']} imported)")
+                return 0
+
+            columns = [column for column in self.headers if column in source["header"]]
+            if not columns:
+                raise ValueError(f"No audit columns found in {csv_path}")
+
+            f.seek(source["offset"])
+            reader = pd.read_csv(
+                BoundedReader(f, end - source["offset"]),
+                names=source["header"],
+                usecols=columns,
+                header=None,
+                dtype=str,
+                keep_default_na=False,
+                chunksize=chunk_rows,
+                on_bad_lines="warn",
+            )
+            # One transaction per file: rows and the ledger offset are committed together,
+            # so a failed import leaves nothing behind and can be re-run
+            with self._lock, self._conn:
+                for chunk in reader:
+                    values = list(
+                        zip(
+                            *[
+                                _convert_column(chunk[column], COLUMN_TYPES.get(column, "TEXT"))
+                                for column in columns
+                            ]
+                        )
+                    )
+                    self._insert(values, columns)
+                    rows += len(values)
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO audit_sources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        stat.st_ino,
+                        os.path.abspath(csv_path),
+                        json.dumps(source["header"]),
+                        source["fingerprint_bytes"],
+                        source["fingerprint"],
+                        end,
+                        source["rows"] + rows,
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+                # Refresh planner statistics so lookups pick the most selective index
+                self._conn.execute("ANALYZE")
+        logger.info(f"Imported {rows} audit rows from {csv_path} into {self.db_path}")
+        return rows
+
+    @staticmethod
+    def _new_source(csv_path: str) -> Optional[Dict[str, Any]]:
+        """Start importing a file after its header row (None until the header is complete)."""
+        with open(csv_path, "rb") as f:
+            header_line = f.readline()
+            start = f.read(FINGERPRINT_BYTES)
+        if not header_line.endswith(b"\n"):
+            return None
+
+        fingerprint_bytes = len(header_line) + len(start)
+        return {
+            "header": next(csv.reader([header_line.decode("utf-8")])),
+            "fingerprint_bytes": fingerprint_bytes,
+            "fingerprint": file_fingerprint(csv_path, fingerprint_bytes),
+            "offset": len(header_line),
+            "rows": 0,
+        }
+
+
+def migrate_csv(
+    csv_paths: List[str], db_path: str, headers: List[str], chunk_rows: int = 50000
+) -> Dict[str, int]:
+    """
+    Migrate CSV audit logs into an audit store.
+
+    Safe to re-run: only rows appended since the previous run are imported, including
+    after the log has been rotated.
+
+    Args:
+        csv_paths: CSV audit logs (e.g. rotated files plus the current log)
+        db_path: SQLite database path
+        headers: Audit columns for the store
+        chunk_rows: Rows inserted per transaction
+
+    Returns:
+        Rows imported per CSV path (0 for files with no new rows)
+    """
+    store = AuditStore(db_path, headers)
+    try:
+        return {path: store.import_csv(path, chunk_rows) for path in csv_paths}
+    finally:
+        store.close()
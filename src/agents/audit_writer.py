@@ -0,0 +1,319 @@
+"""
+Audit Log Writer Module
+
+This module provides a buffered, append-only CSV writer for the safety audit trail.
+Rows are handed to a single background writer thread through a bounded queue, so
+concurrent safety checks never interleave rows and a check never waits on disk I/O.
+
+- Size- and time-based flushing of buffered rows
+- Configurable fsync policy ("always", "on_flush", "never")
+- Log rotation by size and/or date, with a fresh header in every file
+- Explicit flush() and close() for compliance durability; open writers are also
+  closed at interpreter exit
+- Failed writes are retried; flush() reports False while rows are not on disk, and at
+  most max_buffer_rows failed rows are retained (the oldest are dropped beyond that)
+"""
+
+import atexit
+import csv
+import io
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "always": fsync after every batch; "on_flush": fsync on flush()/close() only;
+# "never": leave durability to the OS
+FSYNC_POLICIES = ["always", "on_flush", "never"]
+ROTATE_WHEN = [None, "daily"]
+
+_STOP = object()
+
+
+class _FlushRequest:
+    """Flush marker queued behind earlier rows; records whether they reached disk."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.written = False
+
+
+class AuditLogWriter:
+    """
+    Thread-safe buffered CSV audit writer with a single background writer thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        headers: List[str],
+        max_buffer_rows: int = 10000,
+        flush_rows: int = 500,
+        flush_interval: float = 1.0,
+        fsync: str = "on_flush",
+        rotate_max_bytes: Optional[int] = None,
+        rotate_when: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the writer and start its background thread.
+
+        Args:
+            path: Audit log path
+            headers: CSV header row written at the top of every new file
+            max_buffer_rows: Maximum queued rows; write() blocks when full. Also caps
+                the rows retained for retry after failed writes
+            flush_rows: Rows that trigger a write to disk
+            flush_interval: Maximum seconds a row waits before being written
+            fsync: fsync policy, one of FSYNC_POLICIES
+            rotate_max_bytes: Rotate when the file would exceed this size (None = never)
+            rotate_when: "daily" to rotate when the UTC date changes (None = never)
+            clock: Time source (seconds since the epoch)
+
+        Raises:
+            ValueError: If a policy or size is invalid
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}. Must be one of {FSYNC_POLICIES}")
+        if rotate_when not in ROTATE_WHEN:
+            raise ValueError(f"Invalid rotate_when: {rotate_when}. Must be one of {ROTATE_WHEN}")
+        if max_buffer_rows < 1 or flush_rows < 1:
+            raise ValueError("max_buffer_rows and flush_rows must be at least 1")
+
+        self.path = path
+        self.headers = headers
+        self.max_buffer_rows = max_buffer_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rotate_max_bytes = rotate_max_bytes
+        self.rotate_when = rotate_when
+        self.clock = clock
+
+        header_buffer = io.StringIO()
+        csv.writer(header_buffer).writerow(headers)
+        self._header = header_buffer.getvalue()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_buffer_rows)
+        self._file = None
+        self._file_date = None
+        self._closed = False
+        self._close_lock = threading.Lock()
+        # Rows dropped since the last flush request was answered
+        self._dropped_rows = 0
+
+        self.stats = {
+            "rows_written": 0,
+            "batches_written": 0,
+            "rotations": 0,
+            "write_errors": 0,
+            "rows_dropped": 0,
+        }
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, row: List[Any]) -> None:
+        """
+        Queue one audit row.
+
+        Blocks while the buffer is full.
+
+        Args:
+            row: CSV row values in header order
+
+        Raises:
+            ValueError: If the writer is closed
+        """
+        if self._closed:
+            raise ValueError("Audit writer is closed")
+        self._queue.put(row)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every row queued before this call to disk.
+
+        Rows are fsynced unless the fsync policy is "never".
+
+        Args:
+            timeout: Maximum seconds to wait (None = wait indefinitely)
+
+        Returns:
+            True if every earlier row was written within the timeout; False on
+            timeout, or if a write failed or rows were dropped
+        """
+        if self._closed:
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout) and request.written
+
+    def close(self) -> None:
+        """Flush remaining rows, stop the writer thread and close the file."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dictionary with rows/batches written, rotations, write errors, dropped
+            rows and queued rows
+        """
+        stats = dict(self.stats)
+        stats["queued_rows"] = self._queue.qsize()
+        return stats
+
+    def _run(self) -> None:
+        """Writer thread: batch queued rows and write them on size, time or request."""
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, list):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.flush_rows:
+                    continue
+
+            sync = self.fsync == "always" or (
+                self.fsync == "on_flush" and (item is _STOP or isinstance(item, _FlushRequest))
+            )
+            if batch or (sync and self._file is not None):
+                batch = self._write_batch(batch, sync)
+                deadline = time.monotonic() + self.flush_interval if batch else None
+
+            if isinstance(item, _FlushRequest):
+                item.written = not batch and not self._dropped_rows
+                self._dropped_rows = 0
+                item.done.set()
+            elif item is _STOP:
+                if batch:
+                    logger.error(f"Dropping {len(batch)} unwritten audit rows on close")
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write_batch(self, batch: List[List[Any]], sync: bool) -> List[List[Any]]:
+        """
+        Write a batch of rows with one write call.
+
+        Returns:
+            Rows still pending (the batch is kept for retry if the write failed, up
+            to max_buffer_rows)
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        data = buffer.getvalue()
+
+        try:
+            self._prepare_file(len(data.encode("utf-8")))
+            self._file.write(data)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"Failed to write {len(batch)} audit rows to {self.path}: {e}")
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            # Bound memory while the disk stays unwritable
+            overflow = len(batch) - self.max_buffer_rows
+            if overflow > 0:
+                self.stats["rows_dropped"] += overflow
+                self._dropped_rows += overflow
+                logger.error(f"Dropping {overflow} oldest unwritten audit rows (retry buffer full)")
+                batch = batch[overflow:]
+            return batch
+
+        self.stats["rows_written"] += len(batch)
+        self.stats["batches_written"] += int(bool(batch))
+        return []
+
+    def _prepare_file(self, incoming_bytes: int) -> None:
+        """Open, reopen (if moved or deleted) or rotate the audit file before a write."""
+        if self._file is not None and not self._is_current_file():
+            self._file.close()
+            self._file = None
+
+        if self._file is None:
+            self._open()
+
+        # Never rotate a file that holds only its header
+        size = self._file.tell()
+        if size <= len(self._header):
+            return
+
+        too_big = (
+            self.rotate_max_bytes is not None and size + incoming_bytes > self.rotate_max_bytes
+        )
+        new_day = (
+            self.rotate_when == "daily"
+            and self._file_date != datetime.utcfromtimestamp(self.clock()).date()
+        )
+        if too_big or new_day:
+            self._rotate()
+
+    def _open(self) -> None:
+        """Open the audit file for appending, writing the header if it is new."""
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        if exists:
+            self._file_date = datetime.utcfromtimestamp(os.path.getmtime(self.path)).date()
+        else:
+            self._file.write(self._header)
+            self._file.flush()
+            self._file_date = datetime.utcfromtimestamp(self.clock()).date()
+
+    def _rotate(self) -> None:
+        """Move the current file aside and start a new one."""
+        self._file.close()
+        self._file = None
+
+        suffix = self._file_date.strftime("%Y%m%d") if self.rotate_when == "daily" else None
+        suffix = suffix or datetime.utcfromtimestamp(self.clock()).strftime("%Y%m%dT%H%M%S")
+        rotated = f"{self.path}.{suffix}"
+        counter = 1
+        while os.path.exists(rotated):
+            rotated = f"{self.path}.{suffix}.{counter}"
+            counter += 1
+
+        os.replace(self.path, rotated)
+        self.stats["rotations"] += 1
+        logger.info(f"Rotated audit log to {rotated}")
+        self._open()
+
+    def _is_current_file(self) -> bool:
+        """Whether the open handle still refers to the file at self.path."""
+        try:
+            path_stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        file_stat = os.fstat(self._file.fileno())
+        return (path_stat.st_dev, path_stat.st_ino) == (file_stat.st_dev, file_stat.st_ino)
@@ -18,8 +18,12 @@ from typing import Dict, List, Optional, Tuple, Any
 import uuid
 
 import numpy as np
+import pandas as pd
 from scipy import stats
 
+from src.agents.assignment_engine import HASH_ASSIGNMENT_METHOD, HashAssigner, assign_stratified
+from src.agents.engagement_simulator import simulate_engagement_columnar
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -197,109 +201,82 @@ class ExperimentationAgent:
         Returns:
             List of assignment records
         """
+        assignments = self.assign_customers_columnar(customers, experiment_design).to_dict(
+            "records"
+        )
+        self.assignments = assignments
+        return assignments
+
+    def assign_customers_columnar(self, customers: Any, experiment_design: Dict) -> pd.DataFrame:
+        """
+        Assign customers to experiment arms, returning columnar output.
+
+        Vectorized stratified assignment (see assignment_engine.assign_stratified):
+        each segment is permuted by a np.random.Generator seeded from random_seed,
+        so results are reproducible and suited to millions of customers. Designs
+        with assignment_strategy "deterministic_hash" use HashAssigner instead.
+
+        Args:
+            customers: DataFrame, pyarrow Table or list of dicts with customer_id and segment
+            experiment_design: Experiment design from design_experiment()
+
+        Returns:
+            DataFrame with one row per assigned customer
+        """
         logger.info(f"Assigning {len(customers)} customers to experiment arms")
 
-        assignments = []
-        assignment_stats = defaultdict(lambda: defaultdict(int))
-
-        # Group customers by segment
-        customers_by_segment = defaultdict(list)
-        for customer in customers:
-            segment = customer["segment"]
-            customers_by_segment[segment].append(customer)
-
-        # Assign customers within each segment
-        for segment, segment_customers in customers_by_segment.items():
-            logger.info(f"Assigning {len(segment_customers)} customers in segment '{segment}'")
-
-            # Shuffle customers for random assignment
-            shuffled_customers = segment_customers.copy()
-            random.shuffle(shuffled_customers)
-
-            n_customers = len(shuffled_customers)
-            n_arms = len(experiment_design["arms"])
-
-            # Calculate allocation sizes (25% each arm for 4 arms)
-            allocation_pct = experiment_design["sample_allocation"]
-            control_size = max(1, int(n_customers * allocation_pct["control_percent"] / 100))
-            treatment_size = max(
-                1, int(n_customers * allocation_pct["treatment_percent"] / 100 / 3)
-            )  # 3 treatment arms
-
-            # Adjust if total allocation exceeds available customers
-            total_needed = control_size + (treatment_size * 3)
-            if total_needed > n_customers:
-                # Simple round-robin assignment for small samples
-                control_size = 1 if n_customers >= 1 else 0
-                treatment_size = max(1, (n_customers - control_size) // 3) if n_customers > 1 else 0
-
-            # Assign to control
-            for i in range(control_size):
-                if i < len(shuffled_customers):
-                    customer = shuffled_customers[i]
-                    assignment = {
-                        "customer_id": customer["customer_id"],
-                        "segment": segment,
-                        "experiment_arm": "control",
-                        "variant_id": "control",
-                        "assigned_at": datetime.utcnow().isoformat(),
-                        "assignment_method": "stratified_random",
-                    }
-                    assignments.append(assignment)
-                    assignment_stats[segment]["control"] += 1
-
-            # Assign to treatment arms
-            treatment_arms = ["treatment_1", "treatment_2", "treatment_3"]
-            start_idx = control_size
-
-            for arm_idx, arm_name in enumerate(treatment_arms):
-                arm_start = start_idx + (arm_idx * treatment_size)
-                arm_end = arm_start + treatment_size
-
-                for i in range(arm_start, min(arm_end, len(shuffled_customers))):
-                    customer = shuffled_customers[i]
-
-                    # Get variant for this segment and arm
-                    arm_config = experiment_design["arms"][arm_name]
-                    variant = arm_config["variants_by_segment"].get(segment)
-                    variant_id = (
-                        variant["variant_id"] if variant else f"{arm_name}_{segment}_fallback"
-                    )
-
-                    assignment = {
-                        "customer_id": customer["customer_id"],
-                        "segment": segment,
-                        "experiment_arm": arm_name,
-                        "variant_id": variant_id,
-                        "assigned_at": datetime.utcnow().isoformat(),
-                        "assignment_method": "stratified_random",
-                    }
-                    assignments.append(assignment)
-                    assignment_stats[segment][arm_name] += 1
+        if experiment_design.get("assignment_strategy") == HASH_ASSIGNMENT_METHOD:
+            assignments = HashAssigner(experiment_design).assign_frame(customers)
+        else:
+            assignments = assign_stratified(
+                customers, experiment_design, seed=self.config.get("random_seed", 42)
+            )
 
         # Log assignment statistics
         logger.info("Assignment statistics by segment:")
-        for segment, arm_counts in assignment_stats.items():
-            total = sum(arm_counts.values())
-            logger.info(f"  {segment}: {dict(arm_counts)} (total: {total})")
+        arm_counts = assignments.groupby(["segment", "experiment_arm"], observed=True).size()
+        for segment, segment_counts in arm_counts.groupby(level=0, observed=True):
+            counts = segment_counts.droplevel(0).to_dict()
+            logger.info(f"  {segment}: {counts} (total: {sum(counts.values())})")
 
         # Validate assignment balance
         self._validate_assignment_balance(assignments, experiment_design)
 
-        self.assignments = assignments
         logger.info(f"Successfully assigned {len(assignments)} customers")
         return assignments
 
-    def _validate_assignment_balance(self, assignments: List[Dict], experiment_design: Dict):
+    def assign_customer(
+        self, customer: Dict[str, Any], experiment_design: Dict
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Assign a single customer without the rest of the population.
+
+        Uses deterministic hash assignment, so real-time send paths agree with
+        batch jobs run with assignment_strategy "deterministic_hash".
+
+        Args:
+            customer: Dict with customer_id and segment
+            experiment_design: Experiment design from design_experiment()
+
+        Returns:
+            Assignment record, or None if the customer is not enrolled
+        """
+        return HashAssigner(experiment_design).assign(customer)
+
+    def _validate_assignment_balance(self, assignments: Any, experiment_design: Dict):
         """
         Validate that assignment distribution is balanced within tolerance.
 
         Args:
-            assignments: List of customer assignments
+            assignments: Customer assignments (list of records or DataFrame)
             experiment_design: Experiment design configuration
         """
         # Count assignments by arm
-        arm_counts = Counter(assignment["experiment_arm"] for assignment in assignments)
+        if isinstance(assignments, pd.DataFrame):
+            arm_counts = assignments["experiment_arm"].value_counts(sort=False)
+            arm_counts = arm_counts[arm_counts > 0].to_dict()
+        else:
+            arm_counts = Counter(assignment["experiment_arm"] for assignment in assignments)
         total_assignments = len(assignments)
 
         # Check balance tolerance (±5%)
@@ -335,101 +312,50 @@ class ExperimentationAgent:
         Returns:
             List of engagement records
         """
-        logger.info(f"Simulating engagement for {len(assignments)} assignments")
+        engagement = self.simulate_engagement_columnar(assignments, config)
+        engagement_data = engagement.to_dict("records")
 
-        engagement_data = []
-        simulation_config = config.get(
-            "simulation",
-            {
-                "baseline_rates": {"open_rate": 0.25, "click_rate": 0.05, "conversion_rate": 0.01},
-                "expected_uplift": {
-                    "mean": 0.15,
-                    "std_dev": 0.05,
-                    "min_uplift": 0.05,
-                    "max_uplift": 0.30,
-                },
-                "noise_factor": 0.02,
-            },
-        )
-        baseline_rates = simulation_config["baseline_rates"]
-        uplift_config = simulation_config["expected_uplift"]
+        self.engagement_data = engagement_data
+        return engagement_data
 
-        # Segment-specific baseline rates
-        segment_baselines = config.get("segments", {})
+    def simulate_engagement_columnar(self, assignments: Any, config: Dict) -> pd.DataFrame:
+        """
+        Simulate engagement with vectorized draws, returning columnar output.
 
-        for assignment in assignments:
-            customer_id = assignment["customer_id"]
-            segment = assignment["segment"]
-            arm = assignment["experiment_arm"]
+        See engagement_simulator.simulate_engagement_columnar. Draws come from a
+        np.random.Generator seeded with simulation.random_seed, so results are
+        reproducible and large power studies run at array speed.
 
-            # Get segment-specific baseline rates if available
-            segment_config = segment_baselines.get(segment, {})
-            open_baseline = segment_config.get(
-                "expected_baseline_open", baseline_rates["open_rate"]
-            )
-            click_baseline = segment_config.get(
-                "expected_baseline_click", baseline_rates["click_rate"]
-            )
-            conversion_baseline = baseline_rates["conversion_rate"]
-
-            # Calculate engagement probabilities
-            if arm == "control":
-                # Control uses baseline rates
-                open_prob = open_baseline
-                click_prob = click_baseline
-                conversion_prob = conversion_baseline
-            else:
-                # Treatment arms get uplift
-                segment_uplift = segment_config.get("expected_uplift", uplift_config["mean"])
-
-                # Add some randomness to uplift
-                noise = np.random.normal(0, uplift_config["std_dev"])
-                actual_uplift = max(
-                    uplift_config["min_uplift"],
-                    min(uplift_config["max_uplift"], segment_uplift + noise),
-                )
+        Args:
+            assignments: Assignment DataFrame, pyarrow Table or list of records
+            config: Experiment configuration with simulation parameters
 
-                open_prob = min(1.0, open_baseline * (1 + actual_uplift))
-                click_prob = min(1.0, click_baseline * (1 + actual_uplift))
-                conversion_prob = min(1.0, conversion_baseline * (1 + actual_uplift))
-
-            # Add noise factor
-            noise_factor = simulation_config.get("noise_factor", 0.02)
-            open_prob = max(0, min(1.0, open_prob + np.random.normal(0, noise_factor)))
-            click_prob = max(0, min(1.0, click_prob + np.random.normal(0, noise_factor)))
-
-            # Simulate engagement events
-            opened = np.random.random() < open_prob
-            clicked = opened and (np.random.random() < click_prob)  # Can only click if opened
-            converted = clicked and (
-                np.random.random() < conversion_prob
-            )  # Can only convert if clicked
-
-            engagement_record = {
-                "customer_id": customer_id,
-                "segment": segment,
-                "experiment_arm": arm,
-                "variant_id": assignment["variant_id"],
-                "opened": opened,
-                "clicked": clicked,
-                "converted": converted,
-                "engagement_at": datetime.utcnow().isoformat(),
-                "engagement_source": "simulated",
-            }
+        Returns:
+            DataFrame with one engagement row per assignment
+        """
+        logger.info(f"Simulating engagement for {len(assignments)} assignments")
 
-            engagement_data.append(engagement_record)
+        engagement = simulate_engagement_columnar(
+            assignments, config, seed=self.config["simulation"]["random_seed"]
+        )
 
         # Log engagement statistics
-        self._log_engagement_stats(engagement_data)
+        self._log_engagement_stats(engagement)
 
-        self.engagement_data = engagement_data
-        logger.info(f"Simulated engagement for {len(engagement_data)} customers")
-        return engagement_data
+        logger.info(f"Simulated engagement for {len(engagement)} customers")
+        return engagement
 
-    def _log_engagement_stats(self, engagement_data: List[Dict]):
+    def _log_engagement_stats(self, engagement_data: Any):
         """Log engagement statistics by arm and segment."""
         stats_by_arm = defaultdict(lambda: {"opened": 0, "clicked": 0, "converted": 0, "total": 0})
 
+        if isinstance(engagement_data, pd.DataFrame):
+            grouped = engagement_data.groupby("experiment_arm", observed=True, sort=False)
+            counts = grouped[["opened", "clicked", "converted"]].sum()
+            counts["total"] = grouped.size()
+            stats_by_arm.update(counts.to_dict("index"))
+            engagement_data = []
+
         for record in engagement_data:
             arm = record["experiment_arm"]
             stats_by_arm[arm]["total"] += 1
@@ -482,8 +408,10 @@ class ExperimentationAgent:
         segment_breakdown = self._calculate_segment_breakdown(engagement_data)
 
         # Get primary metric from config
-        primary_metric = self.config.get("experiment", {}).get("metrics", {}).get("primary", "open_rate")
-        
+        primary_metric = (
+            self.config.get("experiment", {}).get("metrics", {}).get("primary", "open_rate")
+        )
+
         experiment_metrics = {
             "experiment_id": self.experiment_id,
             "experiment_name": self.config.get("experiment", {}).get("name", "personalization_poc"),
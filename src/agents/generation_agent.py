@@ -8,12 +8,27 @@ personalized message variants with proper citations to approved content.
 
 import os
 import re
+import bisect
+import hashlib
+import inspect
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
 
 from src.integrations.azure_openai import AzureOpenAIClient
+from src.integrations.azure_openai_batch import (
+    RESULT_BATCH_STATUSES,
+    AzureOpenAIBatchBackend,
+    BatchBackend,
+    build_batch_request,
+    collect_batch_results,
+    wait_for_batch,
+    write_batch_files,
+)
+from src.agents.prompt_budgeter import PromptBudgeter, format_snippet
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -24,6 +39,229 @@ MAX_SUBJECT_LENGTH = 60
 MIN_BODY_WORDS = 150
 MAX_BODY_WORDS = 250
 MIN_CITATIONS = 1
+MAX_STREAM_ATTEMPTS = 3
+
+# Citation patterns: extraction ([Source: Document Title, Section]) and format check
+CITATION_PATTERN = re.compile(r"\[Source:\s*([^,]+),\s*([^\]]+)\]", re.IGNORECASE)
+CITATION_FORMAT_PATTERN = re.compile(r"\[Source:[^\]]+\]")
+
+# Prompt layouts: "template" interleaves segment fields into the template,
+# "cache_prefix" puts all static content first for provider-side prompt caching
+PROMPT_LAYOUTS = ["template", "cache_prefix"]
+SYSTEM_MESSAGE = "You are an expert marketing copywriter creating personalized email messages."
+
+
+def _accepts_keyword(method: Any, name: str) -> bool:
+    """
+    Check whether a callable accepts a keyword argument.
+
+    Args:
+        method: Callable to inspect
+        name: Keyword argument name
+
+    Returns:
+        True if the callable has the parameter or accepts **kwargs
+    """
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        parameter.name == name or parameter.kind is inspect.Parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+class StreamingConstraintMonitor:
+    """
+    Incremental parser that checks hard variant constraints while streaming.
+
+    Text deltas are fed in as they arrive. Subject and body are tracked with the
+    same "Subject:" / "Body:" markers used by _parse_generated_message, and a
+    violation reason is returned as soon as the subject exceeds
+    MAX_SUBJECT_LENGTH or the body exceeds MAX_BODY_WORDS. Both can only grow
+    as more text arrives, so an early violation is final.
+    """
+
+    def __init__(
+        self, max_subject_length: int = MAX_SUBJECT_LENGTH, max_body_words: int = MAX_BODY_WORDS
+    ):
+        self.max_subject_length = max_subject_length
+        self.max_body_words = max_body_words
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget streamed text, e.g. when the stream is restarted by a retry."""
+        self._section = None
+        self._pending = ""
+        self._body_words = 0
+        self.violation = None
+
+    def feed(self, delta: str) -> Optional[str]:
+        """
+        Consume a text delta and report the first hard-constraint violation.
+
+        Args:
+            delta: Newly streamed text
+
+        Returns:
+            Violation reason, or None while the stream is still within limits
+        """
+        if self.violation:
+            return self.violation
+
+        self._pending += delta
+
+        # Process completed lines
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            self.violation = self._check_line(line, complete=True)
+            if self.violation:
+                return self.violation
+
+        # Check the partial line in progress
+        self.violation = self._check_line(self._pending, complete=False)
+        return self.violation
+
+    def _check_line(self, line: str, complete: bool) -> Optional[str]:
+        """Check one (possibly partial) line against the constraints."""
+        stripped = line.strip()
+        lowered = stripped.lower()
+
+        if lowered.startswith("subject:"):
+            subject = stripped[8:].strip()
+            if complete:
+                self._section = "subject"
+            if len(subject) > self.max_subject_length:
+                return f"Subject too long: {len(subject)}+ chars (max {self.max_subject_length})"
+            return None
+
+        if lowered.startswith("body:"):
+            stripped = stripped[5:]
+            if complete:
+                self._section = "body"
+        elif self._section != "body":
+            return None
+
+        words = len(stripped.split())
+        # The last word of a partial line may still be growing
+        if not complete and line and not line[-1].isspace():
+            words = max(0, words - 1)
+
+        total_words = self._body_words + words
+        if complete:
+            self._body_words = total_words
+
+        if total_words > self.max_body_words:
+            return f"Body too long: {total_words}+ words (max {self.max_body_words})"
+        return None
+
+
+class TitleIndex:
+    """
+    Per-request index for mapping citation titles to content documents.
+
+    A citation title matches the first document (in retrieval order) whose
+    lowercased title contains it or is contained in it. Exact titles are served
+    from a dict, titles contained in the citation are found with an Aho-Corasick
+    automaton over all document titles, and citations contained in a title are
+    found with a single substring search over the joined titles.
+    """
+
+    _SEPARATOR = "\x00"
+
+    def __init__(self, content: List[Dict[str, Any]]):
+        self.content = content
+        titles = [(doc.get("title") or "").lower() for doc in content]
+        self._titles = titles
+
+        self._exact: Dict[str, int] = {}
+        for i, title in enumerate(titles):
+            self._exact.setdefault(title, i)
+
+        # Joined titles for "citation inside title" lookups
+        self._joined = self._SEPARATOR.join(titles)
+        self._offsets = []
+        offset = 0
+        for title in titles:
+            self._offsets.append(offset)
+            offset += len(title) + 1
+
+        self._build_automaton(titles)
+
+    def _build_automaton(self, titles: List[str]) -> None:
+        """Build the Aho-Corasick automaton over document titles."""
+        no_match = len(titles)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[int] = [no_match]
+
+        for i, title in enumerate(titles):
+            node = 0
+            for ch in title:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(no_match)
+                node = nxt
+            self._out[node] = min(self._out[node], i)
+
+        # Breadth-first failure links; each node keeps the earliest document
+        # among all titles that end at it or at any of its suffixes
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = min(self._out[nxt], self._out[self._fail[nxt]])
+                queue.append(nxt)
+
+    def lookup(self, title_part: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the first document matching a citation title.
+
+        Args:
+            title_part: Title text from the citation
+
+        Returns:
+            Matching content document, or None
+        """
+        if not self.content:
+            return None
+
+        query = title_part.lower()
+        best = self._exact.get(query, len(self._titles))
+        if best == 0:
+            return self.content[0]
+
+        # Document titles contained in the citation title
+        node = 0
+        best = min(best, self._out[0])
+        for ch in query:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node] < best:
+                best = self._out[node]
+
+        # Citation title contained in a document title
+        pos = self._joined.find(query)
+        while pos != -1:
+            idx = bisect.bisect_right(self._offsets, pos) - 1
+            if idx >= best:
+                break
+            if pos + len(query) <= self._offsets[idx] + len(self._titles[idx]):
+                best = idx
+                break
+            pos = self._joined.find(query, pos + 1)
+
+        return self.content[best] if best < len(self.content) else None
 
 
 class MessageGenerator:
@@ -34,15 +272,50 @@ class MessageGenerator:
     using Azure OpenAI with proper citations to approved content.
     """
 
-    def __init__(self, openai_client: Optional[AzureOpenAIClient] = None):
+    def __init__(
+        self,
+        openai_client: Optional[AzureOpenAIClient] = None,
+        streaming: bool = False,
+        max_stream_attempts: int = MAX_STREAM_ATTEMPTS,
+        prompt_layout: str = "template",
+        snippet_token_budget: Optional[int] = None,
+    ):
         """
         Initialize the message generator.
 
         Args:
             openai_client: Optional Azure OpenAI client. If None, creates default client.
+            streaming: Stream completions and abort as soon as a hard constraint
+                (subject length, body word count) is violated
+            max_stream_attempts: Attempts per variant in streaming mode before
+                keeping the last (invalid) result
+            prompt_layout: "template" (default) or "cache_prefix" to place the
+                system message, template, tone instructions and approved content
+                before any per-segment fields so providers can reuse the prefix
+            snippet_token_budget: Opt-in input-token budget for retrieved snippets
+                (e.g. DEFAULT_SNIPPET_TOKEN_BUDGET); snippets are then deduplicated and
+                packed by relevance score. None (default) keeps retrieved content as is
+
+        Raises:
+            ValueError: If prompt_layout is not recognised or the budget is not positive
         """
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(
+                f"Invalid prompt layout: {prompt_layout}. Must be one of {PROMPT_LAYOUTS}"
+            )
+
         self.client = openai_client or AzureOpenAIClient()
         self.tones = VARIANT_TONES
+        self.streaming = streaming
+        self.max_stream_attempts = max(1, max_stream_attempts)
+        self.prompt_layout = prompt_layout
+        self.prompt_budgeter = (
+            PromptBudgeter(token_budget=snippet_token_budget)
+            if snippet_token_budget is not None
+            else None
+        )
+        # Rendered static template + tone instructions, keyed by tone
+        self._static_templates: Dict[str, str] = {}
         # Calculate project root once during initialization
         self.project_root = os.path.dirname(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -111,22 +384,239 @@ class MessageGenerator:
         # Generate unique variant ID
         variant_id = f"VAR_{uuid4().hex[:8].upper()}"
 
-        # Load and format prompt template
-        prompt = self._build_prompt(segment, content, tone)
+        # Pack retrieved snippets into the token budget (if set), then format the prompt
+        content, budget_stats = self._pack_content(content)
+        prompt, completion_kwargs = self._prepare_prompt(segment, content, tone)
+
+        # Label usage for per-segment/tone breakdowns, if the client supports it
+        completion_method = (
+            self.client.generate_completion_stream
+            if self.streaming
+            else self.client.generate_completion
+        )
+        if _accepts_keyword(completion_method, "usage_labels"):
+            completion_kwargs["usage_labels"] = {"segment": segment["name"], "tone": tone}
 
         # Generate completion using Azure OpenAI
         start_time = datetime.utcnow()
-        response = self.client.generate_completion(
-            prompt=prompt,
-            system_message="You are an expert marketing copywriter creating personalized email messages.",
-            max_tokens=500,  # Allow enough tokens for subject + body + citations
+        system_message = SYSTEM_MESSAGE
+        streaming_stats = None
+        if self.streaming:
+            response, streaming_stats = self._generate_streaming(
+                prompt, system_message, **completion_kwargs
+            )
+        else:
+            response = self.client.generate_completion(
+                prompt=prompt,
+                system_message=system_message,
+                max_tokens=500,  # Allow enough tokens for subject + body + citations
+                **completion_kwargs,
+            )
+
+        variant = self._assemble_variant(variant_id, segment, content, tone, response, start_time)
+        if budget_stats is not None:
+            variant["generation_metadata"]["prompt_budget"] = budget_stats
+
+        if streaming_stats is not None:
+            variant["generation_metadata"]["streaming"] = streaming_stats
+
+        logger.info(
+            f"Generated variant {variant_id} ({tone}) - {len(variant['citations'])} citations"
+        )
+        return variant
+
+    def generate_variants_batch(
+        self,
+        segment_contents: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+        backend: Optional[BatchBackend] = None,
+        batch_dir: str = "data/batches",
+        poll_interval: float = 30.0,
+        timeout: float = 86400.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate variants for many segments through offline batch jobs.
+
+        All (segment, tone) requests are serialized to JSONL batch files (split to
+        stay within the Batch API per-file limits), submitted through the batch
+        backend and polled until they finish. Results are parsed, cited and
+        validated exactly like generate_variant(). An expired batch contributes the
+        requests it completed, and a failed or cancelled batch file is logged and
+        skipped so the other files' results are kept.
+
+        Args:
+            segment_contents: List of (segment, retrieved content) pairs
+            backend: Batch backend (defaults to the Azure OpenAI Batch API)
+            batch_dir: Directory for batch request files
+            poll_interval: Seconds between status polls
+            timeout: Maximum seconds to wait for all batches
+
+        Returns:
+            List of generated variants (failed and unfinished requests are skipped)
+
+        Raises:
+            ValueError: If a segment or its content is invalid
+            RuntimeError: If every batch job fails or is cancelled
+        """
+        if backend is None:
+            backend = AzureOpenAIBatchBackend(self.client.client)
+
+        requests = []
+        pending = {}
+        for segment, content in segment_contents:
+            if not segment or "name" not in segment:
+                raise ValueError("Segment must contain 'name' field")
+            if not content:
+                raise ValueError(f"Content cannot be empty for segment '{segment['name']}'")
+
+            content, budget_stats = self._pack_content(content)
+            for tone in self.tones:
+                variant_id = f"VAR_{uuid4().hex[:8].upper()}"
+                prompt, completion_kwargs = self._prepare_prompt(segment, content, tone)
+                requests.append(
+                    build_batch_request(
+                        custom_id=variant_id,
+                        model=self.client.deployment_name,
+                        prompt=prompt,
+                        system_message=SYSTEM_MESSAGE,
+                        max_tokens=500,
+                        prompt_cache_key=completion_kwargs.get("prompt_cache_key"),
+                    )
+                )
+                pending[variant_id] = (segment, content, tone, budget_stats)
+
+        start_time = datetime.utcnow()
+        input_path = os.path.join(
+            batch_dir, f"generation_{start_time.strftime('%Y%m%dT%H%M%S')}.jsonl"
+        )
+        input_paths = write_batch_files(requests, input_path)
+
+        batch_ids = [backend.submit(path) for path in input_paths]
+        logger.info(
+            f"Submitted {len(batch_ids)} generation batch(es) with {len(requests)} requests"
+        )
+
+        deadline = time.time() + timeout
+        results = {}
+        result_batches = {}
+        failed_batches = {}
+        for batch_id in batch_ids:
+            status = wait_for_batch(
+                backend,
+                batch_id,
+                poll_interval=poll_interval,
+                timeout=max(0.0, deadline - time.time()),
+            )
+            if status not in RESULT_BATCH_STATUSES:
+                logger.error(f"Generation batch {batch_id} ended with status: {status}")
+                failed_batches[batch_id] = status
+                continue
+
+            batch_results = collect_batch_results(
+                backend.get_results(batch_id),
+                model=self.client.deployment_name,
+                cost_fn=getattr(self.client, "calculate_cost", None),
+            )
+            if status == "expired":
+                logger.warning(
+                    f"Generation batch {batch_id} expired; keeping {len(batch_results)} "
+                    "completed requests"
+                )
+            results.update(batch_results)
+            result_batches.update(dict.fromkeys(batch_results, batch_id))
+
+        if len(failed_batches) == len(batch_ids):
+            raise RuntimeError(f"All generation batches failed: {failed_batches}")
+
+        variants = []
+        for variant_id, (segment, content, tone, budget_stats) in pending.items():
+            response = results.get(variant_id)
+            if response is None or "error" in response:
+                error = response.get("error") if response else "missing from batch output"
+                logger.error(f"Batch request {variant_id} ({tone}) failed: {error}")
+                continue
+
+            variant = self._assemble_variant(
+                variant_id, segment, content, tone, response, start_time
+            )
+            variant["generation_metadata"]["batch_id"] = result_batches[variant_id]
+            if budget_stats is not None:
+                variant["generation_metadata"]["prompt_budget"] = budget_stats
+            variants.append(variant)
+
+        logger.info(
+            f"{len(batch_ids)} batch(es) produced {len(variants)}/{len(requests)} variants "
+            f"for {len(segment_contents)} segments"
         )
+        return variants
+
+    def _pack_content(
+        self, content: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Pack retrieved snippets into the snippet token budget, if one is set.
+
+        Args:
+            content: Retrieved content snippets
 
+        Returns:
+            Tuple of (content for the prompt, budget statistics or None when
+            budgeting is off and content is kept in retrieval order)
+        """
+        if self.prompt_budgeter is None:
+            return content, None
+        return self.prompt_budgeter.pack(content)
+
+    def _prepare_prompt(
+        self, segment: Dict[str, Any], content: List[Dict[str, Any]], tone: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the prompt and extra completion arguments for the prompt layout.
+
+        Args:
+            segment: Segment information
+            content: Retrieved content snippets
+            tone: Variant tone
+
+        Returns:
+            Tuple of (prompt, completion keyword arguments)
+        """
+        completion_kwargs = {}
+        if self.prompt_layout == "cache_prefix":
+            static_prefix, dynamic_suffix = self._build_prompt_parts(segment, content, tone)
+            prompt = f"{static_prefix}\n\n{dynamic_suffix}"
+            completion_kwargs["prompt_cache_key"] = self._prompt_cache_key(static_prefix)
+        else:
+            prompt = self._build_prompt(segment, content, tone)
+        return prompt, completion_kwargs
+
+    def _assemble_variant(
+        self,
+        variant_id: str,
+        segment: Dict[str, Any],
+        content: List[Dict[str, Any]],
+        tone: str,
+        response: Dict[str, Any],
+        start_time: datetime,
+    ) -> Dict[str, Any]:
+        """
+        Parse, cite and validate a completion into a variant object.
+
+        Args:
+            variant_id: Variant identifier
+            segment: Segment information
+            content: Retrieved content snippets
+            tone: Variant tone
+            response: Completion response dictionary
+            start_time: Generation start time
+
+        Returns:
+            Variant dictionary
+        """
         # Parse the generated message
         parsed_message = self._parse_generated_message(response["text"])
 
-        # Extract citations from the body
-        citations = self.extract_citations(parsed_message["body"], content)
+        # Extract citations and check citation format in one pass over the body
+        citations, citation_format_found = self._scan_citations(parsed_message["body"], content)
 
         # Validate the variant
         validation_result = self.validate_variant_format(
@@ -134,14 +624,15 @@ class MessageGenerator:
                 "subject": parsed_message["subject"],
                 "body": parsed_message["body"],
                 "citations": citations,
-            }
+            },
+            citation_format_found=citation_format_found,
         )
 
         if not validation_result["valid"]:
             logger.warning(f"Generated variant failed validation: {validation_result['errors']}")
 
         # Create variant object
-        variant = {
+        return {
             "variant_id": variant_id,
             "segment": segment["name"],
             "subject": parsed_message["subject"],
@@ -152,17 +643,68 @@ class MessageGenerator:
             "generation_metadata": {
                 "model": response.get("model", "gpt-4o-mini"),
                 "tokens_input": response.get("input_tokens", 0),
+                "tokens_cached_input": response.get("cached_input_tokens", 0),
                 "tokens_output": response.get("output_tokens", 0),
                 "tokens_total": response.get("tokens_used", 0),
                 "cost_usd": response.get("cost_usd", 0.0),
                 "duration_ms": response.get("duration_ms", 0),
                 "prompt_template": f"generation_prompt_{tone}",
+                "prompt_layout": self.prompt_layout,
             },
             "validation": validation_result,
         }
 
-        logger.info(f"Generated variant {variant_id} ({tone}) - {len(citations)} citations")
-        return variant
+    def _generate_streaming(self, prompt: str, system_message: str, **completion_kwargs) -> tuple:
+        """
+        Generate a completion in streaming mode, retrying on early aborts.
+
+        Args:
+            prompt: Formatted generation prompt
+            system_message: System message for the model
+            **completion_kwargs: Extra arguments for generate_completion_stream
+
+        Returns:
+            Tuple of (final completion response, streaming statistics)
+        """
+        stats = {
+            "attempts": 0,
+            "aborted_attempts": 0,
+            "abort_reasons": [],
+            "time_to_first_token_ms": None,
+            "max_tokens_saved": 0,
+        }
+
+        # Client-side retries restart the stream, so the monitor must start over too
+        resets_monitor = _accepts_keyword(self.client.generate_completion_stream, "on_stream_start")
+
+        response = None
+        for attempt in range(1, self.max_stream_attempts + 1):
+            monitor = StreamingConstraintMonitor()
+            if resets_monitor:
+                completion_kwargs["on_stream_start"] = monitor.reset
+            response = self.client.generate_completion_stream(
+                prompt=prompt,
+                system_message=system_message,
+                max_tokens=500,
+                should_abort=monitor.feed,
+                **completion_kwargs,
+            )
+
+            stats["attempts"] = attempt
+            stats["time_to_first_token_ms"] = response.get("time_to_first_token_ms")
+            stats["max_tokens_saved"] += response.get("max_tokens_saved", 0)
+
+            if not response.get("aborted"):
+                break
+
+            stats["aborted_attempts"] += 1
+            stats["abort_reasons"].append(response.get("abort_reason"))
+            logger.warning(
+                f"Streaming attempt {attempt}/{self.max_stream_attempts} aborted: "
+                f"{response.get('abort_reason')}"
+            )
+
+        return response, stats
 
     def load_prompt_template(self, template_path: str, tone: str) -> str:
         """
@@ -215,46 +757,69 @@ class MessageGenerator:
         Returns:
             List of citation objects with document metadata
         """
-        citations = []
+        citations, _ = self._scan_citations(body, content)
+        return citations
 
-        # Regex pattern to match citation format: [Source: Document Title, Section]
-        citation_pattern = r"\[Source:\s*([^,]+),\s*([^\]]+)\]"
+    def _scan_citations(
+        self, body: str, content: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Extract citations and check citation formatting in one pass over the body.
+
+        Args:
+            body: Message body text
+            content: Retrieved content snippets for mapping
 
-        matches = re.finditer(citation_pattern, body, re.IGNORECASE)
+        Returns:
+            Tuple of (citation objects, whether a properly formatted citation exists)
+        """
+        citations = []
+        format_found = False
+        index = TitleIndex(content)
 
-        for match in matches:
+        for match in CITATION_PATTERN.finditer(body):
             title_part = match.group(1).strip()
             section_part = match.group(2).strip()
 
+            # A case-sensitive "[Source:...]" without inner brackets is also a
+            # format-pattern match, so the second regex pass can be skipped
+            citation_text = match.group(0)
+            if (
+                not format_found
+                and citation_text.startswith("[Source:")
+                and "]" not in citation_text[8:-1]
+            ):
+                format_found = True
+
             # Find matching content document
-            matched_doc = None
-            for doc in content:
-                if (
-                    doc.get("title", "").lower() in title_part.lower()
-                    or title_part.lower() in doc.get("title", "").lower()
-                ):
-                    matched_doc = doc
-                    break
+            matched_doc = index.lookup(title_part)
 
             citation = {
                 "document_id": matched_doc.get("document_id") if matched_doc else "unknown",
                 "title": matched_doc.get("title") if matched_doc else title_part,
                 "paragraph_index": matched_doc.get("paragraph_index", 0) if matched_doc else 0,
                 "text_snippet": section_part,
-                "citation_text": match.group(0),
+                "citation_text": citation_text,
             }
 
             citations.append(citation)
 
+        if not format_found:
+            format_found = CITATION_FORMAT_PATTERN.search(body) is not None
+
         logger.debug(f"Extracted {len(citations)} citations from message body")
-        return citations
+        return citations, format_found
 
-    def validate_variant_format(self, variant: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_variant_format(
+        self, variant: Dict[str, Any], citation_format_found: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Validate variant format and constraints.
 
         Args:
             variant: Variant dictionary with subject, body, citations
+            citation_format_found: Precomputed citation format check from
+                _scan_citations (re-scans the body if None)
 
         Returns:
             Validation result with valid flag and error messages
@@ -287,8 +852,9 @@ class MessageGenerator:
             errors.append(f"Insufficient citations: {len(citations)} (min {MIN_CITATIONS})")
 
         # Check for citation format in body
-        citation_pattern = r"\[Source:[^\]]+\]"
-        if not re.search(citation_pattern, body):
+        if citation_format_found is None:
+            citation_format_found = CITATION_FORMAT_PATTERN.search(body) is not None
+        if not citation_format_found:
             errors.append("No properly formatted citations found in body")
 
         return {
@@ -325,10 +891,7 @@ class MessageGenerator:
         # Format retrieved content snippets
         content_snippets = []
         for i, doc in enumerate(content, 1):
-            snippet_text = (
-                f"{i}. [{doc.get('document_id')}] {doc.get('title')}:\n{doc.get('snippet')}"
-            )
-            content_snippets.append(snippet_text)
+            content_snippets.append(format_snippet(i, doc))
 
         retrieved_snippets = "\n\n".join(content_snippets)
 
@@ -342,6 +905,70 @@ class MessageGenerator:
 
         return formatted_prompt
 
+    def _build_prompt_parts(
+        self, segment: Dict[str, Any], content: List[Dict[str, Any]], tone: str
+    ) -> Tuple[str, str]:
+        """
+        Build a cache-friendly prompt split into a static prefix and dynamic suffix.
+
+        The prefix holds the base template, tone instructions and the approved
+        content block in a byte-identical order for a given tone and content set.
+        Segment and customer fields are only rendered into the suffix.
+
+        Args:
+            segment: Segment information
+            content: Retrieved content snippets
+            tone: Variant tone
+
+        Returns:
+            Tuple of (static prefix, dynamic suffix)
+        """
+        if tone not in self._static_templates:
+            base_template_path = os.path.join(
+                self.project_root, "config/prompts/generation_prompt.txt"
+            )
+            template = self.load_prompt_template(base_template_path, tone)
+            self._static_templates[tone] = template.format(
+                segment_name="(see CUSTOMER CONTEXT below)",
+                segment_features="(see CUSTOMER CONTEXT below)",
+                retrieved_snippets="(see APPROVED CONTENT TO REFERENCE below)",
+                tone=tone.title(),
+            )
+
+        # Format retrieved content snippets
+        content_snippets = []
+        for i, doc in enumerate(content, 1):
+            content_snippets.append(format_snippet(i, doc))
+
+        static_prefix = (
+            f"{self._static_templates[tone]}\n\n"
+            f"APPROVED CONTENT TO REFERENCE:\n" + "\n\n".join(content_snippets)
+        )
+
+        # Format segment and customer fields
+        segment_features = segment.get("features", {})
+        features_text = ", ".join([f"{k}: {v}" for k, v in segment_features.items()])
+        dynamic_suffix = (
+            f"CUSTOMER CONTEXT:\n"
+            f"CUSTOMER SEGMENT: {segment.get('name', 'Unknown')}\n"
+            f"SEGMENT CHARACTERISTICS: {features_text}"
+        )
+
+        return static_prefix, dynamic_suffix
+
+    def _prompt_cache_key(self, static_prefix: str) -> str:
+        """
+        Derive a stable prompt cache key from the system message and static prefix.
+
+        Args:
+            static_prefix: Static part of the prompt
+
+        Returns:
+            Short hex digest identifying the shared prefix
+        """
+        digest = hashlib.sha256(f"{SYSTEM_MESSAGE}\n\n{static_prefix}".encode("utf-8"))
+        return f"cpo-{digest.hexdigest()[:16]}"
+
     def _parse_generated_message(self, generated_text: str) -> Dict[str, str]:
         """
         Parse generated message to extract subject and body.
@@ -0,0 +1,250 @@
+"""
+Module: personalization_planner.py
+Purpose: Plan per-customer message generation with bucket-level deduplication.
+
+Per-customer personalization would naively need one LLM call per customer.
+This module buckets customers by the exact personalization inputs that reach
+the generation prompt (segment name plus quantized features), generates once
+per unique bucket and fans the resulting variants out to every customer in it,
+so generation cost scales with distinct inputs rather than head count.
+"""
+
+import bisect
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.agents.generation_agent import MessageGenerator
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Bin edges for numeric customer features (see data/raw/customers.csv)
+DEFAULT_FEATURE_BINS = {
+    "avg_order_value": [100.0, 200.0, 300.0],
+    "purchase_frequency": [4, 8, 12],
+    "last_engagement_days": [7, 30, 90],
+}
+DEFAULT_CATEGORICAL_FEATURES = ["tier"]
+
+
+class PersonalizationPlanner:
+    """
+    Planner that deduplicates per-customer generation requests.
+
+    Customers are grouped into buckets keyed by their segment and quantized
+    features. Each bucket maps to one generation request whose variants are
+    shared by every customer in the bucket.
+    """
+
+    def __init__(
+        self,
+        feature_bins: Optional[Dict[str, List[float]]] = None,
+        categorical_features: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the planner.
+
+        Args:
+            feature_bins: Mapping of numeric feature name to ascending bin edges
+            categorical_features: Feature names used verbatim in the bucket key
+        """
+        self.feature_bins = feature_bins if feature_bins is not None else DEFAULT_FEATURE_BINS
+        self.categorical_features = (
+            categorical_features
+            if categorical_features is not None
+            else DEFAULT_CATEGORICAL_FEATURES
+        )
+
+        for feature, edges in self.feature_bins.items():
+            if list(edges) != sorted(edges):
+                raise ValueError(f"Bin edges for '{feature}' must be in ascending order")
+
+    def quantize_features(self, customer: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Quantize a customer's features into the labels used in the prompt.
+
+        Args:
+            customer: Customer record
+
+        Returns:
+            Ordered dict of feature name to bin label
+        """
+        quantized = OrderedDict()
+
+        for feature, edges in self.feature_bins.items():
+            value = customer.get(feature)
+            if value is None or value != value:  # Missing or NaN
+                continue
+            quantized[feature] = self._bin_label(float(value), edges)
+
+        for feature in self.categorical_features:
+            value = customer.get(feature)
+            if value is None or value != value:
+                continue
+            quantized[feature] = str(value)
+
+        return quantized
+
+    def bucket_key(self, customer: Dict[str, Any]) -> Tuple:
+        """
+        Build the deduplication key for a customer.
+
+        Args:
+            customer: Customer record with 'segment'
+
+        Returns:
+            Hashable key of (segment, quantized feature items)
+        """
+        segment = customer.get("segment", "Unknown")
+        return (segment, tuple(self.quantize_features(customer).items()))
+
+    def plan(self, customers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Group customers into generation buckets.
+
+        Args:
+            customers: Customer records with 'customer_id' and 'segment'
+
+        Returns:
+            Plan with buckets and deduplication statistics
+
+        Raises:
+            ValueError: If a customer record is missing 'customer_id'
+        """
+        buckets: Dict[Tuple, Dict[str, Any]] = OrderedDict()
+
+        for customer in customers:
+            if "customer_id" not in customer:
+                raise ValueError("Customer must contain 'customer_id'")
+
+            key = self.bucket_key(customer)
+            bucket = buckets.get(key)
+            if bucket is None:
+                segment_name, feature_items = key
+                bucket = {
+                    "bucket_id": self._bucket_id(key),
+                    "segment": {"name": segment_name, "features": dict(feature_items)},
+                    "customer_ids": [],
+                }
+                buckets[key] = bucket
+            bucket["customer_ids"].append(customer["customer_id"])
+
+        total_customers = sum(len(b["customer_ids"]) for b in buckets.values())
+        unique_buckets = len(buckets)
+        dedup_ratio = total_customers / unique_buckets if unique_buckets else 0.0
+
+        logger.info(
+            f"Planned {unique_buckets} generation buckets for {total_customers} customers "
+            f"(dedup ratio {dedup_ratio:.1f}x)"
+        )
+
+        return {
+            "buckets": list(buckets.values()),
+            "total_customers": total_customers,
+            "unique_buckets": unique_buckets,
+            "dedup_ratio": round(dedup_ratio, 2),
+        }
+
+    def execute(
+        self,
+        plan: Dict[str, Any],
+        generator: MessageGenerator,
+        content_by_segment: Dict[str, List[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Generate variants once per bucket and fan them out to customers.
+
+        Args:
+            plan: Plan returned by plan()
+            generator: Message generator used for each bucket
+            content_by_segment: Retrieved content keyed by segment name
+
+        Returns:
+            Dict with generated variants, per-customer variant IDs by tone and
+            generation statistics
+        """
+        variants = []
+        customer_variants: Dict[str, Dict[str, str]] = {}
+        buckets_generated = 0
+        buckets_skipped = 0
+
+        for bucket in plan["buckets"]:
+            segment_info = bucket["segment"]
+            content = content_by_segment.get(segment_info["name"], [])
+            if not content:
+                logger.warning(
+                    f"No content available for {segment_info['name']}, "
+                    f"skipping bucket {bucket['bucket_id']}"
+                )
+                buckets_skipped += 1
+                continue
+
+            try:
+                bucket_variants = generator.generate_variants(segment_info, content)
+            except Exception as e:
+                logger.warning(f"Variant generation failed for bucket {bucket['bucket_id']}: {e}")
+                buckets_skipped += 1
+                continue
+
+            buckets_generated += 1
+            variants_by_tone = {}
+            for variant in bucket_variants:
+                variant["bucket_id"] = bucket["bucket_id"]
+                variant["customer_count"] = len(bucket["customer_ids"])
+                variants_by_tone[variant["tone"]] = variant["variant_id"]
+            variants.extend(bucket_variants)
+
+            for customer_id in bucket["customer_ids"]:
+                customer_variants[customer_id] = dict(variants_by_tone)
+
+        logger.info(
+            f"Generated {len(variants)} variants for {len(customer_variants)} customers "
+            f"from {buckets_generated} buckets"
+        )
+
+        return {
+            "variants": variants,
+            "customer_variants": customer_variants,
+            "statistics": {
+                "total_customers": plan["total_customers"],
+                "unique_buckets": plan["unique_buckets"],
+                "dedup_ratio": plan["dedup_ratio"],
+                "buckets_generated": buckets_generated,
+                "buckets_skipped": buckets_skipped,
+                "customers_covered": len(customer_variants),
+            },
+        }
+
+    def _bin_label(self, value: float, edges: List[float]) -> str:
+        """Map a numeric value to a human-readable bin label."""
+        idx = bisect.bisect_right(edges, value)
+        if idx == 0:
+            return f"<{edges[0]:g}"
+        if idx == len(edges):
+            return f">={edges[-1]:g}"
+        return f"{edges[idx - 1]:g}-{edges[idx]:g}"
+
+    def _bucket_id(self, key: Tuple) -> str:
+        """Derive a stable bucket ID from the bucket key."""
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:10].upper()
+        return f"BKT_{digest}"
+
+
+# Convenience functions for direct usage
+def plan_generation(
+    customers: List[Dict[str, Any]], feature_bins: Optional[Dict[str, List[float]]] = None
+) -> Dict[str, Any]:
+    """
+    Convenience function to plan deduplicated per-customer generation.
+
+    Args:
+        customers: Customer records with 'customer_id' and 'segment'
+        feature_bins: Optional numeric feature bin edges
+
+    Returns:
+        Generation plan with dedup statistics
+    """
+    planner = PersonalizationPlanner(feature_bins=feature_bins)
+    return planner.plan(customers)
@@ -0,0 +1,256 @@
+"""
+Module: prompt_budgeter.py
+Purpose: Token-aware packing of retrieved snippets into generation prompts.
+
+Retrieved snippets are deduplicated, ranked by relevance score and packed into a
+configurable input-token budget, so prompt size (and therefore latency and cost)
+stays predictable as retrieval returns more content.
+
+Token counts come from a local approximation of GPT-4o's o200k_base tokenizer that
+needs no network access. tiktoken is used instead when an encoding name is given
+and the encoding can be loaded.
+"""
+
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Default token budget for the approved content block of a prompt
+DEFAULT_SNIPPET_TOKEN_BUDGET = 1500
+# Word 3-gram Jaccard similarity at which two snippets count as duplicates
+DEFAULT_DEDUPE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+# Pre-tokenization close to the GPT-4o splitter: contractions, letter runs,
+# digit groups of up to three, punctuation runs and whitespace
+_PRETOKEN_PATTERN = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)\b| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+", re.IGNORECASE
+)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def format_snippet(index: int, doc: Dict[str, Any]) -> str:
+    """
+    Format one retrieved snippet as it appears in generation prompts.
+
+    Args:
+        index: 1-based position in the approved content block
+        doc: Content item with document_id, title and snippet
+
+    Returns:
+        Formatted snippet text
+    """
+    return f"{index}. [{doc.get('document_id')}] {doc.get('title')}:\n{doc.get('snippet')}"
+
+
+class TokenCounter:
+    """
+    Offline token counter.
+
+    The approximation splits text like the o200k_base pre-tokenizer and
+    charges one token per common word, with longer words costing an extra
+    token per four characters. It slightly overestimates English prose, which
+    keeps packed prompts safely inside their budget.
+    """
+
+    def __init__(self, encoding_name: Optional[str] = None):
+        """
+        Initialize the token counter.
+
+        Args:
+            encoding_name: Optional tiktoken encoding (e.g. "o200k_base"); falls back
+                to the local approximation if tiktoken or the encoding is unavailable
+        """
+        self._encoding = None
+        if encoding_name:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding {encoding_name} unavailable, approximating: {e}")
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from a real tokenizer."""
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Number of tokens
+        """
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+
+        tokens = 0
+        for piece in _PRETOKEN_PATTERN.findall(text):
+            stripped = piece.strip()
+            if not stripped:
+                tokens += 1
+            elif stripped[0].isalpha():
+                tokens += 1 if len(stripped) <= 7 else 1 + math.ceil((len(stripped) - 7) / 4)
+            elif stripped[0].isdigit():
+                tokens += 1
+            else:
+                tokens += math.ceil(len(stripped) / 2)
+        return tokens
+
+
+def _shingles(text: str) -> set:
+    """Word n-gram shingles of a text (single words for very short texts)."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {tuple(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def jaccard_similarity(a: set, b: set) -> float:
+    """
+    Jaccard similarity of two sets.
+
+    Args:
+        a: First set
+        b: Second set
+
+    Returns:
+        Similarity between 0 and 1
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PromptBudgeter:
+    """
+    Packs retrieved snippets into an input-token budget.
+
+    Snippets are ranked by relevance score, near-duplicates of higher-ranked
+    snippets are removed and the remainder is added greedily while it fits.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = DEFAULT_SNIPPET_TOKEN_BUDGET,
+        dedupe_threshold: float = DEFAULT_DEDUPE_THRESHOLD,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        """
+        Initialize the budgeter.
+
+        Args:
+            token_budget: Maximum tokens for the approved content block (None = unlimited)
+            dedupe_threshold: Similarity at or above which a snippet is a duplicate
+            token_counter: Token counter (default: offline TokenCounter)
+
+        Raises:
+            ValueError: If token_budget is not positive or the threshold is out of range
+        """
+        if token_budget is not None and token_budget <= 0:
+            raise ValueError("token_budget must be positive")
+        if not 0 < dedupe_threshold <= 1:
+            raise ValueError("dedupe_threshold must be in (0, 1]")
+
+        self.token_budget = token_budget
+        self.dedupe_threshold = dedupe_threshold
+        self.token_counter = token_counter or TokenCounter()
+
+    def pack(self, content: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Select the snippets to include in a prompt.
+
+        Args:
+            content: Retrieved content items (optionally with relevance_score)
+
+        Returns:
+            Tuple of (selected content in prompt order, budget statistics)
+        """
+        # Stable sort keeps retrieval order for equal or missing scores
+        ranked = sorted(
+            enumerate(content),
+            key=lambda item: (-(item[1].get("relevance_score") or 0.0), item[0]),
+        )
+
+        selected = []
+        selected_shingles = []
+        duplicates = 0
+        over_budget = 0
+        tokens_in = 0
+        tokens_used = 0
+
+        for _, doc in ranked:
+            cost = self.token_counter.count(format_snippet(len(selected) + 1, doc))
+            tokens_in += cost
+
+            shingles = _shingles(f"{doc.get('title', '')} {doc.get('snippet', '')}")
+            if any(
+                jaccard_similarity(shingles, kept) >= self.dedupe_threshold
+                for kept in selected_shingles
+            ):
+                duplicates += 1
+                continue
+
+            # Always keep the most relevant snippet so the prompt can be grounded
+            if (
+                self.token_budget is not None
+                and selected
+                and tokens_used + cost > self.token_budget
+            ):
+                over_budget += 1
+                continue
+
+            selected.append(doc)
+            selected_shingles.append(shingles)
+            tokens_used += cost
+
+        if self.token_budget is not None and tokens_used > self.token_budget:
+            logger.warning(
+                f"Top snippet alone uses {tokens_used} tokens, over budget of {self.token_budget}"
+            )
+
+        stats = {
+            "token_budget": self.token_budget,
+            "token_counter": "tiktoken" if self.token_counter.exact else "approximate",
+            "snippets_in": len(content),
+            "snippets_used": len(selected),
+            "duplicates_removed": duplicates,
+            "over_budget_dropped": over_budget,
+            "snippet_tokens_in": tokens_in,
+            "snippet_tokens_used": tokens_used,
+            "tokens_saved": tokens_in - tokens_used,
+        }
+
+        if duplicates or over_budget:
+            logger.debug(
+                f"Packed {len(selected)}/{len(content)} snippets ({tokens_used} tokens), "
+                f"{duplicates} duplicates, {over_budget} over budget"
+            )
+        return selected, stats
+
+
+# Convenience function
+def pack_snippets(
+    content: List[Dict[str, Any]], token_budget: Optional[int] = DEFAULT_SNIPPET_TOKEN_BUDGET
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Convenience function to pack snippets into a token budget.
+
+    Args:
+        content: Retrieved content items
+        token_budget: Maximum tokens for the approved content block
+
+    Returns:
+        Tuple of (selected content, budget statistics)
+    """
+    return PromptBudgeter(token_budget=token_budget).pack(content)
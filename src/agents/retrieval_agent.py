@@ -13,7 +13,8 @@ from datetime import datetime
 from azure.search.documents import SearchClient
 from azure.core.exceptions import AzureError
 
-from src.integrations.azure_search import get_search_client
+from src.integrations.azure_search import get_search_client, safety_filter
+from src.integrations.retry_policy import DEFAULT_RETRY_POLICY
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -23,6 +24,9 @@ DEFAULT_TOP_K = 5
 MIN_RELEVANCE_SCORE = 0.5
 MAX_SNIPPET_LENGTH = 200
 SNIPPET_WORD_LIMIT = 150  # Approximately 150-200 words
+# Highest index-time safety severity allowed for grounding sources (0-6 scale);
+# generated variants tend to inherit their sources' language
+MAX_SOURCE_SEVERITY = 2
 
 
 class ContentRetriever:
@@ -33,14 +37,26 @@ class ContentRetriever:
     from Azure AI Search based on customer segment characteristics.
     """
 
-    def __init__(self, search_client: Optional[SearchClient] = None):
+    def __init__(
+        self,
+        search_client: Optional[SearchClient] = None,
+        max_source_severity: Optional[int] = MAX_SOURCE_SEVERITY,
+        include_unscreened: bool = False,
+    ):
         """
         Initialize the content retriever.
 
         Args:
             search_client: Optional Azure Search client. If None, creates default client.
+            max_source_severity: Keep only documents whose index-time safety screening
+                scored at or below this severity (filtered server-side; documents whose
+                screening failed are excluded). None disables the filter.
+            include_unscreened: Also keep documents indexed without screening; only for
+                legacy indexes populated before index-time screening
         """
         self.client = search_client or get_search_client()
+        self.max_source_severity = max_source_severity
+        self.include_unscreened = include_unscreened
         logger.info("ContentRetriever initialized")
 
     def retrieve_content(
@@ -70,14 +86,27 @@ class ContentRetriever:
             query = self.construct_query_from_segment(segment)
             logger.debug(f"Constructed query: '{query}'")
 
-            # Perform search with semantic ranking
-            search_results = self.client.search(
-                search_text=query,
-                top=top_k,
-                query_type="semantic",
-                semantic_configuration_name="default",
-                select=["document_id", "title", "content", "category", "audience"],
-                include_total_count=True,
+            # Unsafe sources are excluded server-side, before ranking and top_k
+            search_kwargs = {}
+            if self.max_source_severity is not None:
+                search_kwargs["filter"] = safety_filter(
+                    self.max_source_severity, include_unscreened=self.include_unscreened
+                )
+
+            # Perform search with semantic ranking; results are fetched inside the
+            # retry policy because the SDK pages lazily
+            search_results = DEFAULT_RETRY_POLICY.call(
+                lambda: list(
+                    self.client.search(
+                        search_text=query,
+                        top=top_k,
+                        query_type="semantic",
+                        semantic_configuration_name="default",
+                        select=["document_id", "title", "content", "category", "audience"],
+                        include_total_count=True,
+                        **search_kwargs,
+                    )
+                )
             )
 
             # Process and format results
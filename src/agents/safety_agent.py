@@ -11,16 +11,50 @@ of all safety decisions for compliance purposes.
 import os
 import csv
 import logging
+import threading
+import time
 import yaml
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+from src.agents.audit_report import AuditReportIndex
+from src.agents.audit_store import AuditStore
+from src.agents.audit_writer import AuditLogWriter
+from src.agents.safety_cache import SafetyVerdictCache, cache_from_config
+from src.agents.safety_router import ROUTE_LOCAL_PASS, SafetyRouter, router_from_config
 from src.integrations.azure_content_safety import ContentSafetyClient, get_safety_client
+from src.integrations.local_content_safety import LocalSafetyAnalyzer
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Default cap on concurrent Content Safety calls in check_safety_batch
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# Audit backends selectable with safety_policy.audit_logging.format
+AUDIT_FORMATS = ["csv", "sqlite"]
+
+# Audit log columns (cache_hit and screening_route were added after the original 13)
+AUDIT_HEADERS = [
+    "timestamp",
+    "variant_id",
+    "customer_id",
+    "segment",
+    "status",
+    "hate_severity",
+    "violence_severity",
+    "self_harm_severity",
+    "sexual_severity",
+    "max_severity",
+    "threshold_used",
+    "blocked_categories",
+    "block_reason",
+    "cache_hit",
+    "screening_route",
+]
+
 
 class SafetyAgent:
     """
@@ -35,31 +69,74 @@ class SafetyAgent:
         safety_client: Optional[ContentSafetyClient] = None,
         config_path: str = "config/safety_thresholds.yaml",
         audit_log_path: str = "logs/safety_audit.log",
+        verdict_cache: Optional[SafetyVerdictCache] = None,
+        safety_router: Optional[SafetyRouter] = None,
     ):
         """
         Initialize the Safety Agent.
 
         Args:
-            safety_client: Azure Content Safety client (creates new if None)
+            safety_client: Content safety client (created from the config's analyzer
+                section if None: Azure by default, or LocalSafetyAnalyzer)
             config_path: Path to safety configuration file
             audit_log_path: Path to audit log file
+            verdict_cache: Verdict cache for repeated message bodies (built from the
+                config's verdict_cache section if None; disabled if not configured)
+            safety_router: Local pre-filter for two-tier screening (built from the
+                config's tiered_screening section if None; disabled if not configured)
         """
-        self.safety_client = safety_client or get_safety_client()
         self.config_path = config_path
         self.audit_log_path = audit_log_path
 
         # Load configuration
         self.config = self._load_config()
         self.threshold = self.config.get("safety_policy", {}).get("threshold", 4)
-
-        # Initialize audit log
-        self._initialize_audit_log()
+        self.batch_concurrency = self.config.get("safety_policy", {}).get(
+            "batch_concurrency", DEFAULT_BATCH_CONCURRENCY
+        )
+
+        # Azure Content Safety, or the local rule-based analyzer (safety_policy.analyzer)
+        analyzer_config = self.config.get("safety_policy", {}).get("analyzer", {}) or {}
+        self.safety_client = safety_client or get_safety_client(
+            analyzer_config.get("provider"),
+            analyzer_config.get("lexicon_path"),
+            block_threshold=self.threshold,
+            max_concurrency=self.batch_concurrency,
+        )
+        analyzer_version = (
+            self.safety_client.version
+            if isinstance(self.safety_client, LocalSafetyAnalyzer)
+            else None
+        )
+        self.verdict_cache = verdict_cache or cache_from_config(
+            self.config, config_path, self.threshold, analyzer_version
+        )
+        self.safety_router = safety_router or router_from_config(self.config)
+
+        # Initialize the audit trail (CSV log or indexed SQLite store)
+        audit_config = self.config.get("safety_policy", {}).get("audit_logging", {}) or {}
+        self.audit_format = audit_config.get("format", "csv")
+        if self.audit_format not in AUDIT_FORMATS:
+            raise ValueError(
+                f"Invalid audit log format: {self.audit_format}. Must be one of {AUDIT_FORMATS}"
+            )
+        self.audit_store = None
+        self.report_index = None
+        if self.audit_format == "sqlite":
+            self.audit_store = self._create_audit_store(audit_config)
+            self.audit_writer = self.audit_store
+        else:
+            self._initialize_audit_log()
+            self.audit_writer = self._create_audit_writer()
+            self.report_index = AuditReportIndex(audit_log_path)
 
         # Statistics tracking
         self.total_checks = 0
         self.total_passed = 0
         self.total_blocked = 0
         self.blocked_by_category = {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0}
+        # Guards statistics and audit log appends during batch screening
+        self._lock = threading.Lock()
 
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -92,27 +169,84 @@ class SafetyAgent:
 
         # Check if audit log exists and has headers
         if not os.path.exists(self.audit_log_path) or os.path.getsize(self.audit_log_path) == 0:
-            headers = [
-                "timestamp",
-                "variant_id",
-                "customer_id",
-                "segment",
-                "status",
-                "hate_severity",
-                "violence_severity",
-                "self_harm_severity",
-                "sexual_severity",
-                "max_severity",
-                "threshold_used",
-                "blocked_categories",
-                "block_reason",
-            ]
-
             with open(self.audit_log_path, "w", newline="") as f:
                 writer = csv.writer(f)
-                writer.writerow(headers)
+                writer.writerow(AUDIT_HEADERS)
 
             logger.info(f"Initialized audit log: {self.audit_log_path}")
+        else:
+            self._upgrade_audit_log()
+
+    def _create_audit_writer(self) -> AuditLogWriter:
+        """
+        Create the buffered audit writer from the audit_logging config section.
+
+        Returns:
+            AuditLogWriter for this agent's audit log
+        """
+        audit_config = self.config.get("safety_policy", {}).get("audit_logging", {}) or {}
+        buffer_config = audit_config.get("buffer", {}) or {}
+        rotation_config = audit_config.get("rotation", {}) or {}
+
+        return AuditLogWriter(
+            self.audit_log_path,
+            AUDIT_HEADERS,
+            max_buffer_rows=buffer_config.get("max_rows", 10000),
+            flush_rows=buffer_config.get("flush_rows", 500),
+            flush_interval=buffer_config.get("flush_interval_seconds", 1.0),
+            fsync=buffer_config.get("fsync", "on_flush"),
+            rotate_max_bytes=rotation_config.get("max_bytes"),
+            rotate_when=rotation_config.get("when"),
+        )
+
+    def _create_audit_store(self, audit_config: Dict[str, Any]) -> AuditStore:
+        """
+        Open the SQLite audit store from the audit_logging config section.
+
+        The store path is audit_logging.store_path, or the audit log path with a
+        .db extension.
+
+        Args:
+            audit_config: safety_policy.audit_logging section
+
+        Returns:
+            AuditStore for this agent's audit trail
+        """
+        buffer_config = audit_config.get("buffer", {}) or {}
+        store_path = (
+            audit_config.get("store_path") or f"{os.path.splitext(self.audit_log_path)[0]}.db"
+        )
+
+        return AuditStore(
+            store_path,
+            AUDIT_HEADERS,
+            flush_rows=buffer_config.get("flush_rows", 500),
+            flush_interval=buffer_config.get("flush_interval_seconds", 1.0),
+        )
+
+    def _upgrade_audit_log(self):
+        """Add columns (cache_hit, screening_route) missing from an older audit log."""
+        with open(self.audit_log_path, "r", newline="") as f:
+            headers = next(csv.reader(f), [])
+        if len(headers) >= len(AUDIT_HEADERS) or headers != AUDIT_HEADERS[: len(headers)]:
+            return
+        missing = [""] * (len(AUDIT_HEADERS) - len(headers))
+
+        # Rewrite once with the new header; existing rows get empty values for new columns
+        upgraded_path = f"{self.audit_log_path}.upgrade"
+        with open(self.audit_log_path, "r", newline="") as src, open(
+            upgraded_path, "w", newline=""
+        ) as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            next(reader)
+            writer.writerow(AUDIT_HEADERS)
+            for row in reader:
+                writer.writerow(row + missing)
+        os.replace(upgraded_path, self.audit_log_path)
+        logger.info(
+            f"Added columns {AUDIT_HEADERS[len(headers):]} to audit log: {self.audit_log_path}"
+        )
 
     def check_safety(self, variant: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -138,6 +272,9 @@ class SafetyAgent:
                 - blocked_categories: List of categories that exceeded threshold
                 - block_reason: Explanation if blocked
                 - checked_at: ISO timestamp of check
+                - cache_hit: Whether the verdict came from the verdict cache
+                - screening_route: Tiered screening route ("local_pass",
+                  "escalated_lexicon", "escalated_novel"; empty when not routed)
 
         Raises:
             ValueError: If variant is missing required fields
@@ -159,8 +296,30 @@ class SafetyAgent:
         logger.debug(f"Checking safety for variant {variant_id}")
 
         try:
-            # Analyze text with Azure Content Safety
-            safety_result = self.safety_client.analyze_text(text_to_analyze)
+            # Reuse the verdict for an identical body under the same policy
+            safety_result = None
+            if self.verdict_cache is not None:
+                safety_result = self.verdict_cache.get(text_to_analyze)
+            cache_hit = safety_result is not None
+
+            # Two-tier screening: clearly-safe text passes on the local classifier
+            screening_route = ""
+            if not cache_hit and self.safety_router is not None:
+                routing = self.safety_router.route(text_to_analyze)
+                screening_route = routing["route"]
+                if screening_route == ROUTE_LOCAL_PASS:
+                    safety_result = routing["analysis"]
+
+            if safety_result is None:
+                # Analyze text with Azure Content Safety
+                start_time = time.time()
+                safety_result = self.safety_client.analyze_text(text_to_analyze)
+                if self.safety_router is not None:
+                    self.safety_router.record_escalation(
+                        text_to_analyze, safety_result, time.time() - start_time
+                    )
+                if self.verdict_cache is not None:
+                    self.verdict_cache.put(text_to_analyze, safety_result)
 
             # Extract severity scores
             severity_scores = safety_result.get("severity_scores", {})
@@ -177,29 +336,22 @@ class SafetyAgent:
                 "max_severity": safety_result.get("max_severity", 0),
                 "threshold_used": self.threshold,
                 "checked_at": datetime.utcnow().isoformat(),
+                "cache_hit": cache_hit,
+                "screening_route": screening_route,
             }
 
             # Apply policy threshold
             policy_result = self.apply_policy_threshold(severity_scores, self.threshold)
             result.update(policy_result)
 
-            # Update statistics
-            self.total_checks += 1
-            if result["status"] == "pass":
-                self.total_passed += 1
-            else:
-                self.total_blocked += 1
-                # Track blocked categories
-                for category in result["blocked_categories"]:
-                    if category in self.blocked_by_category:
-                        self.blocked_by_category[category] += 1
-
-            # Log the decision
-            self._log_safety_decision(result)
+            # Update statistics and log the decision
+            self._record_result(result)
 
             logger.info(
                 f"Safety check complete for {variant_id}: {result['status']} "
-                f"(max severity: {result['max_severity']}, threshold: {self.threshold})"
+                f"(max severity: {result['max_severity']}, threshold: {self.threshold}"
+                f"{', cached' if cache_hit else ''}"
+                f"{f', {screening_route}' if screening_route else ''})"
             )
 
             return result
@@ -208,31 +360,122 @@ class SafetyAgent:
             # Fail closed - block on error
             logger.error(f"Safety check failed for variant {variant_id}: {e}")
 
-            error_result = {
-                "variant_id": variant_id,
-                "customer_id": variant.get("customer_id", ""),
-                "segment": variant.get("segment", ""),
-                "status": "block",
-                "hate_severity": 0,
-                "violence_severity": 0,
-                "self_harm_severity": 0,
-                "sexual_severity": 0,
-                "max_severity": 0,
-                "threshold_used": self.threshold,
-                "blocked_categories": ["api_error"],
-                "block_reason": f"Safety API error: {str(e)}",
-                "checked_at": datetime.utcnow().isoformat(),
-            }
-
-            # Update statistics
-            self.total_checks += 1
-            self.total_blocked += 1
+            error_result = self._error_result(variant, "api_error", f"Safety API error: {str(e)}")
 
-            # Log the error decision
-            self._log_safety_decision(error_result)
+            # Update statistics and log the error decision
+            self._record_result(error_result)
 
             return error_result
 
+    def check_safety_batch(
+        self,
+        variants: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Check many message variants with bounded parallelism.
+
+        All variants share this agent's configuration, audit log and safety client,
+        so throughput is bounded by the Content Safety service rather than per-call
+        setup. Semantics match check_safety: every variant gets an audit entry and
+        any failure blocks the variant (fail closed). Invalid variants are blocked
+        with an "invalid_input" category instead of raising.
+
+        Args:
+            variants: Message variants to check
+            max_concurrency: Maximum concurrent safety calls (default: batch_concurrency
+                from the safety config, or DEFAULT_BATCH_CONCURRENCY)
+            progress_callback: Optional callback invoked with each result as it completes
+
+        Returns:
+            List of safety check results in the same order as variants
+
+        Raises:
+            ValueError: If max_concurrency is not positive
+        """
+        max_concurrency = max_concurrency or self.batch_concurrency
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        if not variants:
+            return []
+
+        def screen(variant: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                result = self.check_safety(variant)
+            except Exception as e:
+                # Invalid input - block and audit rather than abort the batch
+                variant = variant if isinstance(variant, dict) else {}
+                logger.warning(f"Blocking invalid variant {variant.get('variant_id', '')}: {e}")
+                result = self._error_result(variant, "invalid_input", f"Invalid variant: {e}")
+                self._record_result(result)
+
+            if progress_callback is not None:
+                progress_callback(result)
+            return result
+
+        workers = min(max_concurrency, len(variants))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="safety") as pool:
+            results = list(pool.map(screen, variants))
+
+        blocked = sum(1 for result in results if result["status"] != "pass")
+        logger.info(
+            f"Batch safety check complete: {len(results) - blocked}/{len(results)} passed "
+            f"({workers} workers)"
+        )
+        return results
+
+    def _error_result(self, variant: Dict[str, Any], category: str, reason: str) -> Dict[str, Any]:
+        """
+        Build a fail-closed block result.
+
+        Args:
+            variant: Variant that could not be checked
+            category: Blocked category recorded for the failure
+            reason: Block reason
+
+        Returns:
+            Safety check result with status "block"
+        """
+        return {
+            "variant_id": variant.get("variant_id", ""),
+            "customer_id": variant.get("customer_id", ""),
+            "segment": variant.get("segment", ""),
+            "status": "block",
+            "hate_severity": 0,
+            "violence_severity": 0,
+            "self_harm_severity": 0,
+            "sexual_severity": 0,
+            "max_severity": 0,
+            "threshold_used": self.threshold,
+            "blocked_categories": [category],
+            "block_reason": reason,
+            "checked_at": datetime.utcnow().isoformat(),
+            "cache_hit": False,
+            "screening_route": "",
+        }
+
+    def _record_result(self, result: Dict[str, Any]):
+        """
+        Update session statistics and write the audit entry for a result.
+
+        Args:
+            result: Safety check result dictionary
+        """
+        with self._lock:
+            self.total_checks += 1
+            if result["status"] == "pass":
+                self.total_passed += 1
+            else:
+                self.total_blocked += 1
+                # Track blocked categories
+                for category in result["blocked_categories"]:
+                    if category in self.blocked_by_category:
+                        self.blocked_by_category[category] += 1
+
+            self._log_safety_decision(result)
+
     def apply_policy_threshold(
         self, severity_scores: Dict[str, int], threshold: int = None
     ) -> Dict[str, Any]:
@@ -274,125 +517,100 @@ class SafetyAgent:
 
     def _log_safety_decision(self, result: Dict[str, Any]):
         """
-        Log safety decision to CSV audit log.
+        Queue a safety decision for the audit trail.
+
+        Rows are written by the buffered audit writer; call flush_audit_log()
+        when they must be on disk.
 
         Args:
             result: Safety check result dictionary
         """
         try:
-            with open(self.audit_log_path, "a", newline="") as f:
-                writer = csv.writer(f)
+            # Format blocked categories as comma-separated string
+            blocked_categories_str = ",".join(result.get("blocked_categories", []))
+
+            row = [
+                result.get("checked_at", ""),
+                result.get("variant_id", ""),
+                result.get("customer_id", ""),
+                result.get("segment", ""),
+                result.get("status", ""),
+                result.get("hate_severity", 0),
+                result.get("violence_severity", 0),
+                result.get("self_harm_severity", 0),
+                result.get("sexual_severity", 0),
+                result.get("max_severity", 0),
+                result.get("threshold_used", self.threshold),
+                blocked_categories_str,
+                result.get("block_reason", ""),
+                result.get("cache_hit", False),
+                result.get("screening_route", ""),
+            ]
 
-                # Format blocked categories as comma-separated string
-                blocked_categories_str = ",".join(result.get("blocked_categories", []))
-
-                row = [
-                    result.get("checked_at", ""),
-                    result.get("variant_id", ""),
-                    result.get("customer_id", ""),
-                    result.get("segment", ""),
-                    result.get("status", ""),
-                    result.get("hate_severity", 0),
-                    result.get("violence_severity", 0),
-                    result.get("self_harm_severity", 0),
-                    result.get("sexual_severity", 0),
-                    result.get("max_severity", 0),
-                    result.get("threshold_used", self.threshold),
-                    blocked_categories_str,
-                    result.get("block_reason", ""),
-                ]
-
-                writer.writerow(row)
+            self.audit_writer.write(row)
 
         except Exception as e:
             logger.error(f"Failed to write to audit log: {e}")
 
+    def flush_audit_log(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all queued audit rows to disk.
+
+        Args:
+            timeout: Maximum seconds to wait (None = wait indefinitely)
+
+        Returns:
+            True if every queued row was written within the timeout
+        """
+        return self.audit_writer.flush(timeout)
+
+    def close(self):
+        """Flush and close the audit log writer and the verdict cache."""
+        self.audit_writer.close()
+        if self.verdict_cache is not None:
+            self.verdict_cache.close()
+
     def generate_audit_report(self) -> Dict[str, Any]:
         """
         Generate a comprehensive audit report from the safety log.
 
+        The log is streamed into a sidecar summary index, so only rows appended
+        since the previous report are read.
+
         Returns:
             Dict containing audit statistics and summary
         """
         try:
-            # Read audit log
-            audit_entries = []
-            if os.path.exists(self.audit_log_path):
-                with open(self.audit_log_path, "r") as f:
-                    reader = csv.DictReader(f)
-                    audit_entries = list(reader)
-
-            # Calculate statistics
-            total_entries = len(audit_entries)
-            passed_entries = [e for e in audit_entries if e["status"] == "pass"]
-            blocked_entries = [e for e in audit_entries if e["status"] == "block"]
-
-            pass_rate = (len(passed_entries) / max(1, total_entries)) * 100
-            block_rate = (len(blocked_entries) / max(1, total_entries)) * 100
-
-            # Category breakdown
-            category_blocks = {
-                "hate": 0,
-                "violence": 0,
-                "self_harm": 0,
-                "sexual": 0,
-                "api_error": 0,
-            }
+            # Make sure buffered decisions are included
+            self.flush_audit_log()
 
-            for entry in blocked_entries:
-                blocked_cats = entry.get("blocked_categories", "").split(",")
-                for cat in blocked_cats:
-                    cat = cat.strip()
-                    if cat in category_blocks:
-                        category_blocks[cat] += 1
-
-            # Severity distribution
-            severity_distribution = {"safe_0": 0, "low_2": 0, "medium_4": 0, "high_6": 0}
-
-            for entry in audit_entries:
-                max_sev = int(entry.get("max_severity", 0))
-                if max_sev == 0:
-                    severity_distribution["safe_0"] += 1
-                elif max_sev == 2:
-                    severity_distribution["low_2"] += 1
-                elif max_sev == 4:
-                    severity_distribution["medium_4"] += 1
-                elif max_sev == 6:
-                    severity_distribution["high_6"] += 1
-
-            # Recent activity (last 24 hours)
+            # Totals come from the SQLite store or the CSV log's sidecar index
             now = datetime.utcnow()
-            recent_entries = []
-            for entry in audit_entries:
-                try:
-                    entry_time = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00"))
-                    if (now - entry_time.replace(tzinfo=None)).total_seconds() < 86400:  # 24 hours
-                        recent_entries.append(entry)
-                except (ValueError, KeyError):
-                    continue
+            if self.audit_store is not None:
+                summary = self.audit_store.summarize(now)
+            else:
+                summary = self.report_index.summarize(now)
 
             report = {
                 "generated_at": now.isoformat(),
                 "audit_log_path": self.audit_log_path,
                 "threshold_used": self.threshold,
-                "total_checks": total_entries,
-                "passed_checks": len(passed_entries),
-                "blocked_checks": len(blocked_entries),
-                "pass_rate_percent": round(pass_rate, 2),
-                "block_rate_percent": round(block_rate, 2),
-                "category_blocks": category_blocks,
-                "severity_distribution": severity_distribution,
-                "recent_activity_24h": len(recent_entries),
+                **summary,
                 "session_statistics": {
                     "total_checks": self.total_checks,
                     "total_passed": self.total_passed,
                     "total_blocked": self.total_blocked,
                     "blocked_by_category": self.blocked_by_category.copy(),
                 },
+                "audit_writer": self.audit_writer.get_stats(),
+                "tiered_screening": (
+                    self.safety_router.get_stats() if self.safety_router is not None else None
+                ),
             }
 
             logger.info(
-                f"Generated audit report: {total_entries} total checks, {pass_rate:.1f}% pass rate"
+                f"Generated audit report: {summary['total_checks']} total checks, "
+                f"{summary['pass_rate_percent']:.1f}% pass rate"
             )
             return report
 
@@ -400,6 +618,39 @@ class SafetyAgent:
             logger.error(f"Failed to generate audit report: {e}")
             return {"error": str(e), "generated_at": datetime.utcnow().isoformat()}
 
+    def query_audit(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        time_range: Optional[tuple] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query safety decisions in the audit store.
+
+        Example: all blocks for a customer last quarter:
+            agent.query_audit({"customer_id": "C001", "status": "block"},
+                              (datetime(2025, 7, 1), datetime(2025, 10, 1)))
+
+        Args:
+            filters: Column filters (see audit_store.QUERY_FILTERS); values may be
+                single values or lists
+            time_range: (start, end) datetimes or ISO strings, end exclusive
+            limit: Maximum records returned (None = all)
+
+        Returns:
+            Audit records ordered by timestamp
+
+        Raises:
+            ValueError: If the audit trail is not stored in SQLite, or a filter is
+                not supported
+        """
+        if self.audit_store is None:
+            raise ValueError(
+                "query_audit requires safety_policy.audit_logging.format: sqlite "
+                "(migrate existing CSV logs with scripts/migrate_audit_log.py)"
+            )
+        return self.audit_store.query_audit(filters, time_range, limit)
+
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get current session statistics.
@@ -418,6 +669,12 @@ class SafetyAgent:
             "block_rate_percent": round(block_rate, 2),
             "blocked_by_category": self.blocked_by_category.copy(),
             "threshold_used": self.threshold,
+            "verdict_cache": (
+                self.verdict_cache.get_stats() if self.verdict_cache is not None else None
+            ),
+            "tiered_screening": (
+                self.safety_router.get_stats() if self.safety_router is not None else None
+            ),
         }
 
 
@@ -436,7 +693,33 @@ def check_safety(
         Dict containing safety check results
     """
     agent = SafetyAgent(config_path=config_path)
-    return agent.check_safety(variant)
+    try:
+        return agent.check_safety(variant)
+    finally:
+        agent.close()
+
+
+def check_safety_batch(
+    variants: List[Dict[str, Any]],
+    config_path: str = "config/safety_thresholds.yaml",
+    max_concurrency: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Check many message variants with one agent and client (convenience function).
+
+    Args:
+        variants: Message variants to check
+        config_path: Path to safety configuration file
+        max_concurrency: Maximum concurrent safety calls
+
+    Returns:
+        List of safety check results in input order
+    """
+    agent = SafetyAgent(config_path=config_path)
+    try:
+        return agent.check_safety_batch(variants, max_concurrency=max_concurrency)
+    finally:
+        agent.close()
 
 
 def apply_policy_threshold(severity_scores: Dict[str, int], threshold: int = 4) -> Dict[str, Any]:
@@ -451,7 +734,10 @@ def apply_policy_threshold(severity_scores: Dict[str, int], threshold: int = 4)
         Dict containing policy decision
     """
     agent = SafetyAgent()
-    return agent.apply_policy_threshold(severity_scores, threshold)
+    try:
+        return agent.apply_policy_threshold(severity_scores, threshold)
+    finally:
+        agent.close()
 
 
 def generate_audit_report(audit_log_path: str = "logs/safety_audit.log") -> Dict[str, Any]:
@@ -465,7 +751,10 @@ def generate_audit_report(audit_log_path: str = "logs/safety_audit.log") -> Dict
         Dict containing audit report
     """
     agent = SafetyAgent(audit_log_path=audit_log_path)
-    return agent.generate_audit_report()
+    try:
+        return agent.generate_audit_report()
+    finally:
+        agent.close()
 
 
 if __name__ == "__main__":
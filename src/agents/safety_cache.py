@@ -0,0 +1,266 @@
+"""
+Safety Verdict Cache Module
+
+This module caches Content Safety analysis results by a hash of the normalized message
+text, so identical bodies are screened once per safety policy instead of once per run
+and per customer.
+
+- In-memory LRU tier in front of an optional persistent SQLite tier
+- Keys include a policy version (threshold plus a hash of the safety config file), so
+  changing safety_thresholds.yaml invalidates every cached verdict automatically
+- Only successful analyses are cached; API errors are never cached so fail-closed
+  blocks are always retried
+- Message text itself is never stored, only its hash
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Fields of an analysis result that are cached (everything else is per-call metadata)
+CACHED_FIELDS = ["severity_scores", "max_severity"]
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize message text for cache lookups.
+
+    Applies Unicode NFC normalization, collapses whitespace runs and strips
+    the ends. Case is preserved.
+
+    Args:
+        text: Message text
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash normalized message text.
+
+    Args:
+        text: Message text
+
+    Returns:
+        SHA-256 hex digest of the normalized text
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def policy_version(config_path: str, threshold: int, analyzer: Optional[str] = None) -> str:
+    """
+    Build the policy version for cache keys.
+
+    Args:
+        config_path: Path to the safety configuration file
+        threshold: Severity threshold in effect
+        analyzer: Version of a non-Azure analyzer (e.g. LocalSafetyAnalyzer.version),
+            so its verdicts are never mixed with Azure verdicts
+
+    Returns:
+        Version string combining the threshold and a hash of the config file contents
+    """
+    with open(config_path, "rb") as f:
+        config_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    version = f"t{threshold}-{config_hash}"
+    return f"{version}-{analyzer}" if analyzer else version
+
+
+class SafetyVerdictCache:
+    """
+    Thread-safe two-tier cache of safety analysis results.
+
+    Lookups check the in-memory LRU first and fall back to SQLite; SQLite hits are
+    promoted into memory.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 10000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            version: Policy version (see policy_version()); entries from other
+                versions are never returned and are purged from SQLite on open
+            db_path: SQLite database path for the persistent tier (None = memory only)
+            max_memory_entries: Maximum entries in the in-memory LRU
+
+        Raises:
+            ValueError: If max_memory_entries is not positive
+        """
+        if max_memory_entries < 1:
+            raise ValueError("max_memory_entries must be at least 1")
+
+        self.version = version
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        """Open the SQLite tier and drop verdicts from other policy versions."""
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS safety_verdicts ("
+            "text_hash TEXT NOT NULL, "
+            "policy_version TEXT NOT NULL, "
+            "verdict TEXT NOT NULL, "
+            "created_at TEXT NOT NULL, "
+            "PRIMARY KEY (text_hash, policy_version))"
+        )
+        purged = self._conn.execute(
+            "DELETE FROM safety_verdicts WHERE policy_version != ?", (self.version,)
+        ).rowcount
+        self._conn.commit()
+
+        if purged:
+            logger.info(f"Purged {purged} safety verdicts from previous policy versions")
+        logger.info(f"Opened safety verdict cache: {db_path} (policy {self.version})")
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached analysis result for a message.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Cached analysis result (severity_scores, max_severity), or None on a miss
+        """
+        key = text_hash(text)
+
+        with self._lock:
+            verdict = self._memory.get(key)
+            if verdict is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return dict(verdict)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT verdict FROM safety_verdicts WHERE text_hash = ? AND policy_version = ?",
+                    (key, self.version),
+                ).fetchone()
+                if row is not None:
+                    verdict = json.loads(row[0])
+                    self._remember(key, verdict)
+                    self.stats["disk_hits"] += 1
+                    return dict(verdict)
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, text: str, analysis: Dict[str, Any]) -> None:
+        """
+        Cache a successful analysis result.
+
+        Args:
+            text: Message text
+            analysis: Analysis result from ContentSafetyClient.analyze_text()
+        """
+        key = text_hash(text)
+        verdict = {field: analysis[field] for field in CACHED_FIELDS if field in analysis}
+
+        with self._lock:
+            self._remember(key, verdict)
+            self.stats["stores"] += 1
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO safety_verdicts VALUES (?, ?, ?, ?)",
+                        (key, self.version, json.dumps(verdict), datetime.utcnow().isoformat()),
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist safety verdict: {e}")
+
+    def _remember(self, key: str, verdict: Dict[str, Any]) -> None:
+        """Insert into the LRU tier, evicting the least recently used entry (lock held)."""
+        self._memory[key] = verdict
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss counters, hit rate and entry counts
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM safety_verdicts"
+                ).fetchone()[0]
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / max(1, lookups), 4)
+        stats["policy_version"] = self.version
+        return stats
+
+    def close(self) -> None:
+        """Close the SQLite tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def cache_from_config(
+    config: Dict[str, Any], config_path: str, threshold: int, analyzer: Optional[str] = None
+) -> Optional[SafetyVerdictCache]:
+    """
+    Build a verdict cache from the safety configuration.
+
+    Reads the safety_policy.verdict_cache section (enabled, db_path,
+    max_memory_entries).
+
+    Args:
+        config: Loaded safety configuration
+        config_path: Path the configuration was loaded from
+        threshold: Severity threshold in effect
+        analyzer: Version of a non-Azure analyzer (see policy_version())
+
+    Returns:
+        SafetyVerdictCache, or None if caching is not enabled
+    """
+    cache_config = (config or {}).get("safety_policy", {}).get("verdict_cache", {}) or {}
+    if not cache_config.get("enabled", False):
+        return None
+
+    return SafetyVerdictCache(
+        version=policy_version(config_path, threshold, analyzer),
+        db_path=cache_config.get("db_path"),
+        max_memory_entries=cache_config.get("max_memory_entries", 10000),
+    )
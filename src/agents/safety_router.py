@@ -0,0 +1,246 @@
+"""
+Safety Router Module
+
+This module implements the routing tier of two-tier safety screening. A fast local
+classifier decides whether a message is clearly safe, in which case SafetyAgent passes
+it without calling Azure AI Content Safety; anything ambiguous or flagged is escalated.
+
+A message is routed to a local pass only when all checks agree:
+- The local lexicon (LocalSafetyAnalyzer) finds nothing in any category
+- Every word (other than plain numbers such as prices or dates) appeared in a message
+  that Azure scored 0 in every category, so words the small lexicon does not know are
+  never screened locally
+- Its hashed word shingles (feature hashing over overlapping word n-grams) were almost
+  all seen before in such messages, i.e. it is verified copy with at most a few
+  recombined phrases (e.g. a known name or product in a different template)
+
+The learned vocabulary and shingles start empty, so screening begins fully escalated
+and routes more locally as Azure verifies copy. Both margins (min_known_fraction and
+max_novel_shingles) fail closed: tightening them escalates more.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.integrations.local_content_safety import LocalSafetyAnalyzer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ROUTE_LOCAL_PASS = "local_pass"
+ROUTE_LEXICON_MATCH = "escalated_lexicon"
+ROUTE_NOVEL_TEXT = "escalated_novel"
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _words(text: str) -> list:
+    """Lowercased words of a text."""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def shingle_hashes(text: str, shingle_size: int = 3) -> set:
+    """
+    Hash the overlapping word n-grams of a text.
+
+    Args:
+        text: Message text
+        shingle_size: Words per shingle
+
+    Returns:
+        Set of shingle hashes (a text shorter than one shingle yields one hash)
+    """
+    words = _words(text)
+    if len(words) <= shingle_size:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i : i + shingle_size])) for i in range(len(words) - shingle_size + 1)}
+
+
+class SafetyRouter:
+    """
+    Thread-safe local pre-filter that routes clearly-safe text away from the Azure call.
+    """
+
+    def __init__(
+        self,
+        local_analyzer: Optional[LocalSafetyAnalyzer] = None,
+        min_known_fraction: float = 0.9,
+        max_novel_shingles: int = 6,
+        shingle_size: int = 3,
+        max_shingles: int = 1000000,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            local_analyzer: Lexicon analyzer (default: LocalSafetyAnalyzer())
+            min_known_fraction: Minimum fraction of a text's shingles that must come
+                from Azure-verified safe text for a local pass
+            max_novel_shingles: Maximum unverified shingles allowed for a local pass
+            shingle_size: Words per shingle
+            max_shingles: Cap on learned shingles (learning stops when reached)
+
+        Raises:
+            ValueError: If a margin is out of range
+        """
+        if not 0 < min_known_fraction <= 1:
+            raise ValueError("min_known_fraction must be in (0, 1]")
+        if max_novel_shingles < 0 or shingle_size < 1:
+            raise ValueError("max_novel_shingles must be >= 0 and shingle_size >= 1")
+
+        self.local_analyzer = local_analyzer or LocalSafetyAnalyzer()
+        self.min_known_fraction = min_known_fraction
+        self.max_novel_shingles = max_novel_shingles
+        self.shingle_size = shingle_size
+        self.max_shingles = max_shingles
+        self._safe_shingles: set = set()
+        # Words of Azure-verified safe text; any other word escalates
+        self._safe_words: set = set()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "routed": 0,
+            ROUTE_LOCAL_PASS: 0,
+            ROUTE_LEXICON_MATCH: 0,
+            ROUTE_NOVEL_TEXT: 0,
+            "learned_texts": 0,
+            "local_seconds": 0.0,
+            "azure_calls": 0,
+            "azure_seconds": 0.0,
+        }
+
+    def route(self, text: str) -> Dict[str, Any]:
+        """
+        Decide whether a text can pass locally.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Dict with:
+                - route: ROUTE_LOCAL_PASS, ROUTE_LEXICON_MATCH or ROUTE_NOVEL_TEXT
+                - analysis: Local analysis result (ContentSafetyClient format)
+                - known_fraction: Fraction of shingles seen in verified safe text
+                - novel_shingles: Number of unverified shingles
+                - novel_words: Number of words (not plain numbers) outside the
+                  verified vocabulary
+        """
+        start_time = time.time()
+        analysis = self.local_analyzer.analyze_text(text)
+        shingles = shingle_hashes(text, self.shingle_size)
+        words = {word for word in _words(text) if not word.isdigit()}
+
+        with self._lock:
+            novel = len(shingles - self._safe_shingles)
+            novel_words = len(words - self._safe_words)
+        known_fraction = 1 - novel / len(shingles)
+
+        if analysis["max_severity"] > 0:
+            route = ROUTE_LEXICON_MATCH
+        elif (
+            novel_words == 0
+            and known_fraction >= self.min_known_fraction
+            and novel <= self.max_novel_shingles
+        ):
+            route = ROUTE_LOCAL_PASS
+        else:
+            route = ROUTE_NOVEL_TEXT
+
+        elapsed = time.time() - start_time
+        with self._lock:
+            self.stats["routed"] += 1
+            self.stats[route] += 1
+            self.stats["local_seconds"] += elapsed
+
+        return {
+            "route": route,
+            "analysis": analysis,
+            "known_fraction": round(known_fraction, 4),
+            "novel_shingles": novel,
+            "novel_words": novel_words,
+        }
+
+    def record_escalation(self, text: str, analysis: Dict[str, Any], latency: float) -> None:
+        """
+        Record an Azure result for an escalated text.
+
+        Texts Azure scored 0 in every category teach the router their words and shingles.
+
+        Args:
+            text: Message text
+            analysis: Azure analysis result
+            latency: Seconds spent in the Azure call
+        """
+        learn = analysis.get("max_severity", 0) == 0 and not any(
+            analysis.get("severity_scores", {}).values()
+        )
+        shingles = shingle_hashes(text, self.shingle_size) if learn else set()
+
+        with self._lock:
+            self.stats["azure_calls"] += 1
+            self.stats["azure_seconds"] += latency
+            if shingles and len(self._safe_shingles) + len(shingles) <= self.max_shingles:
+                self._safe_shingles |= shingles
+                self._safe_words.update(_words(text))
+                self.stats["learned_texts"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get routing statistics.
+
+        Latency saved is estimated as local passes times the mean Azure call latency,
+        minus the time spent routing.
+
+        Returns:
+            Dictionary with route counts, escalation rate, latencies and savings
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["learned_shingles"] = len(self._safe_shingles)
+            stats["learned_words"] = len(self._safe_words)
+
+        escalated = stats[ROUTE_LEXICON_MATCH] + stats[ROUTE_NOVEL_TEXT]
+        avg_azure = stats["azure_seconds"] / max(1, stats["azure_calls"])
+        stats["escalation_rate"] = round(escalated / max(1, stats["routed"]), 4)
+        stats["avg_azure_latency_seconds"] = round(avg_azure, 4)
+        stats["avg_local_latency_seconds"] = round(
+            stats["local_seconds"] / max(1, stats["routed"]), 6
+        )
+        stats["estimated_latency_saved_seconds"] = round(
+            stats[ROUTE_LOCAL_PASS] * avg_azure - stats["local_seconds"], 3
+        )
+        stats["local_seconds"] = round(stats["local_seconds"], 4)
+        stats["azure_seconds"] = round(stats["azure_seconds"], 4)
+        stats["min_known_fraction"] = self.min_known_fraction
+        stats["max_novel_shingles"] = self.max_novel_shingles
+        return stats
+
+
+def router_from_config(config: Dict[str, Any]) -> Optional[SafetyRouter]:
+    """
+    Build a safety router from the safety configuration.
+
+    Reads the safety_policy.tiered_screening section (enabled, min_known_fraction,
+    max_novel_shingles, shingle_size, max_shingles, lexicon_path).
+
+    Args:
+        config: Loaded safety configuration
+
+    Returns:
+        SafetyRouter, or None if tiered screening is not enabled
+    """
+    tier_config = (config or {}).get("safety_policy", {}).get("tiered_screening", {}) or {}
+    if not tier_config.get("enabled", False):
+        return None
+
+    lexicon_path = tier_config.get("lexicon_path")
+    return SafetyRouter(
+        local_analyzer=LocalSafetyAnalyzer(lexicon_path=lexicon_path) if lexicon_path else None,
+        min_known_fraction=tier_config.get("min_known_fraction", 0.9),
+        max_novel_shingles=tier_config.get("max_novel_shingles", 6),
+        shingle_size=tier_config.get("shingle_size", 3),
+        max_shingles=tier_config.get("max_shingles", 1000000),
+    )
@@ -0,0 +1,212 @@
+"""
+Adaptive Concurrency Module
+
+This module provides an AIMD (additive-increase, multiplicative-decrease) concurrency
+limiter for LLM calls in the Customer Personalization Orchestrator. Instead of a fixed
+worker count, the number of in-flight requests follows the deployment's real capacity:
+
+- Successful calls at stable latency grow the limit by about one slot per round trip
+- 429s and timeouts cut the limit multiplicatively (at most once per cooldown period)
+- Smoothed latency well above the long-term baseline shrinks the limit gently before
+  429s start (single slow responses do not count as congestion)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from openai import APITimeoutError, RateLimitError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Outcomes reported to AdaptiveConcurrencyLimiter.release()
+OUTCOME_SUCCESS = "success"
+OUTCOME_OVERLOAD = "overload"
+OUTCOME_ERROR = "error"
+
+
+def classify_outcome(error: Exception) -> str:
+    """
+    Map an exception from an LLM call to a limiter outcome.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        OUTCOME_OVERLOAD for 429s and timeouts, otherwise OUTCOME_ERROR
+    """
+    if isinstance(error, (RateLimitError, APITimeoutError, TimeoutError)):
+        return OUTCOME_OVERLOAD
+    return OUTCOME_ERROR
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Thread-safe AIMD limiter for in-flight requests.
+
+    Callers acquire() a slot before a request and release() it afterwards with
+    the outcome and latency; acquire() blocks while the limit is reached.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        backoff_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_backoff_factor: float = 0.9,
+        cooldown_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Starting number of concurrent requests
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            backoff_factor: Multiplier applied to the limit on 429s and timeouts
+            latency_tolerance: Smoothed latency above tolerance x baseline counts as congestion
+            latency_backoff_factor: Multiplier applied to the limit on congestion
+            cooldown_seconds: Minimum time between two decreases, so one burst of
+                429s from the same round trip only backs off once
+            clock: Monotonic time source (injectable for tests)
+
+        Raises:
+            ValueError: If limits or factors are out of range
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff_factor < 1 or not 0 < latency_backoff_factor < 1:
+            raise ValueError("Backoff factors must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_backoff_factor = latency_backoff_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline_ms = None
+        self._recent_ms = None
+        self._last_decrease = None
+        self._condition = threading.Condition()
+
+        self.stats = {"successes": 0, "overloads": 0, "errors": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently in flight."""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Block until a slot is free, then take it."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, outcome: str = OUTCOME_SUCCESS, latency_ms: Optional[float] = None) -> None:
+        """
+        Return a slot and adjust the limit from the request outcome.
+
+        Args:
+            outcome: OUTCOME_SUCCESS, OUTCOME_OVERLOAD or OUTCOME_ERROR
+            latency_ms: Request latency (used for successes only)
+        """
+        with self._condition:
+            saturated = self._in_flight >= int(self._limit) // 2
+            self._in_flight -= 1
+
+            if outcome == OUTCOME_OVERLOAD:
+                self.stats["overloads"] += 1
+                self._decrease(self.backoff_factor, "429/timeout")
+            elif outcome == OUTCOME_SUCCESS:
+                self.stats["successes"] += 1
+                self._on_success(latency_ms, saturated)
+            else:
+                # Client or server errors say nothing about capacity
+                self.stats["errors"] += 1
+
+            self._condition.notify_all()
+
+    def _on_success(self, latency_ms: Optional[float], saturated: bool) -> None:
+        """Grow the limit at stable latency or shrink it on congestion (lock held)."""
+        if latency_ms is not None:
+            if self._baseline_ms is None:
+                self._baseline_ms = self._recent_ms = latency_ms
+            else:
+                # Short-term and long-term moving averages; comparing them filters out
+                # individual slow responses from heavy-tailed latency distributions
+                self._recent_ms = 0.8 * self._recent_ms + 0.2 * latency_ms
+                self._baseline_ms = 0.98 * self._baseline_ms + 0.02 * latency_ms
+                if self._recent_ms > self.latency_tolerance * self._baseline_ms:
+                    self._decrease(self.latency_backoff_factor, f"latency {self._recent_ms:.0f}ms")
+                    return
+
+        # Only grow when the current limit is actually being used
+        if saturated and self._limit < self.max_limit:
+            previous = self.limit
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            if self.limit != previous:
+                logger.debug(f"Concurrency limit increased to {self.limit}")
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        """Multiplicatively decrease the limit, at most once per cooldown (lock held)."""
+        now = self.clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown_seconds:
+            return
+
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * factor)
+        self.stats["decreases"] += 1
+        logger.info(f"Concurrency limit decreased to {self.limit} ({reason})")
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        """
+        Call fn inside a limiter slot, reporting its outcome and latency.
+
+        Args:
+            fn: Zero-argument callable performing one request
+
+        Returns:
+            Return value of fn
+        """
+        self.acquire()
+        start_time = time.time()
+        outcome = OUTCOME_SUCCESS
+        try:
+            return fn()
+        except Exception as e:
+            outcome = classify_outcome(e)
+            raise
+        finally:
+            self.release(outcome, (time.time() - start_time) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the current limit and outcome counters.
+
+        Returns:
+            Dictionary with limit, in_flight, baseline latency and counters
+        """
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "baseline_latency_ms": (
+                    round(self._baseline_ms, 1) if self._baseline_ms is not None else None
+                ),
+                **self.stats,
+            }
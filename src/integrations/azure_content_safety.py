@@ -3,48 +3,266 @@ Azure AI Content Safety Integration Module
 
 This module provides a wrapper around the Azure AI Content Safety API for the Customer Personalization Orchestrator.
 It handles content analysis and safety policy enforcement with retry logic and comprehensive error handling.
+
+AsyncContentSafetyClient is the asyncio variant: one shared aio SDK client (and transport)
+per instance, a semaphore bounding in-flight requests, and retries that await their
+backoff (honoring Retry-After) so a 429 never blocks other screenings.
+
+Texts longer than the service limit are split on sentence boundaries and the chunks
+are screened concurrently; per-category severities are merged by max, and remaining
+chunks are skipped once any chunk exceeds the block threshold. Both clients bound
+in-flight requests per instance (max_concurrency), shared by every caller, so chunked
+texts screened from a batch cannot multiply concurrency.
 """
 
+import asyncio
 import os
 import logging
+import re
+import threading
 import time
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from azure.ai.contentsafety import ContentSafetyClient
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.contentsafety.models import AnalyzeTextOptions
 from azure.core.exceptions import AzureError, HttpResponseError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from dotenv import load_dotenv
 
+from src.integrations.retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy, with_retry
+from src.integrations.usage_ledger import LatencyHistogram
+
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Maximum characters per analyze_text request accepted by the service
+MAX_TEXT_CHARS = 10000
+
+# Sentence end (optionally followed by closing quotes/brackets) plus whitespace, or a blank line
+_SENTENCE_BREAK = re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def split_text(text: str, max_chars: int = MAX_TEXT_CHARS) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, preferring sentence boundaries.
+
+    A chunk ends at the last sentence boundary that fits; a single sentence longer
+    than max_chars is split at the last whitespace (or hard at max_chars).
+    Whitespace-only chunks are dropped.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum chunk length
+
+    Returns:
+        List of chunks, in order
+
+    Raises:
+        ValueError: If max_chars < 1
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars must be at least 1")
+
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start : start + max_chars]
+        end = 0
+        for match in _SENTENCE_BREAK.finditer(window):
+            end = match.end()
+        if not end:
+            for match in _WHITESPACE.finditer(window):
+                end = match.end()
+        end = end or max_chars
+        chunks.append(text[start : start + end])
+        start += end
+    chunks.append(text[start:])
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def merge_chunk_results(
+    text: str, results: List[Dict[str, Any]], chunk_count: int
+) -> Dict[str, Any]:
+    """
+    Merge per-chunk analyses into one result for the whole text.
+
+    Args:
+        text: Full text that was analyzed
+        results: Analyses of the chunks screened so far
+        chunk_count: Total number of chunks the text was split into
+
+    Returns:
+        Analysis in the analyze_text() format with per-category severities merged by
+        max, plus chunks, chunks_analyzed and short_circuited
+    """
+    severity_scores = {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0}
+    for result in results:
+        for category, severity in result["severity_scores"].items():
+            severity_scores[category] = max(severity_scores.get(category, 0), severity)
+
+    return {
+        "text_length": len(text),
+        "analyzed_at": datetime.utcnow().isoformat(),
+        "severity_scores": severity_scores,
+        "status": "pass",
+        "blocked_categories": [],
+        "max_severity": max(severity_scores.values()),
+        "chunks": chunk_count,
+        "chunks_analyzed": len(results),
+        "short_circuited": len(results) < chunk_count,
+    }
+
+
+def _exceeds(result: Dict[str, Any], block_threshold: Optional[int]) -> bool:
+    """Whether a chunk result already decides a block (severity > threshold)."""
+    return block_threshold is not None and result["max_severity"] > block_threshold
+
+
+class LatencyStats:
+    """
+    Thread-safe request latency counters shared by the sync and async clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogram = LatencyHistogram()
+        self.request_count = 0
+        self.total_latency = 0.0
+
+    def record(self, latency: float) -> None:
+        """Record one completed request."""
+        with self._lock:
+            self.request_count += 1
+            self.total_latency += latency
+            self._histogram.record(latency * 1000)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize recorded latencies.
+
+        Returns:
+            Dict with total requests, total/average latency, throughput and percentiles
+        """
+        with self._lock:
+            count = self.request_count
+            total = self.total_latency
+            percentiles = self._histogram.summary()
+
+        return {
+            "total_requests": count,
+            "total_latency_seconds": round(total, 3),
+            "average_latency_seconds": round(total / max(1, count), 3),
+            "requests_per_second": round(count / max(1, total), 2),
+            "latency_ms": percentiles,
+        }
+
+
+def _parse_safety_response(response, original_text: str) -> Dict[str, Any]:
+    """
+    Parse Azure Content Safety API response into standardized format.
+
+    Args:
+        response: Raw API response
+        original_text: Original text that was analyzed
+
+    Returns:
+        Standardized safety analysis result
+    """
+    # Initialize result structure
+    result = {
+        "text_length": len(original_text),
+        "analyzed_at": datetime.utcnow().isoformat(),
+        "severity_scores": {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0},
+        "status": "pass",
+        "blocked_categories": [],
+        "max_severity": 0,
+    }
+
+    # Parse categories analysis
+    if hasattr(response, "categories_analysis") and response.categories_analysis:
+        categories = response.categories_analysis
+        category_names = ["hate", "violence", "self_harm", "sexual"]
+
+        for i, category in enumerate(categories):
+            if i < len(category_names):
+                category_name = category_names[i]
+                severity = getattr(category, "severity", 0)
+                result["severity_scores"][category_name] = severity
+
+                # Track maximum severity
+                if severity > result["max_severity"]:
+                    result["max_severity"] = severity
+
+    # Alternative parsing for different response formats
+    elif hasattr(response, "hate_result"):
+        result["severity_scores"]["hate"] = getattr(response.hate_result, "severity", 0)
+        result["severity_scores"]["violence"] = (
+            getattr(response.violence_result, "severity", 0)
+            if hasattr(response, "violence_result")
+            else 0
+        )
+        result["severity_scores"]["self_harm"] = (
+            getattr(response.self_harm_result, "severity", 0)
+            if hasattr(response, "self_harm_result")
+            else 0
+        )
+        result["severity_scores"]["sexual"] = (
+            getattr(response.sexual_result, "severity", 0)
+            if hasattr(response, "sexual_result")
+            else 0
+        )
+
+        result["max_severity"] = max(result["severity_scores"].values())
+
+    return result
+
 
 class ContentSafetyClient:
     """
     Azure AI Content Safety client with retry logic and comprehensive error handling.
 
     This class provides a robust interface to Azure AI Content Safety API with:
-    - Automatic retry logic for transient failures
+    - Retries for transient failures only (shared policy with Retry-After,
+      jittered backoff and a global retry budget)
     - Comprehensive error handling
     - Structured response parsing
     - Performance tracking
+    - Thread safety, so one client can serve concurrent batch screening
+    - Chunked analysis of texts longer than the service limit
+    - One bound on in-flight requests (max_concurrency) shared by all callers and
+      chunk workers
     """
 
-    def __init__(self, endpoint: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        api_key: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        block_threshold: Optional[int] = None,
+        max_text_chars: int = MAX_TEXT_CHARS,
+        max_concurrency: int = 8,
+    ):
         """
         Initialize the Content Safety client.
 
         Args:
             endpoint: Azure Content Safety endpoint (defaults to env var)
             api_key: API key (defaults to env var)
+            retry_policy: Retry policy for API calls (default: shared DEFAULT_RETRY_POLICY)
+            block_threshold: Severity above which a chunked analysis stops screening
+                the remaining chunks (None: always screen every chunk)
+            max_text_chars: Longest text sent in one request; longer texts are chunked
+            max_concurrency: Maximum requests in flight across all callers of this
+                client, including chunks of long texts
 
         Raises:
-            ValueError: If required configuration is missing
+            ValueError: If required configuration is missing or max_concurrency < 1
         """
         self.endpoint = endpoint or os.getenv("AZURE_CONTENT_SAFETY_ENDPOINT")
         self.api_key = api_key or os.getenv("AZURE_CONTENT_SAFETY_API_KEY")
@@ -55,31 +273,63 @@ class ContentSafetyClient:
                 "Set AZURE_CONTENT_SAFETY_ENDPOINT and AZURE_CONTENT_SAFETY_API_KEY environment variables."
             )
 
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.block_threshold = block_threshold
+        self.max_text_chars = max_text_chars
+        self.max_concurrency = max_concurrency
         self._client = None
-        self._request_count = 0
-        self._total_latency = 0.0
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+        # Held for the duration of each HTTP request (not across retry backoff)
+        self._request_slots = threading.BoundedSemaphore(max_concurrency)
+        self.latency_stats = LatencyStats()
+        self._lock = threading.Lock()
 
     @property
     def client(self):
         """Get or create the Azure Content Safety client."""
         if self._client is None:
-            # Import the actual Azure client to avoid naming conflict
-            from azure.ai.contentsafety import ContentSafetyClient as AzureContentSafetyClient
-
-            self._client = AzureContentSafetyClient(
-                endpoint=self.endpoint, credential=AzureKeyCredential(self.api_key)
-            )
+            with self._lock:
+                if self._client is None:
+                    # Import the actual Azure client to avoid naming conflict
+                    from azure.ai.contentsafety import (
+                        ContentSafetyClient as AzureContentSafetyClient,
+                    )
+
+                    # SDK-level retries are disabled; retries are owned by self.retry_policy
+                    self._client = AzureContentSafetyClient(
+                        endpoint=self.endpoint,
+                        credential=AzureKeyCredential(self.api_key),
+                        retry_total=0,
+                    )
         return self._client
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((ConnectionError, TimeoutError)),
-    )
+    @property
+    def chunk_executor(self) -> ThreadPoolExecutor:
+        """Get or create the worker pool shared by all chunked analyses."""
+        if self._chunk_executor is None:
+            with self._lock:
+                if self._chunk_executor is None:
+                    self._chunk_executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency, thread_name_prefix="content-safety"
+                    )
+        return self._chunk_executor
+
+    def close(self) -> None:
+        """Shut down the chunk worker pool (pending chunks are cancelled)."""
+        with self._lock:
+            executor, self._chunk_executor = self._chunk_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """
         Analyze text for safety violations with retry logic.
 
+        Texts longer than max_text_chars are screened with analyze_long_text().
+
         Args:
             text: Text content to analyze
 
@@ -87,22 +337,84 @@ class ContentSafetyClient:
             Dict containing safety analysis results with severity scores
 
         Raises:
-            AzureError: If API call fails after retries
+            AzureError: If API call fails with a terminal error or after retries
             ValueError: If text is empty or invalid
         """
         if not text or not text.strip():
             raise ValueError("Text content cannot be empty")
+        if len(text) > self.max_text_chars:
+            return self.analyze_long_text(text)
+        return self._analyze_request(text)
+
+    def analyze_long_text(self, text: str, block_threshold: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyze text in sentence-aligned chunks screened concurrently.
 
-        start_time = time.time()
+        Severities are merged by max per category. As soon as a chunk exceeds the
+        block threshold, chunks not yet sent are cancelled and the partial (already
+        blocking) result is returned.
 
+        Args:
+            text: Text content to analyze
+            block_threshold: Short-circuit threshold (default: self.block_threshold)
+
+        Returns:
+            Dict in the analyze_text() format plus chunks, chunks_analyzed and
+            short_circuited
+
+        Raises:
+            AzureError: If any chunk fails with a terminal error or after retries
+            ValueError: If text is empty or invalid
+        """
+        if not text or not text.strip():
+            raise ValueError("Text content cannot be empty")
+        if block_threshold is None:
+            block_threshold = self.block_threshold
+
+        chunks = split_text(text, self.max_text_chars)
+        results = []
+        queued = iter(chunks)
+        window = min(self.max_concurrency, len(chunks))
+        executor = self.chunk_executor
+        # Chunks go to the client's shared pool and are submitted only as earlier ones
+        # finish, so none starts after a block; requests still in flight at a block
+        # finish in the background
+        pending = set()
+        try:
+            pending = {
+                executor.submit(self._analyze_request, chunk) for chunk in islice(queued, window)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                if any(_exceeds(result, block_threshold) for result in results):
+                    break
+                for chunk in islice(queued, len(done)):
+                    pending.add(executor.submit(self._analyze_request, chunk))
+        finally:
+            for future in pending:
+                future.cancel()
+
+        result = merge_chunk_results(text, results, len(chunks))
+        logger.debug(
+            f"Chunked safety analysis: {result['chunks_analyzed']}/{len(chunks)} chunks, "
+            f"max severity {result['max_severity']}"
+        )
+        return result
+
+    @with_retry(DEFAULT_RETRY_POLICY)
+    def _analyze_request(self, text: str) -> Dict[str, Any]:
+        """Send one analyze request (text within the service limit)."""
         try:
             request = AnalyzeTextOptions(text=text)
-            response = self.client.analyze_text(request)
+            with self._request_slots:
+                start_time = time.time()
+                response = self.client.analyze_text(request)
 
             # Track performance
             latency = time.time() - start_time
-            self._request_count += 1
-            self._total_latency += latency
+            self.latency_stats.record(latency)
 
             # Parse response
             result = self._parse_safety_response(response, text)
@@ -116,8 +428,8 @@ class ContentSafetyClient:
 
         except HttpResponseError as e:
             if e.status_code == 429:
+                # Backoff honoring Retry-After is handled by the retry policy
                 logger.warning(f"Rate limit hit: {e}")
-                time.sleep(60)  # Wait before retry
                 raise
             elif e.status_code == 401:
                 logger.error("Authentication failed - check API key")
@@ -143,83 +455,277 @@ class ContentSafetyClient:
         Returns:
             Standardized safety analysis result
         """
-        # Initialize result structure
-        result = {
-            "text_length": len(original_text),
-            "analyzed_at": datetime.utcnow().isoformat(),
-            "severity_scores": {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0},
-            "status": "pass",
-            "blocked_categories": [],
-            "max_severity": 0,
-        }
+        return _parse_safety_response(response, original_text)
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get usage statistics for this client instance.
+
+        Returns:
+            Dict containing usage metrics
+        """
+        return self.latency_stats.summary()
+
+
+class AsyncContentSafetyClient:
+    """
+    Asyncio Azure AI Content Safety client for concurrent screening.
+
+    - One aio SDK client per instance, so every request shares its transport and
+      connection pool (pass transport= to share a session between instances)
+    - An asyncio.Semaphore bounds in-flight requests; a request waiting out a 429
+      releases its slot, so other screenings continue at full concurrency
+    - Retries use RetryPolicy.call_async and await their backoff, honoring Retry-After
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        api_key: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        max_concurrency: int = 16,
+        transport: Any = None,
+        block_threshold: Optional[int] = None,
+        max_text_chars: int = MAX_TEXT_CHARS,
+    ):
+        """
+        Initialize the async Content Safety client.
 
-        # Parse categories analysis
-        if hasattr(response, "categories_analysis") and response.categories_analysis:
-            categories = response.categories_analysis
-            category_names = ["hate", "violence", "self_harm", "sexual"]
-
-            for i, category in enumerate(categories):
-                if i < len(category_names):
-                    category_name = category_names[i]
-                    severity = getattr(category, "severity", 0)
-                    result["severity_scores"][category_name] = severity
-
-                    # Track maximum severity
-                    if severity > result["max_severity"]:
-                        result["max_severity"] = severity
-
-        # Alternative parsing for different response formats
-        elif hasattr(response, "hate_result"):
-            result["severity_scores"]["hate"] = getattr(response.hate_result, "severity", 0)
-            result["severity_scores"]["violence"] = (
-                getattr(response.violence_result, "severity", 0)
-                if hasattr(response, "violence_result")
-                else 0
+        Args:
+            endpoint: Azure Content Safety endpoint (defaults to env var)
+            api_key: API key (defaults to env var)
+            retry_policy: Retry policy for API calls (default: shared DEFAULT_RETRY_POLICY)
+            max_concurrency: Maximum requests in flight
+            transport: Optional azure.core async transport shared with other clients
+                (default: the SDK's aiohttp transport)
+            block_threshold: Severity above which a chunked analysis stops screening
+                the remaining chunks (None: always screen every chunk)
+            max_text_chars: Longest text sent in one request; longer texts are chunked
+
+        Raises:
+            ValueError: If required configuration is missing or max_concurrency < 1
+        """
+        self.endpoint = endpoint or os.getenv("AZURE_CONTENT_SAFETY_ENDPOINT")
+        self.api_key = api_key or os.getenv("AZURE_CONTENT_SAFETY_API_KEY")
+
+        if not self.endpoint or not self.api_key:
+            raise ValueError(
+                "Missing required Azure AI Content Safety configuration. "
+                "Set AZURE_CONTENT_SAFETY_ENDPOINT and AZURE_CONTENT_SAFETY_API_KEY environment variables."
             )
-            result["severity_scores"]["self_harm"] = (
-                getattr(response.self_harm_result, "severity", 0)
-                if hasattr(response, "self_harm_result")
-                else 0
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.max_concurrency = max_concurrency
+        self.transport = transport
+        self.block_threshold = block_threshold
+        self.max_text_chars = max_text_chars
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.latency_stats = LatencyStats()
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+    @property
+    def client(self):
+        """Get or create the shared aio Content Safety client."""
+        if self._client is None:
+            from azure.ai.contentsafety.aio import (
+                ContentSafetyClient as AsyncAzureContentSafetyClient,
             )
-            result["severity_scores"]["sexual"] = (
-                getattr(response.sexual_result, "severity", 0)
-                if hasattr(response, "sexual_result")
-                else 0
+
+            # SDK-level retries are disabled; retries are owned by self.retry_policy
+            kwargs = {"retry_total": 0}
+            if self.transport is not None:
+                kwargs["transport"] = self.transport
+            self._client = AsyncAzureContentSafetyClient(
+                endpoint=self.endpoint, credential=AzureKeyCredential(self.api_key), **kwargs
             )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit, created on first use inside the running event loop."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def analyze_text(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze text for safety violations.
 
-            result["max_severity"] = max(result["severity_scores"].values())
+        Texts longer than max_text_chars are screened with analyze_long_text().
 
+        Args:
+            text: Text content to analyze
+
+        Returns:
+            Dict in the ContentSafetyClient.analyze_text() format
+
+        Raises:
+            AzureError: If API call fails with a terminal error or after retries
+            ValueError: If text is empty or invalid
+        """
+        if not text or not text.strip():
+            raise ValueError("Text content cannot be empty")
+        if len(text) > self.max_text_chars:
+            return await self.analyze_long_text(text)
+        return await self.retry_policy.call_async(self._analyze_once, text)
+
+    async def analyze_long_text(
+        self, text: str, block_threshold: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze text in sentence-aligned chunks screened concurrently.
+
+        Chunks share the client's concurrency limit. As soon as a chunk exceeds the
+        block threshold, the remaining chunk requests are cancelled.
+
+        Args:
+            text: Text content to analyze
+            block_threshold: Short-circuit threshold (default: self.block_threshold)
+
+        Returns:
+            Dict in the analyze_text() format plus chunks, chunks_analyzed and
+            short_circuited
+
+        Raises:
+            AzureError: If any chunk fails with a terminal error or after retries
+            ValueError: If text is empty or invalid
+        """
+        if not text or not text.strip():
+            raise ValueError("Text content cannot be empty")
+        if block_threshold is None:
+            block_threshold = self.block_threshold
+
+        chunks = split_text(text, self.max_text_chars)
+        results = []
+        pending = {
+            asyncio.ensure_future(self.retry_policy.call_async(self._analyze_once, chunk))
+            for chunk in chunks
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results.append(task.result())
+                if any(_exceeds(result, block_threshold) for result in results):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return merge_chunk_results(text, results, len(chunks))
+
+    async def _analyze_once(self, text: str) -> Dict[str, Any]:
+        """Send one request while holding a concurrency slot."""
+        async with self.semaphore:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            start_time = time.time()
+            try:
+                response = await self.client.analyze_text(AnalyzeTextOptions(text=text))
+            except HttpResponseError as e:
+                if e.status_code == 429:
+                    logger.warning(f"Rate limit hit: {e}")
+                else:
+                    logger.error(f"HTTP error {e.status_code}: {e.message}")
+                raise
+            finally:
+                self._in_flight -= 1
+
+        latency = time.time() - start_time
+        self.latency_stats.record(latency)
+        result = _parse_safety_response(response, text)
+        logger.debug(
+            f"Safety analysis completed in {latency:.3f}s. "
+            f"Status: {result['status']}, Categories: {result['severity_scores']}"
+        )
         return result
 
+    async def analyze_batch(self, texts: List[str]) -> List[Any]:
+        """
+        Analyze many texts concurrently.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Analysis results in input order; a failed text yields its exception
+            instead of a result, so one error never cancels the rest
+        """
+        return await asyncio.gather(
+            *(self.analyze_text(text) for text in texts), return_exceptions=True
+        )
+
     def get_usage_stats(self) -> Dict[str, Any]:
         """
         Get usage statistics for this client instance.
 
         Returns:
-            Dict containing usage metrics
+            Dict containing usage metrics plus current and peak in-flight requests
         """
-        avg_latency = self._total_latency / max(1, self._request_count)
+        stats = self.latency_stats.summary()
+        stats["in_flight"] = self._in_flight
+        stats["max_in_flight"] = self._max_in_flight
+        return stats
 
-        return {
-            "total_requests": self._request_count,
-            "total_latency_seconds": round(self._total_latency, 3),
-            "average_latency_seconds": round(avg_latency, 3),
-            "requests_per_second": round(self._request_count / max(1, self._total_latency), 2),
-        }
+    async def close(self) -> None:
+        """Close the shared aio client and its transport."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncContentSafetyClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+# Analyzer providers selectable with safety_policy.analyzer.provider
+SAFETY_ANALYZERS = ["azure", "local"]
 
 
 # Convenience functions for backward compatibility
-def get_safety_client() -> ContentSafetyClient:
+def get_safety_client(
+    provider: Optional[str] = None,
+    lexicon_path: Optional[str] = None,
+    block_threshold: Optional[int] = None,
+    max_concurrency: int = 8,
+):
     """
-    Create and return an Azure AI Content Safety client.
+    Create and return a content safety client.
+
+    The CONTENT_SAFETY_ANALYZER environment variable overrides the provider, so
+    tests and benchmarks can switch to the local analyzer without editing config.
+
+    Args:
+        provider: "azure" (default) or "local" for the rule-based LocalSafetyAnalyzer
+        lexicon_path: YAML lexicon for the local analyzer (default: built-in lexicon)
+        block_threshold: Policy threshold used to short-circuit chunked analysis of
+            long texts (Azure only)
+        max_concurrency: Maximum Azure requests in flight across all callers
 
     Returns:
-        ContentSafetyClient: Configured client instance
+        ContentSafetyClient or LocalSafetyAnalyzer
 
     Raises:
-        ValueError: If required environment variables are missing
+        ValueError: If the provider is unknown or required environment variables are missing
     """
-    return ContentSafetyClient()
+    provider = os.getenv("CONTENT_SAFETY_ANALYZER") or provider or "azure"
+    if provider not in SAFETY_ANALYZERS:
+        raise ValueError(f"Invalid safety analyzer: {provider}. Must be one of {SAFETY_ANALYZERS}")
+
+    if provider == "local":
+        from src.integrations.local_content_safety import LocalSafetyAnalyzer
+
+        logger.warning("Using local rule-based content safety analyzer")
+        return LocalSafetyAnalyzer(lexicon_path=lexicon_path)
+    return ContentSafetyClient(block_threshold=block_threshold, max_concurrency=max_concurrency)
 
 
 def analyze_text_safety(text: str) -> Dict[str, Any]:
@@ -8,10 +8,19 @@ It handles authentication, retry logic, response parsing, token counting, and co
 import os
 import time
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Callable, Dict, Any, Optional
 from openai import AzureOpenAI
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from src.integrations.adaptive_concurrency import (
+    OUTCOME_SUCCESS,
+    AdaptiveConcurrencyLimiter,
+    classify_outcome,
+)
+from src.integrations.request_hedging import RequestHedger
+from src.integrations.retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy, with_retry
+from src.integrations.usage_ledger import UsageLedger
 
 # Load environment variables
 load_dotenv()
@@ -19,24 +28,57 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Approximate characters per token, used when the API reports no usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without a tokenizer.
+
+    Args:
+        text: Text sent to or received from the model
+
+    Returns:
+        Approximate number of tokens (at least 1 for non-empty text)
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
 
 class AzureOpenAIClient:
     """
     Azure OpenAI client with retry logic, timeout handling, and cost tracking.
 
     This class provides a robust wrapper around the Azure OpenAI API with:
-    - Automatic retry logic for transient failures
+    - Retries for transient failures only (shared policy with Retry-After,
+      jittered backoff and a global retry budget)
     - Timeout handling (10 seconds default)
-    - Token usage and cost tracking
+    - Token usage and cost tracking (thread-safe, with per-deployment, per-segment
+      and per-tone breakdowns, rolling windows and latency percentiles)
+    - Adaptive (AIMD) concurrency limiting of in-flight requests
+    - Optional request hedging above the observed p95 latency
     - Structured error handling
+    - close() / context-manager use to release the hedger's threads and HTTP connections
     """
 
-    def __init__(self, timeout: float = 10.0):
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedger: Optional[RequestHedger] = None,
+    ):
         """
         Initialize the Azure OpenAI client.
 
         Args:
             timeout: Request timeout in seconds (default: 10.0)
+            concurrency_limiter: Limiter shared by all calls on this client
+                (default: a new AdaptiveConcurrencyLimiter)
+            retry_policy: Retry policy for API calls (default: shared DEFAULT_RETRY_POLICY)
+            hedger: Optional RequestHedger enabling hedged non-streaming completions
 
         Raises:
             ValueError: If required environment variables are missing
@@ -46,6 +88,14 @@ class AzureOpenAIClient:
         self.api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2025-04-01-preview")
         self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
         self.timeout = timeout
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+
+        # Local in-process stand-in for offline load tests (no Azure credentials needed)
+        use_mock = os.getenv("AZURE_OPENAI_MOCK_LLM", "").lower() == "inprocess"
+        if use_mock:
+            self.endpoint = self.endpoint or "mock://in-process"
+            self.api_key = self.api_key or "mock"
+            self.deployment_name = self.deployment_name or "mock-gpt-4o-mini"
 
         # Validate required configuration
         if not self.endpoint or not self.api_key or not self.deployment_name:
@@ -55,31 +105,44 @@ class AzureOpenAIClient:
             )
 
         # Initialize client
-        self.client = AzureOpenAI(
-            azure_endpoint=self.endpoint,
-            api_key=self.api_key,
-            api_version=self.api_version,
-            timeout=self.timeout,
-        )
+        if use_mock:
+            from src.integrations.mock_llm import MockLLMConfig, MockResponsesClient
+
+            self.client = MockResponsesClient(MockLLMConfig.from_env())
+            logger.warning("AZURE_OPENAI_MOCK_LLM=inprocess: using local mock LLM")
+        else:
+            self.client = AzureOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=self.api_version,
+                timeout=self.timeout,
+                max_retries=0,  # Retries are owned by self.retry_policy
+            )
 
-        # Token tracking
+        # Token tracking (lifetime totals guarded by a lock; detailed telemetry in the ledger)
+        self._usage_lock = threading.Lock()
+        self.usage_ledger = UsageLedger()
         self.total_input_tokens = 0
+        self.total_cached_input_tokens = 0
         self.total_output_tokens = 0
         self.total_requests = 0
 
+        # Adapts in-flight requests to the deployment's capacity
+        self.concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter()
+
+        # Opt-in tail-latency hedging (disabled when None)
+        self.hedger = hedger
+
         logger.info(f"Initialized Azure OpenAI client with deployment: {self.deployment_name}")
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception)),
-        reraise=True,
-    )
+    @with_retry(DEFAULT_RETRY_POLICY)
     def generate_completion(
         self,
         prompt: str,
         system_message: str = "You are a marketing copywriter.",
         max_tokens: int = 400,
+        prompt_cache_key: Optional[str] = None,
+        usage_labels: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
         """
         Generate completion using Responses API with retry logic.
@@ -88,13 +151,16 @@ class AzureOpenAIClient:
             prompt: Input prompt (system_message will be prepended)
             system_message: System message to prepend to prompt
             max_tokens: Maximum tokens to generate (minimum 16 for Responses API)
+            prompt_cache_key: Optional key that routes requests sharing a static
+                prompt prefix to the same provider-side prompt cache
+            usage_labels: Optional labels (e.g. segment, tone) for usage breakdowns
 
         Returns:
             Dictionary with response data including text, tokens, and cost
 
         Raises:
             ValueError: If max_tokens is less than 16
-            Exception: If API call fails after retries
+            Exception: If API call fails with a terminal error or after retries
         """
         if max_tokens < 16:
             raise ValueError("max_tokens must be at least 16 for Responses API")
@@ -107,29 +173,54 @@ class AzureOpenAIClient:
         try:
             logger.debug(f"Generating completion with {max_tokens} max tokens")
 
-            response = self.client.responses.create(
-                model=self.deployment_name, input=full_prompt, max_output_tokens=max_tokens
-            )
+            request_kwargs = {}
+            if prompt_cache_key:
+                request_kwargs["prompt_cache_key"] = prompt_cache_key
+
+            def send():
+                return self.concurrency_limiter.run(
+                    lambda: self.client.responses.create(
+                        model=self.deployment_name,
+                        input=full_prompt,
+                        max_output_tokens=max_tokens,
+                        **request_kwargs,
+                    )
+                )
+
+            if self.hedger is not None:
+                response = self.hedger.call(
+                    send,
+                    self.hedger.hedge_delay_ms(
+                        self.usage_ledger.latency_summary(self.deployment_name)
+                    ),
+                    on_discard=lambda discarded: self._record_hedge_overhead(
+                        discarded, usage_labels
+                    ),
+                )
+            else:
+                response = send()
 
             duration_ms = int((time.time() - start_time) * 1000)
 
             # Parse response
             result = self._parse_response(response)
 
-            # Track usage
-            self._track_usage(result)
-
             # Add metadata
             result.update(
                 {
                     "duration_ms": duration_ms,
                     "model": self.deployment_name,
                     "cost_usd": self.calculate_cost(
-                        result["input_tokens"], result["output_tokens"]
+                        result["input_tokens"],
+                        result["output_tokens"],
+                        cached_input_tokens=result.get("cached_input_tokens", 0),
                     ),
                 }
             )
 
+            # Track usage
+            self._track_usage(result, usage_labels)
+
             logger.info(
                 f"Generated completion: {result['output_tokens']} tokens, "
                 f"{duration_ms}ms, ${result['cost_usd']:.4f}"
@@ -139,6 +230,176 @@ class AzureOpenAIClient:
 
         except Exception as e:
             logger.error(f"Azure OpenAI API error: {e}")
+            self.usage_ledger.record_failure(self.deployment_name, usage_labels)
+            raise
+
+    @with_retry(DEFAULT_RETRY_POLICY)
+    def generate_completion_stream(
+        self,
+        prompt: str,
+        system_message: str = "You are a marketing copywriter.",
+        max_tokens: int = 400,
+        should_abort: Optional[Callable[[str], Optional[str]]] = None,
+        prompt_cache_key: Optional[str] = None,
+        usage_labels: Optional[Dict[str, str]] = None,
+        on_stream_start: Optional[Callable[[], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate completion using the streaming Responses API with early abort.
+
+        Each text delta is passed to ``should_abort``. If it returns a reason
+        string the stream is closed immediately, so no further output tokens
+        are generated for a completion that is already known to be invalid.
+
+        Args:
+            prompt: Input prompt (system_message will be prepended)
+            system_message: System message to prepend to prompt
+            max_tokens: Maximum tokens to generate (minimum 16 for Responses API)
+            should_abort: Optional callback receiving each text delta and
+                returning an abort reason, or None to keep streaming
+            prompt_cache_key: Optional key that routes requests sharing a static
+                prompt prefix to the same provider-side prompt cache
+            usage_labels: Optional labels (e.g. segment, tone) for usage breakdowns
+            on_stream_start: Optional callback run before every HTTP attempt, so
+                stateful should_abort callbacks can reset when a retry restarts
+                the stream from the beginning
+
+        Returns:
+            Dictionary with the same fields as generate_completion plus
+            aborted, abort_reason, time_to_first_token_ms and max_tokens_saved
+            (an upper bound: max_tokens minus the tokens generated before an abort).
+            Aborted attempts report an estimated input_tokens with
+            input_tokens_estimated set, since the prompt is billed anyway
+
+        Raises:
+            ValueError: If max_tokens is less than 16
+            Exception: If API call fails with a terminal error or after retries
+        """
+        if max_tokens < 16:
+            raise ValueError("max_tokens must be at least 16 for Responses API")
+
+        # Combine system message and prompt for Responses API
+        full_prompt = f"{system_message}\n\n{prompt}"
+
+        start_time = time.time()
+
+        try:
+            logger.debug(f"Streaming completion with {max_tokens} max tokens")
+
+            request_kwargs = {}
+            if prompt_cache_key:
+                request_kwargs["prompt_cache_key"] = prompt_cache_key
+
+            text_parts = []
+            delta_count = 0
+            time_to_first_token_ms = None
+            abort_reason = None
+            final_response = None
+
+            # A retry restarts the stream from its first delta
+            if on_stream_start is not None:
+                on_stream_start()
+
+            # The slot is held until the stream is fully consumed or closed
+            self.concurrency_limiter.acquire()
+            outcome = OUTCOME_SUCCESS
+            stream = None
+            try:
+                stream = self.client.responses.create(
+                    model=self.deployment_name,
+                    input=full_prompt,
+                    max_output_tokens=max_tokens,
+                    stream=True,
+                    **request_kwargs,
+                )
+
+                for event in stream:
+                    event_type = getattr(event, "type", "")
+
+                    if event_type == "response.output_text.delta":
+                        delta = getattr(event, "delta", "") or ""
+                        if time_to_first_token_ms is None:
+                            time_to_first_token_ms = int((time.time() - start_time) * 1000)
+                        text_parts.append(delta)
+                        delta_count += 1
+
+                        if should_abort is not None:
+                            abort_reason = should_abort(delta)
+                            if abort_reason:
+                                break
+
+                    elif event_type == "response.completed":
+                        final_response = getattr(event, "response", None)
+            except Exception as e:
+                outcome = classify_outcome(e)
+                raise
+            finally:
+                close = getattr(stream, "close", None)
+                if callable(close):
+                    close()
+                self.concurrency_limiter.release(outcome, (time.time() - start_time) * 1000)
+
+            duration_ms = int((time.time() - start_time) * 1000)
+
+            if final_response is not None and abort_reason is None:
+                result = self._parse_response(final_response)
+                if not result["text"]:
+                    result["text"] = "".join(text_parts)
+            else:
+                # Aborted streams carry no usage block, but the prompt is still
+                # billed: estimate input from its length. Each text delta is
+                # approximately one output token
+                input_tokens = estimate_tokens(full_prompt)
+                result = {
+                    "text": "".join(text_parts),
+                    "finish_reason": "aborted" if abort_reason else "incomplete",
+                    "input_tokens": input_tokens,
+                    "input_tokens_estimated": True,
+                    "cached_input_tokens": 0,
+                    "output_tokens": delta_count,
+                    "tokens_used": input_tokens + delta_count,
+                }
+
+            # Add metadata
+            result.update(
+                {
+                    "duration_ms": duration_ms,
+                    "model": self.deployment_name,
+                    "cost_usd": self.calculate_cost(
+                        result["input_tokens"],
+                        result["output_tokens"],
+                        cached_input_tokens=result.get("cached_input_tokens", 0),
+                    ),
+                    "aborted": abort_reason is not None,
+                    "abort_reason": abort_reason,
+                    "time_to_first_token_ms": time_to_first_token_ms,
+                    # Upper bound: the model may have stopped before max_tokens anyway
+                    "max_tokens_saved": (
+                        max(0, max_tokens - result["output_tokens"]) if abort_reason else 0
+                    ),
+                }
+            )
+
+            # Track usage
+            self._track_usage(result, usage_labels)
+
+            if abort_reason:
+                logger.info(
+                    f"Aborted streamed completion after {result['output_tokens']} tokens "
+                    f"({abort_reason}), saved up to {result['max_tokens_saved']} tokens"
+                )
+            else:
+                logger.info(
+                    f"Streamed completion: {result['output_tokens']} tokens, "
+                    f"{duration_ms}ms (TTFT {time_to_first_token_ms}ms), "
+                    f"${result['cost_usd']:.4f}"
+                )
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Azure OpenAI streaming API error: {e}")
+            self.usage_ledger.record_failure(self.deployment_name, usage_labels)
             raise
 
     def _parse_response(self, response) -> Dict[str, Any]:
@@ -167,6 +428,7 @@ class AzureOpenAIClient:
 
         # Extract token usage
         input_tokens = 0
+        cached_input_tokens = 0
         output_tokens = 0
         total_tokens = 0
 
@@ -175,48 +437,107 @@ class AzureOpenAIClient:
             output_tokens = getattr(response.usage, "output_tokens", 0)
             total_tokens = getattr(response.usage, "total_tokens", 0)
 
+            # Prompt-cache hits are reported under input_tokens_details
+            input_details = getattr(response.usage, "input_tokens_details", None)
+            cached_input_tokens = getattr(input_details, "cached_tokens", 0)
+            if not isinstance(cached_input_tokens, int):
+                cached_input_tokens = 0
+
         return {
             "text": output_text,
             "finish_reason": getattr(response, "finish_reason", "completed"),
             "input_tokens": input_tokens,
+            "cached_input_tokens": cached_input_tokens,
             "output_tokens": output_tokens,
             "tokens_used": total_tokens,  # For backward compatibility
         }
 
-    def _track_usage(self, result: Dict[str, Any]) -> None:
+    def _track_usage(
+        self, result: Dict[str, Any], usage_labels: Optional[Dict[str, str]] = None
+    ) -> None:
         """
         Track token usage for cost calculation.
 
+        Safe to call from concurrent threads.
+
         Args:
-            result: Parsed response with token counts
+            result: Parsed response with token counts, cost and duration
+            usage_labels: Optional labels (e.g. segment, tone) for usage breakdowns
+        """
+        with self._usage_lock:
+            self.total_input_tokens += result.get("input_tokens", 0)
+            self.total_cached_input_tokens += result.get("cached_input_tokens", 0)
+            self.total_output_tokens += result.get("output_tokens", 0)
+            self.total_requests += 1
+
+        self.usage_ledger.record(
+            self.deployment_name,
+            input_tokens=result.get("input_tokens", 0),
+            output_tokens=result.get("output_tokens", 0),
+            cached_input_tokens=result.get("cached_input_tokens", 0),
+            cost_usd=result.get("cost_usd", 0.0),
+            duration_ms=result.get("duration_ms"),
+            labels=usage_labels,
+        )
+
+    def _record_hedge_overhead(
+        self, response, usage_labels: Optional[Dict[str, str]] = None
+    ) -> None:
         """
-        self.total_input_tokens += result.get("input_tokens", 0)
-        self.total_output_tokens += result.get("output_tokens", 0)
-        self.total_requests += 1
+        Account for a hedged response that lost the race.
+
+        Its tokens are billed, so they are tracked like any other usage and
+        also reported as hedging overhead.
+
+        Args:
+            response: Raw API response that was discarded
+            usage_labels: Labels of the original request
+        """
+        result = self._parse_response(response)
+        result["cost_usd"] = self.calculate_cost(
+            result["input_tokens"],
+            result["output_tokens"],
+            cached_input_tokens=result.get("cached_input_tokens", 0),
+        )
+        self._track_usage(result, usage_labels)
+        self.hedger.record_overhead(result["input_tokens"], result["output_tokens"])
 
     def calculate_cost(
-        self, input_tokens: int, output_tokens: int, model: str = "gpt-4o-mini"
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        model: str = "gpt-4o-mini",
+        cached_input_tokens: int = 0,
     ) -> float:
         """
         Calculate cost based on token usage.
 
         Args:
-            input_tokens: Number of input tokens
+            input_tokens: Number of input tokens (including cached tokens)
             output_tokens: Number of output tokens
             model: Model name for pricing lookup
+            cached_input_tokens: Portion of input_tokens served from the prompt cache
 
         Returns:
             Cost in USD
         """
         # Pricing per 1K tokens (as of November 2025)
         PRICING = {
-            "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},  # $0.15/$0.60 per 1M
-            "gpt-4o": {"input": 0.005, "output": 0.015},  # $5/$15 per 1M
-            "gpt-4": {"input": 0.03, "output": 0.06},  # $30/$60 per 1M
+            "gpt-4o-mini": {
+                "input": 0.00015,
+                "cached_input": 0.000075,
+                "output": 0.0006,
+            },  # $0.15/$0.075/$0.60 per 1M
+            "gpt-4o": {"input": 0.005, "cached_input": 0.0025, "output": 0.015},  # $5/$15 per 1M
+            "gpt-4": {"input": 0.03, "cached_input": 0.03, "output": 0.06},  # $30/$60 per 1M
         }
 
         price = PRICING.get(model, PRICING["gpt-4o-mini"])
-        cost_input = (input_tokens / 1000) * price["input"]
+        cached_input_tokens = min(cached_input_tokens, input_tokens)
+        uncached_input_tokens = input_tokens - cached_input_tokens
+        cost_input = (uncached_input_tokens / 1000) * price["input"] + (
+            cached_input_tokens / 1000
+        ) * price["cached_input"]
         cost_output = (output_tokens / 1000) * price["output"]
         return cost_input + cost_output
 
@@ -227,12 +548,20 @@ class AzureOpenAIClient:
         Returns:
             Dictionary with usage statistics
         """
-        total_cost = self.calculate_cost(self.total_input_tokens, self.total_output_tokens)
+        total_cost = self.calculate_cost(
+            self.total_input_tokens,
+            self.total_output_tokens,
+            cached_input_tokens=self.total_cached_input_tokens,
+        )
 
         return {
             "total_requests": self.total_requests,
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
             "input_tokens": self.total_input_tokens,
+            "cached_input_tokens": self.total_cached_input_tokens,
+            "cache_hit_rate": round(
+                self.total_cached_input_tokens / max(1, self.total_input_tokens), 4
+            ),
             "output_tokens": self.total_output_tokens,
             "total_cost_usd": round(total_cost, 4),
             "avg_tokens_per_request": (
@@ -240,6 +569,34 @@ class AzureOpenAIClient:
             ),
         }
 
+    def get_usage_snapshot(self) -> Dict[str, Any]:
+        """
+        Get detailed usage telemetry from the usage ledger.
+
+        Returns:
+            Snapshot with totals, per-deployment/segment/tone breakdowns,
+            rolling 1m/5m windows and latency percentiles
+        """
+        snapshot = self.usage_ledger.snapshot()
+        snapshot["concurrency"] = self.concurrency_limiter.get_stats()
+        if self.hedger is not None:
+            snapshot["hedging"] = self.hedger.get_stats()
+        return snapshot
+
+    def close(self) -> None:
+        """Shut down the hedger's worker pool and close the underlying SDK client."""
+        if self.hedger is not None:
+            self.hedger.shutdown()
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            close()
+
+    def __enter__(self) -> "AzureOpenAIClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def test_connection(self) -> str:
         """
         Test the Azure OpenAI connection.
@@ -0,0 +1,470 @@
+"""
+Azure OpenAI Batch Integration Module
+
+This module provides offline batch submission for the Customer Personalization Orchestrator.
+Generation requests are serialized to JSONL batch files (split to stay within the Batch API
+limits on requests and bytes per file), submitted through a pluggable batch backend, polled
+until completion and returned as parsed completion dictionaries with the same fields as
+AzureOpenAIClient.generate_completion. Expired batches still return the requests they
+completed.
+
+Backends:
+- AzureOpenAIBatchBackend: Azure OpenAI Batch API (files + batches endpoints)
+- LocalFileBatchBackend: File-based stand-in that answers requests locally (for tests)
+"""
+
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Responses API endpoint used for each batch line
+BATCH_ENDPOINT = "/v1/responses"
+BATCH_COMPLETION_WINDOW = "24h"
+# Batch requests are billed at 50% of the synchronous price
+BATCH_PRICE_MULTIPLIER = 0.5
+
+# Azure OpenAI Batch API limits per input file
+MAX_BATCH_REQUESTS = 100000
+MAX_BATCH_FILE_BYTES = 200 * 1024 * 1024
+
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Terminal statuses with usable output (an expired batch keeps its completed requests)
+RESULT_BATCH_STATUSES = {"completed", "expired"}
+
+
+def build_batch_request(
+    custom_id: str,
+    model: str,
+    prompt: str,
+    system_message: str,
+    max_tokens: int,
+    prompt_cache_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Build one JSONL batch request line for the Responses API.
+
+    Args:
+        custom_id: Unique ID used to map results back to requests
+        model: Deployment name
+        prompt: Input prompt (system_message will be prepended)
+        system_message: System message to prepend to prompt
+        max_tokens: Maximum tokens to generate
+        prompt_cache_key: Optional key that routes requests sharing a static
+            prompt prefix to the same provider-side prompt cache
+
+    Returns:
+        Batch request dictionary
+    """
+    if max_tokens < 16:
+        raise ValueError("max_tokens must be at least 16 for Responses API")
+
+    body = {
+        "model": model,
+        "input": f"{system_message}\n\n{prompt}",
+        "max_output_tokens": max_tokens,
+    }
+    if prompt_cache_key:
+        body["prompt_cache_key"] = prompt_cache_key
+
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def split_batch_requests(
+    requests: List[Dict[str, Any]],
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_FILE_BYTES,
+) -> List[List[str]]:
+    """
+    Serialize batch requests into JSONL lines grouped by the per-file limits.
+
+    Args:
+        requests: Batch request dictionaries
+        max_requests: Maximum requests per batch file
+        max_bytes: Maximum bytes per batch file
+
+    Returns:
+        Lists of JSONL lines (with trailing newlines), one list per batch file
+
+    Raises:
+        ValueError: If a limit is not positive or one request exceeds max_bytes
+    """
+    if max_requests < 1 or max_bytes < 1:
+        raise ValueError("max_requests and max_bytes must be positive")
+
+    parts: List[List[str]] = []
+    lines: List[str] = []
+    size = 0
+    for request in requests:
+        line = json.dumps(request) + "\n"
+        line_bytes = len(line.encode("utf-8"))
+        if line_bytes > max_bytes:
+            raise ValueError(
+                f"Batch request {request.get('custom_id')} is {line_bytes} bytes, "
+                f"over the {max_bytes}-byte file limit"
+            )
+        if lines and (len(lines) >= max_requests or size + line_bytes > max_bytes):
+            parts.append(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += line_bytes
+    if lines:
+        parts.append(lines)
+    return parts
+
+
+def _check_requests(requests: List[Dict[str, Any]]) -> None:
+    """Reject empty batches and duplicate custom IDs."""
+    if not requests:
+        raise ValueError("Batch must contain at least one request")
+
+    custom_ids = [request["custom_id"] for request in requests]
+    if len(set(custom_ids)) != len(custom_ids):
+        raise ValueError("Batch request custom_id values must be unique")
+
+
+def write_batch_file(requests: List[Dict[str, Any]], path: str) -> str:
+    """
+    Write batch requests to a JSONL file.
+
+    Args:
+        requests: Batch request dictionaries
+        path: Output file path
+
+    Returns:
+        Path of the written file
+
+    Raises:
+        ValueError: If requests is empty or custom IDs are not unique
+    """
+    _check_requests(requests)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+
+    logger.info(f"Wrote {len(requests)} batch requests to {path}")
+    return path
+
+
+def write_batch_files(
+    requests: List[Dict[str, Any]],
+    path: str,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_FILE_BYTES,
+) -> List[str]:
+    """
+    Write batch requests to as many JSONL files as the Batch API limits require.
+
+    Args:
+        requests: Batch request dictionaries
+        path: Output file path; when split, parts are written as <stem>_partNNN<suffix>
+        max_requests: Maximum requests per file
+        max_bytes: Maximum bytes per file
+
+    Returns:
+        Paths of the written files, in request order
+
+    Raises:
+        ValueError: If requests is empty, custom IDs are not unique or one request
+            exceeds max_bytes
+    """
+    _check_requests(requests)
+    parts = split_batch_requests(requests, max_requests=max_requests, max_bytes=max_bytes)
+
+    base = Path(path)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for number, lines in enumerate(parts, start=1):
+        part_path = (
+            path
+            if len(parts) == 1
+            else str(base.with_name(f"{base.stem}_part{number:03d}{base.suffix}"))
+        )
+        with open(part_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        paths.append(part_path)
+
+    logger.info(f"Wrote {len(requests)} batch requests to {len(paths)} file(s) at {path}")
+    return paths
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a JSONL file into a list of dictionaries.
+
+    Args:
+        path: JSONL file path
+
+    Returns:
+        List of parsed lines
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_batch_response_body(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse a raw Responses API JSON body from a batch output line.
+
+    Args:
+        body: Response body dictionary
+
+    Returns:
+        Dictionary with text, finish_reason and token counts
+    """
+    output_text = body.get("output_text") or ""
+    if not output_text:
+        parts = []
+        for item in body.get("output", []) or []:
+            for content in item.get("content", []) or []:
+                if content.get("type") in ("output_text", "text"):
+                    text = content.get("text", "")
+                    if isinstance(text, dict):
+                        text = text.get("value", "")
+                    parts.append(text or "")
+        output_text = "".join(parts)
+
+    usage = body.get("usage") or {}
+    input_details = usage.get("input_tokens_details") or {}
+
+    return {
+        "text": output_text,
+        "finish_reason": body.get("status", "completed"),
+        "input_tokens": usage.get("input_tokens", 0),
+        "cached_input_tokens": input_details.get("cached_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "tokens_used": usage.get("total_tokens", 0),
+    }
+
+
+class BatchBackend(ABC):
+    """
+    Interface for batch submission backends.
+
+    Implementations submit a JSONL request file, report job status and return
+    the output lines once the job has finished.
+    """
+
+    @abstractmethod
+    def submit(self, input_path: str) -> str:
+        """Submit a JSONL request file and return the batch ID."""
+
+    @abstractmethod
+    def get_status(self, batch_id: str) -> str:
+        """Return the current status of a batch job."""
+
+    @abstractmethod
+    def get_results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Return output lines (custom_id, response, error); expired batches return completed ones."""
+
+
+class AzureOpenAIBatchBackend(BatchBackend):
+    """
+    Batch backend using the Azure OpenAI Batch API.
+
+    Requires a Global Batch or Data Zone Batch deployment.
+    """
+
+    def __init__(self, client, completion_window: str = BATCH_COMPLETION_WINDOW):
+        """
+        Initialize the Azure batch backend.
+
+        Args:
+            client: AzureOpenAI SDK client
+            completion_window: Batch completion window
+        """
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: str) -> str:
+        """Upload the request file and create a batch job."""
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        logger.info(f"Submitted Azure OpenAI batch {batch.id} (input file {input_file.id})")
+        return batch.id
+
+    def get_status(self, batch_id: str) -> str:
+        """Retrieve the batch job status."""
+        return self.client.batches.retrieve(batch_id).status
+
+    def get_results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Download output and error files for a finished (or expired) batch."""
+        batch = self.client.batches.retrieve(batch_id)
+
+        lines = []
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            lines.extend(json.loads(line) for line in content.splitlines() if line.strip())
+        return lines
+
+
+class LocalFileBatchBackend(BatchBackend):
+    """
+    File-based batch backend that answers requests locally.
+
+    Each request body is passed to a responder callable; its text is written to
+    an output JSONL file in the same shape as the Azure Batch API output. Useful
+    for tests and offline dry runs.
+    """
+
+    def __init__(
+        self,
+        work_dir: str,
+        responder: Callable[[Dict[str, Any]], str],
+        polls_until_complete: int = 0,
+    ):
+        """
+        Initialize the local batch backend.
+
+        Args:
+            work_dir: Directory for output files
+            responder: Callable mapping a request body to generated text
+            polls_until_complete: Number of status polls reporting "in_progress"
+                before the batch is reported as completed
+        """
+        self.work_dir = work_dir
+        self.responder = responder
+        self.polls_until_complete = polls_until_complete
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def submit(self, input_path: str) -> str:
+        """Process every request in the input file and record the output path."""
+        batch_id = f"batch_local_{uuid4().hex[:12]}"
+        output_path = os.path.join(self.work_dir, f"{batch_id}_output.jsonl")
+        Path(self.work_dir).mkdir(parents=True, exist_ok=True)
+
+        with open(output_path, "w", encoding="utf-8") as out:
+            for request in read_jsonl(input_path):
+                line = {"custom_id": request["custom_id"], "response": None, "error": None}
+                try:
+                    text = self.responder(request["body"])
+                    output_tokens = len(text.split())
+                    input_tokens = len(request["body"].get("input", "").split())
+                    line["response"] = {
+                        "status_code": 200,
+                        "body": {
+                            "status": "completed",
+                            "output": [{"content": [{"type": "output_text", "text": text}]}],
+                            "usage": {
+                                "input_tokens": input_tokens,
+                                "output_tokens": output_tokens,
+                                "total_tokens": input_tokens + output_tokens,
+                            },
+                        },
+                    }
+                except Exception as e:
+                    line["error"] = {"code": "local_error", "message": str(e)}
+                out.write(json.dumps(line) + "\n")
+
+        self._jobs[batch_id] = {"output_path": output_path, "polls": 0}
+        return batch_id
+
+    def get_status(self, batch_id: str) -> str:
+        """Report in_progress for the configured number of polls, then completed."""
+        job = self._jobs[batch_id]
+        job["polls"] += 1
+        return "in_progress" if job["polls"] <= self.polls_until_complete else "completed"
+
+    def get_results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Read the output file for a batch."""
+        return read_jsonl(self._jobs[batch_id]["output_path"])
+
+
+def wait_for_batch(
+    backend: BatchBackend,
+    batch_id: str,
+    poll_interval: float = 30.0,
+    timeout: float = 86400.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> str:
+    """
+    Poll a batch job until it reaches a terminal status.
+
+    Args:
+        backend: Batch backend that owns the job
+        batch_id: Batch ID returned by submit()
+        poll_interval: Seconds between status checks
+        timeout: Maximum seconds to wait
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        Terminal batch status
+
+    Raises:
+        TimeoutError: If the batch does not finish within timeout
+    """
+    start_time = time.time()
+
+    while True:
+        status = backend.get_status(batch_id)
+        if status in TERMINAL_BATCH_STATUSES:
+            logger.info(f"Batch {batch_id} finished with status: {status}")
+            return status
+
+        if time.time() - start_time >= timeout:
+            raise TimeoutError(f"Batch {batch_id} did not complete within {timeout}s")
+
+        logger.debug(f"Batch {batch_id} status: {status}, polling again in {poll_interval}s")
+        sleep(poll_interval)
+
+
+def collect_batch_results(
+    results: List[Dict[str, Any]], model: str, cost_fn: Optional[Callable[..., float]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Map batch output lines to parsed completion dictionaries by custom_id.
+
+    Args:
+        results: Output lines from BatchBackend.get_results()
+        model: Deployment name to record on each result
+        cost_fn: Optional cost function with AzureOpenAIClient.calculate_cost's signature
+
+    Returns:
+        Dict mapping custom_id to a parsed result or an {"error": ...} entry
+    """
+    parsed = {}
+
+    for line in results:
+        custom_id = line.get("custom_id")
+        response = line.get("response") or {}
+        error = line.get("error")
+
+        if error or response.get("status_code", 200) >= 400:
+            parsed[custom_id] = {"error": error or response.get("body", {}).get("error")}
+            continue
+
+        result = parse_batch_response_body(response.get("body") or {})
+        cost = 0.0
+        if cost_fn is not None:
+            cost = cost_fn(
+                result["input_tokens"],
+                result["output_tokens"],
+                cached_input_tokens=result["cached_input_tokens"],
+            )
+        result.update(
+            {
+                "model": model,
+                "duration_ms": 0,
+                "cost_usd": cost * BATCH_PRICE_MULTIPLIER,
+            }
+        )
+        parsed[custom_id] = result
+
+    return parsed
@@ -3,10 +3,16 @@ Azure AI Search Integration Module
 
 This module provides a wrapper around the Azure AI Search API for the Customer Personalization Orchestrator.
 It handles index management, document indexing, and search operations.
+
+Documents can be safety-screened at index time (prescreen_documents); their severities
+and screening status are stored in filterable safety_* fields so retrieval can exclude
+unsafe sources server-side with safety_filter(). Documents whose screening failed are
+marked safety_status "failed" and are always excluded.
 """
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from azure.search.documents.indexes import SearchIndexClient
@@ -27,12 +33,78 @@ from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
 from dotenv import load_dotenv
 
+from src.integrations.retry_policy import DEFAULT_RETRY_POLICY
+
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Content Safety categories stored per document as safety_<category>
+SAFETY_CATEGORIES = ["hate", "violence", "self_harm", "sexual"]
+# Values of the safety_status field (null for documents indexed without screening)
+SAFETY_STATUS_SCREENED = "screened"
+SAFETY_STATUS_FAILED = "failed"
+
+
+def safety_fields() -> List[SimpleField]:
+    """
+    Index fields holding index-time safety screening results.
+
+    Returns:
+        Filterable fields for the max and per-category severities, screening status
+        and screening time
+    """
+    fields = [
+        SimpleField(
+            name="safety_max_severity",
+            type=SearchFieldDataType.Int32,
+            filterable=True,
+            sortable=True,
+            facetable=True,
+        )
+    ]
+    fields += [
+        SimpleField(name=f"safety_{category}", type=SearchFieldDataType.Int32, filterable=True)
+        for category in SAFETY_CATEGORIES
+    ]
+    fields.append(
+        SimpleField(
+            name="safety_status",
+            type=SearchFieldDataType.String,
+            filterable=True,
+            facetable=True,
+        )
+    )
+    fields.append(
+        SimpleField(
+            name="safety_screened_at", type=SearchFieldDataType.DateTimeOffset, filterable=True
+        )
+    )
+    return fields
+
+
+def safety_filter(max_severity: int, include_unscreened: bool = False) -> str:
+    """
+    Build an OData filter keeping documents screened at or below a severity.
+
+    Documents whose screening failed have no severity and never match.
+
+    Args:
+        max_severity: Highest allowed safety_max_severity
+        include_unscreened: Also keep documents indexed without any screening
+            (no severity and no safety_status); only for legacy indexes populated
+            before index-time screening
+
+    Returns:
+        OData filter expression for SearchClient.search(filter=...)
+    """
+    expression = f"safety_max_severity le {int(max_severity)}"
+    if include_unscreened:
+        expression = f"({expression} or (safety_max_severity eq null and safety_status eq null))"
+    return expression
+
 
 def get_search_index_client() -> SearchIndexClient:
     """
@@ -151,6 +223,8 @@ def create_content_index_schema(index_name: str) -> SearchIndex:
         SimpleField(name="metadata_author", type=SearchFieldDataType.String, filterable=True),
         SimpleField(name="metadata_version", type=SearchFieldDataType.String, filterable=True),
         SimpleField(name="metadata_last_updated", type=SearchFieldDataType.String, filterable=True),
+        # Index-time safety screening results
+        *safety_fields(),
     ]
 
     # Configure semantic search
@@ -210,6 +284,36 @@ def create_index(index_name: str) -> bool:
         return False
 
 
+def add_safety_fields(index_name: str) -> bool:
+    """
+    Add the safety_* fields to an index created before index-time screening.
+
+    Adding fields is an in-place schema update; existing documents keep null
+    severities until they are re-indexed.
+
+    Args:
+        index_name: Name of the index to update
+
+    Returns:
+        bool: True if the fields exist afterwards, False otherwise
+    """
+    try:
+        client = get_search_index_client()
+        index = client.get_index(index_name)
+        existing = {field.name for field in index.fields}
+        missing = [field for field in safety_fields() if field.name not in existing]
+        if not missing:
+            return True
+
+        index.fields.extend(missing)
+        client.create_or_update_index(index)
+        logger.info(f"✅ Added {len(missing)} safety fields to index '{index_name}'")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Failed to add safety fields to index '{index_name}': {e}")
+        return False
+
+
 def delete_index(index_name: str) -> bool:
     """
     Delete a search index.
@@ -313,9 +417,73 @@ def transform_document_for_indexing(doc: Dict[str, Any]) -> Dict[str, Any]:
     transformed["metadata_version"] = metadata.get("version", "")
     transformed["metadata_last_updated"] = metadata.get("last_updated", "")
 
+    # Index-time safety screening results (see prescreen_documents)
+    safety = doc.get("safety")
+    if safety:
+        transformed["safety_status"] = safety.get("status", SAFETY_STATUS_SCREENED)
+        transformed["safety_screened_at"] = safety["screened_at"]
+        if transformed["safety_status"] == SAFETY_STATUS_SCREENED:
+            transformed["safety_max_severity"] = safety["max_severity"]
+            for category in SAFETY_CATEGORIES:
+                transformed[f"safety_{category}"] = safety["severity_scores"].get(category, 0)
+
     return transformed
 
 
+def prescreen_documents(
+    documents: List[Dict[str, Any]], safety_client: Any, max_workers: int = 8
+) -> Dict[str, int]:
+    """
+    Safety-screen documents in parallel before indexing.
+
+    Title and content are analyzed together (long documents are chunked by the
+    client). Each document gets a "safety" entry that transform_document_for_indexing()
+    stores in the safety_* fields. Documents whose screening fails are marked with
+    status SAFETY_STATUS_FAILED and no severities, so safety_filter() excludes them
+    until they are re-indexed with a successful screening.
+
+    Args:
+        documents: Documents to screen (updated in place)
+        safety_client: Client with analyze_text(), e.g. from get_safety_client()
+        max_workers: Documents screened concurrently
+
+    Returns:
+        Dict with screened and failed counts and a max-severity histogram
+    """
+
+    def screen(doc: Dict[str, Any]) -> Dict[str, Any]:
+        text = f"{doc.get('title', '')}\n\n{doc.get('content', '')}"
+        screened_at = datetime.utcnow().isoformat() + "Z"
+        try:
+            analysis = safety_client.analyze_text(text)
+        except Exception as e:
+            logger.error(f"❌ Safety screening failed for document {doc.get('document_id')}: {e}")
+            return {"status": SAFETY_STATUS_FAILED, "screened_at": screened_at}
+        return {
+            "status": SAFETY_STATUS_SCREENED,
+            "max_severity": analysis["max_severity"],
+            "severity_scores": analysis["severity_scores"],
+            "screened_at": screened_at,
+        }
+
+    stats = {"screened": 0, "failed": 0, "severity_counts": {}}
+    if not documents:
+        return stats
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(documents)))) as executor:
+        for doc, safety in zip(documents, executor.map(screen, documents)):
+            doc["safety"] = safety
+            if safety["status"] == SAFETY_STATUS_FAILED:
+                stats["failed"] += 1
+                continue
+            stats["screened"] += 1
+            severity = safety["max_severity"]
+            stats["severity_counts"][severity] = stats["severity_counts"].get(severity, 0) + 1
+
+    logger.info(f"🛡️ Safety screening: {stats['screened']} screened, {stats['failed']} failed")
+    return stats
+
+
 def index_documents(
     documents: List[Dict[str, Any]], index_name: Optional[str] = None, batch_size: int = 100
 ) -> Dict[str, int]:
@@ -347,8 +515,8 @@ def index_documents(
             batch = transformed_docs[i : i + batch_size]
 
             try:
-                # Upload the batch
-                result = search_client.upload_documents(documents=batch)
+                # Upload the batch (transient failures retried by the shared policy)
+                result = DEFAULT_RETRY_POLICY.call(search_client.upload_documents, documents=batch)
 
                 # Count successes and failures
                 succeeded = len([r for r in result if r.succeeded])
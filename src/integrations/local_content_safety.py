@@ -0,0 +1,245 @@
+"""
+Local Content Safety Module
+
+This module provides a rule-based stand-in for the Azure AI Content Safety client so
+safety screening can be tested and benchmarked offline at full throughput.
+
+LocalSafetyAnalyzer implements analyze_text() with the same result dict as
+ContentSafetyClient._parse_safety_response(). Each category (hate, violence,
+self_harm, sexual) has a lexicon of keywords and regular expressions grouped by
+severity (2, 4, 6). The whole lexicon is compiled into one pattern that scans the
+lowercased text once, and a category scores the highest tier it matches.
+
+Select it with safety_policy.analyzer.provider: local (or the
+CONTENT_SAFETY_ANALYZER=local environment variable). It is also cheap enough to
+use as a pre-filter in front of the Azure API.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SAFETY_CATEGORIES = ["hate", "violence", "self_harm", "sexual"]
+LEXICON_SEVERITIES = [6, 4, 2]
+
+# Terms are regular expressions matched on word boundaries against the lowercased
+# text, so they must be written in lowercase.
+# The default lexicon is deliberately small and conservative: marketing copy should
+# score 0, and only explicit phrases reach the blocking tier.
+DEFAULT_LEXICON: Dict[str, Dict[int, List[str]]] = {
+    "hate": {
+        6: [r"exterminate (?:them|all of them)", r"subhumans?", r"ethnic cleansing"],
+        4: [r"vermin", r"inferior (?:race|people)", r"go back to your country"],
+        2: [r"hate (?:them|those people)", r"bigots?"],
+    },
+    "violence": {
+        6: [
+            r"kill (?:you|him|her|them)",
+            r"murder(?:ed|ing)?",
+            r"shoot (?:up|you)",
+            r"bomb threat",
+        ],
+        4: [r"beat (?:you|him|her|them) up", r"stab(?:bed|bing)?", r"weapons?", r"assault"],
+        2: [r"fight(?:ing)?", r"punch(?:ed)?", r"violent"],
+    },
+    "self_harm": {
+        6: [r"kill myself", r"suicide", r"end my life"],
+        4: [r"self[- ]harm", r"cut(?:ting)? myself", r"overdose"],
+        2: [r"hurt myself", r"starve myself"],
+    },
+    "sexual": {
+        6: [r"porn(?:ography|ographic)?", r"sexually explicit", r"explicit sex"],
+        4: [r"nude", r"naked", r"sexual"],
+        2: [r"sexy", r"lingerie", r"seductive"],
+    },
+}
+
+
+def load_lexicon(path: str) -> Dict[str, Dict[int, List[str]]]:
+    """
+    Load a lexicon from YAML.
+
+    The file maps each category to severity tiers (2, 4, 6), each a list of
+    lowercase terms. Categories missing from the file keep no terms.
+
+    Args:
+        path: YAML lexicon path
+
+    Returns:
+        Lexicon dictionary
+
+    Raises:
+        ValueError: If a category or severity tier is not recognised
+    """
+    with open(path, "r") as f:
+        raw = yaml.safe_load(f) or {}
+
+    lexicon = {}
+    for category, tiers in raw.items():
+        if category not in SAFETY_CATEGORIES:
+            raise ValueError(f"Unknown safety category in lexicon: {category}")
+        lexicon[category] = {}
+        for severity, terms in (tiers or {}).items():
+            if int(severity) not in LEXICON_SEVERITIES:
+                raise ValueError(
+                    f"Invalid severity {severity} for {category}. "
+                    f"Must be one of {LEXICON_SEVERITIES}"
+                )
+            lexicon[category][int(severity)] = list(terms or [])
+    return lexicon
+
+
+class LocalSafetyAnalyzer:
+    """
+    Rule-based content safety analyzer with the ContentSafetyClient interface.
+
+    Thread-safe: compiled patterns are read-only and counters are guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        lexicon: Optional[Dict[str, Dict[int, List[str]]]] = None,
+        lexicon_path: Optional[str] = None,
+    ):
+        """
+        Initialize the analyzer and compile its lexicon.
+
+        Args:
+            lexicon: Category -> severity -> terms (default: DEFAULT_LEXICON)
+            lexicon_path: YAML lexicon file, used when lexicon is None
+
+        Raises:
+            ValueError: If a term is not a valid regular expression
+        """
+        if lexicon is None:
+            lexicon = load_lexicon(lexicon_path) if lexicon_path else DEFAULT_LEXICON
+        self.lexicon = lexicon
+        self._pattern = self._compile(lexicon)
+
+        # Lexicon fingerprint, so cached verdicts are invalidated when the rules change
+        lexicon_json = json.dumps(
+            {
+                category: {str(k): v for k, v in tiers.items()}
+                for category, tiers in lexicon.items()
+            },
+            sort_keys=True,
+        )
+        self.version = f"local-{hashlib.sha256(lexicon_json.encode('utf-8')).hexdigest()[:12]}"
+
+        self._request_count = 0
+        self._total_latency = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(lexicon: Dict[str, Dict[int, List[str]]]) -> "re.Pattern":
+        """
+        Compile the whole lexicon into one pattern with a named group per category tier.
+
+        A single pass over the lowercased text finds every match; IGNORECASE is avoided
+        because it makes matching several times slower.
+        """
+        groups = []
+        for category in SAFETY_CATEGORIES:
+            tiers = lexicon.get(category, {}) or {}
+            for severity in LEXICON_SEVERITIES:
+                terms = tiers.get(severity) or []
+                if not terms:
+                    continue
+                try:
+                    for term in terms:
+                        re.compile(term)
+                except re.error as e:
+                    raise ValueError(f"Invalid {category} lexicon term at severity {severity}: {e}")
+                alternation = "|".join(f"(?:{term})" for term in terms)
+                groups.append(f"(?P<{category}__{severity}>{alternation})")
+
+        if not groups:
+            # Never matches: an empty lexicon scores everything 0
+            return re.compile(r"(?!)")
+        return re.compile(rf"(?<!\w)(?:{'|'.join(groups)})(?!\w)")
+
+    def _matches(self, text: str):
+        """Yield (category, severity, matched text) for lexicon matches in text."""
+        for match in self._pattern.finditer(text.lower()):
+            category, severity = match.lastgroup.split("__")
+            yield category, int(severity), match.group(0)
+
+    def analyze_text(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze text for safety violations with the local lexicon.
+
+        Args:
+            text: Text content to analyze
+
+        Returns:
+            Dict in the ContentSafetyClient.analyze_text() format
+
+        Raises:
+            ValueError: If text is empty or invalid
+        """
+        if not text or not text.strip():
+            raise ValueError("Text content cannot be empty")
+
+        start_time = time.time()
+        # Each category scores the highest tier it matches
+        severity_scores = {category: 0 for category in SAFETY_CATEGORIES}
+        for category, severity, _ in self._matches(text):
+            if severity > severity_scores[category]:
+                severity_scores[category] = severity
+
+        result = {
+            "text_length": len(text),
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "severity_scores": severity_scores,
+            "status": "pass",
+            "blocked_categories": [],
+            "max_severity": max(severity_scores.values()),
+        }
+
+        latency = time.time() - start_time
+        with self._lock:
+            self._request_count += 1
+            self._total_latency += latency
+
+        return result
+
+    def explain(self, text: str) -> Dict[str, List[str]]:
+        """
+        List the lexicon matches behind a score.
+
+        Args:
+            text: Text content to analyze
+
+        Returns:
+            Category -> matched phrases, lowercased (categories without matches omitted)
+        """
+        matches: Dict[str, List[str]] = {}
+        for category, _, phrase in self._matches(text):
+            matches.setdefault(category, []).append(phrase)
+        return matches
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get usage statistics for this analyzer instance.
+
+        Returns:
+            Dict containing usage metrics (same keys as ContentSafetyClient)
+        """
+        avg_latency = self._total_latency / max(1, self._request_count)
+
+        return {
+            "total_requests": self._request_count,
+            "total_latency_seconds": round(self._total_latency, 3),
+            "average_latency_seconds": round(avg_latency, 3),
+            "requests_per_second": round(self._request_count / max(1e-9, self._total_latency), 2),
+        }
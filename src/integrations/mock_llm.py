@@ -0,0 +1,446 @@
+"""
+Mock LLM Module
+
+This module provides a local stand-in for the Azure OpenAI Responses API so the
+generation pipeline can be load-tested offline without spending money.
+
+Two flavours speak the same ``responses.create`` shape:
+- MockResponsesClient: in-process fake that AzureOpenAIClient uses when
+  AZURE_OPENAI_MOCK_LLM=inprocess
+- MockLLMServer: small localhost HTTP server; point AZURE_OPENAI_ENDPOINT at it
+
+Both support configurable latency distributions, token counts, 429 injection and
+deterministic templated outputs that satisfy validate_variant_format.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from openai import RateLimitError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "lognormal"]
+
+# Matches "[DOC_ID] Title:" snippet headers rendered by MessageGenerator._build_prompt
+_SNIPPET_TITLE_PATTERN = re.compile(r"^\s*\d+\.\s*\[[^\]]*\]\s*(.+?):\s*$", re.MULTILINE)
+# Splits streamed output into word-sized text deltas (trailing whitespace attached)
+_STREAM_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+_BODY_SENTENCES = [
+    "We put together a few ideas based on what customers like you value most.",
+    "Our approved resources explain how each feature fits into your routine.",
+    "Members who explored these options reported smoother day-to-day experiences.",
+    "Every recommendation below is grounded in content our team has reviewed.",
+    "You can start with the option that best matches your current goals.",
+    "Our support specialists are ready to help you compare the details.",
+    "Take a moment to review the highlights and choose what works for you.",
+    "We will keep sharing updates that make your experience more rewarding.",
+]
+
+
+class MockLLMConfig:
+    """
+    Configuration for mock LLM behaviour.
+
+    Attributes:
+        latency_distribution: "fixed", "uniform" or "lognormal"
+        latency_ms: Fixed latency, or median latency for lognormal
+        latency_min_ms / latency_max_ms: Bounds for the uniform distribution
+        latency_sigma: Shape parameter for the lognormal distribution
+        rate_limit_probability: Probability of returning a 429 per request
+        retry_after_seconds: Retry-After header value sent with 429s
+        body_words: Number of words in generated bodies (150-250 passes validation)
+        output_tokens: Fixed output token count (None estimates from text)
+        seed: Seed for latency and 429 sampling
+    """
+
+    def __init__(
+        self,
+        latency_distribution: str = "fixed",
+        latency_ms: float = 0.0,
+        latency_min_ms: float = 0.0,
+        latency_max_ms: float = 0.0,
+        latency_sigma: float = 0.5,
+        rate_limit_probability: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        body_words: int = 180,
+        output_tokens: Optional[int] = None,
+        seed: int = 42,
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Invalid latency distribution: {latency_distribution}. "
+                f"Must be one of {LATENCY_DISTRIBUTIONS}"
+            )
+        if not 0.0 <= rate_limit_probability <= 1.0:
+            raise ValueError("rate_limit_probability must be between 0 and 1")
+
+        self.latency_distribution = latency_distribution
+        self.latency_ms = latency_ms
+        self.latency_min_ms = latency_min_ms
+        self.latency_max_ms = latency_max_ms
+        self.latency_sigma = latency_sigma
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after_seconds = retry_after_seconds
+        self.body_words = body_words
+        self.output_tokens = output_tokens
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls) -> "MockLLMConfig":
+        """
+        Build a configuration from AZURE_OPENAI_MOCK_* environment variables.
+
+        Returns:
+            MockLLMConfig instance
+        """
+        output_tokens = os.getenv("AZURE_OPENAI_MOCK_OUTPUT_TOKENS")
+        return cls(
+            latency_distribution=os.getenv("AZURE_OPENAI_MOCK_LATENCY_DISTRIBUTION", "fixed"),
+            latency_ms=float(os.getenv("AZURE_OPENAI_MOCK_LATENCY_MS", "0")),
+            latency_min_ms=float(os.getenv("AZURE_OPENAI_MOCK_LATENCY_MIN_MS", "0")),
+            latency_max_ms=float(os.getenv("AZURE_OPENAI_MOCK_LATENCY_MAX_MS", "0")),
+            latency_sigma=float(os.getenv("AZURE_OPENAI_MOCK_LATENCY_SIGMA", "0.5")),
+            rate_limit_probability=float(os.getenv("AZURE_OPENAI_MOCK_429_RATE", "0")),
+            retry_after_seconds=float(os.getenv("AZURE_OPENAI_MOCK_RETRY_AFTER", "1")),
+            body_words=int(os.getenv("AZURE_OPENAI_MOCK_BODY_WORDS", "180")),
+            output_tokens=int(output_tokens) if output_tokens else None,
+            seed=int(os.getenv("AZURE_OPENAI_MOCK_SEED", "42")),
+        )
+
+
+class MockLLMEngine:
+    """
+    Shared engine that produces deterministic responses and simulated failures.
+
+    Thread-safe: sampling is protected by a lock so the engine can back a
+    thread pool or a threaded HTTP server.
+    """
+
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        self.config = config or MockLLMConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.rate_limited_count = 0
+
+    def sample_latency_seconds(self) -> float:
+        """Draw a latency from the configured distribution."""
+        cfg = self.config
+        with self._lock:
+            if cfg.latency_distribution == "uniform":
+                latency_ms = self._rng.uniform(cfg.latency_min_ms, cfg.latency_max_ms)
+            elif cfg.latency_distribution == "lognormal":
+                latency_ms = self._rng.lognormvariate(0.0, cfg.latency_sigma) * cfg.latency_ms
+            else:
+                latency_ms = cfg.latency_ms
+        return max(0.0, latency_ms) / 1000.0
+
+    def should_rate_limit(self) -> bool:
+        """Decide whether this request receives a 429."""
+        with self._lock:
+            self.request_count += 1
+            limited = self._rng.random() < self.config.rate_limit_probability
+            if limited:
+                self.rate_limited_count += 1
+        return limited
+
+    def generate_text(self, prompt: str) -> str:
+        """
+        Produce a deterministic templated message for a prompt.
+
+        The same prompt always yields the same text. Subjects stay within 60
+        characters, bodies contain config.body_words words and cite one of the
+        snippet titles found in the prompt.
+
+        Args:
+            prompt: Full input prompt
+
+        Returns:
+            Generated message text with Subject: and Body: sections
+        """
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        titles = _SNIPPET_TITLE_PATTERN.findall(prompt)
+        title = titles[digest % len(titles)].strip() if titles else "Approved Content"
+        citation = f"[Source: {title}, Highlights]"
+
+        tone = "Update"
+        for candidate in ("Urgent", "Informational", "Friendly"):
+            if f"TONE: {candidate}" in prompt:
+                tone = candidate
+                break
+        subject = f"{tone} picks selected for you #{digest % 1000:03d}"[:60]
+
+        # Rotate sentences deterministically until the word budget is filled
+        target_words = max(1, self.config.body_words)
+        words: List[str] = []
+        i = digest % len(_BODY_SENTENCES)
+        citation_words = citation.split()
+        while len(words) + len(citation_words) < target_words:
+            words.extend(_BODY_SENTENCES[i % len(_BODY_SENTENCES)].split())
+            i += 1
+        words = words[: target_words - len(citation_words)] + citation_words
+
+        return f"Subject: {subject}\n\nBody: {' '.join(words)}"
+
+    def build_response_body(self, model: str, prompt: str, max_output_tokens: int) -> Dict:
+        """
+        Build a Responses API JSON body for a prompt.
+
+        Args:
+            model: Deployment name
+            prompt: Full input prompt
+            max_output_tokens: Requested output token limit (recorded only)
+
+        Returns:
+            Response dictionary in the Responses API shape
+        """
+        text = self.generate_text(prompt)
+        input_tokens = max(1, len(prompt) // 4)
+        output_tokens = self.config.output_tokens or max(1, int(len(text.split()) * 1.3))
+
+        return {
+            "id": f"resp_mock_{hashlib.md5(prompt.encode('utf-8')).hexdigest()[:16]}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": model,
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg_mock",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }
+            ],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+            "max_output_tokens": max_output_tokens,
+        }
+
+    @staticmethod
+    def stream_events(body: Dict) -> List[Dict]:
+        """
+        Split a response body into Responses API streaming events.
+
+        Args:
+            body: Response dictionary from build_response_body
+
+        Returns:
+            response.output_text.delta events followed by a response.completed event
+        """
+        text = body["output"][0]["content"][0]["text"]
+        events = [
+            {
+                "type": "response.output_text.delta",
+                "item_id": body["output"][0]["id"],
+                "output_index": 0,
+                "content_index": 0,
+                "delta": token,
+                "logprobs": [],
+            }
+            for token in _STREAM_TOKEN_PATTERN.findall(text)
+        ]
+        events.append({"type": "response.completed", "response": body})
+        for sequence_number, event in enumerate(events):
+            event["sequence_number"] = sequence_number
+        return events
+
+
+def _to_namespace(value: Any) -> Any:
+    """Recursively convert dicts to attribute-access namespaces."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _rate_limit_error(retry_after_seconds: float) -> RateLimitError:
+    """Build an openai.RateLimitError equivalent to an Azure 429."""
+    request = httpx.Request("POST", "http://mock-llm.local/openai/responses")
+    response = httpx.Response(
+        429, request=request, headers={"retry-after": f"{retry_after_seconds:g}"}
+    )
+    return RateLimitError("Mock rate limit exceeded", response=response, body=None)
+
+
+class _MockResponses:
+    """``responses`` resource of MockResponsesClient."""
+
+    def __init__(self, engine: MockLLMEngine):
+        self._engine = engine
+
+    def create(
+        self,
+        model: str,
+        input: str,
+        max_output_tokens: int = 400,
+        stream: bool = False,
+        **kwargs,
+    ):
+        """Create a response in the same shape as AzureOpenAI.responses.create."""
+        engine = self._engine
+        latency = engine.sample_latency_seconds()
+
+        if engine.should_rate_limit():
+            raise _rate_limit_error(engine.config.retry_after_seconds)
+
+        body = engine.build_response_body(model, input, max_output_tokens)
+        response = _to_namespace(body)
+        response.output_text = body["output"][0]["content"][0]["text"]
+
+        if stream:
+            return self._stream(response, latency)
+
+        if latency:
+            time.sleep(latency)
+        return response
+
+    def _stream(self, response, latency: float) -> Iterator[SimpleNamespace]:
+        """Yield text delta events followed by a completed event."""
+        tokens = _STREAM_TOKEN_PATTERN.findall(response.output_text)
+        per_token = latency / max(1, len(tokens))
+        for token in tokens:
+            if per_token:
+                time.sleep(per_token)
+            yield SimpleNamespace(type="response.output_text.delta", delta=token)
+        yield SimpleNamespace(type="response.completed", response=response)
+
+
+class MockResponsesClient:
+    """
+    In-process fake of the AzureOpenAI SDK client's ``responses`` resource.
+
+    Usage:
+        client = MockResponsesClient(MockLLMConfig(latency_ms=200))
+        client.responses.create(model="mock", input="...", max_output_tokens=500)
+    """
+
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        self.engine = MockLLMEngine(config)
+        self.responses = _MockResponses(self.engine)
+
+
+class MockLLMServer:
+    """
+    Localhost HTTP server speaking the Azure OpenAI Responses API.
+
+    Point AZURE_OPENAI_ENDPOINT at ``server.endpoint`` to exercise the real SDK
+    and HTTP stack. Any POST path ending in ``/responses`` is answered, as
+    server-sent events when the request sets ``stream``.
+    """
+
+    def __init__(
+        self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 0
+    ):
+        self.engine = MockLLMEngine(config)
+        engine = self.engine
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.split("?")[0].rstrip("/").endswith("/responses"):
+                    self._send(404, {"error": {"code": "NotFound", "message": self.path}})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                latency = engine.sample_latency_seconds()
+                if engine.should_rate_limit():
+                    self._send(
+                        429,
+                        {"error": {"code": "429", "message": "Mock rate limit exceeded"}},
+                        headers={"Retry-After": f"{engine.config.retry_after_seconds:g}"},
+                    )
+                    return
+
+                prompt = payload.get("input", "")
+                if isinstance(prompt, list):
+                    prompt = "\n\n".join(str(item.get("content", "")) for item in prompt)
+
+                body = engine.build_response_body(
+                    payload.get("model", "mock"), prompt, payload.get("max_output_tokens", 400)
+                )
+                if payload.get("stream"):
+                    self._send_stream(engine.stream_events(body), latency)
+                    return
+
+                if latency:
+                    time.sleep(latency)
+                self._send(200, body)
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, events: List[Dict], latency: float):
+                # Server-sent events; latency is spread over the text deltas
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                per_event = latency / max(1, len(events) - 1)
+                for event in events:
+                    if per_event and event["type"] == "response.output_text.delta":
+                        time.sleep(per_event)
+                    data = json.dumps(event)
+                    self.wfile.write(f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+            def log_message(self, format, *args):
+                logger.debug("mock-llm: " + format % args)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL to use as AZURE_OPENAI_ENDPOINT."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockLLMServer":
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Mock LLM server listening on {self.endpoint}")
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and release the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -0,0 +1,213 @@
+"""
+Request Hedging Module
+
+This module provides opt-in request hedging for LLM calls in the Customer Personalization
+Orchestrator. When a call has not returned after the deployment's observed p95 latency, a
+duplicate request is fired and whichever succeeds first is used, so a few very slow calls
+no longer define campaign latency.
+
+- Hedges only start once enough latency samples exist to estimate p95
+- Hedged volume is capped at a fraction of requests (default 5%)
+- The losing request is cancelled if it has not started yet; an in-flight synchronous
+  HTTP call cannot be aborted, so it finishes in the background and its tokens are
+  reported as hedging overhead
+- shutdown() (or leaving a ``with`` block) stops the worker pool; AzureOpenAIClient.close()
+  calls it for the client's hedger
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import wait
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RequestHedger:
+    """
+    Thread-safe request hedger with a hedge budget.
+
+    Calls run on a shared worker pool so the caller can return as soon as
+    either the original or the hedged request succeeds.
+    """
+
+    def __init__(
+        self,
+        budget_fraction: float = 0.05,
+        latency_key: str = "p95_ms",
+        min_samples: int = 20,
+        min_delay_ms: float = 250.0,
+        max_workers: int = 256,
+    ):
+        """
+        Initialize the hedger.
+
+        Args:
+            budget_fraction: Maximum hedged requests as a fraction of all requests
+            latency_key: Latency summary key used as the hedge delay (p50_ms, p95_ms, p99_ms)
+            min_samples: Latency samples required before hedging starts
+            min_delay_ms: Lower bound for the hedge delay
+            max_workers: Worker threads shared by all hedged calls (should exceed
+                the caller's concurrency so requests never queue behind each other)
+
+        Raises:
+            ValueError: If budget_fraction is outside [0, 1]
+        """
+        if not 0 <= budget_fraction <= 1:
+            raise ValueError("budget_fraction must be between 0 and 1")
+
+        self.budget_fraction = budget_fraction
+        self.latency_key = latency_key
+        self.min_samples = min_samples
+        self.min_delay_ms = min_delay_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "hedges_denied": 0,
+            "discarded_responses": 0,
+            "overhead_input_tokens": 0,
+            "overhead_output_tokens": 0,
+        }
+
+    def hedge_delay_ms(self, latency_summary: Dict[str, float]) -> Optional[float]:
+        """
+        Compute the hedge delay from a latency summary.
+
+        Args:
+            latency_summary: Output of UsageLedger.latency_summary()
+
+        Returns:
+            Delay in milliseconds, or None if there are too few samples to hedge
+        """
+        if latency_summary.get("count", 0) < self.min_samples:
+            return None
+        return max(self.min_delay_ms, latency_summary.get(self.latency_key, 0.0))
+
+    def _try_acquire_hedge(self) -> bool:
+        """Reserve one hedge if the budget allows it."""
+        with self._lock:
+            if self.stats["hedges_fired"] + 1 <= self.budget_fraction * self.stats["requests"]:
+                self.stats["hedges_fired"] += 1
+                return True
+            self.stats["hedges_denied"] += 1
+            return False
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        delay_ms: Optional[float],
+        on_discard: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Call fn, firing a duplicate if it has not returned after delay_ms.
+
+        Args:
+            fn: Zero-argument callable performing one request
+            delay_ms: Hedge delay (None disables hedging for this call)
+            on_discard: Callback receiving each successful response that lost the race
+
+        Returns:
+            Result of the first successful call
+
+        Raises:
+            Exception: The original error if every attempt failed
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+
+        if delay_ms is None:
+            return fn()
+
+        primary = self._executor.submit(fn)
+        try:
+            return primary.result(timeout=delay_ms / 1000)
+        except FuturesTimeoutError:
+            pass
+
+        if not self._try_acquire_hedge():
+            return primary.result()
+
+        logger.debug(f"Request exceeded {delay_ms:.0f}ms, firing hedge")
+        hedge = self._executor.submit(fn)
+        pending = {primary, hedge}
+        first_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winners = [future for future in done if future.exception() is None]
+            if not winners:
+                first_error = first_error or next(iter(done)).exception()
+                continue
+
+            winner = winners[0]
+            if winner is hedge:
+                with self._lock:
+                    self.stats["hedge_wins"] += 1
+
+            for loser in winners[1:]:
+                self._discard(loser, on_discard)
+            for loser in pending:
+                if not loser.cancel():
+                    loser.add_done_callback(lambda f: self._discard(f, on_discard))
+            return winner.result()
+
+        raise first_error
+
+    def _discard(self, future, on_discard: Optional[Callable[[Any], None]]) -> None:
+        """Hand a losing response to the discard callback."""
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        with self._lock:
+            self.stats["discarded_responses"] += 1
+        if on_discard is not None:
+            try:
+                on_discard(future.result())
+            except Exception as e:
+                logger.warning(f"Failed to record discarded hedge response: {e}")
+
+    def record_overhead(self, input_tokens: int, output_tokens: int) -> None:
+        """
+        Record tokens spent on a discarded response.
+
+        Args:
+            input_tokens: Input tokens of the discarded response
+            output_tokens: Output tokens of the discarded response
+        """
+        with self._lock:
+            self.stats["overhead_input_tokens"] += input_tokens
+            self.stats["overhead_output_tokens"] += output_tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hedging counters.
+
+        Returns:
+            Dictionary with request, hedge and overhead counters plus hedge rate
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hedge_rate"] = round(stats["hedges_fired"] / max(1, stats["requests"]), 4)
+        return stats
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the worker pool.
+
+        Args:
+            wait: Whether to wait for background (losing) requests to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "RequestHedger":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
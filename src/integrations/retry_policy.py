@@ -0,0 +1,396 @@
+"""
+Retry Policy Module
+
+This module provides the shared retry and backoff policy for the Azure OpenAI, Azure AI
+Content Safety and Azure AI Search integrations of the Customer Personalization Orchestrator.
+
+- Errors are classified as retryable (429, 408, 5xx, connection errors, timeouts) or
+  terminal (validation errors, other 4xx, unknown exceptions), so requests that can never
+  succeed fail on the first attempt
+- Retry-After / retry-after-ms headers are honored; waits longer than the policy allows
+  fail fast instead of blocking a worker
+- Other retries use full-jitter exponential backoff
+- call_async() applies the same policy to coroutines, waiting with asyncio.sleep so
+  other tasks keep running during backoff
+- A process-wide retry budget caps retries as a fraction of traffic, so an outage
+  does not multiply load with retry storms
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Exceptions that indicate a caller bug and are never retried
+TERMINAL_EXCEPTIONS = (ValueError, TypeError, KeyError, AttributeError)
+
+
+class RetryBudget:
+    """
+    Thread-safe token bucket limiting retries to a fraction of requests.
+
+    Every first attempt deposits ``retry_ratio`` tokens and every retry
+    withdraws one. A small per-second refill keeps retries possible at low
+    traffic. When the bucket is empty, failed requests are not retried.
+    """
+
+    def __init__(
+        self,
+        retry_ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        max_tokens: float = 100.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the retry budget.
+
+        Args:
+            retry_ratio: Retries allowed per first attempt (0.1 = 10% of traffic)
+            min_retries_per_second: Baseline refill rate independent of traffic
+            max_tokens: Maximum number of retries that can be banked
+            clock: Monotonic time source (injectable for tests)
+        """
+        if retry_ratio < 0 or min_retries_per_second < 0:
+            raise ValueError("retry_ratio and min_retries_per_second must be non-negative")
+
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self.clock = clock
+
+        self._tokens = max_tokens
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.retries = 0
+        self.rejected_retries = 0
+
+    def _refill(self) -> None:
+        """Add time-based tokens (lock held)."""
+        now = self.clock()
+        elapsed = max(0.0, now - self._last_refill)
+        self._last_refill = now
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_retries_per_second)
+
+    def record_request(self) -> None:
+        """Record a first attempt and deposit its share of retry tokens."""
+        with self._lock:
+            self._refill()
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.retry_ratio)
+
+    def try_acquire_retry(self) -> bool:
+        """
+        Withdraw one retry token.
+
+        Returns:
+            True if the retry may proceed, False if the budget is exhausted
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.retries += 1
+                return True
+            self.rejected_retries += 1
+            return False
+
+    def get_stats(self) -> dict:
+        """Return request/retry counters and the remaining balance."""
+        with self._lock:
+            self._refill()
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "rejected_retries": self.rejected_retries,
+                "available_tokens": round(self._tokens, 2),
+            }
+
+
+# Shared by every integration so the cap applies to total traffic
+DEFAULT_RETRY_BUDGET = RetryBudget()
+
+
+def _get_header(headers: Any, name: str) -> Optional[str]:
+    """Case-insensitive header lookup tolerant of missing or non-mapping headers."""
+    if not headers or not hasattr(headers, "get"):
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    return value if isinstance(value, str) else None
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Parse Retry-After style headers into seconds.
+
+    Supports retry-after-ms, x-ms-retry-after-ms and retry-after (seconds).
+    HTTP-date values are ignored.
+
+    Args:
+        headers: Response headers mapping
+
+    Returns:
+        Seconds to wait, or None if no usable header is present
+    """
+    for name, scale in (("retry-after-ms", 1000.0), ("x-ms-retry-after-ms", 1000.0)):
+        value = _get_header(headers, name)
+        if value is not None:
+            try:
+                return max(0.0, float(value) / scale)
+            except ValueError:
+                pass
+
+    value = _get_header(headers, "retry-after")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+    return None
+
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether an error is worth retrying.
+
+    Args:
+        error: Exception raised by an Azure SDK call
+
+    Returns:
+        Tuple of (retryable, retry_after_seconds or None)
+    """
+    if isinstance(error, TERMINAL_EXCEPTIONS):
+        return False, None
+
+    # Builtin network errors
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True, None
+
+    # OpenAI SDK: APIStatusError carries status_code and response
+    status_code = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+
+    if getattr(error, "code", None) == "insufficient_quota":
+        # Quota exhaustion is reported as 429 but will not clear with retries
+        return False, None
+
+    if isinstance(status_code, int):
+        if status_code in RETRYABLE_STATUS_CODES:
+            return True, parse_retry_after(headers)
+        return False, None
+
+    # Connection and timeout errors without a status code
+    error_types = {cls.__name__ for cls in type(error).__mro__}
+    if error_types & {
+        "APIConnectionError",
+        "APITimeoutError",
+        "ServiceRequestError",
+        "ServiceResponseError",
+    }:
+        return True, None
+
+    return False, None
+
+
+class RetryPolicy:
+    """
+    Retry policy with error classification, Retry-After support, jittered
+    backoff and a shared retry budget.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 10.0,
+        max_retry_after: float = 30.0,
+        budget: Optional[RetryBudget] = DEFAULT_RETRY_BUDGET,
+        sleep: Optional[Callable[[float], None]] = None,
+        rng: Optional[random.Random] = None,
+        async_sleep: Optional[Callable[[float], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Maximum attempts including the first one
+            base_delay: Backoff base in seconds
+            max_delay: Cap on the jittered backoff in seconds
+            max_retry_after: Longest server-requested wait that is honored; longer
+                waits fail fast so the caller can shed or reschedule the work
+            budget: Retry budget shared across integrations (None disables it)
+            sleep: Sleep function (defaults to time.sleep, looked up at call time)
+            rng: Random generator for jitter
+            async_sleep: Sleep coroutine for call_async (defaults to asyncio.sleep)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.async_sleep = async_sleep
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff for the given retry number.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call fn, retrying retryable errors according to the policy.
+
+        Args:
+            fn: Callable to invoke
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Return value of fn
+
+        Raises:
+            Exception: The last error once it is terminal, attempts are
+                exhausted, the retry budget is empty or Retry-After is too long
+        """
+        name = getattr(fn, "__qualname__", repr(fn))
+        if self.budget is not None:
+            self.budget.record_request()
+
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(name, attempt, e)
+                (self.sleep or time.sleep)(delay)
+                attempt += 1
+
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await a coroutine function, retrying retryable errors according to the policy.
+
+        Backoff waits with asyncio.sleep, so other tasks on the event loop keep running
+        while this call waits out a 429 or transient error.
+
+        Args:
+            fn: Coroutine function to await
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Result of fn
+
+        Raises:
+            Exception: The last error once it is terminal, attempts are
+                exhausted, the retry budget is empty or Retry-After is too long
+        """
+        name = getattr(fn, "__qualname__", repr(fn))
+        if self.budget is not None:
+            self.budget.record_request()
+
+        attempt = 1
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(name, attempt, e)
+                await (self.async_sleep or asyncio.sleep)(delay)
+                attempt += 1
+
+    def _retry_delay(self, name: str, attempt: int, error: Exception) -> float:
+        """
+        Decide whether a failed attempt is retried.
+
+        Args:
+            name: Name of the called function (for logging)
+            attempt: Number of the attempt that just failed (1-based)
+            error: Error raised by the attempt
+
+        Returns:
+            Seconds to wait before the next attempt
+
+        Raises:
+            Exception: error, when it must not be retried
+        """
+        retryable, retry_after = classify_error(error)
+
+        if not retryable:
+            raise error
+        if attempt >= self.max_attempts:
+            logger.warning(f"{name}: giving up after {attempt} attempts: {error}")
+            raise error
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(
+                f"{name}: Retry-After {retry_after:.0f}s exceeds "
+                f"{self.max_retry_after:.0f}s, failing fast"
+            )
+            raise error
+        if self.budget is not None and not self.budget.try_acquire_retry():
+            logger.warning(f"{name}: retry budget exhausted, not retrying: {error}")
+            raise error
+
+        if retry_after is not None:
+            # Small jitter so clients told to wait the same time do not retry in lockstep
+            delay = retry_after + self.rng.uniform(0, min(1.0, 0.1 * retry_after))
+        else:
+            delay = self.backoff_delay(attempt)
+
+        logger.info(
+            f"{name}: attempt {attempt}/{self.max_attempts} failed ({error}), "
+            f"retrying in {delay:.2f}s"
+        )
+        return delay
+
+
+def with_retry(policy: RetryPolicy) -> Callable:
+    """
+    Decorator applying a retry policy to a function or method.
+
+    For methods, a ``retry_policy`` attribute on the instance overrides the
+    default policy, so clients can be configured per instance.
+
+    Args:
+        policy: Default retry policy
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            active = getattr(args[0], "retry_policy", None) if args else None
+            if not isinstance(active, RetryPolicy):
+                active = policy
+            return active.call(fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Policy shared by the Azure OpenAI, Content Safety and Search integrations
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,338 @@
+"""
+Usage Ledger Module
+
+This module provides thread-safe usage accounting for LLM calls in the Customer
+Personalization Orchestrator. Every completion is recorded once under a lock with its
+token counts, cost and latency, and the ledger maintains:
+
+- Lifetime totals
+- Breakdowns per deployment and per label (segment, tone)
+- Rolling one-minute and five-minute windows (requests, tokens, cost per minute)
+- Latency histograms with p50/p95/p99 estimates
+- JSON-serializable snapshots that can be appended to a JSONL file
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rolling window lengths in seconds
+ROLLING_WINDOWS = {"1m": 60, "5m": 300}
+# Label keys broken down in snapshots
+DEFAULT_DIMENSIONS = ("segment", "tone")
+# Relative width of latency histogram buckets (percentiles are accurate to ~5%)
+LATENCY_BUCKET_GROWTH = 1.05
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with bounded memory.
+
+    Bucket i holds latencies in (GROWTH**(i-1), GROWTH**i] milliseconds, so
+    percentile estimates are accurate to the bucket growth factor regardless
+    of how many samples are recorded. Not thread-safe on its own; UsageLedger
+    guards it with its lock.
+    """
+
+    def __init__(self, growth: float = LATENCY_BUCKET_GROWTH):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            growth: Ratio between consecutive bucket upper bounds (must be > 1)
+        """
+        if growth <= 1:
+            raise ValueError("growth must be greater than 1")
+
+        self._log_growth = math.log(growth)
+        self.growth = growth
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float) -> None:
+        """Add one latency sample in milliseconds."""
+        duration_ms = max(0.0, float(duration_ms))
+        index = 0 if duration_ms <= 1 else math.ceil(math.log(duration_ms) / self._log_growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a latency percentile.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Upper bound of the bucket containing the percentile (0.0 if empty)
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return round(min(self.growth**index, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def summary(self) -> Dict[str, float]:
+        """Return count, p50, p95, p99 and max latency."""
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+def _empty_totals() -> Dict[str, Any]:
+    """Return a zeroed usage counter dictionary."""
+    return {
+        "requests": 0,
+        "failures": 0,
+        "input_tokens": 0,
+        "cached_input_tokens": 0,
+        "output_tokens": 0,
+        "cost_usd": 0.0,
+    }
+
+
+class UsageLedger:
+    """
+    Thread-safe ledger of LLM usage.
+
+    All updates and reads take a single lock, so concurrent generation threads
+    never lose increments and snapshots are internally consistent.
+    """
+
+    def __init__(
+        self,
+        dimensions: Iterable[str] = DEFAULT_DIMENSIONS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize an empty ledger.
+
+        Args:
+            dimensions: Label keys to break usage down by (e.g. segment, tone)
+            clock: Time source in seconds (injectable for tests)
+        """
+        self.dimensions = tuple(dimensions)
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self._totals = _empty_totals()
+        self._by_deployment: Dict[str, Dict[str, Any]] = {}
+        self._by_dimension: Dict[str, Dict[str, Dict[str, Any]]] = {
+            dimension: {} for dimension in self.dimensions
+        }
+        self._latency = LatencyHistogram()
+        self._latency_by_deployment: Dict[str, LatencyHistogram] = {}
+        # Per-second aggregates: [second, requests, failures, tokens, cost]
+        self._recent: deque = deque()
+
+    def record(
+        self,
+        deployment: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_input_tokens: int = 0,
+        cost_usd: float = 0.0,
+        duration_ms: Optional[float] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Record one completed LLM call.
+
+        Args:
+            deployment: Deployment (model) name
+            input_tokens: Input tokens billed (including cached tokens)
+            output_tokens: Output tokens billed
+            cached_input_tokens: Portion of input_tokens served from the prompt cache
+            cost_usd: Cost of the call
+            duration_ms: End-to-end latency of the call
+            labels: Optional labels such as {"segment": ..., "tone": ...}
+        """
+        counts = {
+            "requests": 1,
+            "failures": 0,
+            "input_tokens": input_tokens or 0,
+            "cached_input_tokens": cached_input_tokens or 0,
+            "output_tokens": output_tokens or 0,
+            "cost_usd": cost_usd or 0.0,
+        }
+        self._record(deployment, counts, duration_ms, labels)
+
+    def record_failure(self, deployment: str, labels: Optional[Dict[str, str]] = None) -> None:
+        """
+        Record one failed LLM call.
+
+        Failures are counted but excluded from latency percentiles.
+
+        Args:
+            deployment: Deployment (model) name
+            labels: Optional labels such as {"segment": ..., "tone": ...}
+        """
+        counts = _empty_totals()
+        counts.update({"requests": 1, "failures": 1})
+        self._record(deployment, counts, None, labels)
+
+    def _record(
+        self,
+        deployment: str,
+        counts: Dict[str, Any],
+        duration_ms: Optional[float],
+        labels: Optional[Dict[str, str]],
+    ) -> None:
+        """Apply counts to every aggregate under the lock."""
+        labels = labels or {}
+        now = self.clock()
+        second = int(now)
+        tokens = counts["input_tokens"] + counts["output_tokens"]
+
+        with self._lock:
+            targets = [
+                self._totals,
+                self._by_deployment.setdefault(deployment, _empty_totals()),
+            ]
+            for dimension in self.dimensions:
+                value = labels.get(dimension)
+                if value is not None:
+                    targets.append(
+                        self._by_dimension[dimension].setdefault(str(value), _empty_totals())
+                    )
+            for target in targets:
+                for key, value in counts.items():
+                    target[key] += value
+
+            if duration_ms is not None:
+                self._latency.record(duration_ms)
+                self._latency_by_deployment.setdefault(deployment, LatencyHistogram()).record(
+                    duration_ms
+                )
+
+            if self._recent and self._recent[-1][0] == second:
+                bucket = self._recent[-1]
+            else:
+                bucket = [second, 0, 0, 0, 0.0]
+                self._recent.append(bucket)
+            bucket[1] += counts["requests"]
+            bucket[2] += counts["failures"]
+            bucket[3] += tokens
+            bucket[4] += counts["cost_usd"]
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop per-second aggregates older than the longest window (lock held)."""
+        horizon = now - max(ROLLING_WINDOWS.values())
+        while self._recent and self._recent[0][0] <= horizon:
+            self._recent.popleft()
+
+    def rolling_window(self, seconds: int) -> Dict[str, float]:
+        """
+        Summarize usage over the trailing window.
+
+        Args:
+            seconds: Window length in seconds (at most five minutes are retained)
+
+        Returns:
+            Dictionary with requests, failures, tokens, cost and per-minute rates
+        """
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            buckets = [b for b in self._recent if b[0] > now - seconds]
+
+        requests = sum(b[1] for b in buckets)
+        tokens = sum(b[3] for b in buckets)
+        cost = sum(b[4] for b in buckets)
+        minutes = seconds / 60
+        return {
+            "requests": requests,
+            "failures": sum(b[2] for b in buckets),
+            "tokens": tokens,
+            "cost_usd": round(cost, 6),
+            "requests_per_minute": round(requests / minutes, 2),
+            "tokens_per_minute": round(tokens / minutes, 2),
+        }
+
+    def latency_summary(self, deployment: Optional[str] = None) -> Dict[str, float]:
+        """
+        Return latency percentiles overall or for one deployment.
+
+        Args:
+            deployment: Optional deployment name
+
+        Returns:
+            Dictionary with count, p50_ms, p95_ms, p99_ms and max_ms
+        """
+        with self._lock:
+            if deployment is None:
+                return self._latency.summary()
+            histogram = self._latency_by_deployment.get(deployment)
+            return histogram.summary() if histogram else LatencyHistogram().summary()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Take a consistent, JSON-serializable snapshot of the ledger.
+
+        Returns:
+            Dictionary with totals, breakdowns, rolling windows and latency
+        """
+        with self._lock:
+            snapshot = {
+                "timestamp": self.clock(),
+                "totals": dict(self._totals),
+                "by_deployment": {
+                    name: {
+                        **counts,
+                        "latency": (
+                            self._latency_by_deployment[name].summary()
+                            if name in self._latency_by_deployment
+                            else LatencyHistogram().summary()
+                        ),
+                    }
+                    for name, counts in self._by_deployment.items()
+                },
+                "latency": self._latency.summary(),
+            }
+            for dimension, breakdown in self._by_dimension.items():
+                snapshot[f"by_{dimension}"] = {
+                    value: dict(counts) for value, counts in breakdown.items()
+                }
+
+        snapshot["windows"] = {
+            name: self.rolling_window(seconds) for name, seconds in ROLLING_WINDOWS.items()
+        }
+        return snapshot
+
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Append a snapshot as one JSON line to a file.
+
+        Args:
+            path: JSONL output path
+
+        Returns:
+            The snapshot that was written
+        """
+        snapshot = self.snapshot()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+        logger.debug(f"Exported usage snapshot to {path}")
+        return snapshot
@@ -0,0 +1,155 @@
+"""
+Unit tests for the adaptive concurrency limiter.
+
+Tests additive increase, multiplicative decrease on overload and congestion,
+blocking at the limit and integration with AzureOpenAIClient.
+"""
+
+import os
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from src.integrations.adaptive_concurrency import (
+    OUTCOME_ERROR,
+    OUTCOME_OVERLOAD,
+    OUTCOME_SUCCESS,
+    AdaptiveConcurrencyLimiter,
+    classify_outcome,
+)
+from src.integrations.azure_openai import AzureOpenAIClient
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_round(limiter, outcome=OUTCOME_SUCCESS, latency_ms=100.0):
+    """Fill every slot, then release them all with the same outcome."""
+    slots = limiter.limit
+    for _ in range(slots):
+        limiter.acquire()
+    for _ in range(slots):
+        limiter.release(outcome, latency_ms)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test cases for AdaptiveConcurrencyLimiter."""
+
+    def test_additive_increase_when_saturated(self):
+        """Test the limit grows by about one slot per fully used round."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        for _ in range(3):
+            run_round(limiter)
+
+        assert 6 <= limiter.limit <= 7
+
+    def test_no_increase_when_underused(self):
+        """Test the limit does not grow when only one slot is in use."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        for _ in range(50):
+            limiter.acquire()
+            limiter.release(OUTCOME_SUCCESS, 100.0)
+
+        assert limiter.limit == 8
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        """Test a burst of 429s halves the limit only once per cooldown."""
+        clock = FakeClock()
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, cooldown_seconds=1.0, clock=clock)
+
+        run_round(limiter, OUTCOME_OVERLOAD)
+        assert limiter.limit == 8
+
+        clock.now += 2.0
+        run_round(limiter, OUTCOME_OVERLOAD)
+        assert limiter.limit == 4
+        assert limiter.get_stats()["decreases"] == 2
+
+    def test_latency_congestion_decrease(self):
+        """Test sustained latency far above the baseline shrinks the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+        for latency_ms in [100.0, 100.0, 500.0]:
+            limiter.acquire()
+            limiter.release(OUTCOME_SUCCESS, latency_ms)
+        assert limiter.limit == 10
+
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(OUTCOME_SUCCESS, 1000.0)
+
+        assert limiter.limit == 9
+
+    def test_errors_do_not_change_limit(self):
+        """Test non-capacity errors leave the limit unchanged."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        run_round(limiter, OUTCOME_ERROR)
+
+        assert limiter.limit == 4
+        assert limiter.get_stats()["errors"] == 4
+
+    def test_acquire_blocks_at_limit(self):
+        """Test acquire waits until a slot is released."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.1)
+
+        limiter.release(OUTCOME_SUCCESS, 10.0)
+        assert acquired.wait(1.0)
+        thread.join()
+
+    def test_invalid_limits(self):
+        """Test inconsistent limits are rejected."""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=5)
+
+    def test_classify_outcome(self):
+        """Test timeouts count as overload and other errors do not."""
+        assert classify_outcome(TimeoutError()) == OUTCOME_OVERLOAD
+        assert classify_outcome(ValueError()) == OUTCOME_ERROR
+
+
+class TestClientConcurrencyLimiting:
+    """Test cases for the limiter inside AzureOpenAIClient."""
+
+    @patch.dict(
+        os.environ,
+        {
+            "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+            "AZURE_OPENAI_API_KEY": "test-api-key",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o-mini",
+        },
+    )
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_generate_completion_releases_slot(self, mock_azure_openai):
+        """Test calls go through the limiter and publish its state."""
+        mock_response = Mock()
+        mock_response.output_text = "Hello"
+        mock_response.usage = Mock(input_tokens=10, output_tokens=5, total_tokens=15)
+        mock_azure_openai.return_value.responses.create.return_value = mock_response
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        client = AzureOpenAIClient(concurrency_limiter=limiter)
+
+        client.generate_completion("Prompt")
+
+        stats = client.get_usage_snapshot()["concurrency"]
+        assert stats["successes"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["limit"] == 2
@@ -0,0 +1,213 @@
+"""
+Unit tests for vectorized stratified assignment.
+
+Tests allocation sizes, reproducibility from the seed, input formats,
+variant lookup, deterministic hash assignment, balance checks and the
+ExperimentationAgent APIs.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.assignment_engine import (
+    ARMS,
+    ASSIGNMENT_COLUMNS,
+    HASH_ASSIGNMENT_METHOD,
+    HashAssigner,
+    allocation_sizes,
+    assign_stratified,
+    check_balance,
+    hash_bucket,
+)
+from src.agents.experimentation_agent import ExperimentationAgent
+
+ALLOCATION = {"control_percent": 25, "treatment_percent": 75}
+DESIGN = {
+    "arms": {
+        "control": {"name": "control"},
+        "treatment_1": {"variants_by_segment": {"Gold": {"variant_id": "G-URG"}}},
+        "treatment_2": {"variants_by_segment": {"Gold": {"variant_id": "G-INF"}}},
+        "treatment_3": {"variants_by_segment": {}},
+    },
+    "sample_allocation": ALLOCATION,
+}
+HASH_DESIGN = dict(DESIGN, experiment_id="EXP1", assignment_strategy=HASH_ASSIGNMENT_METHOD)
+
+
+def make_customers(n_gold=400, n_standard=200):
+    """Build interleaved customers from two segments."""
+    segments = ["Gold"] * n_gold + ["Standard"] * n_standard
+    rng = np.random.default_rng(0)
+    rng.shuffle(segments)
+    return pd.DataFrame(
+        {"customer_id": [f"C{i}" for i in range(len(segments))], "segment": segments}
+    )
+
+
+class TestAssignmentEngine:
+    """Test cases for assign_stratified."""
+
+    def test_allocation_sizes(self):
+        """Test sizes follow the configured percentages with a small-sample fallback."""
+        assert allocation_sizes(400, ALLOCATION) == (100, 100)
+        assert allocation_sizes(10, ALLOCATION) == (2, 2)
+        assert allocation_sizes(3, ALLOCATION) == (1, 1)
+        assert allocation_sizes(1, ALLOCATION) == (1, 0)
+
+    def test_arm_sizes_per_segment(self):
+        """Test each segment is split into control and three treatment blocks."""
+        assignments = assign_stratified(make_customers(), DESIGN, seed=7)
+
+        counts = assignments.groupby(["segment", "experiment_arm"], observed=True).size()
+        assert counts["Gold"].tolist() == [100, 100, 100, 100]
+        assert counts["Standard"].tolist() == [50, 50, 50, 50]
+        assert list(assignments.columns) == ASSIGNMENT_COLUMNS
+        assert assignments["customer_id"].is_unique
+
+    def test_reproducible_from_seed(self):
+        """Test the same seed gives the same assignment and another seed does not."""
+        customers = make_customers()
+
+        first = assign_stratified(customers, DESIGN, seed=7)
+        second = assign_stratified(customers, DESIGN, seed=7)
+        other = assign_stratified(customers, DESIGN, seed=8)
+
+        pd.testing.assert_series_equal(first["customer_id"], second["customer_id"])
+        assert not first["customer_id"].equals(other["customer_id"])
+
+    def test_input_formats_agree(self):
+        """Test lists of dicts and Arrow tables are assigned like DataFrames."""
+        pa = pytest.importorskip("pyarrow")
+        customers = make_customers(40, 20)
+        expected = assign_stratified(customers, DESIGN, seed=3)
+
+        from_records = assign_stratified(customers.to_dict("records"), DESIGN, seed=3)
+        from_arrow = assign_stratified(pa.Table.from_pandas(customers), DESIGN, seed=3)
+
+        assert from_records["customer_id"].tolist() == expected["customer_id"].tolist()
+        assert from_arrow["customer_id"].tolist() == expected["customer_id"].tolist()
+
+    def test_variant_ids_and_batch_timestamp(self):
+        """Test variant lookup, fallbacks and one timestamp per batch."""
+        assignments = assign_stratified(make_customers(), DESIGN, assigned_at="2025-11-23T10:00")
+
+        gold = assignments[assignments["segment"] == "Gold"]
+        variants = gold.groupby("experiment_arm", observed=True)["variant_id"].first()
+        assert variants.tolist() == ["control", "G-URG", "G-INF", "treatment_3_Gold_fallback"]
+        assert assignments["assigned_at"].nunique() == 1
+        assert set(assignments["experiment_arm"].cat.categories) == set(ARMS)
+
+    def test_missing_columns_rejected(self):
+        """Test customers without a segment column raise ValueError."""
+        with pytest.raises(ValueError):
+            assign_stratified(pd.DataFrame({"customer_id": ["C1"]}), DESIGN)
+
+    def test_agent_columnar_and_records(self):
+        """Test the agent's columnar and list APIs agree."""
+        agent = ExperimentationAgent({"random_seed": 11})
+        customers = make_customers(40, 20)
+
+        frame = agent.assign_customers_columnar(customers, DESIGN)
+        records = agent.assign_customers_to_arms(customers.to_dict("records"), DESIGN)
+
+        assert len(records) == len(frame) == 60
+        assert [r["customer_id"] for r in records] == frame["customer_id"].tolist()
+        assert isinstance(records[0]["experiment_arm"], str)
+
+
+class TestHashAssigner:
+    """Test cases for deterministic hash-based assignment."""
+
+    def test_bucket_is_stable_and_salted(self):
+        """Test buckets are fixed values (not process-salted) and differ per experiment."""
+        assert hash_bucket("EXP1", "C1") == pytest.approx(0.08431799160568043)
+        assert 0 <= hash_bucket("EXP2", "C1") < 1
+        assert hash_bucket("EXP1", "C1") != hash_bucket("EXP2", "C1")
+
+    def test_single_stream_and_frame_agree(self):
+        """Test one record, a stream and a batch give the same arms in any order."""
+        assigner = HashAssigner(HASH_DESIGN)
+        customers = make_customers(40, 20)
+        records = customers.to_dict("records")
+
+        frame = assigner.assign_frame(customers.iloc[::-1])
+        by_frame = dict(zip(frame["customer_id"], frame["experiment_arm"]))
+        by_stream = {r["customer_id"]: r["experiment_arm"] for r in assigner.assign_stream(records)}
+        single = HashAssigner(HASH_DESIGN).assign(records[0])
+
+        assert by_frame == by_stream
+        assert single["experiment_arm"] == by_frame[records[0]["customer_id"]]
+        assert single["assignment_method"] == HASH_ASSIGNMENT_METHOD
+
+    def test_shards_match_whole_batch(self):
+        """Test shards assigned independently match the whole batch."""
+        assigner = HashAssigner(HASH_DESIGN)
+        customers = make_customers(40, 20)
+
+        whole = assigner.assign_frame(customers)
+        shards = pd.concat(
+            [HashAssigner(HASH_DESIGN).assign_frame(customers.iloc[i::3]) for i in range(3)]
+        )
+
+        assert dict(zip(whole["customer_id"], whole["experiment_arm"].astype(str))) == dict(
+            zip(shards["customer_id"], shards["experiment_arm"].astype(str))
+        )
+
+    def test_balance_within_tolerance(self):
+        """Test a large population matches the allocation within tolerance."""
+        assigner = HashAssigner(HASH_DESIGN)
+        assignments = assigner.assign_frame(make_customers(15000, 5000))
+
+        report = assigner.check_balance(assignments, tolerance=0.01)
+
+        assert report["balanced"]
+        assert report["total"] == 20000
+        assert report["arms"]["control"]["expected_percent"] == 25.0
+
+    def test_unenrolled_remainder(self):
+        """Test buckets past the allocated share are not enrolled."""
+        design = dict(
+            HASH_DESIGN, sample_allocation={"control_percent": 10, "treatment_percent": 30}
+        )
+        assigner = HashAssigner(design)
+
+        assignments = assigner.assign_frame(make_customers(8000, 2000))
+
+        assert 0.37 < len(assignments) / 10000 < 0.43
+        assert assigner.arm_for_bucket(0.05) == "control"
+        assert assigner.arm_for_bucket(0.15) == "treatment_1"
+        assert assigner.arm_for_bucket(0.5) is None
+
+    def test_check_balance_flags_imbalance(self):
+        """Test arms outside the tolerance are reported."""
+        report = check_balance(
+            {"control": 400, "treatment_1": 200, "treatment_2": 200, "treatment_3": 200},
+            ALLOCATION,
+        )
+
+        assert not report["balanced"]
+        assert not report["arms"]["control"]["within_tolerance"]
+        assert report["arms"]["treatment_1"]["within_tolerance"]
+
+    def test_invalid_design(self):
+        """Test missing experiment ids and over-allocation are rejected."""
+        with pytest.raises(ValueError):
+            HashAssigner(DESIGN)
+        with pytest.raises(ValueError):
+            HashAssigner(
+                dict(
+                    HASH_DESIGN, sample_allocation={"control_percent": 50, "treatment_percent": 75}
+                )
+            )
+
+    def test_agent_uses_hash_strategy(self):
+        """Test the agent assigns with the hash strategy and single customers."""
+        agent = ExperimentationAgent({"random_seed": 11})
+        customers = make_customers(40, 20)
+
+        frame = agent.assign_customers_columnar(customers, HASH_DESIGN)
+        single = agent.assign_customer(customers.iloc[0].to_dict(), HASH_DESIGN)
+
+        assert (frame["assignment_method"] == HASH_ASSIGNMENT_METHOD).all()
+        assert single["experiment_arm"] == frame["experiment_arm"].iloc[0]
@@ -0,0 +1,170 @@
+"""
+Unit tests for the streaming audit report index.
+
+Tests totals, category and severity counts, recent activity, incremental
+refreshes, rotated and rewritten logs, and partially written rows.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from src.agents.audit_report import AuditReportIndex, generate_report
+from src.agents.safety_agent import AUDIT_HEADERS
+
+NOW = datetime(2025, 11, 23, 12, 30)
+
+
+def audit_row(timestamp, variant_id, status, categories="", max_severity=0, cache_hit=False):
+    """Build an audit row in AUDIT_HEADERS order."""
+    return [
+        timestamp,
+        variant_id,
+        "C1",
+        "S1",
+        status,
+        "0",
+        "0",
+        "0",
+        "0",
+        str(max_severity),
+        "4",
+        categories,
+        "",
+        str(cache_hit),
+        "",
+    ]
+
+
+class TestAuditReportIndex:
+    """Test cases for AuditReportIndex."""
+
+    def setup_method(self):
+        """Create a temporary audit log."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "audit.log")
+        self.write_rows([], mode="w")
+
+    def teardown_method(self):
+        """Clean up temporary files."""
+        self.tmp.cleanup()
+
+    def write_rows(self, rows, mode="a", path=None):
+        """Write rows to the audit log (with the header when mode is 'w')."""
+        with open(path or self.path, mode, newline="") as f:
+            writer = csv.writer(f)
+            if mode == "w":
+                writer.writerow(AUDIT_HEADERS)
+            writer.writerows(rows)
+
+    def test_empty_log(self):
+        """Test an empty log gives zero totals."""
+        report = generate_report(self.path, now=NOW)
+
+        assert report["total_checks"] == 0
+        assert report["pass_rate_percent"] == 0
+        assert report["category_blocks"]["hate"] == 0
+
+    def test_totals_categories_and_severity(self):
+        """Test statistics computed from the streamed rows."""
+        self.write_rows(
+            [
+                audit_row("2025-11-23T10:00:00", "V1", "pass", max_severity=2, cache_hit=True),
+                audit_row("2025-11-23T10:05:00", "V2", "block", "hate,violence", 6),
+                audit_row("2025-11-23T11:00:00", "V3", "block", "api_error", 6),
+                audit_row("2025-11-20T09:00:00", "V4", "pass"),
+                audit_row("2025-11-20T09:30:00", "V5", "block", "invalid_input"),
+                audit_row("2025-11-20T09:45:00", "V6", "pass"),
+            ]
+        )
+
+        report = AuditReportIndex(self.path).summarize(NOW)
+
+        assert report["total_checks"] == 6
+        assert report["passed_checks"] == 3
+        assert report["blocked_checks"] == 3
+        assert report["block_rate_percent"] == 50.0
+        assert report["category_blocks"] == {
+            "hate": 1,
+            "violence": 1,
+            "self_harm": 0,
+            "sexual": 0,
+            "api_error": 1,
+            "invalid_input": 1,
+        }
+        assert report["severity_distribution"] == {
+            "safe_0": 3,
+            "low_2": 1,
+            "medium_4": 0,
+            "high_6": 2,
+        }
+        assert report["cache_hits"] == 1
+        assert report["recent_activity_24h"] == 3
+
+    def test_refresh_reads_only_appended_rows(self):
+        """Test a second refresh indexes only new rows and reuses the sidecar."""
+        self.write_rows([audit_row("2025-11-23T10:00:00", f"V{i}", "pass") for i in range(5)])
+        index = AuditReportIndex(self.path, chunk_rows=2)
+        assert index.refresh()["rows_indexed"] == 5
+
+        self.write_rows([audit_row("2025-11-23T11:00:00", "V5", "block", "sexual", 4)])
+        reopened = AuditReportIndex(self.path)
+        assert reopened.refresh()["rows_indexed"] == 1
+        assert reopened.refresh()["rows_indexed"] == 0
+
+        report = reopened.summarize(NOW)
+        assert report["total_checks"] == 6
+        assert report["category_blocks"]["sexual"] == 1
+        with open(reopened.index_path) as f:
+            assert "2025-11-23T11" in json.load(f)["files"]["audit.log"]["partitions"]
+
+    def test_partial_row_waits_for_newline(self):
+        """Test a row still being written is not counted until complete."""
+        self.write_rows([audit_row("2025-11-23T10:00:00", "V1", "pass")])
+        with open(self.path, "a") as f:
+            f.write("2025-11-23T10:01:00,V2,C1")
+
+        index = AuditReportIndex(self.path)
+        assert index.summarize(NOW)["total_checks"] == 1
+
+        with open(self.path, "a", newline="") as f:
+            f.write(",S1,block,0,0,0,0,6,4,hate,,False,\n")
+        report = index.summarize(NOW)
+        assert report["total_checks"] == 2
+        assert report["category_blocks"]["hate"] == 1
+
+    def test_rotated_log_keeps_its_entry(self):
+        """Test rows in a rotated file are counted once and not rescanned."""
+        self.write_rows([audit_row("2025-11-22T10:00:00", f"V{i}", "pass") for i in range(3)])
+        index = AuditReportIndex(self.path)
+        index.refresh()
+
+        os.replace(self.path, f"{self.path}.20251122")
+        self.write_rows([audit_row("2025-11-23T10:00:00", "V3", "pass")], mode="w")
+
+        assert index.refresh()["rows_indexed"] == 1
+        report = index.summarize(NOW)
+        assert report["total_checks"] == 4
+        assert report["audit_files"] == 2
+
+    def test_rewritten_log_is_reindexed(self):
+        """Test a truncated or rewritten log is indexed from the start."""
+        self.write_rows([audit_row("2025-11-23T10:00:00", f"V{i}", "pass") for i in range(3)])
+        index = AuditReportIndex(self.path)
+        assert index.summarize(NOW)["total_checks"] == 3
+
+        self.write_rows([audit_row("2025-11-23T10:00:00", "X1", "block", "hate", 6)], mode="w")
+        report = index.summarize(NOW)
+
+        assert report["total_checks"] == 1
+        assert report["blocked_checks"] == 1
+
+    def test_corrupt_index_is_rebuilt(self):
+        """Test an unreadable sidecar index is rebuilt from the log."""
+        self.write_rows([audit_row("2025-11-23T10:00:00", "V1", "pass")])
+        with open(f"{self.path}.index.json", "w") as f:
+            f.write("{not json")
+
+        assert generate_report(self.path, now=NOW)["total_checks"] == 1
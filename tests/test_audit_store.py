@@ -0,0 +1,287 @@
+"""
+Unit tests for the SQLite audit store.
+
+Tests buffered inserts, query filters and time ranges, report summaries,
+CSV migration and the sqlite audit format in SafetyAgent.
+"""
+
+import csv
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+import pytest
+import yaml
+from unittest.mock import Mock
+
+from src.agents.audit_store import AuditStore, migrate_csv
+from src.agents.safety_agent import AUDIT_HEADERS, SafetyAgent
+
+NOW = datetime(2025, 11, 23, 12, 0)
+
+
+def audit_row(timestamp, variant_id, customer_id, status, categories="", max_severity=0):
+    """Build an audit row in AUDIT_HEADERS order."""
+    return [
+        timestamp,
+        variant_id,
+        customer_id,
+        "Gold",
+        status,
+        0,
+        max_severity,
+        0,
+        0,
+        max_severity,
+        4,
+        categories,
+        "Blocked" if status == "block" else "",
+        False,
+        "",
+    ]
+
+
+ROWS = [
+    audit_row("2025-07-15T10:00:00", "V1", "C1", "block", "violence", 6),
+    audit_row("2025-08-01T10:00:00", "V2", "C1", "pass", max_severity=2),
+    audit_row("2025-09-30T23:59:59", "V3", "C1", "block", "hate,sexual", 4),
+    audit_row("2025-10-01T00:00:00", "V4", "C1", "block", "hate", 6),
+    audit_row("2025-11-23T09:00:00", "V5", "C2", "block", "api_error", 6),
+    audit_row("2025-11-20T09:00:00", "V6", "C2", "block", "invalid_input"),
+]
+
+
+class TestAuditStore:
+    """Test cases for AuditStore."""
+
+    def setup_method(self):
+        """Create a store in a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "audit.db")
+        self.store = AuditStore(self.db_path, AUDIT_HEADERS, flush_rows=100, flush_interval=60)
+
+    def teardown_method(self):
+        """Close the store and clean up temporary files."""
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_rows_buffered_until_flush(self):
+        """Test rows are inserted on flush with typed columns."""
+        self.store.write(ROWS[0])
+        assert self.store.get_stats()["queued_rows"] == 1
+
+        assert self.store.flush()
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT max_severity, cache_hit FROM audit_log").fetchone()
+        assert row == (6, 0)
+        assert self.store.get_stats()["rows_written"] == 1
+
+    def test_indexes_created(self):
+        """Test the lookup columns are indexed."""
+        with sqlite3.connect(self.db_path) as conn:
+            indexed = {
+                row[2]
+                for name in ["idx_audit_timestamp", "idx_audit_variant"]
+                + ["idx_audit_customer", "idx_audit_status"]
+                for row in conn.execute(f"PRAGMA index_info({name})")
+            }
+        assert {"timestamp", "variant_id", "customer_id", "status"} <= indexed
+
+    def test_query_customer_blocks_in_quarter(self):
+        """Test filters combined with a start-inclusive, end-exclusive time range."""
+        for row in ROWS:
+            self.store.write(row)
+
+        records = self.store.query_audit(
+            {"customer_id": "C1", "status": "block"},
+            (datetime(2025, 7, 1), datetime(2025, 10, 1)),
+        )
+
+        assert [r["variant_id"] for r in records] == ["V1", "V3"]
+        assert records[0]["max_severity"] == 6
+        assert records[0]["cache_hit"] is False
+
+    def test_query_list_values_category_and_limit(self):
+        """Test list-valued filters, category matching and limits."""
+        for row in ROWS:
+            self.store.write(row)
+
+        assert len(self.store.query_audit({"variant_id": ["V1", "V5"]})) == 2
+        hate = self.store.query_audit({"blocked_category": "hate"})
+        assert [r["variant_id"] for r in hate] == ["V3", "V4"]
+        assert len(self.store.query_audit(time_range=("2025-08-01", None), limit=2)) == 2
+
+    def test_unknown_filter_rejected(self):
+        """Test unsupported filter keys raise ValueError."""
+        with pytest.raises(ValueError):
+            self.store.query_audit({"body": "text"})
+
+    def test_summarize(self):
+        """Test report statistics computed in SQL."""
+        for row in ROWS:
+            self.store.write(row)
+
+        report = self.store.summarize(NOW)
+
+        assert report["total_checks"] == 6
+        assert report["blocked_checks"] == 5
+        assert report["category_blocks"]["hate"] == 2
+        assert report["category_blocks"]["api_error"] == 1
+        assert report["category_blocks"]["invalid_input"] == 1
+        assert report["severity_distribution"]["high_6"] == 3
+        assert report["recent_activity_24h"] == 1
+
+    def test_write_after_close(self):
+        """Test writes to a closed store fail."""
+        self.store.close()
+        with pytest.raises(ValueError):
+            self.store.write(ROWS[0])
+
+
+class TestMigrateCsv:
+    """Test cases for CSV migration."""
+
+    def test_migrates_once_including_legacy_logs(self):
+        """Test CSV logs are imported once and legacy columns become NULL."""
+        with tempfile.TemporaryDirectory() as tmp:
+            current = os.path.join(tmp, "audit.log")
+            legacy = os.path.join(tmp, "audit.log.20251122")
+            with open(current, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(AUDIT_HEADERS)
+                writer.writerows(ROWS[:3])
+            with open(legacy, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(AUDIT_HEADERS[:13])
+                writer.writerow(ROWS[3][:13])
+
+            db_path = os.path.join(tmp, "audit.db")
+            assert migrate_csv([legacy, current], db_path, AUDIT_HEADERS) == {
+                legacy: 1,
+                current: 3,
+            }
+            assert migrate_csv([legacy, current], db_path, AUDIT_HEADERS) == {
+                legacy: 0,
+                current: 0,
+            }
+
+            store = AuditStore(db_path, AUDIT_HEADERS)
+            records = store.query_audit()
+            store.close()
+            assert len(records) == 4
+            assert records[-1]["variant_id"] == "V4"
+            assert records[-1]["cache_hit"] is None
+            assert records[0]["hate_severity"] == 0
+
+    def test_rerun_after_append_and_rotation(self):
+        """Test re-runs import appended rows once, across rotation of the log."""
+        with tempfile.TemporaryDirectory() as tmp:
+            current = os.path.join(tmp, "audit.log")
+            rotated = os.path.join(tmp, "audit.log.20251123T120000")
+            db_path = os.path.join(tmp, "audit.db")
+
+            def append(path, rows, header=False):
+                with open(path, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    if header:
+                        writer.writerow(AUDIT_HEADERS)
+                    writer.writerows(rows)
+
+            append(current, ROWS[:1], header=True)
+            assert migrate_csv([current], db_path, AUDIT_HEADERS) == {current: 1}
+
+            append(current, ROWS[1:2])
+            assert migrate_csv([current], db_path, AUDIT_HEADERS) == {current: 1}
+
+            # The writer appends, rotates and starts a new log
+            append(current, ROWS[2:3])
+            os.rename(current, rotated)
+            append(current, ROWS[3:4], header=True)
+            assert migrate_csv([rotated, current], db_path, AUDIT_HEADERS) == {
+                rotated: 1,
+                current: 1,
+            }
+            assert migrate_csv([rotated, current], db_path, AUDIT_HEADERS) == {
+                rotated: 0,
+                current: 0,
+            }
+
+            store = AuditStore(db_path, AUDIT_HEADERS)
+            records = store.query_audit()
+            store.close()
+            assert [r["variant_id"] for r in records] == ["V1", "V2", "V3", "V4"]
+
+    def test_partial_last_row_waits(self):
+        """Test a row still being written is imported by the next run."""
+        with tempfile.TemporaryDirectory() as tmp:
+            current = os.path.join(tmp, "audit.log")
+            db_path = os.path.join(tmp, "audit.db")
+            with open(current, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(AUDIT_HEADERS)
+                writer.writerow(ROWS[0])
+                f.write("2025-08-01T10:00:00,V2")
+
+            assert migrate_csv([current], db_path, AUDIT_HEADERS) == {current: 1}
+            with open(current, "a", newline="") as f:
+                f.write(",C1,Gold,pass,0,2,0,0,2,4,,,False,\r\n")
+            assert migrate_csv([current], db_path, AUDIT_HEADERS) == {current: 1}
+
+
+class TestSafetyAgentAuditStore:
+    """Test cases for the sqlite audit format in SafetyAgent."""
+
+    def setup_method(self):
+        """Write a config selecting the sqlite audit format."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmp.name, "safety.yaml")
+        self.audit_log_path = os.path.join(self.tmp.name, "safety_audit.log")
+        config = {"safety_policy": {"threshold": 4, "audit_logging": {"format": "sqlite"}}}
+        with open(self.config_path, "w") as f:
+            yaml.dump(config, f)
+
+        client = Mock()
+        client.analyze_text.return_value = {
+            "severity_scores": {"hate": 0, "violence": 6, "self_harm": 0, "sexual": 0},
+            "max_severity": 6,
+        }
+        self.agent = SafetyAgent(
+            safety_client=client,
+            config_path=self.config_path,
+            audit_log_path=self.audit_log_path,
+        )
+
+    def teardown_method(self):
+        """Close the agent and clean up temporary files."""
+        self.agent.close()
+        self.tmp.cleanup()
+
+    def test_decisions_stored_and_queryable(self):
+        """Test decisions go to the store next to the audit log path."""
+        self.agent.check_safety({"variant_id": "V1", "customer_id": "C9", "body": "Message."})
+
+        records = self.agent.query_audit({"customer_id": "C9", "status": "block"})
+
+        assert [r["variant_id"] for r in records] == ["V1"]
+        assert records[0]["blocked_categories"] == "violence"
+        assert os.path.exists(os.path.join(self.tmp.name, "safety_audit.db"))
+        assert not os.path.exists(self.audit_log_path)
+
+        report = self.agent.generate_audit_report()
+        assert report["total_checks"] == 1
+        assert report["category_blocks"]["violence"] == 1
+
+    def test_query_requires_sqlite_format(self):
+        """Test query_audit is rejected for CSV audit logs."""
+        config = {"safety_policy": {"threshold": 4, "audit_logging": {"format": "csv"}}}
+        with open(self.config_path, "w") as f:
+            yaml.dump(config, f)
+        agent = SafetyAgent(
+            safety_client=Mock(), config_path=self.config_path, audit_log_path=self.audit_log_path
+        )
+        try:
+            with pytest.raises(ValueError):
+                agent.query_audit({"status": "block"})
+        finally:
+            agent.close()
@@ -0,0 +1,172 @@
+"""
+Unit tests for the buffered audit log writer.
+
+Tests size- and time-based flushing, explicit flush/close, concurrent
+writers and size/date rotation.
+"""
+
+import csv
+import glob
+import os
+import tempfile
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from src.agents.audit_writer import AuditLogWriter
+
+HEADERS = ["timestamp", "variant_id", "status"]
+
+
+def read_rows(path):
+    """Read CSV rows (including the header)."""
+    with open(path, "r", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestAuditLogWriter:
+    """Test cases for AuditLogWriter."""
+
+    def setup_method(self):
+        """Create a temporary directory for audit logs."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "logs", "audit.log")
+
+    def teardown_method(self):
+        """Clean up temporary files."""
+        self.tmp.cleanup()
+
+    def test_rows_buffered_until_flush(self):
+        """Test rows stay buffered until flush() and are then written in order."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=100, flush_interval=60)
+        writer.write(["t1", "V1", "pass"])
+        writer.write(["t2", "V2", "block"])
+
+        assert not os.path.exists(self.path)
+        assert writer.flush(timeout=5)
+
+        assert read_rows(self.path) == [HEADERS, ["t1", "V1", "pass"], ["t2", "V2", "block"]]
+        writer.close()
+
+    def test_size_based_flush(self):
+        """Test a full batch is written without an explicit flush."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=2, flush_interval=60)
+        writer.write(["t1", "V1", "pass"])
+        writer.write(["t2", "V2", "pass"])
+
+        deadline = time.time() + 2
+        while writer.get_stats()["rows_written"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert len(read_rows(self.path)) == 3
+        writer.close()
+
+    def test_time_based_flush(self):
+        """Test buffered rows are written after the flush interval."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=100, flush_interval=0.05)
+        writer.write(["t1", "V1", "pass"])
+
+        time.sleep(0.3)
+
+        assert len(read_rows(self.path)) == 2
+        writer.close()
+
+    def test_concurrent_writers_do_not_interleave(self):
+        """Test rows from many threads are written whole."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=50, fsync="never")
+
+        def produce(thread_id):
+            for i in range(200):
+                writer.write([f"t{i}", f"T{thread_id}-{i}", "pass," * 10])
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.close()
+
+        rows = read_rows(self.path)[1:]
+        assert len(rows) == 1600
+        assert all(len(row) == 3 for row in rows)
+        assert len({row[1] for row in rows}) == 1600
+
+    def test_close_flushes_and_rejects_writes(self):
+        """Test close() writes remaining rows and further writes fail."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=100, flush_interval=60)
+        writer.write(["t1", "V1", "pass"])
+        writer.close()
+
+        assert len(read_rows(self.path)) == 2
+        with pytest.raises(ValueError):
+            writer.write(["t2", "V2", "pass"])
+
+    def test_flush_reports_failed_writes(self):
+        """Test flush() returns False while rows are not on disk, then True once written."""
+        writer = AuditLogWriter(self.path, HEADERS, flush_rows=100, flush_interval=60)
+        with patch.object(writer, "_prepare_file", side_effect=OSError("disk full")):
+            writer.write(["t1", "V1", "pass"])
+            assert writer.flush(timeout=5) is False
+
+        assert writer.flush(timeout=5) is True
+        writer.close()
+
+        assert read_rows(self.path) == [HEADERS, ["t1", "V1", "pass"]]
+        assert writer.get_stats()["write_errors"] == 1
+
+    def test_failed_rows_retained_up_to_buffer_size(self):
+        """Test a persistently failing disk keeps at most max_buffer_rows for retry."""
+        writer = AuditLogWriter(
+            self.path, HEADERS, max_buffer_rows=3, flush_rows=100, flush_interval=60
+        )
+        with patch.object(writer, "_prepare_file", side_effect=OSError("disk full")):
+            for i in range(5):
+                writer.write([f"t{i}", f"V{i}", "pass"])
+            assert writer.flush(timeout=5) is False
+
+        assert writer.flush(timeout=5) is True
+        writer.close()
+
+        assert [row[1] for row in read_rows(self.path)[1:]] == ["V2", "V3", "V4"]
+        assert writer.get_stats()["rows_dropped"] == 2
+
+    def test_size_rotation(self):
+        """Test the log rotates before exceeding max bytes, with a header per file."""
+        writer = AuditLogWriter(
+            self.path, HEADERS, flush_rows=1, flush_interval=60, rotate_max_bytes=60
+        )
+        for i in range(6):
+            writer.write([f"2025-11-23T00:00:0{i}", f"V{i}", "pass"])
+        writer.close()
+
+        files = [self.path] + glob.glob(f"{self.path}.*")
+        assert len(files) > 1
+        rows = []
+        for path in files:
+            content = read_rows(path)
+            assert content[0] == HEADERS
+            assert os.path.getsize(path) <= 60
+            rows.extend(content[1:])
+        assert sorted(row[1] for row in rows) == [f"V{i}" for i in range(6)]
+        assert writer.get_stats()["rotations"] == len(files) - 1
+
+    def test_daily_rotation(self):
+        """Test the log rotates when the UTC date changes."""
+        now = {"t": 1763856000.0}  # 2025-11-23T00:00:00Z
+        writer = AuditLogWriter(
+            self.path, HEADERS, flush_rows=1, rotate_when="daily", clock=lambda: now["t"]
+        )
+        writer.write(["d1", "V1", "pass"])
+        writer.flush(timeout=5)
+        now["t"] += 86400
+        writer.write(["d2", "V2", "pass"])
+        writer.close()
+
+        assert read_rows(f"{self.path}.20251123") == [HEADERS, ["d1", "V1", "pass"]]
+        assert read_rows(self.path) == [HEADERS, ["d2", "V2", "pass"]]
+
+    def test_invalid_fsync_policy(self):
+        """Test unknown fsync policies are rejected."""
+        with pytest.raises(ValueError):
+            AuditLogWriter(self.path, HEADERS, fsync="sometimes")
@@ -55,6 +55,7 @@ class TestAzureOpenAIClient:
                 api_key="test-api-key",
                 api_version="2025-04-01-preview",
                 timeout=15.0,
+                max_retries=0,
             )
 
     def test_client_initialization_missing_config(self):
@@ -254,6 +255,24 @@ class TestAzureOpenAIClient:
         assert "total_cost_usd" in summary
         assert summary["total_cost_usd"] > 0
 
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_usage_snapshot_labels(self, mock_azure_openai):
+        """Test completions are recorded in the ledger with their labels."""
+        mock_response = Mock()
+        mock_response.output_text = "Hello"
+        mock_response.usage = Mock(input_tokens=10, output_tokens=5, total_tokens=15)
+        mock_azure_openai.return_value.responses.create.return_value = mock_response
+        client = AzureOpenAIClient()
+
+        client.generate_completion("Prompt", usage_labels={"segment": "A", "tone": "urgent"})
+        snapshot = client.get_usage_snapshot()
+
+        assert snapshot["by_deployment"]["gpt-4o-mini"]["requests"] == 1
+        assert snapshot["by_segment"]["A"]["input_tokens"] == 10
+        assert snapshot["by_tone"]["urgent"]["output_tokens"] == 5
+        assert snapshot["latency"]["count"] == 1
+        assert snapshot["windows"]["1m"]["requests"] == 1
+
     @patch("src.integrations.azure_openai.AzureOpenAI")
     def test_test_connection_success(self, mock_azure_openai):
         """Test successful connection test."""
@@ -287,6 +306,104 @@ class TestAzureOpenAIClient:
         with pytest.raises(ConnectionError, match="Connection failed"):
             client.test_connection()
 
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_generate_completion_cached_tokens(self, mock_azure_openai):
+        """Test cached prompt tokens are parsed, tracked and discounted."""
+        mock_response = Mock()
+        mock_response.output_text = "Cached"
+        mock_response.finish_reason = "completed"
+        mock_response.usage = Mock(input_tokens=2000, output_tokens=100, total_tokens=2100)
+        mock_response.usage.input_tokens_details = Mock(cached_tokens=1536)
+
+        mock_client_instance = Mock()
+        mock_client_instance.responses.create.return_value = mock_response
+        mock_azure_openai.return_value = mock_client_instance
+
+        client = AzureOpenAIClient()
+        result = client.generate_completion("Test prompt", prompt_cache_key="cpo-abc")
+
+        assert result["cached_input_tokens"] == 1536
+        assert result["cost_usd"] < client.calculate_cost(2000, 100)
+        assert (
+            mock_client_instance.responses.create.call_args.kwargs["prompt_cache_key"] == "cpo-abc"
+        )
+
+        summary = client.get_usage_summary()
+        assert summary["cached_input_tokens"] == 1536
+        assert summary["cache_hit_rate"] == 0.768
+
+    def test_calculate_cost_cached_input(self):
+        """Test cached input tokens are billed at the discounted rate."""
+        with patch("src.integrations.azure_openai.AzureOpenAI"):
+            client = AzureOpenAIClient()
+
+        cost = client.calculate_cost(1000, 0, cached_input_tokens=1000)
+
+        assert abs(cost - 0.000075) < 1e-9
+
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_generate_completion_stream_completed(self, mock_azure_openai):
+        """Test streamed completion collects deltas and final usage."""
+        final_response = Mock(
+            output_text="Hello world",
+            finish_reason="completed",
+            usage=Mock(input_tokens=40, output_tokens=2, total_tokens=42),
+        )
+        events = [
+            Mock(type="response.output_text.delta", delta="Hello"),
+            Mock(type="response.output_text.delta", delta=" world"),
+            Mock(type="response.completed", response=final_response),
+        ]
+
+        mock_client_instance = Mock()
+        mock_client_instance.responses.create.return_value = iter(events)
+        mock_azure_openai.return_value = mock_client_instance
+
+        client = AzureOpenAIClient()
+        result = client.generate_completion_stream("Test prompt", max_tokens=100)
+
+        assert result["text"] == "Hello world"
+        assert result["aborted"] is False
+        assert result["max_tokens_saved"] == 0
+        assert result["input_tokens"] == 40
+        assert "input_tokens_estimated" not in result
+        assert result["time_to_first_token_ms"] is not None
+        assert mock_client_instance.responses.create.call_args.kwargs["stream"] is True
+        assert client.total_requests == 1
+
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_generate_completion_stream_abort(self, mock_azure_openai):
+        """Test streamed completion stops as soon as the abort callback fires."""
+        events = [Mock(type="response.output_text.delta", delta=f"w{i} ") for i in range(10)]
+        consumed = []
+
+        def event_stream():
+            for event in events:
+                consumed.append(event)
+                yield event
+
+        mock_client_instance = Mock()
+        mock_client_instance.responses.create.return_value = event_stream()
+        mock_azure_openai.return_value = mock_client_instance
+
+        client = AzureOpenAIClient()
+        result = client.generate_completion_stream(
+            "Test prompt",
+            max_tokens=100,
+            should_abort=lambda delta: "too long" if delta == "w2 " else None,
+        )
+
+        assert result["aborted"] is True
+        assert result["abort_reason"] == "too long"
+        assert result["text"] == "w0 w1 w2 "
+        assert result["output_tokens"] == 3
+        assert result["max_tokens_saved"] == 97
+        assert len(consumed) == 3
+        # The prompt is billed even though the stream was aborted
+        assert result["input_tokens_estimated"] is True
+        assert result["input_tokens"] > 0
+        assert result["cost_usd"] > client.calculate_cost(0, 3)
+
 
 class TestLegacyFunctions:
     """Test cases for legacy functions."""
@@ -0,0 +1,300 @@
+"""
+Unit tests for Azure OpenAI batch integration.
+
+Tests batch file serialization, the local file-based batch backend, polling
+and the offline batch generation mode of MessageGenerator.
+"""
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from src.agents.generation_agent import MessageGenerator
+from src.integrations.azure_openai_batch import (
+    AzureOpenAIBatchBackend,
+    BatchBackend,
+    LocalFileBatchBackend,
+    build_batch_request,
+    collect_batch_results,
+    parse_batch_response_body,
+    split_batch_requests,
+    wait_for_batch,
+    write_batch_file,
+    write_batch_files,
+)
+
+VALID_BODY = " ".join(["word"] * 160) + " [Source: Premium Features, Overview]"
+
+
+class TestBatchHelpers:
+    """Test cases for batch serialization and parsing helpers."""
+
+    def test_write_batch_file(self, tmp_path):
+        """Test requests are written one JSON object per line."""
+        requests = [
+            build_batch_request("VAR_1", "gpt-4o-mini", "Prompt 1", "System", 500),
+            build_batch_request("VAR_2", "gpt-4o-mini", "Prompt 2", "System", 500),
+        ]
+
+        path = write_batch_file(requests, str(tmp_path / "batch.jsonl"))
+
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+        assert [line["custom_id"] for line in lines] == ["VAR_1", "VAR_2"]
+        assert lines[0]["url"] == "/v1/responses"
+        assert lines[0]["body"]["input"] == "System\n\nPrompt 1"
+
+    def test_write_batch_file_duplicate_ids(self, tmp_path):
+        """Test duplicate custom IDs are rejected."""
+        request = build_batch_request("VAR_1", "gpt-4o-mini", "Prompt", "System", 500)
+
+        with pytest.raises(ValueError, match="unique"):
+            write_batch_file([request, request], str(tmp_path / "batch.jsonl"))
+
+    def test_split_by_request_count_and_bytes(self):
+        """Test files are split at the request and byte limits."""
+        requests = [build_batch_request(f"VAR_{i}", "m", "p" * 50, "s", 100) for i in range(5)]
+        line_bytes = len(json.dumps(requests[0])) + 1
+
+        assert [len(part) for part in split_batch_requests(requests, max_requests=2)] == [2, 2, 1]
+        by_bytes = split_batch_requests(requests, max_bytes=line_bytes * 3)
+        assert [len(part) for part in by_bytes] == [3, 2]
+        with pytest.raises(ValueError):
+            split_batch_requests(requests, max_bytes=line_bytes - 1)
+
+    def test_write_batch_files_parts(self, tmp_path):
+        """Test split batches are written as numbered parts in request order."""
+        requests = [build_batch_request(f"VAR_{i}", "m", "p", "s", 100) for i in range(5)]
+
+        paths = write_batch_files(requests, str(tmp_path / "batch.jsonl"), max_requests=2)
+
+        assert [p.rsplit("/", 1)[-1] for p in paths] == [
+            "batch_part001.jsonl",
+            "batch_part002.jsonl",
+            "batch_part003.jsonl",
+        ]
+        custom_ids = []
+        for path in paths:
+            with open(path) as f:
+                custom_ids += [json.loads(line)["custom_id"] for line in f]
+        assert custom_ids == [f"VAR_{i}" for i in range(5)]
+        single = write_batch_files(requests, str(tmp_path / "one.jsonl"))
+        assert single == [str(tmp_path / "one.jsonl")]
+
+    def test_prompt_cache_key_in_body(self):
+        """Test the prompt cache key is sent in the request body when given."""
+        request = build_batch_request("VAR_1", "m", "p", "s", 100, prompt_cache_key="abc")
+
+        assert request["body"]["prompt_cache_key"] == "abc"
+        assert "prompt_cache_key" not in build_batch_request("VAR_1", "m", "p", "s", 100)["body"]
+
+    def test_backend_interface_is_abstract(self):
+        """Test backends must implement every BatchBackend method."""
+
+        class PartialBackend(BatchBackend):
+            def submit(self, input_path):
+                return "batch-1"
+
+        with pytest.raises(TypeError):
+            PartialBackend()
+
+    def test_parse_batch_response_body(self):
+        """Test raw Responses API bodies are parsed into completion fields."""
+        body = {
+            "status": "completed",
+            "output": [{"content": [{"type": "output_text", "text": "Hello"}]}],
+            "usage": {
+                "input_tokens": 100,
+                "output_tokens": 5,
+                "total_tokens": 105,
+                "input_tokens_details": {"cached_tokens": 64},
+            },
+        }
+
+        result = parse_batch_response_body(body)
+
+        assert result["text"] == "Hello"
+        assert result["input_tokens"] == 100
+        assert result["cached_input_tokens"] == 64
+
+    def test_collect_batch_results_errors_and_discount(self):
+        """Test failed lines are reported and batch pricing is applied."""
+        lines = [
+            {
+                "custom_id": "ok",
+                "response": {"status_code": 200, "body": {"output_text": "Hi", "usage": {}}},
+            },
+            {"custom_id": "bad", "response": None, "error": {"message": "quota"}},
+        ]
+
+        results = collect_batch_results(lines, "gpt-4o-mini", cost_fn=lambda *a, **k: 0.02)
+
+        assert results["ok"]["text"] == "Hi"
+        assert results["ok"]["cost_usd"] == pytest.approx(0.01)
+        assert results["bad"]["error"] == {"message": "quota"}
+
+    def test_wait_for_batch_polls_until_complete(self, tmp_path):
+        """Test polling sleeps between in-progress statuses."""
+        backend = LocalFileBatchBackend(str(tmp_path), lambda body: "x", polls_until_complete=2)
+        input_path = write_batch_file(
+            [build_batch_request("VAR_1", "m", "p", "s", 100)], str(tmp_path / "in.jsonl")
+        )
+        batch_id = backend.submit(input_path)
+        sleep = Mock()
+
+        status = wait_for_batch(backend, batch_id, poll_interval=5, sleep=sleep)
+
+        assert status == "completed"
+        assert sleep.call_count == 2
+
+    def test_wait_for_batch_timeout(self):
+        """Test polling raises once the timeout elapses."""
+        backend = Mock()
+        backend.get_status.return_value = "in_progress"
+
+        with pytest.raises(TimeoutError):
+            wait_for_batch(backend, "batch_1", poll_interval=0, timeout=0, sleep=Mock())
+
+    def test_azure_backend_submit(self, tmp_path):
+        """Test the Azure backend uploads the file and creates a batch."""
+        client = Mock()
+        client.files.create.return_value = Mock(id="file-1")
+        client.batches.create.return_value = Mock(id="batch-1")
+        input_path = tmp_path / "in.jsonl"
+        input_path.write_text("{}\n")
+
+        batch_id = AzureOpenAIBatchBackend(client).submit(str(input_path))
+
+        assert batch_id == "batch-1"
+        client.batches.create.assert_called_once_with(
+            input_file_id="file-1", endpoint="/v1/responses", completion_window="24h"
+        )
+
+
+class TestBatchGeneration:
+    """Test cases for MessageGenerator.generate_variants_batch."""
+
+    def test_generate_variants_batch(self, tmp_path):
+        """Test batch results are parsed, cited and validated per tone."""
+        client = Mock()
+        client.deployment_name = "gpt-4o-mini"
+        client.calculate_cost.return_value = 0.002
+        backend = LocalFileBatchBackend(
+            str(tmp_path / "out"), lambda body: f"Subject: Batch subject\n\nBody: {VALID_BODY}"
+        )
+        generator = MessageGenerator(client)
+        content = [{"document_id": "DOC001", "title": "Premium Features", "snippet": "Text"}]
+
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            variants = generator.generate_variants_batch(
+                [
+                    ({"name": "A", "features": {}}, content),
+                    ({"name": "B", "features": {}}, content),
+                ],
+                backend=backend,
+                batch_dir=str(tmp_path / "in"),
+                poll_interval=0,
+            )
+
+        assert len(variants) == 6
+        assert {v["segment"] for v in variants} == {"A", "B"}
+        assert all(v["validation"]["valid"] for v in variants)
+        assert variants[0]["citations"][0]["document_id"] == "DOC001"
+        assert variants[0]["generation_metadata"]["cost_usd"] == pytest.approx(0.001)
+        assert variants[0]["generation_metadata"]["batch_id"].startswith("batch_local_")
+        client.generate_completion.assert_not_called()
+
+    def test_generate_variants_batch_failed_status(self, tmp_path):
+        """Test a failed batch raises when no batch produced results."""
+        client = Mock()
+        client.deployment_name = "gpt-4o-mini"
+        backend = Mock()
+        backend.submit.return_value = "batch-1"
+        backend.get_status.return_value = "failed"
+        generator = MessageGenerator(client)
+
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            with pytest.raises(RuntimeError, match="failed"):
+                generator.generate_variants_batch(
+                    [({"name": "A", "features": {}}, [{"title": "Doc"}])],
+                    backend=backend,
+                    batch_dir=str(tmp_path),
+                )
+
+    def test_generate_variants_batch_failed_part_keeps_other_parts(self, tmp_path):
+        """Test a failed batch file is skipped and completed files' results are kept."""
+        client = Mock()
+        client.deployment_name = "gpt-4o-mini"
+        client.calculate_cost.return_value = 0.0
+        generator = MessageGenerator(client)
+        backend = Mock()
+        backend.submit.side_effect = lambda path: path
+        backend.get_status.side_effect = lambda path: (
+            "failed" if path.endswith("_part002.jsonl") else "completed"
+        )
+
+        def results(path):
+            with open(path) as f:
+                custom_ids = [json.loads(line)["custom_id"] for line in f]
+            body = {"output_text": f"Subject: Part\n\nBody: {VALID_BODY}"}
+            return [
+                {"custom_id": custom_id, "response": {"status_code": 200, "body": body}}
+                for custom_id in custom_ids
+            ]
+
+        backend.get_results.side_effect = results
+        content = [{"document_id": "DOC001", "title": "Premium Features", "snippet": "Text"}]
+
+        def one_request_per_file(requests, path):
+            return write_batch_files(requests, path, max_requests=1)
+
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            with patch(
+                "src.agents.generation_agent.write_batch_files", side_effect=one_request_per_file
+            ):
+                variants = generator.generate_variants_batch(
+                    [({"name": "A", "features": {}}, content)],
+                    backend=backend,
+                    batch_dir=str(tmp_path),
+                    poll_interval=0,
+                )
+
+        assert backend.submit.call_count == 3
+        assert len(variants) == 2
+        assert not any(
+            v["generation_metadata"]["batch_id"].endswith("_part002.jsonl") for v in variants
+        )
+
+    def test_generate_variants_batch_expired_keeps_partial_results(self, tmp_path):
+        """Test an expired batch returns the variants it completed."""
+        client = Mock()
+        client.deployment_name = "gpt-4o-mini"
+        client.calculate_cost.return_value = 0.0
+        generator = MessageGenerator(client, prompt_layout="cache_prefix")
+        backend = Mock()
+        backend.submit.return_value = "batch-1"
+        backend.get_status.return_value = "expired"
+
+        def results(batch_id):
+            with open(backend.submit.call_args[0][0]) as f:
+                first = json.loads(f.readline())
+            assert first["body"]["prompt_cache_key"]
+            body = {"output_text": f"Subject: Partial\n\nBody: {VALID_BODY}"}
+            return [
+                {"custom_id": first["custom_id"], "response": {"status_code": 200, "body": body}}
+            ]
+
+        backend.get_results.side_effect = results
+        content = [{"document_id": "DOC001", "title": "Premium Features", "snippet": "Text"}]
+
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            variants = generator.generate_variants_batch(
+                [({"name": "A", "features": {}}, content)],
+                backend=backend,
+                batch_dir=str(tmp_path),
+                poll_interval=0,
+            )
+
+        assert len(variants) == 1
+        assert variants[0]["subject"] == "Partial"
+        assert variants[0]["generation_metadata"]["batch_id"] == "batch-1"
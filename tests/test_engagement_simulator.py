@@ -0,0 +1,109 @@
+"""
+Unit tests for vectorized engagement simulation.
+
+Tests the engagement cascade, reproducibility from the seed, simulated rates
+against the configured model, input formats and the ExperimentationAgent APIs.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.engagement_simulator import ENGAGEMENT_COLUMNS, simulate_engagement_columnar
+from src.agents.experimentation_agent import ExperimentationAgent
+
+# No uplift or probability noise, so simulated rates have known expectations
+CONFIG = {
+    "simulation": {
+        "baseline_rates": {"open_rate": 0.4, "click_rate": 0.2, "conversion_rate": 0.1},
+        "expected_uplift": {"mean": 0.2, "std_dev": 0.0, "min_uplift": 0.05, "max_uplift": 0.3},
+        "noise_factor": 0.0,
+    },
+    "segments": {"Gold": {"expected_baseline_open": 0.6, "expected_uplift": 0.5}},
+}
+
+
+def make_assignments(n=100000):
+    """Build assignments alternating control/treatment across two segments."""
+    index = np.arange(n)
+    return pd.DataFrame(
+        {
+            "customer_id": index,
+            "segment": np.where(index % 2 == 0, "Gold", "Standard"),
+            "experiment_arm": np.where((index // 2) % 2 == 0, "control", "treatment_1"),
+            "variant_id": "V1",
+        }
+    )
+
+
+class TestEngagementSimulator:
+    """Test cases for simulate_engagement_columnar."""
+
+    def test_columns_and_cascade(self):
+        """Test output columns and that clicks need opens and conversions need clicks."""
+        engagement = simulate_engagement_columnar(make_assignments(10000), CONFIG, seed=1)
+
+        assert list(engagement.columns) == ENGAGEMENT_COLUMNS
+        assert not (engagement["clicked"] & ~engagement["opened"]).any()
+        assert not (engagement["converted"] & ~engagement["clicked"]).any()
+        assert engagement["engagement_at"].nunique() == 1
+
+    def test_reproducible_from_seed(self):
+        """Test the same seed reproduces the simulation and another seed does not."""
+        assignments = make_assignments(10000)
+
+        first = simulate_engagement_columnar(assignments, CONFIG, seed=1)
+        second = simulate_engagement_columnar(assignments, CONFIG, seed=1)
+        other = simulate_engagement_columnar(assignments, CONFIG, seed=2)
+
+        assert first["opened"].equals(second["opened"])
+        assert not first["opened"].equals(other["opened"])
+
+    def test_rates_follow_model(self):
+        """Test simulated rates match baselines, segment overrides and uplift."""
+        engagement = simulate_engagement_columnar(make_assignments(), CONFIG, seed=3)
+
+        rates = engagement.groupby(["segment", "experiment_arm"])[["opened", "clicked"]].mean()
+        # Standard: baseline 0.4 open, 0.4 * 0.2 click; treatment uplift 0.2
+        assert rates.loc[("Standard", "control"), "opened"] == pytest.approx(0.4, abs=0.01)
+        assert rates.loc[("Standard", "control"), "clicked"] == pytest.approx(0.08, abs=0.01)
+        assert rates.loc[("Standard", "treatment_1"), "opened"] == pytest.approx(0.48, abs=0.01)
+        # Gold: segment baseline 0.6, uplift 0.5 clipped to max_uplift 0.3
+        assert rates.loc[("Gold", "control"), "opened"] == pytest.approx(0.6, abs=0.01)
+        assert rates.loc[("Gold", "treatment_1"), "opened"] == pytest.approx(0.78, abs=0.01)
+
+    def test_chunking_keeps_rates(self):
+        """Test small chunks simulate the same model."""
+        engagement = simulate_engagement_columnar(
+            make_assignments(20000), CONFIG, seed=3, chunk_size=999
+        )
+
+        control = engagement[engagement["experiment_arm"] == "control"]
+        assert control["opened"].mean() == pytest.approx(0.5, abs=0.02)
+
+    def test_input_formats(self):
+        """Test record lists and Arrow tables are accepted; missing columns rejected."""
+        pa = pytest.importorskip("pyarrow")
+        assignments = make_assignments(100)
+        expected = simulate_engagement_columnar(assignments, CONFIG, seed=4)
+
+        from_records = simulate_engagement_columnar(assignments.to_dict("records"), CONFIG, seed=4)
+        from_arrow = simulate_engagement_columnar(pa.Table.from_pandas(assignments), CONFIG, seed=4)
+
+        assert from_records["opened"].tolist() == expected["opened"].tolist()
+        assert from_arrow["opened"].tolist() == expected["opened"].tolist()
+        assert simulate_engagement_columnar([], CONFIG).empty
+        with pytest.raises(ValueError):
+            simulate_engagement_columnar(assignments.drop(columns="variant_id"), CONFIG)
+
+    def test_agent_reproducible_across_instances(self):
+        """Test agents with the same simulation seed produce the same records."""
+        assignments = make_assignments(1000).to_dict("records")
+        config = dict(CONFIG, random_seed=5)
+
+        first = ExperimentationAgent(config).simulate_engagement(assignments, config)
+        second = ExperimentationAgent(config).simulate_engagement(assignments, config)
+
+        flags = ["opened", "clicked", "converted"]
+        assert [[r[f] for f in flags] for r in first] == [[r[f] for f in flags] for r in second]
+        assert isinstance(first[0]["opened"], bool)
@@ -5,16 +5,26 @@ This module tests the message generation functionality including
 variant generation, citation extraction, and validation.
 """
 
+import os
+import re
+from types import SimpleNamespace
+
+import httpx
 import pytest
+from openai import APIConnectionError
 from unittest.mock import Mock, patch, mock_open
 from src.agents.generation_agent import (
     MessageGenerator,
+    StreamingConstraintMonitor,
+    TitleIndex,
     generate_variants,
     generate_variant,
     load_prompt_template,
     extract_citations,
     validate_variant_format,
 )
+from src.integrations.azure_openai import AzureOpenAIClient
+from src.integrations.retry_policy import RetryPolicy
 
 
 class TestMessageGenerator:
@@ -438,3 +448,290 @@ class TestEdgeCases:
         # Should use first part as subject, rest as body
         assert result["subject"] == "Random text without proper structure"
         assert result["body"] == ""
+
+
+class TestStreamingGeneration:
+    """Test cases for streaming generation with early abort."""
+
+    def test_monitor_subject_too_long(self):
+        """Test monitor flags an over-long subject before the line completes."""
+        monitor = StreamingConstraintMonitor()
+
+        assert monitor.feed("Subject: ") is None
+        reason = monitor.feed("x" * 61)
+
+        assert reason is not None
+        assert "Subject too long" in reason
+
+    def test_monitor_body_too_long(self):
+        """Test monitor flags the body once it passes the word limit."""
+        monitor = StreamingConstraintMonitor(max_body_words=5)
+
+        assert monitor.feed("Subject: Hi\nBody: one two ") is None
+        assert monitor.feed("three\nfour five") is None
+        assert monitor.feed(" six") is None  # "six" may still be growing
+        assert "Body too long" in monitor.feed(" ")
+
+    def test_monitor_valid_message(self):
+        """Test monitor stays silent for a message within limits."""
+        monitor = StreamingConstraintMonitor()
+        text = "Subject: Short subject\n\nBody: " + "word " * 200
+
+        reasons = [monitor.feed(text[i : i + 7]) for i in range(0, len(text), 7)]
+
+        assert all(reason is None for reason in reasons)
+
+    def test_generate_variant_streaming_retries_after_abort(self):
+        """Test streaming mode retries aborted attempts and reports tokens saved."""
+        client = Mock()
+        client.generate_completion_stream.side_effect = [
+            {
+                "text": "Subject: " + "x" * 70,
+                "aborted": True,
+                "abort_reason": "Subject too long: 70+ chars (max 60)",
+                "time_to_first_token_ms": 120,
+                "max_tokens_saved": 480,
+                "output_tokens": 20,
+            },
+            {
+                "text": "Subject: Fine\n\nBody: Hello [Source: Doc, Section]",
+                "aborted": False,
+                "abort_reason": None,
+                "time_to_first_token_ms": 110,
+                "max_tokens_saved": 0,
+                "input_tokens": 300,
+                "output_tokens": 150,
+                "tokens_used": 450,
+            },
+        ]
+
+        generator = MessageGenerator(client, streaming=True)
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            variant = generator.generate_variant(
+                {"name": "Test", "features": {}},
+                [{"document_id": "DOC", "title": "Doc"}],
+                "urgent",
+            )
+
+        streaming = variant["generation_metadata"]["streaming"]
+        assert variant["subject"] == "Fine"
+        assert streaming["attempts"] == 2
+        assert streaming["aborted_attempts"] == 1
+        assert streaming["max_tokens_saved"] == 480
+        assert streaming["time_to_first_token_ms"] == 110
+        client.generate_completion.assert_not_called()
+
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_client_retry_restarts_constraint_monitor(self, mock_azure_openai):
+        """Test a mid-stream retryable error does not carry words into the retried stream."""
+        body = " ".join(["word"] * 200) + " [Source: Doc, Section]"
+        text = f"Subject: Fine\n\nBody: {body}"
+        deltas = re.findall(r"\S+\s*|\s+", text)
+
+        def dropped_stream():
+            yield from (
+                SimpleNamespace(type="response.output_text.delta", delta=d) for d in deltas[:150]
+            )
+            raise APIConnectionError(
+                request=httpx.Request("POST", "https://test.openai.azure.com/")
+            )
+
+        def full_stream():
+            yield from (SimpleNamespace(type="response.output_text.delta", delta=d) for d in deltas)
+            response = SimpleNamespace(
+                output_text=text,
+                finish_reason="completed",
+                usage=SimpleNamespace(input_tokens=300, output_tokens=210, total_tokens=510),
+            )
+            yield SimpleNamespace(type="response.completed", response=response)
+
+        mock_azure_openai.return_value.responses.create.side_effect = [
+            dropped_stream(),
+            full_stream(),
+        ]
+        env = {
+            "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+            "AZURE_OPENAI_API_KEY": "test-api-key",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o-mini",
+        }
+        with patch.dict(os.environ, env):
+            client = AzureOpenAIClient()
+        client.retry_policy = RetryPolicy(budget=None, sleep=lambda seconds: None)
+
+        generator = MessageGenerator(client, streaming=True)
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            variant = generator.generate_variant(
+                {"name": "Test", "features": {}},
+                [{"document_id": "DOC", "title": "Doc"}],
+                "urgent",
+            )
+
+        streaming = variant["generation_metadata"]["streaming"]
+        assert mock_azure_openai.return_value.responses.create.call_count == 2
+        assert streaming["aborted_attempts"] == 0
+        assert len(variant["body"].split()) == 203
+        assert variant["validation"]["valid"] is True
+
+
+class TestUsageLabels:
+    """Test cases for passing usage labels to the completion client."""
+
+    RESPONSE = {"text": "Subject: Fine\n\nBody: Hello [Source: Doc, Section]", "model": "m"}
+
+    def generate(self, client):
+        """Generate one variant with a stubbed prompt template."""
+        generator = MessageGenerator(client)
+        with patch.object(generator, "load_prompt_template", return_value="Test template"):
+            return generator.generate_variant(
+                {"name": "Test", "features": {}},
+                [{"document_id": "DOC", "title": "Doc"}],
+                "urgent",
+            )
+
+    def test_labels_sent_to_supporting_client(self):
+        """Test labels are passed when the client accepts them."""
+        client = Mock()
+        client.generate_completion.return_value = self.RESPONSE
+
+        self.generate(client)
+
+        labels = client.generate_completion.call_args.kwargs["usage_labels"]
+        assert labels == {"segment": "Test", "tone": "urgent"}
+
+    def test_labels_omitted_for_older_clients(self):
+        """Test clients without a usage_labels parameter still work."""
+
+        class LegacyClient:
+            def __init__(self):
+                self.calls = []
+
+            def generate_completion(self, prompt, system_message=None, max_tokens=500):
+                self.calls.append(prompt)
+                return TestUsageLabels.RESPONSE
+
+        client = LegacyClient()
+        variant = self.generate(client)
+
+        assert len(client.calls) == 1
+        assert variant["subject"] == "Fine"
+
+
+class TestCachePrefixPromptLayout:
+    """Test cases for the cache-friendly prompt layout."""
+
+    @pytest.fixture
+    def content(self):
+        """Sample retrieved content for testing."""
+        return [
+            {"document_id": "DOC001", "title": "Premium Features", "snippet": "Premium text."},
+            {"document_id": "DOC002", "title": "Success Stories", "snippet": "Story text."},
+        ]
+
+    def test_invalid_prompt_layout(self):
+        """Test unknown prompt layouts are rejected."""
+        with pytest.raises(ValueError, match="Invalid prompt layout"):
+            MessageGenerator(Mock(), prompt_layout="interleaved")
+
+    def test_static_prefix_identical_across_segments(self, content):
+        """Test segment fields only appear after the shared static prefix."""
+        generator = MessageGenerator(Mock(), prompt_layout="cache_prefix")
+
+        prefix_a, suffix_a = generator._build_prompt_parts(
+            {"name": "High-Value Recent", "features": {"avg_order_value": 275.0}}, content, "urgent"
+        )
+        prefix_b, suffix_b = generator._build_prompt_parts(
+            {"name": "New Customer", "features": {}}, content, "urgent"
+        )
+
+        assert prefix_a == prefix_b
+        assert "High-Value Recent" not in prefix_a
+        assert "[DOC002] Success Stories" in prefix_a
+        assert prefix_a.index("URGENT TONE") < prefix_a.index("APPROVED CONTENT TO REFERENCE:\n1.")
+        assert suffix_a.startswith("CUSTOMER CONTEXT:")
+        assert "avg_order_value: 275.0" in suffix_a
+        assert suffix_a != suffix_b
+
+    def test_generate_variant_passes_prompt_cache_key(self, content):
+        """Test cache layout sends a stable prompt cache key and records cached tokens."""
+        client = Mock()
+        client.generate_completion.return_value = {
+            "text": "Subject: Hi\n\nBody: Hello [Source: Premium Features, Intro]",
+            "input_tokens": 900,
+            "cached_input_tokens": 768,
+            "output_tokens": 150,
+        }
+        generator = MessageGenerator(client, prompt_layout="cache_prefix")
+
+        variant_a = generator.generate_variant({"name": "A", "features": {}}, content, "friendly")
+        variant_b = generator.generate_variant({"name": "B", "features": {}}, content, "friendly")
+
+        keys = [
+            call.kwargs["prompt_cache_key"] for call in client.generate_completion.call_args_list
+        ]
+        prompts = [call.kwargs["prompt"] for call in client.generate_completion.call_args_list]
+        assert keys[0] == keys[1]
+        assert prompts[0] != prompts[1]
+        assert variant_a["generation_metadata"]["tokens_cached_input"] == 768
+        assert variant_b["generation_metadata"]["prompt_layout"] == "cache_prefix"
+
+
+class TestCitationEngine:
+    """Test cases for the title index and single-pass citation scan."""
+
+    @pytest.fixture
+    def content(self):
+        """Content with overlapping titles."""
+        return [
+            {"document_id": "DOC001", "title": "Premium Widget Features"},
+            {"document_id": "DOC002", "title": "Widget"},
+            {"document_id": "DOC003", "title": "Customer Success Stories"},
+        ]
+
+    def test_title_index_exact_match(self, content):
+        """Test exact (case-insensitive) title lookups."""
+        index = TitleIndex(content)
+
+        assert index.lookup("customer success stories")["document_id"] == "DOC003"
+
+    def test_title_index_prefers_first_document(self, content):
+        """Test the earliest matching document wins, as with a linear scan."""
+        index = TitleIndex(content)
+
+        # "Widget" is an exact match for DOC002 but is also contained in DOC001
+        assert index.lookup("Widget")["document_id"] == "DOC001"
+        # DOC002's title is contained in the citation title
+        assert index.lookup("The Widget Guide")["document_id"] == "DOC002"
+
+    def test_title_index_no_match(self, content):
+        """Test unknown titles return None."""
+        assert TitleIndex(content).lookup("Shipping Policy") is None
+        assert TitleIndex([]).lookup("Anything") is None
+
+    def test_scan_citations_reports_format(self, content):
+        """Test citations and format check come from one scan."""
+        generator = MessageGenerator(Mock())
+
+        citations, format_found = generator._scan_citations(
+            "Read [Source: Customer Success Stories, Testimonials] today.", content
+        )
+        assert format_found is True
+        assert citations[0]["document_id"] == "DOC003"
+
+        citations, format_found = generator._scan_citations(
+            "Read [source: widget, intro] today.", content
+        )
+        assert len(citations) == 1
+        assert format_found is False
+
+    def test_validate_variant_format_uses_precomputed_format(self):
+        """Test validation honours a precomputed citation format flag."""
+        generator = MessageGenerator(Mock())
+        variant = {
+            "subject": "Subject",
+            "body": " ".join(["word"] * 160) + " [Source: Doc, Section]",
+            "citations": [{"document_id": "DOC001"}],
+        }
+
+        assert generator.validate_variant_format(variant)["valid"] is True
+        result = generator.validate_variant_format(variant, citation_format_found=False)
+        assert "No properly formatted citations found in body" in result["errors"]
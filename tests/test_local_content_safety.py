@@ -0,0 +1,133 @@
+"""
+Unit tests for the local rule-based content safety analyzer.
+
+Tests lexicon scoring, the ContentSafetyClient result shape, custom lexicons,
+provider selection and SafetyAgent integration.
+"""
+
+import os
+import tempfile
+import pytest
+import yaml
+from unittest.mock import patch
+
+from src.agents.safety_agent import SafetyAgent
+from src.integrations.azure_content_safety import get_safety_client
+from src.integrations.local_content_safety import LocalSafetyAnalyzer, load_lexicon
+
+SAFE_TEXT = "Discover our new savings plan, built around the goals you care about most."
+
+
+class TestLocalSafetyAnalyzer:
+    """Test cases for LocalSafetyAnalyzer."""
+
+    def setup_method(self):
+        """Create an analyzer with the default lexicon."""
+        self.analyzer = LocalSafetyAnalyzer()
+
+    def test_result_shape_matches_azure_client(self):
+        """Test the result has the keys produced by _parse_safety_response."""
+        result = self.analyzer.analyze_text(SAFE_TEXT)
+
+        assert set(result) == {
+            "text_length",
+            "analyzed_at",
+            "severity_scores",
+            "status",
+            "blocked_categories",
+            "max_severity",
+        }
+        assert result["severity_scores"] == {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0}
+        assert result["status"] == "pass"
+        assert result["max_severity"] == 0
+        assert result["text_length"] == len(SAFE_TEXT)
+
+    def test_highest_matching_tier_wins(self):
+        """Test a category scores its highest matched severity, case-insensitively."""
+        result = self.analyzer.analyze_text("They got into a FIGHT and then tried to Murder him.")
+
+        assert result["severity_scores"]["violence"] == 6
+        assert result["max_severity"] == 6
+        assert result["severity_scores"]["hate"] == 0
+
+    def test_word_boundaries(self):
+        """Test terms do not match inside longer words."""
+        assert self.analyzer.analyze_text("Our nudes palette is here")["max_severity"] == 0
+        assert self.analyzer.analyze_text("A sexy new look")["severity_scores"]["sexual"] == 2
+
+    def test_explain(self):
+        """Test matched phrases are reported per category."""
+        assert self.analyzer.explain("Stop the self-harm and violent talk") == {
+            "violence": ["violent"],
+            "self_harm": ["self-harm"],
+        }
+
+    def test_empty_text_rejected(self):
+        """Test empty text raises ValueError like the Azure client."""
+        with pytest.raises(ValueError):
+            self.analyzer.analyze_text("   ")
+
+    def test_custom_lexicon_file(self):
+        """Test a YAML lexicon replaces the defaults and changes the version."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+            yaml.dump({"hate": {4: ["gremlins?"]}}, f)
+        try:
+            analyzer = LocalSafetyAnalyzer(lexicon_path=f.name)
+        finally:
+            os.unlink(f.name)
+
+        assert analyzer.analyze_text("Beware of gremlins")["severity_scores"]["hate"] == 4
+        assert analyzer.analyze_text("Murder")["max_severity"] == 0
+        assert analyzer.version != self.analyzer.version
+
+    def test_invalid_lexicon(self):
+        """Test unknown tiers and invalid patterns are rejected."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+            yaml.dump({"hate": {3: ["x"]}}, f)
+        try:
+            with pytest.raises(ValueError):
+                load_lexicon(f.name)
+        finally:
+            os.unlink(f.name)
+
+        with pytest.raises(ValueError):
+            LocalSafetyAnalyzer(lexicon={"hate": {6: ["(unclosed"]}})
+
+    def test_usage_stats(self):
+        """Test usage counters use the ContentSafetyClient keys."""
+        self.analyzer.analyze_text(SAFE_TEXT)
+        stats = self.analyzer.get_usage_stats()
+
+        assert stats["total_requests"] == 1
+        assert "requests_per_second" in stats
+
+
+class TestAnalyzerSelection:
+    """Test cases for choosing the local analyzer by configuration."""
+
+    def test_get_safety_client_local(self):
+        """Test the provider argument and environment override."""
+        assert isinstance(get_safety_client("local"), LocalSafetyAnalyzer)
+        with patch.dict(os.environ, {"CONTENT_SAFETY_ANALYZER": "local"}):
+            assert isinstance(get_safety_client(), LocalSafetyAnalyzer)
+        with pytest.raises(ValueError):
+            get_safety_client("other")
+
+    def test_safety_agent_uses_local_analyzer(self):
+        """Test SafetyAgent screens offline when the config selects the local provider."""
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = os.path.join(tmp, "safety.yaml")
+            with open(config_path, "w") as f:
+                yaml.dump({"safety_policy": {"threshold": 4, "analyzer": {"provider": "local"}}}, f)
+
+            agent = SafetyAgent(config_path=config_path, audit_log_path=os.path.join(tmp, "a.log"))
+            try:
+                assert isinstance(agent.safety_client, LocalSafetyAnalyzer)
+                assert (
+                    agent.check_safety({"variant_id": "V1", "body": SAFE_TEXT})["status"] == "pass"
+                )
+                blocked = agent.check_safety({"variant_id": "V2", "body": "I will kill you."})
+                assert blocked["status"] == "block"
+                assert blocked["blocked_categories"] == ["violence"]
+            finally:
+                agent.close()
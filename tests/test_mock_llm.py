@@ -0,0 +1,133 @@
+"""
+Unit tests for the local mock LLM.
+
+Tests the deterministic mock engine, the in-process Responses client, the
+localhost HTTP server and the AZURE_OPENAI_MOCK_LLM switch in AzureOpenAIClient.
+"""
+
+import os
+import pytest
+from openai import RateLimitError
+from unittest.mock import patch
+
+from src.agents.generation_agent import MessageGenerator
+from src.integrations.azure_openai import AzureOpenAIClient
+from src.integrations.mock_llm import (
+    MockLLMConfig,
+    MockLLMEngine,
+    MockLLMServer,
+    MockResponsesClient,
+)
+
+SAMPLE_PROMPT = (
+    "TONE: Friendly\n"
+    "APPROVED CONTENT TO REFERENCE:\n"
+    "1. [DOC001] Premium Widget Features: Advanced features.\n"
+    "2. [DOC002] Customer Success Stories: Remarkable results.\n"
+)
+SAMPLE_CONTENT = [
+    {"document_id": "DOC001", "title": "Premium Widget Features", "snippet": "Advanced."},
+    {"document_id": "DOC002", "title": "Customer Success Stories", "snippet": "Results."},
+]
+
+
+class TestMockLLMEngine:
+    """Test cases for the mock engine and in-process client."""
+
+    def test_generate_text_is_deterministic(self):
+        """Test the same prompt always yields the same text."""
+        engine = MockLLMEngine(MockLLMConfig())
+
+        assert engine.generate_text(SAMPLE_PROMPT) == engine.generate_text(SAMPLE_PROMPT)
+        assert engine.generate_text(SAMPLE_PROMPT) != engine.generate_text(SAMPLE_PROMPT + "x")
+
+    def test_generated_text_passes_validation(self):
+        """Test mock output satisfies the generation format constraints."""
+        client = MockResponsesClient(MockLLMConfig())
+        response = client.responses.create(model="mock", input=SAMPLE_PROMPT, max_output_tokens=400)
+        generator = MessageGenerator(openai_client=object())
+
+        parsed = generator._parse_generated_message(response.output_text)
+        subject, body = parsed["subject"], parsed["body"]
+        citations = generator.extract_citations(body, SAMPLE_CONTENT)
+        validation = generator.validate_variant_format(
+            {"subject": subject, "body": body, "citations": citations}
+        )
+
+        assert validation["valid"], validation["errors"]
+        assert response.usage.output_tokens > 0
+
+    def test_invalid_latency_distribution(self):
+        """Test unknown latency distributions are rejected."""
+        with pytest.raises(ValueError):
+            MockLLMConfig(latency_distribution="pareto")
+
+    def test_rate_limit_injection(self):
+        """Test 429 errors are raised at the configured probability."""
+        client = MockResponsesClient(MockLLMConfig(rate_limit_probability=1.0))
+
+        with pytest.raises(RateLimitError):
+            client.responses.create(model="mock", input=SAMPLE_PROMPT, max_output_tokens=400)
+
+    def test_streaming_events(self):
+        """Test streaming yields text deltas followed by a completed event."""
+        client = MockResponsesClient(MockLLMConfig())
+
+        events = list(
+            client.responses.create(
+                model="mock", input=SAMPLE_PROMPT, max_output_tokens=400, stream=True
+            )
+        )
+
+        deltas = [e.delta for e in events if e.type == "response.output_text.delta"]
+        assert events[-1].type == "response.completed"
+        assert "".join(deltas) == events[-1].response.output_text
+
+
+class TestMockLLMIntegration:
+    """Test cases for driving AzureOpenAIClient against the mock."""
+
+    def test_inprocess_env_switch(self):
+        """Test AZURE_OPENAI_MOCK_LLM=inprocess needs no Azure credentials."""
+        with patch.dict(os.environ, {"AZURE_OPENAI_MOCK_LLM": "inprocess"}, clear=True):
+            client = AzureOpenAIClient()
+
+        result = client.generate_completion(SAMPLE_PROMPT, "System", max_tokens=400)
+
+        assert isinstance(client.client, MockResponsesClient)
+        assert result["text"].startswith("Subject:")
+        assert client.total_requests == 1
+
+    def test_http_server(self):
+        """Test the real SDK client can call the localhost mock server."""
+        with MockLLMServer(MockLLMConfig()) as server:
+            env = {
+                "AZURE_OPENAI_ENDPOINT": server.endpoint,
+                "AZURE_OPENAI_API_KEY": "mock",
+                "AZURE_OPENAI_DEPLOYMENT_NAME": "mock-gpt-4o-mini",
+            }
+            with patch.dict(os.environ, env, clear=True):
+                client = AzureOpenAIClient(timeout=5.0)
+                result = client.generate_completion(SAMPLE_PROMPT, "System", max_tokens=400)
+
+        assert "[Source:" in result["text"]
+        assert result["input_tokens"] > 0
+        assert server.engine.request_count == 1
+
+    def test_http_server_streaming(self):
+        """Test the mock server answers stream=True requests with server-sent events."""
+        with MockLLMServer(MockLLMConfig()) as server:
+            env = {
+                "AZURE_OPENAI_ENDPOINT": server.endpoint,
+                "AZURE_OPENAI_API_KEY": "mock",
+                "AZURE_OPENAI_DEPLOYMENT_NAME": "mock-gpt-4o-mini",
+            }
+            with patch.dict(os.environ, env, clear=True):
+                client = AzureOpenAIClient(timeout=5.0)
+                result = client.generate_completion_stream(SAMPLE_PROMPT, "System", max_tokens=400)
+
+        assert result["aborted"] is False
+        assert "[Source:" in result["text"]
+        assert result["input_tokens"] > 0
+        assert "input_tokens_estimated" not in result
+        assert result["time_to_first_token_ms"] is not None
@@ -0,0 +1,126 @@
+"""
+Unit tests for the Personalization Planner.
+
+Tests bucketing of customers by quantized personalization inputs and
+fan-out of generated variants to every customer in a bucket.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from src.agents.personalization_planner import PersonalizationPlanner, plan_generation
+
+
+class TestPersonalizationPlanner:
+    """Test cases for PersonalizationPlanner class."""
+
+    @pytest.fixture
+    def sample_customers(self):
+        """Sample customers with raw features."""
+        return [
+            {
+                "customer_id": "C001",
+                "segment": "High-Value Recent",
+                "tier": "Gold",
+                "avg_order_value": 250.0,
+                "purchase_frequency": 12,
+                "last_engagement_days": 5,
+            },
+            {
+                "customer_id": "C002",
+                "segment": "High-Value Recent",
+                "tier": "Gold",
+                "avg_order_value": 275.0,
+                "purchase_frequency": 14,
+                "last_engagement_days": 3,
+            },
+            {
+                "customer_id": "C003",
+                "segment": "High-Value Recent",
+                "tier": "Gold",
+                "avg_order_value": 320.0,
+                "purchase_frequency": 14,
+                "last_engagement_days": 3,
+            },
+            {
+                "customer_id": "C004",
+                "segment": "Standard",
+                "tier": "Silver",
+                "avg_order_value": 150.0,
+                "purchase_frequency": 6,
+                "last_engagement_days": 30,
+            },
+        ]
+
+    def test_quantize_features(self):
+        """Test numeric features are mapped to bin labels."""
+        planner = PersonalizationPlanner()
+
+        quantized = planner.quantize_features(
+            {
+                "avg_order_value": 250.0,
+                "purchase_frequency": 2,
+                "last_engagement_days": 90,
+                "tier": "Gold",
+            }
+        )
+
+        assert quantized == {
+            "avg_order_value": "200-300",
+            "purchase_frequency": "<4",
+            "last_engagement_days": ">=90",
+            "tier": "Gold",
+        }
+
+    def test_invalid_bin_edges(self):
+        """Test unsorted bin edges are rejected."""
+        with pytest.raises(ValueError, match="ascending order"):
+            PersonalizationPlanner(feature_bins={"avg_order_value": [300, 100]})
+
+    def test_plan_deduplicates_identical_inputs(self, sample_customers):
+        """Test customers with identical quantized inputs share a bucket."""
+        plan = PersonalizationPlanner().plan(sample_customers)
+
+        assert plan["total_customers"] == 4
+        assert plan["unique_buckets"] == 3
+        assert plan["dedup_ratio"] == pytest.approx(1.33)
+
+        first_bucket = plan["buckets"][0]
+        assert first_bucket["customer_ids"] == ["C001", "C002"]
+        assert first_bucket["segment"]["name"] == "High-Value Recent"
+        assert first_bucket["segment"]["features"]["avg_order_value"] == "200-300"
+
+    def test_plan_missing_customer_id(self):
+        """Test plan rejects customers without an ID."""
+        with pytest.raises(ValueError, match="customer_id"):
+            PersonalizationPlanner().plan([{"segment": "Standard"}])
+
+    def test_execute_fans_out_variants(self, sample_customers):
+        """Test one generation call per bucket is fanned out to its customers."""
+        generator = Mock()
+        generator.generate_variants.side_effect = lambda segment, content: [
+            {"variant_id": f"VAR_{segment['name']}_{tone}_{id(segment)}", "tone": tone}
+            for tone in ["urgent", "friendly"]
+        ]
+        planner = PersonalizationPlanner()
+        plan = planner.plan(sample_customers)
+
+        result = planner.execute(
+            plan,
+            generator,
+            {"High-Value Recent": [{"document_id": "DOC001"}], "Standard": []},
+        )
+
+        assert generator.generate_variants.call_count == 2
+        assert result["statistics"]["buckets_generated"] == 2
+        assert result["statistics"]["buckets_skipped"] == 1
+        assert result["customer_variants"]["C001"] == result["customer_variants"]["C002"]
+        assert result["customer_variants"]["C001"] != result["customer_variants"]["C003"]
+        assert "C004" not in result["customer_variants"]
+        assert result["variants"][0]["customer_count"] == 2
+
+    def test_plan_generation_convenience_function(self, sample_customers):
+        """Test convenience function returns a plan."""
+        plan = plan_generation(sample_customers)
+
+        assert plan["unique_buckets"] == 3
@@ -0,0 +1,163 @@
+"""
+Unit tests for prompt budgeting.
+
+Tests offline token counting, relevance-ordered packing, near-duplicate
+removal and budget statistics in generated variants.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from src.agents.generation_agent import MessageGenerator
+from src.agents.prompt_budgeter import (
+    PromptBudgeter,
+    TokenCounter,
+    format_snippet,
+    pack_snippets,
+)
+
+
+def make_doc(doc_id, snippet, score=None, title=None):
+    """Build a retrieved content item."""
+    doc = {"document_id": doc_id, "title": title or f"Doc {doc_id}", "snippet": snippet}
+    if score is not None:
+        doc["relevance_score"] = score
+    return doc
+
+
+LONG_SNIPPET = (
+    "Our Premium Widget includes advanced features designed specifically for our most "
+    "valued customers. These exclusive capabilities provide enhanced performance and "
+    "priority support around the clock."
+)
+
+
+class TestTokenCounter:
+    """Test cases for TokenCounter."""
+
+    def test_counts_offline(self):
+        """Test the approximate counter needs no tokenizer download."""
+        counter = TokenCounter()
+
+        assert not counter.exact
+        assert counter.count("") == 0
+        assert counter.count("Hello world") == 2
+        # 30 words plus punctuation: roughly one token per common word
+        assert 30 <= counter.count(LONG_SNIPPET) <= 45
+
+    def test_long_words_cost_more(self):
+        """Test long words are charged more than one token."""
+        counter = TokenCounter()
+
+        assert counter.count("personalization") > counter.count("person")
+
+    def test_unavailable_encoding_falls_back(self):
+        """Test an unknown tiktoken encoding falls back to the approximation."""
+        counter = TokenCounter(encoding_name="no_such_encoding")
+
+        assert not counter.exact
+        assert counter.count("Hello world") == 2
+
+
+class TestPromptBudgeter:
+    """Test cases for PromptBudgeter."""
+
+    def test_packs_by_relevance_within_budget(self):
+        """Test the most relevant snippets are kept when the budget is tight."""
+        content = [
+            make_doc("DOC1", LONG_SNIPPET, score=0.2),
+            make_doc("DOC2", "Gold tier members get free shipping on every order.", score=0.9),
+            make_doc("DOC3", "Annual plans renew automatically unless cancelled.", score=0.5),
+        ]
+        counter = TokenCounter()
+        budget = counter.count(format_snippet(1, content[1])) + counter.count(
+            format_snippet(2, content[2])
+        )
+
+        selected, stats = PromptBudgeter(token_budget=budget).pack(content)
+
+        assert [doc["document_id"] for doc in selected] == ["DOC2", "DOC3"]
+        assert stats["snippets_used"] == 2
+        assert stats["over_budget_dropped"] == 1
+        assert stats["snippet_tokens_used"] <= budget
+        assert stats["tokens_saved"] == stats["snippet_tokens_in"] - stats["snippet_tokens_used"]
+
+    def test_removes_near_duplicates(self):
+        """Test a near-identical lower-ranked snippet is dropped."""
+        content = [
+            make_doc("DOC1", LONG_SNIPPET, score=0.8, title="Premium Widget"),
+            make_doc("DOC2", LONG_SNIPPET + " Terms apply.", score=0.7, title="Premium Widget"),
+            make_doc("DOC3", "Gold tier members get free shipping on every order.", score=0.6),
+        ]
+
+        selected, stats = PromptBudgeter(token_budget=None).pack(content)
+
+        assert [doc["document_id"] for doc in selected] == ["DOC1", "DOC3"]
+        assert stats["duplicates_removed"] == 1
+        assert stats["tokens_saved"] > 0
+
+    def test_keeps_retrieval_order_without_scores(self):
+        """Test content without relevance scores keeps its original order."""
+        content = [make_doc("DOC1", "First snippet text."), make_doc("DOC2", "Second one.")]
+
+        selected, stats = pack_snippets(content)
+
+        assert selected == content
+        assert stats["tokens_saved"] == 0
+
+    def test_top_snippet_kept_when_over_budget(self):
+        """Test the most relevant snippet is kept even if it alone exceeds the budget."""
+        selected, stats = PromptBudgeter(token_budget=5).pack([make_doc("DOC1", LONG_SNIPPET)])
+
+        assert len(selected) == 1
+        assert stats["snippet_tokens_used"] > 5
+
+    def test_invalid_budget(self):
+        """Test non-positive budgets are rejected."""
+        with pytest.raises(ValueError):
+            PromptBudgeter(token_budget=0)
+
+
+class TestGeneratorBudgeting:
+    """Test cases for prompt budgeting in MessageGenerator."""
+
+    def test_generate_variant_uses_packed_content(self):
+        """Test only packed snippets reach the prompt and stats are recorded."""
+        client = Mock()
+        client.generate_completion.return_value = {
+            "text": "Subject: Upgrade today\nBody: Great news [Source: Doc DOC2, Benefits]",
+            "model": "gpt-4o-mini",
+        }
+        generator = MessageGenerator(openai_client=client, snippet_token_budget=40)
+        content = [
+            make_doc("DOC1", LONG_SNIPPET * 3, score=0.1),
+            make_doc("DOC2", "Gold tier members get free shipping on every order.", score=0.9),
+        ]
+
+        variant = generator.generate_variant({"name": "High-Value"}, content, "friendly")
+
+        prompt = client.generate_completion.call_args.kwargs["prompt"]
+        assert "[DOC2]" in prompt
+        assert "[DOC1]" not in prompt
+        budget = variant["generation_metadata"]["prompt_budget"]
+        assert budget["snippets_used"] == 1
+        assert budget["tokens_saved"] > 0
+
+    def test_budgeting_is_opt_in(self):
+        """Test content keeps retrieval order and all snippets without a budget."""
+        client = Mock()
+        client.generate_completion.return_value = {
+            "text": "Subject: Upgrade today\nBody: Great news [Source: Doc DOC2, Benefits]",
+            "model": "gpt-4o-mini",
+        }
+        generator = MessageGenerator(openai_client=client)
+        content = [
+            make_doc("DOC1", LONG_SNIPPET * 3, score=0.1),
+            make_doc("DOC2", "Gold tier members get free shipping on every order.", score=0.9),
+        ]
+
+        variant = generator.generate_variant({"name": "High-Value"}, content, "friendly")
+
+        prompt = client.generate_completion.call_args.kwargs["prompt"]
+        assert prompt.index("[DOC1]") < prompt.index("[DOC2]")
+        assert "prompt_budget" not in variant["generation_metadata"]
@@ -0,0 +1,152 @@
+"""
+Unit tests for request hedging.
+
+Tests hedge delay estimation, the hedge budget, winner selection and
+hedged completions in AzureOpenAIClient.
+"""
+
+import os
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from src.integrations.azure_openai import AzureOpenAIClient
+from src.integrations.request_hedging import RequestHedger
+
+
+def slow_then_fast(slow_seconds: float = 1.0):
+    """Callable whose first invocation is slow and later invocations are fast."""
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls["count"] += 1
+            call_number = calls["count"]
+        if call_number == 1:
+            time.sleep(slow_seconds)
+            return "primary"
+        return "hedge"
+
+    return fn, calls
+
+
+class TestRequestHedger:
+    """Test cases for RequestHedger."""
+
+    def test_hedge_delay_requires_samples(self):
+        """Test hedging waits for enough latency samples."""
+        hedger = RequestHedger(min_samples=20, min_delay_ms=100)
+
+        assert hedger.hedge_delay_ms({"count": 5, "p95_ms": 800}) is None
+        assert hedger.hedge_delay_ms({"count": 50, "p95_ms": 800}) == 800
+        assert hedger.hedge_delay_ms({"count": 50, "p95_ms": 20}) == 100
+
+    def test_fast_call_is_not_hedged(self):
+        """Test calls finishing before the delay never fire a hedge."""
+        hedger = RequestHedger(budget_fraction=1.0)
+        fn = Mock(return_value="ok")
+
+        assert hedger.call(fn, delay_ms=500) == "ok"
+        assert fn.call_count == 1
+        assert hedger.get_stats()["hedges_fired"] == 0
+
+    def test_slow_call_is_hedged(self):
+        """Test the hedge result is returned when the original is slow."""
+        hedger = RequestHedger(budget_fraction=1.0)
+        fn, calls = slow_then_fast()
+        discarded = []
+
+        start = time.time()
+        result = hedger.call(fn, delay_ms=50, on_discard=discarded.append)
+        elapsed = time.time() - start
+
+        assert result == "hedge"
+        assert elapsed < 0.5
+        assert calls["count"] == 2
+        stats = hedger.get_stats()
+        assert stats["hedges_fired"] == 1
+        assert stats["hedge_wins"] == 1
+
+        # The slow original finishes in the background and is reported as discarded
+        deadline = time.time() + 2
+        while not discarded and time.time() < deadline:
+            time.sleep(0.01)
+        assert discarded == ["primary"]
+
+    def test_budget_limits_hedges(self):
+        """Test no hedge fires once the budget fraction is used up."""
+        hedger = RequestHedger(budget_fraction=0.0)
+        fn, calls = slow_then_fast(slow_seconds=0.2)
+
+        assert hedger.call(fn, delay_ms=10) == "primary"
+        assert calls["count"] == 1
+        assert hedger.get_stats()["hedges_denied"] == 1
+
+    def test_invalid_budget(self):
+        """Test budget fractions outside [0, 1] are rejected."""
+        with pytest.raises(ValueError):
+            RequestHedger(budget_fraction=1.5)
+
+
+class TestClientHedging:
+    """Test cases for hedged completions in AzureOpenAIClient."""
+
+    @patch.dict(
+        os.environ,
+        {
+            "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+            "AZURE_OPENAI_API_KEY": "test-api-key",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o-mini",
+        },
+    )
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_generate_completion_hedges_above_p95(self, mock_azure_openai):
+        """Test a call slower than the observed p95 is hedged and overhead recorded."""
+        responses = {
+            "primary": Mock(output_text="Slow", usage=Mock(input_tokens=10, output_tokens=7)),
+            "hedge": Mock(output_text="Fast", usage=Mock(input_tokens=10, output_tokens=5)),
+        }
+        fn, _ = slow_then_fast(slow_seconds=0.3)
+
+        def create(**kwargs):
+            return responses[fn()]
+
+        mock_azure_openai.return_value.responses.create.side_effect = create
+        hedger = RequestHedger(budget_fraction=1.0, min_samples=10, min_delay_ms=20)
+        client = AzureOpenAIClient(hedger=hedger)
+        for _ in range(10):
+            client.usage_ledger.record("gpt-4o-mini", duration_ms=20)
+
+        result = client.generate_completion("Prompt")
+
+        assert result["text"] == "Fast"
+        hedger.shutdown(wait=True)
+        stats = client.get_usage_snapshot()["hedging"]
+        assert stats["hedge_wins"] == 1
+        assert stats["overhead_output_tokens"] == 7
+
+    @patch.dict(
+        os.environ,
+        {
+            "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+            "AZURE_OPENAI_API_KEY": "test-api-key",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o-mini",
+        },
+    )
+    @patch("src.integrations.azure_openai.AzureOpenAI")
+    def test_client_close_stops_hedge_workers(self, mock_azure_openai):
+        """Test closing the client shuts down the hedger's worker threads."""
+        hedger = RequestHedger(budget_fraction=1.0, min_samples=1, min_delay_ms=1000)
+        with AzureOpenAIClient(hedger=hedger):
+            hedger.call(lambda: "ok", delay_ms=1000)
+            workers = list(hedger._executor._threads)
+            assert workers
+
+        for worker in workers:
+            worker.join(timeout=5)
+        assert not any(worker.is_alive() for worker in workers)
+        mock_azure_openai.return_value.close.assert_called_once()
+        with pytest.raises(RuntimeError):
+            hedger.call(lambda: "ok", delay_ms=1000)
@@ -22,6 +22,10 @@ from src.integrations.azure_search import (
     index_exists,
     get_index_statistics,
     index_documents,
+    add_safety_fields,
+    prescreen_documents,
+    safety_filter,
+    transform_document_for_indexing,
 )
 
 
@@ -324,6 +328,94 @@ class TestIndexStatistics:
         assert result is None
 
 
+class TestIndexTimeSafety:
+    """Test index-time safety screening and severity fields."""
+
+    def analysis(self, violence):
+        """Build a safety analysis with the given violence severity."""
+        return {
+            "severity_scores": {"hate": 0, "violence": violence, "self_harm": 0, "sexual": 0},
+            "max_severity": violence,
+        }
+
+    def test_schema_has_filterable_safety_fields(self):
+        """Test severities are stored in filterable integer fields."""
+        field_dict = {field.name: field for field in create_content_index_schema("idx").fields}
+
+        for name in ["safety_max_severity", "safety_hate", "safety_violence"]:
+            assert field_dict[name].filterable is True
+        assert "safety_screened_at" in field_dict
+        assert field_dict["safety_status"].filterable is True
+
+    def test_safety_filter(self):
+        """Test unscreened documents are kept only on request and failed screens never."""
+        assert safety_filter(2) == "safety_max_severity le 2"
+        assert safety_filter(2, include_unscreened=True) == (
+            "(safety_max_severity le 2 or "
+            "(safety_max_severity eq null and safety_status eq null))"
+        )
+
+    def test_prescreen_documents(self):
+        """Test documents are screened in parallel and failures left unscreened."""
+        client = Mock()
+
+        def analyze(text):
+            if "broken" in text:
+                raise RuntimeError("service error")
+            return self.analysis(6 if "fight" in text else 0)
+
+        client.analyze_text.side_effect = analyze
+        documents = [
+            {"document_id": "D1", "title": "Welcome", "content": "Calm copy."},
+            {"document_id": "D2", "title": "Story", "content": "A fight scene."},
+            {"document_id": "D3", "title": "Bad", "content": "broken"},
+        ]
+
+        stats = prescreen_documents(documents, client, max_workers=3)
+
+        assert stats == {"screened": 2, "failed": 1, "severity_counts": {0: 1, 6: 1}}
+        assert documents[1]["safety"]["max_severity"] == 6
+        assert client.analyze_text.call_count == 3
+
+        # A failed screen is marked explicitly and stored without severities
+        failed = transform_document_for_indexing(documents[2])
+        assert failed["safety_status"] == "failed"
+        assert "safety_max_severity" not in failed
+
+    def test_transform_stores_safety_fields(self):
+        """Test screened documents carry severities into the index document."""
+        doc = {
+            "document_id": "D1",
+            "safety": {
+                "max_severity": 4,
+                "severity_scores": self.analysis(4)["severity_scores"],
+                "screened_at": "2025-11-23T10:00:00Z",
+            },
+        }
+
+        transformed = transform_document_for_indexing(doc)
+
+        assert transformed["safety_max_severity"] == 4
+        assert transformed["safety_status"] == "screened"
+        assert transformed["safety_violence"] == 4
+        assert transformed["safety_hate"] == 0
+        assert "safety_max_severity" not in transform_document_for_indexing({"document_id": "D2"})
+
+    @patch("src.integrations.azure_search.get_search_index_client")
+    def test_add_safety_fields_to_existing_index(self, mock_get_client):
+        """Test an older index gains only the missing safety fields."""
+        index = create_content_index_schema("idx")
+        index.fields = [f for f in index.fields if f.name != "safety_sexual"]
+        mock_client = Mock()
+        mock_client.get_index.return_value = index
+        mock_get_client.return_value = mock_client
+
+        assert add_safety_fields("idx") is True
+
+        updated = mock_client.create_or_update_index.call_args[0][0]
+        assert [f.name for f in updated.fields].count("safety_sexual") == 1
+
+
 class TestIntegrationOperations:
     """Test end-to-end integration operations."""
 
@@ -685,6 +777,30 @@ class TestRetrievalIntegration:
         call_args = mock_client.search.call_args
         assert call_args[1]["top"] == 5
         assert call_args[1]["query_type"] == "semantic"
+        assert call_args[1]["filter"] == safety_filter(2)
+
+    def test_source_severity_filter_can_be_disabled(self):
+        """Test max_source_severity sets or disables the server-side filter."""
+        from src.agents.retrieval_agent import ContentRetriever
+
+        mock_client = Mock()
+        mock_client.search.return_value = []
+        segment = {"name": "High-Value Recent", "features": {}}
+
+        ContentRetriever(search_client=mock_client, max_source_severity=0).retrieve_content(segment)
+        assert mock_client.search.call_args[1]["filter"] == safety_filter(0)
+
+        ContentRetriever(search_client=mock_client, max_source_severity=None).retrieve_content(
+            segment
+        )
+        assert "filter" not in mock_client.search.call_args[1]
+
+        ContentRetriever(search_client=mock_client, include_unscreened=True).retrieve_content(
+            segment
+        )
+        assert mock_client.search.call_args[1]["filter"] == safety_filter(
+            2, include_unscreened=True
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""
+Unit tests for the shared retry policy.
+
+Tests error classification, Retry-After handling, jittered backoff and the
+global retry budget.
+"""
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import Mock
+from azure.core.exceptions import HttpResponseError, ServiceRequestError
+from openai import BadRequestError, RateLimitError
+
+from src.integrations.retry_policy import (
+    RetryBudget,
+    RetryPolicy,
+    classify_error,
+    parse_retry_after,
+    with_retry,
+)
+
+
+def openai_error(cls, status_code, headers=None, code=None):
+    """Build an OpenAI SDK status error with the given response headers."""
+    request = httpx.Request("POST", "https://test.openai.azure.com/openai/responses")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    body = {"code": code} if code else None
+    return cls("error", response=response, body=body)
+
+
+class TestClassifyError:
+    """Test cases for error classification."""
+
+    def test_rate_limit_with_retry_after(self):
+        """Test 429s are retryable and carry their Retry-After."""
+        error = openai_error(RateLimitError, 429, {"retry-after-ms": "1500"})
+
+        assert classify_error(error) == (True, 1.5)
+
+    def test_insufficient_quota_is_terminal(self):
+        """Test quota exhaustion is not retried even though it is a 429."""
+        error = openai_error(RateLimitError, 429, code="insufficient_quota")
+
+        assert classify_error(error) == (False, None)
+
+    def test_client_errors_are_terminal(self):
+        """Test 400-class errors and validation errors are not retried."""
+        assert classify_error(openai_error(BadRequestError, 400))[0] is False
+        assert classify_error(ValueError("bad input"))[0] is False
+
+    def test_azure_errors(self):
+        """Test Azure 503s and connection failures are retryable."""
+        unavailable = HttpResponseError(
+            message="Unavailable", response=Mock(status_code=503, headers={"Retry-After": "2"})
+        )
+
+        assert classify_error(unavailable) == (True, 2.0)
+        assert classify_error(ServiceRequestError("connection reset"))[0] is True
+
+    def test_parse_retry_after_ignores_http_dates(self):
+        """Test HTTP-date Retry-After values are ignored."""
+        assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+
+
+class TestRetryPolicy:
+    """Test cases for RetryPolicy."""
+
+    def test_retries_transient_then_succeeds(self):
+        """Test transient failures are retried with jittered backoff."""
+        sleep = Mock()
+        fn = Mock(side_effect=[ConnectionError("reset"), "ok"])
+        policy = RetryPolicy(base_delay=1.0, budget=None, sleep=sleep)
+
+        assert policy.call(fn) == "ok"
+        assert fn.call_count == 2
+        assert 0 <= sleep.call_args.args[0] <= 1.0
+
+    def test_terminal_error_fails_fast(self):
+        """Test terminal errors are raised without retrying."""
+        sleep = Mock()
+        fn = Mock(side_effect=openai_error(BadRequestError, 400))
+
+        with pytest.raises(BadRequestError):
+            RetryPolicy(budget=None, sleep=sleep).call(fn)
+
+        assert fn.call_count == 1
+        sleep.assert_not_called()
+
+    def test_long_retry_after_fails_fast(self):
+        """Test server waits above max_retry_after are not honored."""
+        fn = Mock(side_effect=openai_error(RateLimitError, 429, {"retry-after": "120"}))
+
+        with pytest.raises(RateLimitError):
+            RetryPolicy(max_retry_after=30, budget=None, sleep=Mock()).call(fn)
+
+        assert fn.call_count == 1
+
+    def test_budget_caps_retries(self):
+        """Test retries stop once the shared budget is exhausted."""
+        budget = RetryBudget(retry_ratio=0.0, min_retries_per_second=0.0, max_tokens=1)
+        policy = RetryPolicy(max_attempts=5, budget=budget, sleep=Mock())
+        fn = Mock(side_effect=ConnectionError("down"))
+
+        with pytest.raises(ConnectionError):
+            policy.call(fn)
+
+        assert fn.call_count == 2
+        assert budget.get_stats()["rejected_retries"] == 1
+
+    def test_with_retry_uses_instance_policy(self):
+        """Test the decorator prefers an instance retry_policy attribute."""
+        sleep = Mock()
+
+        class Client:
+            retry_policy = RetryPolicy(max_attempts=2, budget=None, sleep=sleep)
+
+            def __init__(self):
+                self.calls = 0
+
+            @with_retry(RetryPolicy(max_attempts=5, budget=None, sleep=Mock()))
+            def fetch(self):
+                self.calls += 1
+                raise TimeoutError("slow")
+
+        client = Client()
+        with pytest.raises(TimeoutError):
+            client.fetch()
+
+        assert client.calls == 2
+        assert sleep.call_count == 1
+
+    def test_call_async_awaits_backoff(self):
+        """Test coroutine retries wait with the async sleep and honor Retry-After."""
+        delays = []
+
+        async def async_sleep(delay):
+            delays.append(delay)
+
+        attempts = []
+
+        async def fetch():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise openai_error(RateLimitError, 429, {"retry-after": "2"})
+            return "ok"
+
+        policy = RetryPolicy(budget=None, sleep=Mock(), async_sleep=async_sleep)
+
+        assert asyncio.run(policy.call_async(fetch)) == "ok"
+        assert len(attempts) == 2
+        assert 2.0 <= delays[0] <= 2.2
+        policy.sleep.assert_not_called()
+
+    def test_call_async_terminal_error(self):
+        """Test coroutine terminal errors are raised without retrying."""
+
+        async def fetch():
+            raise ValueError("bad input")
+
+        with pytest.raises(ValueError):
+            asyncio.run(RetryPolicy(budget=None).call_async(fetch))
@@ -4,6 +4,7 @@ Unit tests for Azure AI Content Safety integration.
 Tests the ContentSafetyClient class and related functions with mocked API responses.
 """
 
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from azure.core.exceptions import HttpResponseError, AzureError
@@ -12,17 +13,24 @@ import sys
 import tempfile
 import yaml
 import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.integrations.azure_content_safety import (
+    AsyncContentSafetyClient,
     ContentSafetyClient,
     get_safety_client,
+    split_text,
     analyze_text_safety,
     test_connection,
 )
 
+from src.integrations.retry_policy import RetryPolicy
+
 # Import SafetyAgent for testing
 from src.agents.safety_agent import (
     SafetyAgent,
@@ -55,8 +63,8 @@ class TestContentSafetyClient:
         client = ContentSafetyClient()
         assert client.endpoint == "https://test.com"
         assert client.api_key == "test-key"
-        assert client._request_count == 0
-        assert client._total_latency == 0.0
+        assert client.latency_stats.request_count == 0
+        assert client.latency_stats.total_latency == 0.0
 
     def test_client_initialization_with_parameters(self):
         """Test client initialization with explicit parameters."""
@@ -176,7 +184,8 @@ class TestContentSafetyClient:
         """Test handling of rate limit (429) errors."""
         mock_client_instance = Mock()
         mock_client_instance.analyze_text.side_effect = HttpResponseError(
-            message="Rate limit exceeded", response=Mock(status_code=429)
+            message="Rate limit exceeded",
+            response=Mock(status_code=429, headers={"Retry-After": "5"}),
         )
         mock_azure_client.return_value = mock_client_instance
 
@@ -185,8 +194,10 @@ class TestContentSafetyClient:
         with patch("time.sleep") as mock_sleep:
             with pytest.raises(HttpResponseError):
                 client.analyze_text("Test message")
-            # Verify sleep was called for rate limiting
-            mock_sleep.assert_called_with(60)
+            # Verify the Retry-After header was honored between attempts
+            assert mock_client_instance.analyze_text.call_count == 3
+            assert mock_sleep.call_count == 2
+            assert all(5 <= call.args[0] <= 5.5 for call in mock_sleep.call_args_list)
 
     @patch.dict(
         os.environ,
@@ -208,6 +219,8 @@ class TestContentSafetyClient:
 
         with pytest.raises(HttpResponseError):
             client.analyze_text("Test message")
+        # Terminal errors are not retried
+        assert mock_client_instance.analyze_text.call_count == 1
 
     @patch.dict(
         os.environ,
@@ -246,8 +259,8 @@ class TestContentSafetyClient:
         assert stats["average_latency_seconds"] == 0.0
 
         # Simulate some usage
-        client._request_count = 5
-        client._total_latency = 2.5
+        for _ in range(5):
+            client.latency_stats.record(0.5)
 
         stats = client.get_usage_stats()
         assert stats["total_requests"] == 5
@@ -256,6 +269,263 @@ class TestContentSafetyClient:
         assert stats["requests_per_second"] == 2.0
 
 
+class FakeAsyncSafetyService:
+    """Async stand-in for the aio SDK client that rate-limits selected texts once."""
+
+    def __init__(self, rate_limited=(), latency=0.01, retry_after="0.1"):
+        self.rate_limited = set(rate_limited)
+        self.latency = latency
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = []
+        self.closed = False
+
+    async def analyze_text(self, options):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if options.text in self.rate_limited:
+                self.rate_limited.discard(options.text)
+                raise HttpResponseError(
+                    message="Too Many Requests",
+                    response=Mock(status_code=429, headers={"Retry-After": self.retry_after}),
+                )
+            self.completed.append(options.text)
+            violence = Mock(severity=4 if "fight" in options.text else 0)
+            safe = Mock(severity=0)
+            return Mock(categories_analysis=[safe, violence, safe, safe])
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncContentSafetyClient:
+    """Test cases for AsyncContentSafetyClient."""
+
+    def make_client(self, service, max_concurrency=4):
+        """Build a client wired to a fake aio service."""
+        client = AsyncContentSafetyClient(
+            endpoint="https://test.com",
+            api_key="test-key",
+            retry_policy=RetryPolicy(budget=None),
+            max_concurrency=max_concurrency,
+        )
+        client._client = service
+        return client
+
+    def test_analyze_text_parses_response(self):
+        """Test results use the same format as the sync client."""
+        client = self.make_client(FakeAsyncSafetyService())
+
+        result = asyncio.run(client.analyze_text("a fight scene"))
+
+        assert result["severity_scores"]["violence"] == 4
+        assert result["max_severity"] == 4
+        assert client.get_usage_stats()["total_requests"] == 1
+
+    def test_empty_text_rejected(self):
+        """Test empty text raises ValueError."""
+        client = self.make_client(FakeAsyncSafetyService())
+
+        with pytest.raises(ValueError):
+            asyncio.run(client.analyze_text("  "))
+
+    def test_concurrency_is_bounded(self):
+        """Test the semaphore caps in-flight requests."""
+        service = FakeAsyncSafetyService()
+        client = self.make_client(service, max_concurrency=3)
+
+        results = asyncio.run(client.analyze_batch([f"text {i}" for i in range(12)]))
+
+        assert len(results) == 12
+        assert service.max_in_flight == 3
+        assert client.get_usage_stats()["max_in_flight"] == 3
+
+    def test_rate_limit_does_not_stall_other_requests(self):
+        """Test a 429 backoff releases its slot while other screenings continue."""
+        service = FakeAsyncSafetyService(rate_limited={"text 0"}, retry_after="0.2")
+        client = self.make_client(service, max_concurrency=2)
+        texts = [f"text {i}" for i in range(6)]
+
+        results = asyncio.run(client.analyze_batch(texts))
+
+        assert all(isinstance(result, dict) for result in results)
+        # The rate-limited request finished last; everything else ran during its wait
+        assert service.completed[-1] == "text 0"
+        assert client.get_usage_stats()["total_requests"] == 6
+
+    def test_terminal_errors_returned_per_text(self):
+        """Test a failed text yields its exception without cancelling the batch."""
+        service = FakeAsyncSafetyService()
+        client = self.make_client(service)
+
+        results = asyncio.run(client.analyze_batch(["ok", ""]))
+
+        assert isinstance(results[0], dict)
+        assert isinstance(results[1], ValueError)
+
+    def test_close(self):
+        """Test closing releases the shared client."""
+        service = FakeAsyncSafetyService()
+        client = self.make_client(service)
+
+        async def run():
+            async with client:
+                await client.analyze_text("hello")
+
+        asyncio.run(run())
+        assert service.closed
+        assert client._client is None
+
+
+class FakeSafetyService:
+    """Sync stand-in for the SDK client scoring "fight" as violence 4."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def analyze_text(self, options):
+        with self._lock:
+            self.calls.append(options.text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        violence = Mock(severity=4 if "fight" in options.text else 0)
+        safe = Mock(severity=0)
+        return Mock(categories_analysis=[safe, violence, safe, safe])
+
+
+LONG_TEXT = " ".join(f"Sentence number {i} is calm." for i in range(12))
+
+
+class TestChunkedAnalysis:
+    """Test cases for sentence-aligned chunked analysis of long texts."""
+
+    def test_split_text_on_sentence_boundaries(self):
+        """Test chunks fit the limit, end on sentences and keep every character."""
+        chunks = split_text(LONG_TEXT, max_chars=60)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 60 for chunk in chunks)
+        assert all(chunk.rstrip().endswith(".") for chunk in chunks)
+        assert "".join(chunks) == LONG_TEXT
+        assert split_text("short text.") == ["short text."]
+
+    def test_split_text_long_sentence(self):
+        """Test a sentence over the limit splits on whitespace, then hard."""
+        assert split_text("aaaa bbbb cccc", max_chars=10) == ["aaaa bbbb ", "cccc"]
+        assert split_text("x" * 25, max_chars=10) == ["x" * 10, "x" * 10, "x" * 5]
+        with pytest.raises(ValueError):
+            split_text("text", max_chars=0)
+
+    def make_client(self, service, **kwargs):
+        """Build a sync client wired to a fake service."""
+        client = ContentSafetyClient(
+            endpoint="https://test.com",
+            api_key="test-key",
+            retry_policy=RetryPolicy(budget=None),
+            max_text_chars=60,
+            **kwargs,
+        )
+        client._client = service
+        return client
+
+    def test_long_text_chunks_screened_concurrently(self):
+        """Test long text is chunked, screened in parallel and merged by max."""
+        service = FakeSafetyService(latency=0.2)
+        client = self.make_client(service)
+        text = LONG_TEXT + " Then a fight broke out."
+
+        start = time.time()
+        result = client.analyze_text(text)
+        elapsed = time.time() - start
+
+        assert len(service.calls) == len(split_text(text, 60)) == result["chunks"]
+        assert result["chunks_analyzed"] == result["chunks"]
+        assert result["severity_scores"]["violence"] == 4
+        assert result["max_severity"] == 4
+        assert result["text_length"] == len(text)
+        assert not result["short_circuited"]
+        assert elapsed < 0.2 * result["chunks"] / 2
+
+    def test_short_circuit_on_blocking_chunk(self):
+        """Test remaining chunks are skipped once one exceeds the block threshold."""
+        service = FakeSafetyService()
+        client = self.make_client(service, block_threshold=2, max_concurrency=1)
+
+        result = client.analyze_text("A fight started. " + LONG_TEXT)
+
+        assert len(service.calls) == 1
+        assert result["short_circuited"]
+        assert result["chunks_analyzed"] == 1
+        assert result["max_severity"] == 4
+
+    def test_concurrency_shared_across_callers(self):
+        """Test long texts screened from many threads share one in-flight bound."""
+        service = FakeSafetyService(latency=0.02)
+        client = self.make_client(service, max_concurrency=3)
+        texts = [LONG_TEXT, LONG_TEXT + " More.", "A calm sentence.", LONG_TEXT]
+
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            results = list(executor.map(client.analyze_text, texts))
+        client.close()
+
+        assert service.max_in_flight == 3
+        assert sum(result.get("chunks", 1) for result in results) == len(service.calls)
+
+    def test_short_text_single_request(self):
+        """Test texts within the limit are sent as one request."""
+        service = FakeSafetyService(latency=0)
+        client = self.make_client(service)
+
+        result = client.analyze_text("A calm sentence.")
+
+        assert service.calls == ["A calm sentence."]
+        assert "chunks" not in result
+
+    def test_async_long_text_short_circuits(self):
+        """Test the async client cancels outstanding chunks after a block."""
+        service = FakeAsyncSafetyService()
+        client = AsyncContentSafetyClient(
+            endpoint="https://test.com",
+            api_key="test-key",
+            retry_policy=RetryPolicy(budget=None),
+            max_concurrency=1,
+            block_threshold=2,
+            max_text_chars=60,
+        )
+        client._client = service
+
+        result = asyncio.run(client.analyze_text("A fight started. " + LONG_TEXT))
+
+        assert result["short_circuited"]
+        assert len(service.completed) == 1
+
+    def test_async_long_text_chunks_in_parallel(self):
+        """Test async chunks run concurrently and merge into one result."""
+        service = FakeAsyncSafetyService()
+        client = AsyncContentSafetyClient(
+            endpoint="https://test.com", api_key="test-key", max_text_chars=60
+        )
+        client._client = service
+
+        result = asyncio.run(client.analyze_text(LONG_TEXT))
+
+        assert service.max_in_flight == result["chunks"] > 1
+        assert result["max_severity"] == 0
+        assert not result["short_circuited"]
+
+
 class TestConvenienceFunctions:
     """Test cases for convenience functions."""
 
@@ -620,6 +890,76 @@ class TestSafetyAgent:
         assert stats["blocked_by_category"]["violence"] == 1
         assert stats["threshold_used"] == 4
 
+    def test_check_safety_batch(self):
+        """Test batch screening preserves order and caps concurrency."""
+        import threading
+        import time
+
+        in_flight = {"current": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def analyze_text(text):
+            with lock:
+                in_flight["current"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+            time.sleep(0.01)
+            with lock:
+                in_flight["current"] -= 1
+            severity = 6 if "unsafe" in text else 0
+            return {
+                "severity_scores": {"hate": severity, "violence": 0, "self_harm": 0, "sexual": 0},
+                "max_severity": severity,
+            }
+
+        self.mock_safety_client.analyze_text.side_effect = analyze_text
+        agent = SafetyAgent(
+            safety_client=self.mock_safety_client,
+            config_path=self.temp_config.name,
+            audit_log_path=self.temp_audit_log.name,
+        )
+        variants = [
+            {"variant_id": f"V{i}", "body": "unsafe text" if i % 5 == 0 else "safe text"}
+            for i in range(20)
+        ]
+
+        results = agent.check_safety_batch(variants, max_concurrency=3)
+
+        assert [r["variant_id"] for r in results] == [v["variant_id"] for v in variants]
+        assert [r["status"] for r in results].count("block") == 4
+        assert in_flight["peak"] <= 3
+        assert agent.total_checks == 20
+        assert agent.blocked_by_category["hate"] == 4
+
+        # One audit entry per variant
+        agent.flush_audit_log()
+        with open(self.temp_audit_log.name, "r") as f:
+            rows = list(csv.DictReader(f))
+        assert sorted(row["variant_id"] for row in rows) == sorted(
+            v["variant_id"] for v in variants
+        )
+
+    def test_check_safety_batch_fails_closed(self):
+        """Test API errors and invalid variants are blocked and audited in a batch."""
+        self.mock_safety_client.analyze_text.side_effect = Exception("API Error")
+        agent = SafetyAgent(
+            safety_client=self.mock_safety_client,
+            config_path=self.temp_config.name,
+            audit_log_path=self.temp_audit_log.name,
+        )
+        variants = [{"variant_id": "V1", "body": "Test message"}, {"variant_id": "V2", "body": ""}]
+
+        results = agent.check_safety_batch(variants)
+
+        assert [r["status"] for r in results] == ["block", "block"]
+        assert results[0]["blocked_categories"] == ["api_error"]
+        assert results[1]["blocked_categories"] == ["invalid_input"]
+        assert agent.total_blocked == 2
+
+        agent.flush_audit_log()
+        with open(self.temp_audit_log.name, "r") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["variant_id"] for row in rows] == ["V1", "V2"]
+
 
 class TestSafetyAgentConvenienceFunctions:
     """Test cases for SafetyAgent convenience functions."""
@@ -0,0 +1,212 @@
+"""
+Unit tests for the safety verdict cache.
+
+Tests text normalization, LRU and SQLite tiers, policy-version invalidation
+and cached verdicts in SafetyAgent audit logging.
+"""
+
+import csv
+import os
+import tempfile
+import pytest
+import yaml
+from unittest.mock import Mock
+
+from src.agents.safety_agent import AUDIT_HEADERS, SafetyAgent
+from src.agents.safety_cache import (
+    SafetyVerdictCache,
+    normalize_text,
+    policy_version,
+    text_hash,
+)
+
+SAFE_ANALYSIS = {
+    "severity_scores": {"hate": 0, "violence": 2, "self_harm": 0, "sexual": 0},
+    "max_severity": 2,
+    "status": "pass",
+    "analyzed_at": "2025-11-23T00:00:00",
+}
+
+
+class TestSafetyVerdictCache:
+    """Test cases for SafetyVerdictCache."""
+
+    def test_normalization(self):
+        """Test whitespace differences map to the same key."""
+        assert normalize_text("  Hello \n\n world ") == "Hello world"
+        assert text_hash("Hello world") == text_hash("Hello   world\n")
+        assert text_hash("Hello world") != text_hash("hello world")
+
+    def test_memory_tier_and_lru_eviction(self):
+        """Test hits, misses and least-recently-used eviction."""
+        cache = SafetyVerdictCache(version="v1", max_memory_entries=2)
+        cache.put("a", SAFE_ANALYSIS)
+        cache.put("b", SAFE_ANALYSIS)
+        assert cache.get("a")["max_severity"] == 2
+        cache.put("c", SAFE_ANALYSIS)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        stats = cache.get_stats()
+        assert stats["memory_hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_only_severities_cached(self):
+        """Test per-call metadata is not cached."""
+        cache = SafetyVerdictCache(version="v1")
+        cache.put("text", SAFE_ANALYSIS)
+
+        assert set(cache.get("text")) == {"severity_scores", "max_severity"}
+
+    def test_sqlite_tier_persists_and_invalidates(self):
+        """Test verdicts survive reopening and are purged for a new policy version."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "cache", "verdicts.db")
+            cache = SafetyVerdictCache(version="v1", db_path=db_path)
+            cache.put("text", SAFE_ANALYSIS)
+            cache.close()
+
+            reopened = SafetyVerdictCache(version="v1", db_path=db_path)
+            assert reopened.get("text")["severity_scores"]["violence"] == 2
+            assert reopened.get_stats()["disk_hits"] == 1
+            reopened.close()
+
+            changed = SafetyVerdictCache(version="v2", db_path=db_path)
+            assert changed.get("text") is None
+            assert changed.get_stats()["disk_entries"] == 0
+            changed.close()
+
+    def test_policy_version_tracks_config(self):
+        """Test the policy version changes with the config file and threshold."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+            f.write("safety_policy:\n  threshold: 4\n")
+        try:
+            original = policy_version(f.name, 4)
+            assert policy_version(f.name, 2) != original
+
+            with open(f.name, "a") as config:
+                config.write("  batch_concurrency: 4\n")
+            assert policy_version(f.name, 4) != original
+        finally:
+            os.unlink(f.name)
+
+    def test_invalid_size(self):
+        """Test non-positive LRU sizes are rejected."""
+        with pytest.raises(ValueError):
+            SafetyVerdictCache(version="v1", max_memory_entries=0)
+
+
+class TestSafetyAgentCaching:
+    """Test cases for cached verdicts in SafetyAgent."""
+
+    def setup_method(self):
+        """Set up config, audit log and cache paths."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmp.name, "safety.yaml")
+        self.audit_log_path = os.path.join(self.tmp.name, "audit.log")
+        self.db_path = os.path.join(self.tmp.name, "verdicts.db")
+        self.write_config(threshold=4)
+
+        self.client = Mock()
+        self.client.analyze_text.return_value = dict(SAFE_ANALYSIS)
+        self.agents = []
+
+    def teardown_method(self):
+        """Close agents and clean up temporary files."""
+        for agent in self.agents:
+            agent.close()
+        self.tmp.cleanup()
+
+    def write_config(self, threshold):
+        """Write a safety config with the verdict cache enabled."""
+        config = {
+            "safety_policy": {
+                "threshold": threshold,
+                "verdict_cache": {"enabled": True, "db_path": self.db_path},
+            }
+        }
+        with open(self.config_path, "w") as f:
+            yaml.dump(config, f)
+
+    def make_agent(self):
+        """Build an agent from the current config."""
+        agent = SafetyAgent(
+            safety_client=self.client,
+            config_path=self.config_path,
+            audit_log_path=self.audit_log_path,
+        )
+        self.agents.append(agent)
+        return agent
+
+    def read_audit(self):
+        """Read audit log rows."""
+        with open(self.audit_log_path, "r") as f:
+            return list(csv.DictReader(f))
+
+    def test_repeated_body_uses_cache_and_is_audited(self):
+        """Test identical bodies are analyzed once and every check is audited."""
+        agent = self.make_agent()
+        variants = [
+            {"variant_id": f"V{i}", "customer_id": f"C{i}", "body": "Same message body."}
+            for i in range(3)
+        ]
+
+        results = [agent.check_safety(variant) for variant in variants]
+
+        assert self.client.analyze_text.call_count == 1
+        assert [r["cache_hit"] for r in results] == [False, True, True]
+        assert all(r["status"] == "pass" for r in results)
+        agent.flush_audit_log()
+        rows = self.read_audit()
+        assert [row["variant_id"] for row in rows] == ["V0", "V1", "V2"]
+        assert [row["cache_hit"] for row in rows] == ["False", "True", "True"]
+        assert agent.generate_audit_report()["cache_hits"] == 2
+
+    def test_cache_persists_across_agents(self):
+        """Test a new agent reuses verdicts from the SQLite tier."""
+        self.make_agent().check_safety({"variant_id": "V1", "body": "Same message body."})
+
+        result = self.make_agent().check_safety({"variant_id": "V2", "body": "Same message body."})
+
+        assert result["cache_hit"] is True
+        assert self.client.analyze_text.call_count == 1
+
+    def test_config_change_invalidates(self):
+        """Test editing the safety config forces re-analysis."""
+        self.make_agent().check_safety({"variant_id": "V1", "body": "Same message body."})
+        self.write_config(threshold=2)
+
+        result = self.make_agent().check_safety({"variant_id": "V2", "body": "Same message body."})
+
+        assert result["cache_hit"] is False
+        assert self.client.analyze_text.call_count == 2
+
+    def test_errors_are_not_cached(self):
+        """Test fail-closed blocks are not cached."""
+        self.client.analyze_text.side_effect = [Exception("API Error"), dict(SAFE_ANALYSIS)]
+        agent = self.make_agent()
+
+        first = agent.check_safety({"variant_id": "V1", "body": "Same message body."})
+        second = agent.check_safety({"variant_id": "V2", "body": "Same message body."})
+
+        assert first["status"] == "block"
+        assert second["status"] == "pass"
+        assert second["cache_hit"] is False
+
+    def test_legacy_audit_log_gets_cache_column(self):
+        """Test an audit log without cache_hit is upgraded in place."""
+        with open(self.audit_log_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(AUDIT_HEADERS[:13])
+            writer.writerow(
+                ["2025-11-23T00:00:00", "OLD", "", "", "pass"] + ["0"] * 5 + ["4", "", ""]
+            )
+
+        agent = self.make_agent()
+        agent.check_safety({"variant_id": "NEW", "body": "Same message body."})
+        agent.flush_audit_log()
+
+        rows = self.read_audit()
+        assert [row["variant_id"] for row in rows] == ["OLD", "NEW"]
+        assert rows[0]["cache_hit"] == ""
+        assert rows[1]["cache_hit"] == "False"
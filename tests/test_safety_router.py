@@ -0,0 +1,214 @@
+"""
+Unit tests for tiered safety screening.
+
+Tests shingle hashing, routing margins, learning from Azure verdicts,
+statistics and SafetyAgent integration with audited routes.
+"""
+
+import csv
+import os
+import tempfile
+import pytest
+import yaml
+from unittest.mock import Mock
+
+from src.agents.safety_agent import SafetyAgent
+from src.agents.safety_router import (
+    ROUTE_LEXICON_MATCH,
+    ROUTE_LOCAL_PASS,
+    ROUTE_NOVEL_TEXT,
+    SafetyRouter,
+    router_from_config,
+    shingle_hashes,
+)
+
+TEMPLATE = (
+    "Hi {name}, your new rewards plan is ready with {points} points. Members like you save "
+    "more every month with flexible options, clear pricing and friendly support whenever "
+    "you need it. Explore the latest offers in the app and choose the perks that suit your "
+    "routine best. Thank you for being part of our community, and enjoy early access to "
+    "seasonal events this year."
+)
+SAFE_ANALYSIS = {
+    "severity_scores": {"hate": 0, "violence": 0, "self_harm": 0, "sexual": 0},
+    "max_severity": 0,
+}
+
+
+class TestSafetyRouter:
+    """Test cases for SafetyRouter."""
+
+    def test_shingle_hashes(self):
+        """Test shingles ignore case and punctuation, and short texts hash whole."""
+        assert shingle_hashes("Save more, today!") == shingle_hashes("save MORE today")
+        assert len(shingle_hashes("one two three four five")) == 3
+        assert len(shingle_hashes("hello")) == 1
+
+    def test_unseen_text_escalates(self):
+        """Test nothing passes locally before Azure has verified similar copy."""
+        router = SafetyRouter()
+
+        decision = router.route(TEMPLATE.format(name="Ana", points=120))
+
+        assert decision["route"] == ROUTE_NOVEL_TEXT
+        assert decision["known_fraction"] == 0
+
+    def test_verified_template_passes_locally(self):
+        """Test verified copy with new numeric details passes after one Azure verification."""
+        router = SafetyRouter()
+        router.record_escalation(TEMPLATE.format(name="Ana", points=120), SAFE_ANALYSIS, 0.2)
+
+        decision = router.route(TEMPLATE.format(name="Ana", points=4500))
+
+        assert decision["route"] == ROUTE_LOCAL_PASS
+        assert decision["novel_shingles"] <= 3
+        assert decision["novel_words"] == 0
+        assert decision["analysis"]["max_severity"] == 0
+
+    def test_unverified_words_escalate(self):
+        """Test any word outside the verified vocabulary escalates, such as a new name."""
+        router = SafetyRouter()
+        router.record_escalation(TEMPLATE.format(name="Ana", points=120), SAFE_ANALYSIS, 0.2)
+
+        decision = router.route(TEMPLATE.format(name="Bruno", points=120))
+
+        assert decision["route"] == ROUTE_NOVEL_TEXT
+        assert decision["novel_words"] == 1
+
+    def test_inserted_unknown_words_escalate(self):
+        """Test a threat in words the lexicon does not know is not screened locally."""
+        router = SafetyRouter()
+        router.record_escalation(TEMPLATE.format(name="Ana", points=120), SAFE_ANALYSIS, 0.2)
+        text = TEMPLATE.format(name="Ana", points=120).replace(
+            "Members like you", "We know your street. Members like you"
+        )
+
+        decision = router.route(text)
+
+        assert decision["analysis"]["max_severity"] == 0
+        # Within both shingle margins, so only the vocabulary check escalates it
+        assert decision["novel_shingles"] <= router.max_novel_shingles
+        assert decision["known_fraction"] >= router.min_known_fraction
+        assert decision["route"] == ROUTE_NOVEL_TEXT
+        assert decision["novel_words"] == 3
+
+    def test_lexicon_match_escalates(self):
+        """Test lexicon hits escalate even for otherwise verified copy."""
+        router = SafetyRouter()
+        text = TEMPLATE.format(name="Ana", points=120)
+        router.record_escalation(text, SAFE_ANALYSIS, latency=0.2)
+
+        decision = router.route(text + " Or we will kill you.")
+
+        assert decision["route"] == ROUTE_LEXICON_MATCH
+
+    def test_margins_fail_closed(self):
+        """Test tight margins escalate copy with too many novel shingles."""
+        router = SafetyRouter(max_novel_shingles=0)
+        router.record_escalation(TEMPLATE.format(name="Ana", points=120), SAFE_ANALYSIS, 0.2)
+
+        assert router.route(TEMPLATE.format(name="Ana", points=450))["route"] == ROUTE_NOVEL_TEXT
+        assert router.route(TEMPLATE.format(name="Ana", points=120))["route"] == ROUTE_LOCAL_PASS
+
+    def test_unsafe_verdicts_not_learned(self):
+        """Test only text Azure scored 0 everywhere teaches the router."""
+        router = SafetyRouter()
+        flagged = {"severity_scores": {"hate": 0, "violence": 2}, "max_severity": 2}
+        text = TEMPLATE.format(name="Ana", points=120)
+        router.record_escalation(text, flagged, latency=0.2)
+
+        assert router.route(text)["route"] == ROUTE_NOVEL_TEXT
+        assert router.get_stats()["learned_texts"] == 0
+
+    def test_stats_report_escalation_rate_and_savings(self):
+        """Test escalation rate and estimated latency savings."""
+        router = SafetyRouter()
+        first = TEMPLATE.format(name="Ana", points=120)
+        router.route(first)
+        router.record_escalation(first, SAFE_ANALYSIS, latency=0.5)
+        for points in [250, 380, 4100]:
+            router.route(TEMPLATE.format(name="Ana", points=points))
+
+        stats = router.get_stats()
+
+        assert stats["routed"] == 4
+        assert stats[ROUTE_LOCAL_PASS] == 3
+        assert stats["escalation_rate"] == 0.25
+        assert stats["avg_azure_latency_seconds"] == 0.5
+        assert 1.4 < stats["estimated_latency_saved_seconds"] <= 1.5
+
+    def test_invalid_margins(self):
+        """Test out-of-range margins are rejected."""
+        with pytest.raises(ValueError):
+            SafetyRouter(min_known_fraction=0)
+        with pytest.raises(ValueError):
+            SafetyRouter(max_novel_shingles=-1)
+
+    def test_router_from_config(self):
+        """Test the router is only built when enabled."""
+        assert router_from_config({"safety_policy": {}}) is None
+        router = router_from_config(
+            {"safety_policy": {"tiered_screening": {"enabled": True, "max_novel_shingles": 2}}}
+        )
+        assert router.max_novel_shingles == 2
+
+
+class TestSafetyAgentTieredScreening:
+    """Test cases for tiered screening in SafetyAgent."""
+
+    def setup_method(self):
+        """Set up an agent with tiered screening enabled."""
+        self.tmp = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self.tmp.name, "safety.yaml")
+        self.audit_log_path = os.path.join(self.tmp.name, "audit.log")
+        with open(config_path, "w") as f:
+            yaml.dump({"safety_policy": {"threshold": 4, "tiered_screening": {"enabled": True}}}, f)
+
+        self.client = Mock()
+        self.client.analyze_text.return_value = dict(SAFE_ANALYSIS)
+        self.agent = SafetyAgent(
+            safety_client=self.client, config_path=config_path, audit_log_path=self.audit_log_path
+        )
+
+    def teardown_method(self):
+        """Close the agent and clean up temporary files."""
+        self.agent.close()
+        self.tmp.cleanup()
+
+    def test_templated_copy_skips_azure_and_is_audited(self):
+        """Test routes are returned, audited and counted in statistics."""
+        results = [
+            self.agent.check_safety(
+                {"variant_id": f"V{i}", "body": TEMPLATE.format(name="Ana", points=points)}
+            )
+            for i, points in enumerate([120, 250, 380])
+        ]
+
+        assert self.client.analyze_text.call_count == 1
+        assert [r["screening_route"] for r in results] == [
+            ROUTE_NOVEL_TEXT,
+            ROUTE_LOCAL_PASS,
+            ROUTE_LOCAL_PASS,
+        ]
+        assert all(r["status"] == "pass" for r in results)
+
+        self.agent.flush_audit_log()
+        with open(self.audit_log_path, "r") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["screening_route"] for row in rows] == [r["screening_route"] for r in results]
+
+        stats = self.agent.get_statistics()["tiered_screening"]
+        assert stats["escalation_rate"] == round(1 / 3, 4)
+
+    def test_flagged_text_goes_to_azure(self):
+        """Test lexicon matches are decided by the Azure verdict."""
+        self.client.analyze_text.return_value = {
+            "severity_scores": {"hate": 0, "violence": 6, "self_harm": 0, "sexual": 0},
+            "max_severity": 6,
+        }
+
+        result = self.agent.check_safety({"variant_id": "V1", "body": "We will kill you."})
+
+        assert result["screening_route"] == ROUTE_LEXICON_MATCH
+        assert result["status"] == "block"
+        assert self.client.analyze_text.call_count == 1
@@ -0,0 +1,111 @@
+"""
+Unit tests for the usage ledger.
+
+Tests thread-safe accounting, label breakdowns, rolling windows, latency
+percentiles and snapshot export.
+"""
+
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.integrations.usage_ledger import LatencyHistogram, UsageLedger
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram."""
+
+    def test_percentiles_within_bucket_precision(self):
+        """Test percentile estimates stay within the bucket growth factor."""
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms)
+
+        assert histogram.percentile(50) == pytest.approx(500, rel=0.05)
+        assert histogram.percentile(95) == pytest.approx(950, rel=0.05)
+        assert histogram.percentile(99) == pytest.approx(990, rel=0.05)
+        assert histogram.summary()["max_ms"] == 1000
+
+    def test_empty_histogram(self):
+        """Test an empty histogram reports zero latency."""
+        assert LatencyHistogram().percentile(99) == 0.0
+
+
+class TestUsageLedger:
+    """Test cases for UsageLedger."""
+
+    def test_breakdowns(self):
+        """Test usage is broken down per deployment, segment and tone."""
+        ledger = UsageLedger(clock=FakeClock())
+        ledger.record(
+            "gpt-4o-mini", 100, 50, cost_usd=0.01, labels={"segment": "A", "tone": "urgent"}
+        )
+        ledger.record(
+            "gpt-4o-mini", 100, 50, cost_usd=0.01, labels={"segment": "B", "tone": "urgent"}
+        )
+        ledger.record_failure("gpt-4o", labels={"segment": "A"})
+
+        snapshot = ledger.snapshot()
+
+        assert snapshot["totals"]["requests"] == 3
+        assert snapshot["totals"]["failures"] == 1
+        assert snapshot["by_deployment"]["gpt-4o-mini"]["output_tokens"] == 100
+        assert snapshot["by_deployment"]["gpt-4o"]["failures"] == 1
+        assert snapshot["by_segment"]["A"]["requests"] == 2
+        assert snapshot["by_tone"]["urgent"]["cost_usd"] == pytest.approx(0.02)
+
+    def test_rolling_windows(self):
+        """Test records age out of the one-minute and five-minute windows."""
+        clock = FakeClock()
+        ledger = UsageLedger(clock=clock)
+        ledger.record("m", 60, 0)
+        clock.now += 120
+        ledger.record("m", 30, 0)
+
+        windows = ledger.snapshot()["windows"]
+        assert windows["1m"]["requests"] == 1
+        assert windows["1m"]["tokens_per_minute"] == 30
+        assert windows["5m"]["requests"] == 2
+
+        clock.now += 300
+        assert ledger.rolling_window(300)["requests"] == 0
+
+    def test_concurrent_records_are_not_lost(self):
+        """Test concurrent updates from many threads are all counted."""
+        ledger = UsageLedger()
+
+        def worker(_):
+            for _ in range(500):
+                ledger.record("m", 2, 1, cost_usd=0.001, duration_ms=10, labels={"tone": "urgent"})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(worker, range(8)))
+
+        snapshot = ledger.snapshot()
+        assert snapshot["totals"]["requests"] == 4000
+        assert snapshot["totals"]["input_tokens"] == 8000
+        assert snapshot["by_tone"]["urgent"]["requests"] == 4000
+        assert snapshot["latency"]["count"] == 4000
+
+    def test_export_snapshot(self, tmp_path):
+        """Test snapshots are appended as JSON lines."""
+        ledger = UsageLedger(clock=FakeClock())
+        ledger.record("m", 10, 5, duration_ms=250)
+        path = tmp_path / "usage" / "snapshots.jsonl"
+
+        ledger.export_snapshot(str(path))
+        ledger.export_snapshot(str(path))
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["latency"]["p50_ms"] == pytest.approx(250, rel=0.05)
@@ -0,0 +1,149 @@
+"""
+Unit tests for vectorized variant validation.
+
+Tests metrics, the violation table and parity with
+MessageGenerator.validate_variant_format.
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from unittest.mock import Mock
+
+from src.agents.generation_agent import MessageGenerator
+from src.agents.variant_validator import (
+    VIOLATION_COLUMNS,
+    compute_variant_metrics,
+    find_violations,
+    summarize_validation,
+    validate_variants_batch,
+)
+
+
+def make_body(words: int, citation: bool = True) -> str:
+    """Build a body with the given word count (citation included)."""
+    if citation:
+        return " ".join(["word"] * (words - 3)) + " [Source: Guide, Intro]"
+    return " ".join(["word"] * words)
+
+
+@pytest.fixture
+def variants():
+    """Variants covering valid and invalid cases."""
+    return [
+        {"variant_id": "V1", "subject": "Great offer", "body": make_body(200), "citations": [{}]},
+        {"variant_id": "V2", "subject": "x" * 70, "body": make_body(100), "citations": [{}]},
+        {"variant_id": "V3", "subject": "  ", "body": make_body(300, citation=False)},
+        {"variant_id": "V4", "subject": "Hello", "body": "", "citations": []},
+    ]
+
+
+class TestComputeVariantMetrics:
+    """Test cases for compute_variant_metrics."""
+
+    def test_metrics(self, variants):
+        """Test lengths, word counts and citation counts."""
+        metrics = compute_variant_metrics(variants)
+
+        assert list(metrics["word_count"]) == [200, 100, 300, 0]
+        assert list(metrics["subject_length"]) == [11, 70, 2, 5]
+        assert list(metrics["citation_count"]) == [1, 1, 0, 0]
+        assert list(metrics["valid"]) == [True, False, False, False]
+
+    def test_word_count_matches_split(self):
+        """Test word counts match str.split() across string boundaries."""
+        bodies = ["a b", "c", "", "  d  e ", "\tf\ng", "h", "ij k"]
+        metrics = compute_variant_metrics(
+            pd.DataFrame({"subject": ["s"] * len(bodies), "body": bodies})
+        )
+
+        assert list(metrics["word_count"]) == [len(body.split()) for body in bodies]
+
+    def test_unicode_whitespace_matches_split(self):
+        """Test Unicode whitespace separates words and blank bodies count as empty."""
+        bodies = ["\xa0 \n", "a\xa0b", "café\u2003crème", "x", "\u3000", "ü\x0bv", "a b"]
+        metrics = compute_variant_metrics(
+            pd.DataFrame({"subject": ["s"] * len(bodies), "body": bodies})
+        )
+
+        assert list(metrics["word_count"]) == [len(body.split()) for body in bodies]
+        assert list(metrics["body_empty"]) == [not body.strip() for body in bodies]
+
+    def test_citations_counted_from_body(self):
+        """Test citation markers are counted when no citation column is given."""
+        df = pd.DataFrame({"subject": ["s"], "body": ["Text [Source: A, B] more [Source: C, D]"]})
+
+        assert compute_variant_metrics(df)["citation_count"].iloc[0] == 2
+
+    def test_missing_column(self):
+        """Test inputs without a body column are rejected."""
+        with pytest.raises(ValueError):
+            compute_variant_metrics(pd.DataFrame({"subject": ["s"]}))
+
+
+class TestValidateVariantsBatch:
+    """Test cases for validate_variants_batch."""
+
+    def test_violation_table(self, variants):
+        """Test one row per violated rule with values and limits."""
+        violations = validate_variants_batch(pd.DataFrame(variants))
+
+        assert list(violations.columns) == VIOLATION_COLUMNS
+        assert "V1" not in set(violations["variant_id"])
+        v2 = violations[violations["variant_id"] == "V2"].set_index("rule")
+        assert set(v2.index) == {"subject_too_long", "body_too_short"}
+        assert v2.loc["subject_too_long", "value"] == 70
+        assert v2.loc["subject_too_long", "limit"] == 60
+
+    def test_matches_scalar_validation(self, variants):
+        """Test messages match validate_variant_format in the same order."""
+        generator = MessageGenerator(openai_client=Mock())
+        violations = validate_variants_batch(variants)
+
+        for variant in variants:
+            expected = generator.validate_variant_format(variant)["errors"]
+            actual = violations[violations["variant_id"] == variant["variant_id"]]
+            assert list(actual["message"]) == expected
+
+    def test_unicode_blank_matches_scalar_validation(self):
+        """Test bodies and subjects of Unicode whitespace report the same errors."""
+        generator = MessageGenerator(openai_client=Mock())
+        variants = [
+            {"variant_id": "V1", "subject": "Hi", "body": "\xa0 \n", "citations": []},
+            {"variant_id": "V2", "subject": "\u2003", "body": "\u3000", "citations": []},
+        ]
+        violations = validate_variants_batch(variants)
+
+        for variant in variants:
+            expected = generator.validate_variant_format(variant)["errors"]
+            actual = violations[violations["variant_id"] == variant["variant_id"]]
+            assert list(actual["message"]) == expected
+        assert "Body cannot be empty" in list(violations["message"])
+
+    def test_arrow_table_input(self, variants):
+        """Test Arrow tables are accepted."""
+        table = pa.Table.from_pylist(
+            [{k: v for k, v in variant.items() if k != "citations"} for variant in variants]
+        )
+
+        violations = validate_variants_batch(table)
+
+        assert set(violations["variant_id"]) == {"V2", "V3", "V4"}
+
+    def test_all_valid(self, variants):
+        """Test an empty violation table when every variant is valid."""
+        violations = validate_variants_batch(variants[:1])
+
+        assert violations.empty
+        assert list(violations.columns) == VIOLATION_COLUMNS
+
+    def test_summary(self, variants):
+        """Test campaign summary counts."""
+        summary = summarize_validation(compute_variant_metrics(variants))
+
+        assert summary["total_variants"] == 4
+        assert summary["pass_rate"] == 0.25
+        assert summary["violations_by_rule"]["body_too_short"] == 2
+        assert len(find_violations(compute_variant_metrics(variants))) == sum(
+            summary["violations_by_rule"].values()
+        )